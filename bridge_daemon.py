@@ -0,0 +1,318 @@
+"""
+Bridge Daemon - 无界面的 X-Plane → FSD 桥接
+
+只把 XPlaneTCPClient 和 FSDClient 接在一起，运行在 QCoreApplication 上，不加载
+QtWebEngine、各个页面和背景图，适合与 X-Plane 同机运行的低配电脑：
+- 读取与桌面客户端相同的 data/config.ini：
+  General/username、General/password（登录时勾选“记住我”后保存）
+  bridge/callsign、bridge/real_name、bridge/cid（可选，缺省时用账号密码登录接口获取）
+  命令行参数优先于配置文件
+- X-Plane 或 FSD 断开后每 RETRY_INTERVAL_MS 自动重连
+- 在 127.0.0.1:STATUS_PORT 提供只读状态（GET /status 返回 JSON）
+
+用法:
+    python bridge_daemon.py [--callsign CCA1234] [--real-name NAME] [--status-port 51080]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from PySide6.QtCore import QCoreApplication, QObject, QSettings, QTimer
+
+from xplane_tcp_client import XPlaneTCPClient
+from fsd_client import FSDClient, TransponderMode, position_from_xplane
+
+logger = logging.getLogger('ISFP-Connect.Bridge')
+
+ISFP_API_BASE = "https://isfpapi.flyisfp.com/api"
+FSD_SERVER = "fsd.flyisfp.com"
+FSD_PORT = 6809
+STATUS_PORT = 51080
+RETRY_INTERVAL_MS = 10000
+STATUS_INTERVAL_MS = 1000
+POSITION_INTERVAL_MS = 200
+
+
+def get_data_dir() -> str:
+    """与桌面客户端相同的 data 目录（打包后在可执行文件旁）"""
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, "data")
+
+
+def fetch_cid(username: str, password: str) -> str:
+    """用账号密码登录 ISFP 接口获取 CID（只在配置里没有 CID 时调用）"""
+    import requests
+    resp = requests.post(f"{ISFP_API_BASE}/users/sessions",
+                         json={"username": username, "password": password}, timeout=10)
+    data = resp.json()
+    if data.get("code") != "LOGIN_SUCCESS":
+        raise RuntimeError(f"登录失败: {data.get('message') or data.get('code')}")
+    return str(data.get("data", {}).get("user", {}).get("cid", ""))
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """GET /status 返回桥接状态快照"""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/status"):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.bridge.status_snapshot(), ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("status: " + format, *args)
+
+
+class BridgeDaemon(QObject):
+    """X-Plane 样本 → FSD 位置更新，断线自动重连"""
+
+    def __init__(self, callsign: str, cid: str, password: str, real_name: str,
+                 xplane_host: str = '127.0.0.1', xplane_port: int = 51001,
+                 fsd_server: str = FSD_SERVER, fsd_port: int = FSD_PORT, parent=None):
+        super().__init__(parent)
+        self.fsd_server = fsd_server
+        self.fsd_port = fsd_port
+        self.started_at = time.time()
+        self.samples = 0
+        self.last_sample_at = 0.0
+        self._latest_sample = None
+        self._stopping = False
+        self._xplane_connecting = False
+        self._status: Dict[str, Any] = {}
+        self._status_lock = threading.Lock()
+
+        self.xplane = XPlaneTCPClient(xplane_host, xplane_port, self)
+        self.xplane.connected.connect(self._on_xplane_connected)
+        self.xplane.disconnected.connect(self._on_xplane_disconnected)
+        # 每个样本在 X-Plane 接收线程中直接交给 FSD 位置路径（带接收时刻）
+        self.xplane.add_sample_listener(self._on_flight_data)
+        self.xplane.error_occurred.connect(lambda msg: logger.warning(f"X-Plane 错误: {msg}"))
+
+        self.fsd = FSDClient(self)
+        self.fsd.set_credentials(callsign, cid, password, real_name)
+        self.fsd.connected.connect(self._on_fsd_connected)
+        self.fsd.disconnected.connect(self._on_fsd_disconnected)
+        self.fsd.error.connect(lambda msg: logger.warning(
+            f"FSD 连接错误: {msg}，{RETRY_INTERVAL_MS // 1000} 秒内重试"))
+        self.fsd.server_error.connect(lambda kind, msg: logger.error(f"FSD 服务器错误 [{kind}]: {msg}"))
+        self.fsd.text_message_received.connect(
+            lambda sender, receiver, message: logger.info(f"[{sender}] {message}"))
+
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setInterval(RETRY_INTERVAL_MS)
+        self._retry_timer.timeout.connect(self._reconnect)
+        self._status_timer = QTimer(self)
+        self._status_timer.setInterval(STATUS_INTERVAL_MS)
+        self._status_timer.timeout.connect(self._update_status)
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        self._update_status()
+        self._status_timer.start()
+        self._retry_timer.start()
+        self._connect_xplane()
+
+    def stop(self):
+        self._stopping = True
+        self._retry_timer.stop()
+        self._status_timer.stop()
+        self.fsd.disconnect_from_server()
+        self.xplane.disconnect()
+
+    def _reconnect(self):
+        if not self.xplane.is_connected():
+            self._connect_xplane()
+        elif not self.fsd.is_connected:
+            self._connect_fsd()
+
+    # ---------- X-Plane ----------
+
+    def _connect_xplane(self):
+        """connect_to_xplane() 会阻塞重试，放到后台线程"""
+        if self._xplane_connecting:
+            return
+        self._xplane_connecting = True
+
+        def run():
+            try:
+                self.xplane.connect_to_xplane()
+            except Exception as e:
+                logger.error(f"连接 X-Plane 异常: {e}")
+            finally:
+                self._xplane_connecting = False
+
+        threading.Thread(target=run, name='XPlaneConnect', daemon=True).start()
+
+    def _on_xplane_connected(self):
+        logger.info("已连接到 X-Plane")
+        self._connect_fsd()
+
+    def _on_xplane_disconnected(self):
+        logger.info("与 X-Plane 断开连接")
+        if self.fsd.is_connected and not self._stopping:
+            # 模拟器不在了，不继续在网络上显示
+            self.fsd.disconnect_from_server()
+
+    def _on_flight_data(self, data: Dict[str, Any], received_at: float):
+        # 在接收线程中调用
+        self.samples += 1
+        self.last_sample_at = time.time()
+        self._latest_sample = (data, received_at)
+        if self.fsd.is_authenticated:
+            self._update_fsd_position(data, received_at)
+
+    def _update_fsd_position(self, data: Dict[str, Any], received_at: float):
+        self.fsd.update_position(position_from_xplane(data),
+                                 transponder_code=data.get('transponder', 1200),
+                                 transponder_mode=TransponderMode.ON,
+                                 timestamp=received_at)
+
+    # ---------- FSD ----------
+
+    def _connect_fsd(self):
+        if self.fsd.is_connected or not self.xplane.is_connected():
+            return
+        # X-Plane 11 = 15, X-Plane 12 = 16
+        self.fsd.session.sim_type = 15 if self.xplane.get_simulator_version() == 11 else 16
+        self.fsd.connect_to_server(self.fsd_server, self.fsd_port)
+
+    def _on_fsd_connected(self):
+        logger.info(f"已连接到 FSD 服务器，呼号: {self.fsd.callsign}")
+        self.fsd.start_position_updates(POSITION_INTERVAL_MS)
+        latest = self._latest_sample
+        if latest is not None:
+            self._update_fsd_position(*latest)
+
+    def _on_fsd_disconnected(self):
+        logger.info("与 FSD 服务器断开连接")
+        self.fsd.stop_position_updates()
+
+    # ---------- 状态 ----------
+
+    def _update_status(self):
+        """在 GUI 线程生成快照，状态线程只读取快照"""
+        session = self.fsd.session
+        scheduler = session.send_scheduler
+        status = {
+            'callsign': self.fsd.callsign,
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'xplane': {
+                'connected': self.xplane.is_connected(),
+                'frame_format': self.xplane.frame_format,
+                'frames_lost': self.xplane.frames_lost,
+                'samples': self.samples,
+                'last_sample_age_s': round(time.time() - self.last_sample_at, 1) if self.last_sample_at else None,
+            },
+            'fsd': {
+                'server': f"{self.fsd_server}:{self.fsd_port}",
+                'connected': self.fsd.is_connected,
+                'authenticated': self.fsd.is_authenticated,
+                'send_phase': scheduler.phase,
+                'positions_sent': scheduler.sent,
+                'positions_skipped': scheduler.skipped,
+                'positions_dropped': session.positions_dropped,
+                'write_buffer_bytes': session.write_buffer_size,
+                'traffic': len(self.fsd.traffic),
+            },
+        }
+        with self._status_lock:
+            self._status = status
+
+    def status_snapshot(self) -> Dict[str, Any]:
+        with self._status_lock:
+            return self._status
+
+
+def start_status_server(bridge: BridgeDaemon, port: int) -> Optional[ThreadingHTTPServer]:
+    """只监听本机回环地址"""
+    try:
+        server = ThreadingHTTPServer(('127.0.0.1', port), _StatusHandler)
+    except OSError as e:
+        logger.warning(f"状态端口 {port} 不可用: {e}")
+        return None
+    server.daemon_threads = True
+    server.bridge = bridge
+    threading.Thread(target=server.serve_forever, name='BridgeStatus', daemon=True).start()
+    logger.info(f"状态接口: http://127.0.0.1:{port}/status")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ISFP Connect 无界面 X-Plane → FSD 桥接')
+    parser.add_argument('--config', default=os.path.join(get_data_dir(), "config.ini"))
+    parser.add_argument('--callsign')
+    parser.add_argument('--real-name')
+    parser.add_argument('--cid')
+    parser.add_argument('--xplane-host', default='127.0.0.1')
+    parser.add_argument('--xplane-port', type=int, default=51001)
+    parser.add_argument('--fsd-server', default=FSD_SERVER)
+    parser.add_argument('--fsd-port', type=int, default=FSD_PORT)
+    parser.add_argument('--status-port', type=int, default=STATUS_PORT, help='0 表示不提供状态接口')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='[%(asctime)s] [%(levelname)-8s] [%(name)s] %(message)s')
+
+    settings = QSettings(args.config, QSettings.IniFormat)
+    username = settings.value("username", "")
+    password = settings.value("password", "")
+    callsign = args.callsign or settings.value("bridge/callsign", "")
+    real_name = args.real_name or settings.value("bridge/real_name", "")
+    cid = args.cid or settings.value("bridge/cid", "")
+    if not (callsign and real_name):
+        logger.error("缺少呼号或真实姓名：使用 --callsign / --real-name，或在 config.ini 的 [bridge] 中配置")
+        return 2
+    if not password:
+        logger.error("config.ini 中没有保存密码，请先在桌面客户端勾选“记住我”登录一次")
+        return 2
+    if not cid:
+        try:
+            cid = fetch_cid(username, password)
+        except Exception as e:
+            logger.error(f"获取 CID 失败: {e}")
+            return 2
+        settings.setValue("bridge/cid", cid)
+
+    app = QCoreApplication(sys.argv)
+    bridge = BridgeDaemon(callsign, cid, password, real_name,
+                          args.xplane_host, args.xplane_port, args.fsd_server, args.fsd_port)
+    status_server = start_status_server(bridge, args.status_port) if args.status_port else None
+
+    def shutdown(*_):
+        bridge.stop()
+        app.quit()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    # 让 Python 信号处理器在 Qt 事件循环中也能及时运行
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(250)
+
+    bridge.start()
+    code = app.exec()
+    if status_server is not None:
+        status_server.shutdown()
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
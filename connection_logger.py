@@ -1,16 +1,134 @@
 """
 连线日志模块 - 用于记录 XSwiftBus 和 FSD 连接的详细日志
+
+日志记录不在调用线程写文件：
+- 调用方只把 LogRecord 放入有界队列（QueueHandler），格式化和写入 RotatingFileHandler
+  都在后台 QueueListener 线程完成
+- log_* 函数使用 %-风格的延迟参数，级别未启用时直接返回，不做任何字符串拼接或 repr()
+- 队列积压超过 SAMPLE_THRESHOLD 时 DEBUG 记录按 1/SAMPLE_RATE 采样；队列满时丢弃
+  WARNING 以下的记录，丢弃数量最多每秒补记一条警告
+- 连线日志不再向根日志传播，避免在调用线程重复写 main.log 和控制台
 """
 
 import os
+import queue
+import atexit
 import logging
 import logging.handlers
+import threading
+import time
 from datetime import datetime
 from typing import Optional
 
 # 全局日志配置
 _connection_logger: Optional[logging.Logger] = None
 _logging_enabled = False
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# 后台写入队列容量
+QUEUE_SIZE = 10000
+# 积压超过容量的该比例后开始对 DEBUG 记录采样
+SAMPLE_THRESHOLD = 0.5
+SAMPLE_RATE = 10
+# 队列满时 WARNING 及以上记录的最长等待时间（秒）
+BLOCK_TIMEOUT = 0.05
+# 丢弃统计最多每隔多少秒补记一次
+DROP_REPORT_INTERVAL = 1.0
+# 单条消息显示的最大长度
+MAX_MESSAGE_CHARS = 200
+
+
+class _Clip:
+    """延迟截断：只有在后台线程真正格式化时才生成字符串"""
+    __slots__ = ('value', 'limit', 'use_repr')
+
+    def __init__(self, value, limit: int = MAX_MESSAGE_CHARS, use_repr: bool = False):
+        self.value = value
+        self.limit = limit
+        self.use_repr = use_repr
+
+    def __str__(self):
+        value = self.value[:self.limit] if len(self.value) > self.limit else self.value
+        text = repr(value) if self.use_repr else value
+        return text + "..." if len(self.value) > self.limit else text
+
+
+def clip(value, limit: int = MAX_MESSAGE_CHARS) -> _Clip:
+    """截断显示的延迟参数，例如 log_connection_event('FSD', '收到', '%s', clip(data))"""
+    return _Clip(value, limit)
+
+
+def clip_repr(value, limit: int = MAX_MESSAGE_CHARS) -> _Clip:
+    """截断后 repr() 显示的延迟参数"""
+    return _Clip(value, limit, use_repr=True)
+
+
+class _BackpressureQueueHandler(logging.handlers.QueueHandler):
+    """有界队列 + 采样 / 丢弃策略；不在调用线程格式化消息"""
+
+    def __init__(self, q: "queue.Queue"):
+        super().__init__(q)
+        self._drop_lock = threading.Lock()
+        self._sample_counter = 0
+        self.dropped = 0
+        self._dropped_since_report = 0
+        self._last_report = 0.0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 参数都是不可变值或 _Clip，保留 msg/args 由后台线程格式化；
+        # 异常回溯对象不能跨线程保留，先转成文本
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        q = self.queue
+        if record.levelno <= logging.DEBUG and q.qsize() >= q.maxsize * SAMPLE_THRESHOLD:
+            self._sample_counter += 1
+            if self._sample_counter % SAMPLE_RATE:
+                self._count_drop()
+                return
+        try:
+            if record.levelno >= logging.WARNING:
+                q.put(record, timeout=BLOCK_TIMEOUT)
+            else:
+                q.put_nowait(record)
+        except queue.Full:
+            self._count_drop()
+            return
+        self._report_drops()
+
+    def _count_drop(self):
+        with self._drop_lock:
+            self.dropped += 1
+            self._dropped_since_report += 1
+
+    def _report_drops(self):
+        if not self._dropped_since_report:
+            return
+        now = time.monotonic()
+        if now - self._last_report < DROP_REPORT_INTERVAL:
+            return
+        self._last_report = now
+        with self._drop_lock:
+            count, self._dropped_since_report = self._dropped_since_report, 0
+        notice = logging.LogRecord(self.name or 'ISFP-Connect.Connection', logging.WARNING, __file__, 0,
+                                   "连线日志负载过高，已丢弃 %d 条记录", (count,), None)
+        try:
+            self.queue.put_nowait(notice)
+        except queue.Full:
+            pass
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        # 停止前写完队列中剩余的记录
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 
 def setup_connection_logging(enabled: bool = True, max_bytes: int = 5*1024*1024, backup_count: int = 3,
@@ -33,7 +151,11 @@ def setup_connection_logging(enabled: bool = True, max_bytes: int = 5*1024*1024,
     logger = logging.getLogger('ISFP-Connect.Connection')
     logger.setLevel(logging.DEBUG if enabled else logging.WARNING)
     
+    # 连线日志只写 connect.log
+    logger.propagate = False
+    
     # 清除现有的处理器
+    _stop_listener()
     logger.handlers.clear()
     
     if not enabled:
@@ -68,7 +190,11 @@ def setup_connection_logging(enabled: bool = True, max_bytes: int = 5*1024*1024,
     )
     file_handler.setFormatter(formatter)
     
-    logger.addHandler(file_handler)
+    # 文件写入在后台线程完成，调用方只负责入队
+    global _listener
+    _listener = logging.handlers.QueueListener(queue.Queue(QUEUE_SIZE), file_handler, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(_BackpressureQueueHandler(_listener.queue))
     
     _connection_logger = logger
     _logging_enabled = True
@@ -106,6 +232,15 @@ def disable_connection_logging():
     logger.setLevel(logging.WARNING)
     # 清除处理器
     logger.handlers.clear()
+    _stop_listener()
+
+
+def shutdown_connection_logging():
+    """程序退出时写完队列中剩余的日志"""
+    _stop_listener()
+
+
+atexit.register(shutdown_connection_logging)
 
 
 def is_logging_enabled() -> bool:
@@ -113,21 +248,26 @@ def is_logging_enabled() -> bool:
     return _logging_enabled
 
 
+def _enabled_logger(level: int) -> Optional[logging.Logger]:
+    """日志已启用且该级别会被记录时返回记录器，否则返回 None"""
+    if not _logging_enabled:
+        return None
+    logger = get_connection_logger()
+    return logger if logger.isEnabledFor(level) else None
+
+
 def log_fsd_message(direction: str, message: str):
     """
     记录 FSD 消息
     
     Args:
         direction: 方向 ('SEND' 或 'RECV')
-        message: 消息内容
+        message: 消息内容（超过 MAX_MESSAGE_CHARS 的部分在写入时截断）
     """
-    if not _logging_enabled:
+    logger = _enabled_logger(logging.DEBUG)
+    if logger is None:
         return
-    
-    logger = get_connection_logger()
-    # 截断过长的消息
-    msg_display = message[:200] + "..." if len(message) > 200 else message
-    logger.debug(f"[FSD {direction}] {msg_display}")
+    logger.debug("[FSD %s] %s", direction, _Clip(message))
 
 
 def log_xswiftbus_message(direction: str, interface: str, method: str, args: str = ""):
@@ -140,30 +280,32 @@ def log_xswiftbus_message(direction: str, interface: str, method: str, args: str
         method: 方法名
         args: 参数
     """
-    if not _logging_enabled:
+    logger = _enabled_logger(logging.DEBUG)
+    if logger is None:
         return
-    
-    logger = get_connection_logger()
-    logger.debug(f"[XSwiftBus {direction}] {interface}.{method}({args})")
+    logger.debug("[XSwiftBus %s] %s.%s(%s)", direction, interface, method, args)
 
 
-def log_connection_event(connector_type: str, event: str, details: str = ""):
+def log_connection_event(connector_type: str, event: str, details: str = "", *args,
+                         level: int = logging.INFO):
     """
     记录连接事件
     
     Args:
         connector_type: 连接器类型 ('FSD' 或 'XSwiftBus')
         event: 事件名称
-        details: 详细信息
+        details: 详细信息；带 args 时作为 %-格式模板，在后台线程格式化
+        level: 日志级别，逐条消息的高频事件使用 DEBUG
     """
-    if not _logging_enabled:
+    logger = _enabled_logger(level)
+    if logger is None:
         return
-    
-    logger = get_connection_logger()
-    if details:
-        logger.info(f"[{connector_type}] {event}: {details}")
+    if args:
+        logger.log(level, "[%s] %s: " + details, connector_type, event, *args)
+    elif details:
+        logger.log(level, "[%s] %s: %s", connector_type, event, details)
     else:
-        logger.info(f"[{connector_type}] {event}")
+        logger.log(level, "[%s] %s", connector_type, event)
 
 
 def log_connection_error(connector_type: str, error: str, exception: Exception = None):
@@ -175,14 +317,13 @@ def log_connection_error(connector_type: str, error: str, exception: Exception =
         error: 错误信息
         exception: 异常对象
     """
-    if not _logging_enabled:
+    logger = _enabled_logger(logging.ERROR)
+    if logger is None:
         return
-    
-    logger = get_connection_logger()
     if exception:
-        logger.error(f"[{connector_type}] {error}", exc_info=exception)
+        logger.error("[%s] %s", connector_type, error, exc_info=exception)
     else:
-        logger.error(f"[{connector_type}] {error}")
+        logger.error("[%s] %s", connector_type, error)
 
 
 class ConnectionLogMixin:
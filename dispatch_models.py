@@ -0,0 +1,231 @@
+"""
+Dispatch Models - 签派页机库 / 航班历史的 model/view 实现
+
+替代每次刷新都清空重建的 QListWidget：
+- 航班历史按页从 DispatchManager 懒加载（canFetchMore / fetchMore），滚动到底部才读下一页
+- 增删改都是单行的 beginInsertRows / beginRemoveRows / dataChanged，不再整表重建
+- 机库图标按图片 URL 缓存在模型中，没有图片的航空器由委托统一使用同一张占位图
+- 委托只测量一次行尺寸，配合 setUniformItemSizes 滚动时不再逐行排版
+"""
+
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+from PySide6.QtGui import QColor, QFont, QIcon, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem
+
+from image_cache import HANGAR_THUMB_SIZE
+
+# 每次从数据库读取的航班条数
+HISTORY_PAGE_SIZE = 100
+
+# 航班状态颜色
+STATUS_COLORS = {
+    '计划': '#95a5a6',
+    '推出': '#e67e22',
+    '起飞': '#f39c12',
+    '巡航': '#3498db',
+    '下降': '#9b59b6',
+    '落地': '#2ecc71'
+}
+DEFAULT_STATUS_COLOR = '#95a5a6'
+
+StatusRole = Qt.UserRole + 1
+
+_placeholder_icon: Optional[QIcon] = None
+
+
+def hangar_placeholder_icon() -> QIcon:
+    """所有无图航空器共用的 "NO IMAGE" 占位图（首次调用时绘制）"""
+    global _placeholder_icon
+    if _placeholder_icon is None:
+        pix = QPixmap(*HANGAR_THUMB_SIZE)
+        pix.fill(QColor(44, 62, 80))
+        painter = QPainter(pix)
+        painter.setPen(QPen(Qt.white))
+        painter.setFont(QFont("Arial", 14, QFont.Bold))
+        painter.drawText(pix.rect(), Qt.AlignCenter, "NO IMAGE")
+        painter.end()
+        _placeholder_icon = QIcon(pix)
+    return _placeholder_icon
+
+
+class HangarModel(QAbstractListModel):
+    """机库航空器列表；Qt.UserRole 返回航空器字典"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._aircraft: List[dict] = []
+        # 图片 URL / 本地路径 -> 图标，重新加载机库时保留
+        self._icons: Dict[str, QIcon] = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._aircraft)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._aircraft):
+            return None
+        ac = self._aircraft[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{ac.get('airline', '')} {ac.get('reg', '')}\n{ac.get('type', '')}"
+        if role == Qt.DecorationRole:
+            return self._icons.get(ac.get('image') or '')
+        if role == Qt.UserRole:
+            return ac
+        return None
+
+    def aircraft(self) -> List[dict]:
+        return list(self._aircraft)
+
+    def set_aircraft(self, aircraft: List[dict]):
+        self.beginResetModel()
+        self._aircraft = list(aircraft)
+        self.endResetModel()
+
+    def append(self, aircraft: dict):
+        row = len(self._aircraft)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._aircraft.append(aircraft)
+        self.endInsertRows()
+
+    def remove_row(self, row: int):
+        if 0 <= row < len(self._aircraft):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._aircraft[row]
+            self.endRemoveRows()
+
+    def update_row(self, row: int, aircraft: dict):
+        if 0 <= row < len(self._aircraft):
+            self._aircraft[row] = aircraft
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def set_aircraft_image(self, registration: str, image: str) -> Optional[dict]:
+        """与 DispatchStore.set_aircraft_image 一致：更新第一架匹配注册号的航空器"""
+        for row, ac in enumerate(self._aircraft):
+            if ac.get('reg') == registration:
+                ac['image'] = image
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+                return ac
+        return None
+
+    def has_icon(self, image: str) -> bool:
+        return image in self._icons
+
+    def set_icon(self, image: str, icon: QIcon):
+        """设置某个图片 URL / 路径的图标，只刷新使用它的行"""
+        self._icons[image] = icon
+        for row, ac in enumerate(self._aircraft):
+            if ac.get('image') == image:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class FlightHistoryModel(QAbstractListModel):
+    """航班历史（最新在前），按页懒加载；Qt.UserRole 返回航班字典"""
+
+    def __init__(self, source, parent=None, page_size: int = HISTORY_PAGE_SIZE):
+        """source 需提供 history_count() 和 history_page(offset, limit)，即 DispatchManager"""
+        super().__init__(parent)
+        self._source = source
+        self._page_size = page_size
+        self._flights: List[dict] = []
+        self._total = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._flights)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self._flights) < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        page = self._source.history_page(len(self._flights), self._page_size)
+        if not page:
+            # 数据库中的记录比预期少（例如被外部删除）
+            self._total = len(self._flights)
+            return
+        start = len(self._flights)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._flights.extend(page)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._flights):
+            return None
+        f = self._flights[index.row()]
+        if role == Qt.DisplayRole:
+            status = f.get('status', '计划')
+            aircraft_type = (f.get('aircraft') or {}).get('type', '')
+            # 格式化显示：日期 | 航班号 | 起降 | 机型 | 状态
+            return (f"📅 {f.get('date', '')}   ✈ {f.get('callsign', '')}\n"
+                    f"🛫 {f.get('dep', '')} ➔ 🛬 {f.get('arr', '')}   🛩️ {aircraft_type}   [{status}]")
+        if role == Qt.UserRole:
+            return f
+        if role == StatusRole:
+            return f.get('status', '计划')
+        return None
+
+    def reload(self):
+        """丢弃已加载的行，只重新读取总数；行数据等视图需要时再按页读取"""
+        self.beginResetModel()
+        self._flights = []
+        self._total = self._source.history_count()
+        self.endResetModel()
+
+    def prepend(self, flight: dict):
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._flights.insert(0, flight)
+        self._total += 1
+        self.endInsertRows()
+
+    def remove_row(self, row: int):
+        if 0 <= row < len(self._flights):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._flights[row]
+            self._total -= 1
+            self.endRemoveRows()
+
+    def refresh_row(self, row: int):
+        """航班字典已被原地修改（例如状态），通知视图重绘该行"""
+        if 0 <= row < len(self._flights):
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+
+class _UniformItemDelegate(QStyledItemDelegate):
+    """所有行同尺寸：第一次测量后直接复用"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._size_hint: Optional[QSize] = None
+
+    def sizeHint(self, option, index):
+        if self._size_hint is None:
+            self._size_hint = super().sizeHint(option, index)
+        return self._size_hint
+
+
+class HangarItemDelegate(_UniformItemDelegate):
+    """机库卡片：白色粗体居中文字，无图时使用共享占位图"""
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index):
+        super().initStyleOption(option, index)
+        option.font = QFont("Consolas", 10, QFont.Bold)
+        option.displayAlignment = Qt.AlignCenter
+        option.palette.setColor(option.palette.ColorRole.Text, Qt.white)
+        if option.icon.isNull():
+            option.icon = hangar_placeholder_icon()
+            option.features |= QStyleOptionViewItem.HasDecoration
+
+
+class FlightHistoryDelegate(_UniformItemDelegate):
+    """航班历史行：按状态着色"""
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index):
+        super().initStyleOption(option, index)
+        option.font = QFont("Consolas", 10)
+        color = STATUS_COLORS.get(index.data(StatusRole), DEFAULT_STATUS_COLOR)
+        option.palette.setColor(option.palette.ColorRole.Text, QColor(color))
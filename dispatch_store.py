@@ -0,0 +1,229 @@
+"""
+Dispatch Store - 机库与航班历史的 SQLite 存储
+
+替代每次修改都整体重写的 hangar.json / flight_history.json：
+- WAL 模式，单行增删改各自一个事务，不再重写整个文件
+- 航班按 (callsign, date) 建索引，航空器按注册号建索引，状态更新不再线性扫描
+- 启动时不必把全部历史读入内存，可按页读取
+- 首次打开时自动导入旧的 JSON 文件，导入后重命名为 *.json.migrated 作为备份
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger('ISFP-Connect.Dispatch')
+
+DB_FILENAME = "dispatch.db"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS aircraft (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    registration TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_aircraft_registration ON aircraft(registration);
+CREATE TABLE IF NOT EXISTS flights (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    callsign TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_flights_callsign_date ON flights(callsign, date);
+"""
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+class DispatchStore:
+    """机库 / 航班历史存储；航班按 id 倒序即最新在前，航空器按添加顺序"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', ?)",
+                               (str(SCHEMA_VERSION),))
+
+    def close(self):
+        self._conn.close()
+
+    # ---------- 迁移 ----------
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    def migrate_json(self, hangar_file: str, history_file: str) -> bool:
+        """导入旧 JSON 文件，返回本次是否导入了文件
+
+        两个文件分别记录是否已导入；读取失败（损坏、非列表）的文件保持原样，
+        不记录为已导入，下次启动时重试。
+        """
+        migrated = False
+        if self._migrate_file('hangar_migrated', hangar_file, self._import_hangar):
+            migrated = True
+        if self._migrate_file('history_migrated', history_file, self._import_history):
+            migrated = True
+        return migrated
+
+    def _migrate_file(self, key: str, path: str, importer) -> bool:
+        # json_migrated 是旧版本一次性导入两个文件时写入的标记
+        if self._meta(key) or self._meta('json_migrated'):
+            return False
+        if not os.path.exists(path):
+            # 没有旧文件（新安装），以后也不再导入
+            self._set_meta(key, '1')
+            return False
+        items = _load_json_list(path)
+        if items is None:
+            return False
+        with self._conn:
+            importer(items)
+            self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, '1')", (key,))
+        try:
+            os.replace(path, path + ".migrated")
+        except OSError as e:
+            logger.warning(f"无法重命名已迁移的文件 {path}: {e}")
+        logger.info(f"已从 {os.path.basename(path)} 导入 {len(items)} 条记录")
+        return True
+
+    def _import_hangar(self, hangar: list):
+        self._conn.executemany(
+            "INSERT INTO aircraft(registration, data) VALUES (?, ?)",
+            [(ac.get('reg', ''), _dumps(ac)) for ac in hangar])
+
+    def _import_history(self, history: list):
+        # JSON 中最新航班在前，倒序插入使 id 倒序与原顺序一致
+        self._conn.executemany(
+            "INSERT INTO flights(callsign, date, status, data) VALUES (?, ?, ?, ?)",
+            [(f.get('callsign', ''), f.get('date', ''), f.get('status', ''), _dumps(f))
+             for f in reversed(history)])
+
+    # ---------- 机库 ----------
+
+    def aircraft(self) -> List[dict]:
+        rows = self._conn.execute("SELECT data FROM aircraft ORDER BY id").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def aircraft_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM aircraft").fetchone()[0]
+
+    def _find_aircraft(self, aircraft: dict) -> Optional[int]:
+        rows = self._conn.execute("SELECT id, data FROM aircraft WHERE registration = ? ORDER BY id",
+                                  (aircraft.get('reg', ''),))
+        for row_id, data in rows:
+            if json.loads(data) == aircraft:
+                return row_id
+        return None
+
+    def add_aircraft(self, aircraft: dict):
+        with self._conn:
+            self._conn.execute("INSERT INTO aircraft(registration, data) VALUES (?, ?)",
+                               (aircraft.get('reg', ''), _dumps(aircraft)))
+
+    def update_aircraft(self, old_data: dict, new_data: dict) -> bool:
+        with self._conn:
+            row_id = self._find_aircraft(old_data)
+            if row_id is None:
+                return False
+            self._conn.execute("UPDATE aircraft SET registration = ?, data = ? WHERE id = ?",
+                               (new_data.get('reg', ''), _dumps(new_data), row_id))
+        return True
+
+    def delete_aircraft(self, aircraft: dict) -> bool:
+        with self._conn:
+            row_id = self._find_aircraft(aircraft)
+            if row_id is None:
+                return False
+            self._conn.execute("DELETE FROM aircraft WHERE id = ?", (row_id,))
+        return True
+
+    def set_aircraft_image(self, registration: str, image: str) -> bool:
+        """更新第一架匹配注册号的航空器图片"""
+        with self._conn:
+            row = self._conn.execute("SELECT id, data FROM aircraft WHERE registration = ? ORDER BY id LIMIT 1",
+                                     (registration,)).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row[1])
+            data['image'] = image
+            self._conn.execute("UPDATE aircraft SET data = ? WHERE id = ?", (_dumps(data), row[0]))
+        return True
+
+    # ---------- 航班历史 ----------
+
+    def flights(self, offset: int = 0, limit: int = -1) -> List[dict]:
+        """按最新在前返回航班，limit=-1 表示不限"""
+        rows = self._conn.execute("SELECT data FROM flights ORDER BY id DESC LIMIT ? OFFSET ?",
+                                  (limit, offset)).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def flight_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM flights").fetchone()[0]
+
+    def add_flight(self, flight: dict):
+        with self._conn:
+            self._conn.execute("INSERT INTO flights(callsign, date, status, data) VALUES (?, ?, ?, ?)",
+                               (flight.get('callsign', ''), flight.get('date', ''),
+                                flight.get('status', ''), _dumps(flight)))
+
+    def delete_flight(self, flight: dict) -> bool:
+        with self._conn:
+            rows = self._conn.execute(
+                "SELECT id, data FROM flights WHERE callsign = ? AND date = ? ORDER BY id DESC",
+                (flight.get('callsign', ''), flight.get('date', ''))).fetchall()
+            for row_id, data in rows:
+                if json.loads(data) == flight:
+                    self._conn.execute("DELETE FROM flights WHERE id = ?", (row_id,))
+                    return True
+        return False
+
+    def update_flight_status(self, callsign: str, date: str, status: str) -> bool:
+        """更新最新一条匹配 (callsign, date) 的航班状态"""
+        with self._conn:
+            row = self._conn.execute(
+                "SELECT id, data FROM flights WHERE callsign = ? AND date = ? ORDER BY id DESC LIMIT 1",
+                (callsign or '', date or '')).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row[1])
+            data['status'] = status
+            self._conn.execute("UPDATE flights SET status = ?, data = ? WHERE id = ?",
+                               (status, _dumps(data), row[0]))
+        return True
+
+    def clear_flights(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM flights")
+
+
+def _load_json_list(path: str) -> Optional[list]:
+    """读取 JSON 列表文件，无法读取或内容不是列表时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取 {path} 失败，暂不迁移，下次启动时重试: {e}")
+        return None
+    if not isinstance(data, list):
+        logger.warning(f"{path} 不是列表，暂不迁移，下次启动时重试")
+        return None
+    return data
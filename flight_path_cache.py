@@ -0,0 +1,168 @@
+"""
+Flight Path Cache - 连飞地图航迹缓存与抽稀
+
+/clients/paths/{callsign} 每次返回完整航迹，长航班可达数千个点：
+- 按呼号缓存航迹点；再次获取时只追加新增的点，已有历史不变（起点对不上时才整条替换）
+- 按缩放级别用 Douglas-Peucker 抽稀（容差约 SIMPLIFY_PIXELS 个屏幕像素），
+  每个缩放级别的结果单独缓存；新增点只对尾部抽稀后追加，不重算历史
+- 缓存在 PATH_TTL 内视为最新，重复点击直接重绘，不再请求接口
+
+只在 GUI 线程使用。
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+Point = Tuple[float, float]
+
+PATH_TTL = 30.0
+MAX_PATHS = 50
+SIMPLIFY_PIXELS = 1.5
+MIN_ZOOM = 0
+MAX_ZOOM = 18
+COORD_DECIMALS = 5
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """缩放级别下 SIMPLIFY_PIXELS 像素对应的经度跨度（Web 墨卡托，256 像素瓦片）"""
+    return SIMPLIFY_PIXELS * 360.0 / (256 * (2 ** zoom))
+
+
+def simplify(points: List[Point], tolerance: float) -> List[Point]:
+    """Douglas-Peucker 抽稀（显式栈，不递归），保留首尾点
+
+    经度按航迹平均纬度的 cos 缩放，使容差在南北方向和东西方向一致。
+    """
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return list(points)
+    k = math.cos(math.radians(sum(p[0] for p in points) / n))
+    xs = [p[1] * k for p in points]
+    ys = [p[0] for p in points]
+    tol2 = tolerance * tolerance
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        x1, y1 = xs[first], ys[first]
+        dx, dy = xs[last] - x1, ys[last] - y1
+        seg2 = dx * dx + dy * dy
+        max_d2 = -1.0
+        index = first
+        for i in range(first + 1, last):
+            px, py = xs[i] - x1, ys[i] - y1
+            if seg2 == 0.0:
+                d2 = px * px + py * py
+            else:
+                cross = px * dy - py * dx
+                d2 = cross * cross / seg2
+            if d2 > max_d2:
+                max_d2 = d2
+                index = i
+        if max_d2 > tol2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, kept in zip(points, keep) if kept]
+
+
+def parse_points(raw: Iterable) -> List[Point]:
+    """接口返回的点（{"latitude", "longitude", ...}）转为 (lat, lon)，跳过无效点"""
+    points = []
+    for p in raw or ():
+        try:
+            lat = float(p.get("latitude"))
+            lon = float(p.get("longitude"))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        points.append((lat, lon))
+    return points
+
+
+class _PathEntry:
+    __slots__ = ('points', 'fetched_at', 'simplified')
+
+    def __init__(self):
+        self.points: List[Point] = []
+        self.fetched_at = 0.0
+        # 缩放级别 -> (已抽稀的原始点数, 抽稀结果)
+        self.simplified: Dict[int, Tuple[int, List[Point]]] = {}
+
+
+class FlightPathCache:
+    """按呼号缓存航迹并按缩放级别增量抽稀"""
+
+    def __init__(self, ttl: float = PATH_TTL, max_paths: int = MAX_PATHS):
+        self.ttl = ttl
+        self.max_paths = max_paths
+        self._entries: "OrderedDict[str, _PathEntry]" = OrderedDict()
+
+    def __contains__(self, callsign: str) -> bool:
+        return callsign in self._entries
+
+    def is_fresh(self, callsign: str) -> bool:
+        entry = self._entries.get(callsign)
+        return entry is not None and time.monotonic() - entry.fetched_at < self.ttl
+
+    def update(self, callsign: str, raw_points: Iterable) -> int:
+        """合并一次接口返回的完整航迹，返回新增的点数"""
+        points = parse_points(raw_points)
+        entry = self._entries.get(callsign)
+        if entry is None:
+            entry = self._entries[callsign] = _PathEntry()
+            while len(self._entries) > self.max_paths:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(callsign)
+        entry.fetched_at = time.monotonic()
+
+        known = len(entry.points)
+        if known and len(points) >= known and points[known - 1] == entry.points[-1] \
+                and points[0] == entry.points[0]:
+            # 同一次飞行：只追加尾部
+            added = points[known:]
+            entry.points.extend(added)
+            return len(added)
+        # 新的飞行或服务器重置了航迹：整条替换
+        entry.points = points
+        entry.simplified.clear()
+        return len(points)
+
+    def points(self, callsign: str) -> List[Point]:
+        entry = self._entries.get(callsign)
+        return list(entry.points) if entry is not None else []
+
+    def simplified(self, callsign: str, zoom: int) -> List[Point]:
+        """返回该缩放级别下抽稀后的航迹，只对上次之后新增的点抽稀"""
+        entry = self._entries.get(callsign)
+        if entry is None:
+            return []
+        self._entries.move_to_end(callsign)
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, int(zoom)))
+        done, result = entry.simplified.get(zoom, (0, []))
+        total = len(entry.points)
+        if done < total:
+            tolerance = zoom_tolerance(zoom)
+            if done == 0:
+                result = simplify(entry.points, tolerance)
+            else:
+                # 从已保留的最后一个点开始抽稀尾部，历史部分保持不变
+                tail = simplify(entry.points[done - 1:], tolerance)
+                result = result + tail[1:]
+            entry.simplified[zoom] = (total, result)
+        return result
+
+    def payload(self, callsign: str, zoom: int) -> dict:
+        """drawPath 使用的紧凑数据：{"callsign": ..., "p": [[lat, lon], ...]}"""
+        return {
+            "callsign": callsign,
+            "p": [[round(lat, COORD_DECIMALS), round(lon, COORD_DECIMALS)]
+                  for lat, lon in self.simplified(callsign, zoom)],
+        }
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,285 @@
+"""
+Flight Recorder - X-Plane 飞行数据的环形缓冲记录与回放
+
+XPlaneTCPClient 收到的每个样本都可以交给 FlightRecorder：
+- 每个字段一列 array（经纬度 'd'，整数字段 'i'，其余 'f'，外加接收时间），
+  预分配固定容量的环形缓冲，内存占用恒定（默认 65536 个样本约 6.5 MB）
+- 后台线程每 FLUSH_INTERVAL 秒把尚未写出的样本压缩成一个块追加到录制文件；
+  写出落后于接收超过缓冲容量时，最旧的未写出样本被覆盖并计入 dropped
+- read_recording() 逐块读取录制文件；ReplaySource 按 1x-100x 速度把样本经
+  XPlaneTCPClient.inject_sample() 送回与实时数据相同的路径（样本邮箱和逐样本监听器），
+  每个样本都会送达 FSD 位置路径，可离线分析 FSD 发送
+
+录制文件格式（小端）::
+
+    b"ISFPREC\\x01"
+    uint32 头长度 + JSON 头 {"version": 1, "fields": [...], "typecodes": "..."}
+    重复: uint32 压缩长度, uint32 样本数, zlib(时间列 + 各字段列依次拼接)
+"""
+
+import os
+import json
+import atexit
+import time
+import zlib
+import array
+import struct
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from xplane_protocol import FLIGHT_FIELDS
+
+logger = logging.getLogger('ISFP-Connect.FlightRecorder')
+
+MAGIC = b"ISFPREC\x01"
+RECORDING_SUFFIX = ".isfprec"
+FORMAT_VERSION = 1
+DEFAULT_CAPACITY = 65536
+FLUSH_INTERVAL = 5.0
+COMPRESS_LEVEL = 6
+
+MIN_REPLAY_SPEED = 1.0
+MAX_REPLAY_SPEED = 100.0
+REPLAY_TICK_MS = 10
+
+_INT_FIELDS = frozenset(('com1_freq', 'com2_freq', 'transponder', 'gear_deploy'))
+_DOUBLE_FIELDS = frozenset(('latitude', 'longitude'))
+
+_LENGTH = struct.Struct('<I')
+_CHUNK_HEADER = struct.Struct('<II')
+
+
+def _typecode(name: str) -> str:
+    if name in _DOUBLE_FIELDS:
+        return 'd'
+    if name in _INT_FIELDS:
+        return 'i'
+    return 'f'
+
+
+class FlightRecorder:
+    """列式环形缓冲记录器；record() 可在接收线程中调用"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, flush_interval: float = FLUSH_INTERVAL,
+                 fields: Tuple[str, ...] = FLIGHT_FIELDS):
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.fields = tuple(fields)
+        self.typecodes = 'd' + ''.join(_typecode(name) for name in self.fields)
+        # 第 0 列是接收时间
+        self._columns = [array.array(code, bytes(array.array(code).itemsize * capacity))
+                         for code in self.typecodes]
+        self._lock = threading.Lock()
+        self._written = 0    # 累计写入缓冲的样本数
+        self._flushed = 0    # 累计写出到文件的样本数
+        self.dropped = 0
+        self.chunks = 0
+        self.path: Optional[str] = None
+        self._file = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 程序退出时写出最后一块
+        atexit.register(self.stop)
+
+    # ---------- 记录 ----------
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+    def record(self, sample: Dict[str, Any], timestamp: Optional[float] = None):
+        """写入一个样本（缺失的字段记为 0）"""
+        t = time.time() if timestamp is None else timestamp
+        columns = self._columns
+        with self._lock:
+            i = self._written % self.capacity
+            columns[0][i] = t
+            for c, name in enumerate(self.fields, 1):
+                value = sample.get(name, 0)
+                columns[c][i] = int(value) if self.typecodes[c] == 'i' else float(value)
+            self._written += 1
+
+    def snapshot(self, last: Optional[int] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """按时间顺序返回缓冲中最近 last 个样本（默认全部）"""
+        with self._lock:
+            count = len(self) if last is None else min(last, len(self))
+            start = self._written - count
+            return [self._sample_at(n % self.capacity) for n in range(start, self._written)]
+
+    def _sample_at(self, i: int) -> Tuple[float, Dict[str, Any]]:
+        columns = self._columns
+        return columns[0][i], {name: columns[c][i] for c, name in enumerate(self.fields, 1)}
+
+    # ---------- 写文件 ----------
+
+    @property
+    def is_recording(self) -> bool:
+        return self._file is not None
+
+    def start(self, path: str):
+        """开始录制到 path，并启动后台写出线程"""
+        self.stop()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'fields': list(self.fields),
+            'typecodes': self.typecodes,
+        }).encode('utf-8')
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        self.path = path
+        with self._lock:
+            # 只写出开始录制之后的样本
+            self._flushed = self._written
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name='FlightRecorder', daemon=True)
+        self._thread.start()
+        logger.info(f"开始录制飞行数据: {path}")
+
+    def stop(self):
+        """停止录制，写出剩余样本并关闭文件"""
+        if self._file is None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._file.close()
+        self._file = None
+        logger.info(f"飞行数据录制结束: {self.path}，{self.chunks} 块，丢弃 {self.dropped} 个样本")
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"写入录制文件失败: {e}")
+
+    def flush(self) -> int:
+        """把尚未写出的样本压缩成一个块写入文件，返回写出的样本数"""
+        if self._file is None:
+            return 0
+        with self._lock:
+            pending = self._written - self._flushed
+            if pending > self.capacity:
+                # 写出落后太多，最旧的样本已被覆盖
+                self.dropped += pending - self.capacity
+                pending = self.capacity
+            if pending <= 0:
+                return 0
+            start = (self._written - pending) % self.capacity
+            end = start + pending
+            if end <= self.capacity:
+                payload = b''.join(col[start:end].tobytes() for col in self._columns)
+            else:
+                wrap = end - self.capacity
+                payload = b''.join(col[start:].tobytes() + col[:wrap].tobytes() for col in self._columns)
+            self._flushed = self._written
+        # 压缩和磁盘写入都在锁外完成，不阻塞 record()
+        compressed = zlib.compress(payload, COMPRESS_LEVEL)
+        self._file.write(_CHUNK_HEADER.pack(len(compressed), pending) + compressed)
+        self._file.flush()
+        self.chunks += 1
+        return pending
+
+
+def read_recording(path: str) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """逐块读取录制文件，按时间顺序产出 (接收时间, 样本)；样本与实时数据一样带 type='flight_data'"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是飞行数据录制文件: {path}")
+        (header_len,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        header = json.loads(f.read(header_len).decode('utf-8'))
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"不支持的录制文件版本: {header.get('version')}")
+        fields = header['fields']
+        typecodes = header['typecodes']
+        while True:
+            raw = f.read(_CHUNK_HEADER.size)
+            if len(raw) < _CHUNK_HEADER.size:
+                return
+            size, count = _CHUNK_HEADER.unpack(raw)
+            data = f.read(size)
+            if len(data) < size:
+                # 录制中途退出留下的不完整块
+                logger.warning(f"录制文件末尾的块不完整，已忽略: {path}")
+                return
+            payload = zlib.decompress(data)
+            columns = []
+            offset = 0
+            for code in typecodes:
+                col = array.array(code)
+                nbytes = col.itemsize * count
+                col.frombytes(payload[offset:offset + nbytes])
+                offset += nbytes
+                columns.append(col)
+            times = columns[0]
+            for i in range(count):
+                sample = {name: columns[c][i] for c, name in enumerate(fields, 1)}
+                sample['type'] = 'flight_data'
+                yield times[i], sample
+
+
+class ReplaySource(QObject):
+    """按录制时的时间间隔（乘以速度）把样本送回 XPlaneTCPClient；须在 GUI 线程使用"""
+
+    finished = Signal()
+
+    def __init__(self, path: str, target, speed: float = 1.0, parent=None):
+        """target 需提供 inject_sample(dict, received_at)，即 XPlaneTCPClient"""
+        super().__init__(parent)
+        self.path = path
+        self.target = target
+        self.speed = max(MIN_REPLAY_SPEED, min(MAX_REPLAY_SPEED, float(speed)))
+        self.samples_sent = 0
+        self._samples: Optional[Iterator[Tuple[float, Dict[str, Any]]]] = None
+        self._next: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._t0 = 0.0
+        self._wall0 = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(REPLAY_TICK_MS)
+        self._timer.timeout.connect(self._tick)
+
+    def set_speed(self, speed: float):
+        """回放中途调整速度，从当前位置继续"""
+        speed = max(MIN_REPLAY_SPEED, min(MAX_REPLAY_SPEED, float(speed)))
+        if self._timer.isActive() and self._next is not None:
+            now = time.monotonic()
+            position = self._t0 + (now - self._wall0) * self.speed
+            self._t0, self._wall0 = position, now
+        self.speed = speed
+
+    def start(self):
+        self._samples = read_recording(self.path)
+        self._next = next(self._samples, None)
+        if self._next is None:
+            self.finished.emit()
+            return
+        self._t0 = self._next[0]
+        self._wall0 = time.monotonic()
+        self.samples_sent = 0
+        self._timer.start()
+        logger.info(f"开始回放 {self.path}，速度 {self.speed:g}x")
+
+    def stop(self):
+        self._timer.stop()
+        self._samples = None
+        self._next = None
+
+    def _tick(self):
+        position = self._t0 + (time.monotonic() - self._wall0) * self.speed
+        while self._next is not None and self._next[0] <= position:
+            # 按样本应到达的时刻标记接收时间，同一次触发送出的多个样本间隔不变（按速度缩放）
+            due = self._wall0 + (self._next[0] - self._t0) / self.speed
+            self.target.inject_sample(self._next[1], due)
+            self.samples_sent += 1
+            self._next = next(self._samples, None)
+        if self._next is None:
+            self._timer.stop()
+            logger.info(f"回放结束，共 {self.samples_sent} 个样本")
+            self.finished.emit()
@@ -5,13 +5,16 @@ FSD (Flight Simulator Data) 协议客户端模块
 """
 
 import re
+import math
+import asyncio
 import time
 import socket
 import struct
 import logging
 import hashlib
+import threading
 from enum import Enum, IntEnum, IntFlag
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Optional, List, Dict, Callable, Any, Tuple, Union
 from datetime import datetime
 from PySide6.QtCore import QObject, QThread, Signal, QTimer, Qt
@@ -21,7 +24,7 @@ from PySide6.QtNetwork import QTcpSocket, QAbstractSocket, QHostAddress
 try:
     from connection_logger import (
         log_fsd_message, log_connection_event, log_connection_error,
-        setup_connection_logging, is_logging_enabled
+        setup_connection_logging, is_logging_enabled, clip_repr
     )
     CONNECTION_LOGGING_AVAILABLE = True
 except ImportError:
@@ -91,6 +94,8 @@ class MessageType(Enum):
     PILOT_CLIENT_COM = "PILOTCLIENTCOM"
     REHOST = "REHOST"
     MUTE = "MUTE"
+    SQUAWKBOX = "SQUAWKBOX"
+    METAR_REQUEST = "METARREQUEST"
 
 
 class PilotRating(IntEnum):
@@ -215,11 +220,334 @@ class FSDAircraftConfig:
     capabilities: str = ""
 
 
+# 插件不提供接地标志，按离地高度判断：y_agl 是重心离地高度，停在地面时约 3~20 英尺
+ON_GROUND_AGL_FT = 20.0
+# 离地高度很低但仍在明显下沉 / 爬升时（拉平、离地瞬间）不算接地（vh_ind，米/秒）
+ON_GROUND_MAX_VS_MPS = 2.0
+
+
+def is_on_ground(data: Dict[str, Any]) -> bool:
+    """判断 X-Plane 样本是否在地面（样本自带 on_ground 时直接使用）"""
+    if 'on_ground' in data:
+        return bool(data['on_ground'])
+    if 'altitude_agl' not in data:
+        return False
+    return (data['altitude_agl'] < ON_GROUND_AGL_FT
+            and abs(data.get('vertical_speed', 0.0)) < ON_GROUND_MAX_VS_MPS)
+
+
+def position_from_xplane(data: Dict[str, Any]) -> FSDPilotPosition:
+    """把 X-Plane 插件的 flight_data 样本转换为 FSD 位置（roll 对应 bank，MSL 高度同时作为气压高度）"""
+    altitude_msl = int(data.get('altitude_msl', 0))
+    return FSDPilotPosition(
+        latitude=data.get('latitude', 0),
+        longitude=data.get('longitude', 0),
+        altitude_true=altitude_msl,
+        altitude_pressure=altitude_msl,
+        groundspeed=int(data.get('groundspeed', 0)),
+        pitch=data.get('pitch', 0),
+        bank=data.get('roll', 0),
+        heading=data.get('heading', 0),
+        on_ground=is_on_ground(data)
+    )
+
+
+# ==================== 位置外推 ====================
+
+EARTH_RADIUS_M = 6371000.0
+KNOTS_TO_MPS = 0.514444
+
+
+def _wrap_angle(angle: float) -> float:
+    """把角度差规范到 [-180, 180)"""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def _clamp(value: float, limit: float) -> float:
+    """把数值限制在 [-limit, limit]"""
+    return max(-limit, min(limit, value))
+
+
+def _bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """两点之间的初始真方位（度）"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlon = math.radians(lon2 - lon1)
+    y = math.sin(dlon) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlon)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+class PositionExtrapolator:
+    """航位推算外推器
+    
+    插件样本间隔（约 100-500 ms）大于位置发送间隔时，根据最近两个真实样本得出的
+    地速、航迹、垂直速度和转弯率，把位置和姿态外推到发送时刻（恒定转弯率模型）。
+    新的真实样本到达后立即以它为新起点，不做混合，外推误差不会累积。
+    转弯率只在前后两个样本都由位移连线得出航迹时计算，航迹来源切换（首个样本、
+    样本中断、离地/接地）时重新起算，避免把航迹与航向之差当成转弯。
+    """
+    
+    # 外推的最长时间，超过后保持最后的外推位置（样本中断时避免飞出去）
+    MAX_EXTRAPOLATION_S = 2.0
+    # 两个样本间隔超出此范围时不计算变化率
+    MIN_SAMPLE_DT_S = 0.02
+    MAX_SAMPLE_DT_S = 5.0
+    # 低于该地速时用航向代替由位移计算的航迹
+    MIN_TRACK_SPEED_KT = 30
+    # 变化率限幅
+    MAX_TURN_RATE_DPS = 10.0
+    MAX_VERTICAL_SPEED_FPS = 150.0
+    MAX_ATTITUDE_RATE_DPS = 20.0
+    # 外推出的姿态限幅
+    MAX_PITCH_DEG = 90.0
+    MAX_BANK_DEG = 180.0
+    
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._last: Optional[FSDPilotPosition] = None
+        self._last_time = 0.0
+        self._chord_track = 0.0
+        self._chord_valid = False        # 上一个样本的航迹是否由位移连线得出
+        self.track = 0.0                 # 航迹（度）
+        self.turn_rate = 0.0             # 航迹变化率（度/秒）
+        self.heading_rate = 0.0          # 航向变化率（度/秒）
+        self.vertical_speed = 0.0        # 垂直速度（英尺/秒）
+        self.pitch_rate = 0.0            # 俯仰角变化率（度/秒）
+        self.bank_rate = 0.0             # 倾斜角变化率（度/秒）
+    
+    @property
+    def has_sample(self) -> bool:
+        return self._last is not None
+    
+    def reset(self):
+        """丢弃所有样本"""
+        self._last = None
+        self._chord_valid = False
+        self.track = self.turn_rate = self.heading_rate = self.vertical_speed = 0.0
+        self.pitch_rate = self.bank_rate = 0.0
+    
+    def observe(self, position: FSDPilotPosition, timestamp: Optional[float] = None):
+        """记录一个真实样本"""
+        now = self._clock() if timestamp is None else timestamp
+        prev = self._last
+        dt = now - self._last_time if prev is not None else 0.0
+        
+        if prev is not None and self.MIN_SAMPLE_DT_S <= dt <= self.MAX_SAMPLE_DT_S:
+            moved = (position.latitude, position.longitude) != (prev.latitude, prev.longitude)
+            if moved and position.groundspeed >= self.MIN_TRACK_SPEED_KT and not position.on_ground:
+                # 两点连线的方位是区间中点的航迹，之后按转弯率补偿到当前样本
+                chord = _bearing_deg(prev.latitude, prev.longitude,
+                                     position.latitude, position.longitude)
+                midpoint_shift = 0.5 * dt
+                if self._chord_valid:
+                    turn_rate = _wrap_angle(chord - self._chord_track) / dt
+                    self.turn_rate = _clamp(turn_rate, self.MAX_TURN_RATE_DPS)
+                else:
+                    # 上一个航迹来自航向，与连线方位相减不是转弯率，从本样本重新起算
+                    self.turn_rate = 0.0
+                self._chord_valid = True
+            else:
+                chord = position.heading
+                midpoint_shift = 0.0
+                self.turn_rate = 0.0
+                self._chord_valid = False
+            self.heading_rate = _clamp(_wrap_angle(position.heading - prev.heading) / dt,
+                                       self.MAX_TURN_RATE_DPS)
+            self.vertical_speed = _clamp((position.altitude_true - prev.altitude_true) / dt,
+                                         self.MAX_VERTICAL_SPEED_FPS)
+            self.pitch_rate = _clamp((position.pitch - prev.pitch) / dt, self.MAX_ATTITUDE_RATE_DPS)
+            self.bank_rate = _clamp(_wrap_angle(position.bank - prev.bank) / dt,
+                                    self.MAX_ATTITUDE_RATE_DPS)
+            self._chord_track = chord
+            self.track = (chord + self.turn_rate * midpoint_shift) % 360.0
+        else:
+            # 第一个样本或间隔异常：只用航向，不外推变化
+            self.track = self._chord_track = position.heading
+            self._chord_valid = False
+            self.turn_rate = self.heading_rate = self.vertical_speed = 0.0
+            self.pitch_rate = self.bank_rate = 0.0
+        
+        self._last = position
+        self._last_time = now
+    
+    def predict(self, timestamp: Optional[float] = None) -> Optional[FSDPilotPosition]:
+        """外推到指定时刻，没有样本时返回 None"""
+        last = self._last
+        if last is None:
+            return None
+        now = self._clock() if timestamp is None else timestamp
+        tau = min(now - self._last_time, self.MAX_EXTRAPOLATION_S)
+        if tau <= 0 or (last.on_ground and last.groundspeed < 1):
+            return last
+        
+        speed = last.groundspeed * KNOTS_TO_MPS
+        theta0 = math.radians(self.track)
+        omega = math.radians(self.turn_rate)
+        if abs(omega) < 1e-4:
+            east = speed * tau * math.sin(theta0)
+            north = speed * tau * math.cos(theta0)
+        else:
+            # 恒定转弯率圆弧积分
+            theta1 = theta0 + omega * tau
+            east = speed / omega * (math.cos(theta0) - math.cos(theta1))
+            north = speed / omega * (math.sin(theta1) - math.sin(theta0))
+        
+        lat = last.latitude + math.degrees(north / EARTH_RADIUS_M)
+        cos_lat = max(math.cos(math.radians(last.latitude)), 1e-6)
+        lon = last.longitude + math.degrees(east / (EARTH_RADIUS_M * cos_lat))
+        lon = (lon + 180.0) % 360.0 - 180.0
+        climb = self.vertical_speed * tau
+        
+        return replace(
+            last,
+            latitude=lat,
+            longitude=lon,
+            altitude_true=int(round(last.altitude_true + climb)),
+            altitude_pressure=int(round(last.altitude_pressure + climb)),
+            heading=(last.heading + self.heading_rate * tau) % 360.0,
+            pitch=_clamp(last.pitch + self.pitch_rate * tau, self.MAX_PITCH_DEG),
+            bank=_clamp(last.bank + self.bank_rate * tau, self.MAX_BANK_DEG),
+        )
+
+
+# ==================== 自适应发送频率 ====================
+
+@dataclass
+class SendRateConfig:
+    """位置发送频率配置（间隔单位：秒）"""
+    parked_interval: float = 5.0       # 停机位静止
+    taxi_interval: float = 1.0         # 地面滑行
+    ground_roll_interval: float = 0.2  # 起飞/落地滑跑
+    cruise_interval: float = 1.0       # 空中稳定飞行
+    dynamic_interval: float = 0.2      # 空中机动（转弯、爬升下降、姿态变化）
+    keepalive_interval: float = 5.0    # 无变化时的最低发送频率
+    timer_interval: float = 0.2        # 发送定时器的触发间隔
+    taxi_speed_kt: int = 1             # 低于该地速视为静止
+    ground_roll_speed_kt: int = 40     # 高于该地速视为滑跑
+    dynamic_turn_rate_dps: float = 1.0
+    dynamic_vertical_speed_fpm: float = 300.0
+    dynamic_attitude_rate_dps: float = 2.0
+    # 变化阈值：低于全部阈值时跳过本次发送
+    min_distance_m: float = 2.0
+    min_altitude_ft: int = 10
+    min_heading_deg: float = 1.0
+    min_attitude_deg: float = 1.0
+
+
+def _distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """短距离平面近似（米）"""
+    north = math.radians(lat2 - lat1) * EARTH_RADIUS_M
+    east = math.radians(lon2 - lon1) * EARTH_RADIUS_M * math.cos(math.radians(lat1))
+    return math.hypot(north, east)
+
+
+class AdaptiveSendScheduler:
+    """根据飞行阶段和变化幅度决定本次定时器触发时是否发送位置
+    
+    定时器按最快间隔触发；本调度器按地面状态、地速和姿态变化率选择当前阶段的发送间隔，
+    间隔到达后若与上次发送相比变化低于阈值则跳过，但至少每 keepalive_interval 发送一次。
+    间隔按最近的定时器触发判断（容差为半个 timer_interval），定时器提前几毫秒触发时不会跳过整个周期。
+    """
+    
+    PHASE_PARKED = 'parked'
+    PHASE_TAXI = 'taxi'
+    PHASE_GROUND_ROLL = 'ground_roll'
+    PHASE_CRUISE = 'cruise'
+    PHASE_DYNAMIC = 'dynamic'
+    
+    def __init__(self, config: Optional[SendRateConfig] = None):
+        self.config = config or SendRateConfig()
+        self._last_sent: Optional[FSDPilotPosition] = None
+        self._last_sent_time = 0.0
+        self._prev_eval: Optional[FSDPilotPosition] = None
+        self._prev_eval_time = 0.0
+        self.phase = self.PHASE_PARKED
+        self.sent = 0
+        self.skipped = 0
+    
+    def reset(self):
+        self._last_sent = None
+        self._prev_eval = None
+        self.sent = self.skipped = 0
+    
+    def _attitude_rate(self, position: FSDPilotPosition, now: float) -> float:
+        """与上一次评估相比的最大姿态变化率（度/秒）"""
+        prev = self._prev_eval
+        dt = now - self._prev_eval_time
+        if prev is None or dt <= 0:
+            return 0.0
+        return max(abs(position.pitch - prev.pitch), abs(position.bank - prev.bank)) / dt
+    
+    def classify(self, position: FSDPilotPosition, now: float,
+                 turn_rate: float = 0.0, vertical_speed_fpm: float = 0.0) -> str:
+        """判断当前飞行阶段"""
+        cfg = self.config
+        if position.on_ground:
+            if position.groundspeed < cfg.taxi_speed_kt:
+                return self.PHASE_PARKED
+            if position.groundspeed < cfg.ground_roll_speed_kt:
+                return self.PHASE_TAXI
+            return self.PHASE_GROUND_ROLL
+        if (abs(turn_rate) >= cfg.dynamic_turn_rate_dps
+                or abs(vertical_speed_fpm) >= cfg.dynamic_vertical_speed_fpm
+                or self._attitude_rate(position, now) >= cfg.dynamic_attitude_rate_dps):
+            return self.PHASE_DYNAMIC
+        return self.PHASE_CRUISE
+    
+    def interval_for(self, phase: str) -> float:
+        cfg = self.config
+        return {
+            self.PHASE_PARKED: cfg.parked_interval,
+            self.PHASE_TAXI: cfg.taxi_interval,
+            self.PHASE_GROUND_ROLL: cfg.ground_roll_interval,
+            self.PHASE_CRUISE: cfg.cruise_interval,
+            self.PHASE_DYNAMIC: cfg.dynamic_interval,
+        }[phase]
+    
+    def _changed(self, position: FSDPilotPosition) -> bool:
+        """与上次发送相比是否超过任一变化阈值"""
+        cfg = self.config
+        last = self._last_sent
+        return (_distance_m(last.latitude, last.longitude, position.latitude, position.longitude) >= cfg.min_distance_m
+                or abs(position.altitude_true - last.altitude_true) >= cfg.min_altitude_ft
+                or abs(_wrap_angle(position.heading - last.heading)) >= cfg.min_heading_deg
+                or abs(position.pitch - last.pitch) >= cfg.min_attitude_deg
+                or abs(position.bank - last.bank) >= cfg.min_attitude_deg
+                or position.on_ground != last.on_ground)
+    
+    def should_send(self, position: FSDPilotPosition, now: float,
+                    turn_rate: float = 0.0, vertical_speed_fpm: float = 0.0) -> bool:
+        """本次触发是否需要发送"""
+        self.phase = self.classify(position, now, turn_rate, vertical_speed_fpm)
+        self._prev_eval = position
+        self._prev_eval_time = now
+        
+        if self._last_sent is None:
+            return True
+        elapsed = now - self._last_sent_time
+        if elapsed >= self.config.keepalive_interval:
+            return True
+        if elapsed < self.interval_for(self.phase) - 0.5 * self.config.timer_interval:
+            self.skipped += 1
+            return False
+        if not self._changed(position):
+            self.skipped += 1
+            return False
+        return True
+    
+    def mark_sent(self, position: FSDPilotPosition, now: float):
+        self._last_sent = position
+        self._last_sent_time = now
+        self.sent += 1
+
+
 # ==================== FSD 消息基类 ====================
 
 class FSDMessage:
     """FSD 消息基类"""
     
+    __slots__ = ('msg_type', 'sender', 'receiver')
+    
     # PDU 标识符映射 (根据 FSD9-Protocol.md)
     PDU_IDENTIFIERS = {
         MessageType.ADD_ATC: "#AA",           # 管制员上线
@@ -243,6 +571,8 @@ class FSDMessage:
         MessageType.TEXT_MESSAGE: "#TM",      # 文本消息
         MessageType.REHOST: "$XX",            # 重新托管
         MessageType.MUTE: "#MU",              # 静音
+        MessageType.SQUAWKBOX: "#SB",         # SquawkBox 扩展 (机型信息等)
+        MessageType.METAR_REQUEST: "$AX",     # METAR 请求
     }
     
     def __init__(self, msg_type: MessageType, sender: str = "", receiver: str = ""):
@@ -267,6 +597,8 @@ class FSDMessage:
 class FSDIdentificationMessage(FSDMessage):
     """FSD 服务器识别消息 ($DI)"""
     
+    __slots__ = ('server_version', 'initial_challenge')
+    
     def __init__(self, server_version: str = "", initial_challenge: str = ""):
         super().__init__(MessageType.FSD_IDENTIFICATION)
         self.server_version = server_version
@@ -291,6 +623,8 @@ class FSDAddPilotMessage(FSDMessage):
     例如: #APB2352:SERVER:2352:123456:1:9:16:2352 ZGHA
     """
     
+    __slots__ = ('callsign', 'cid', 'password', 'rating', 'protocol', 'sim_type', 'real_name')
+    
     def __init__(self, callsign: str = "", cid: str = "", password: str = "",
                  rating: PilotRating = PilotRating.OBS, 
                  protocol: int = ProtocolRevision.CLASSIC,
@@ -314,6 +648,8 @@ class FSDAddPilotMessage(FSDMessage):
 class FSDPilotDataUpdateMessage(FSDMessage):
     """飞行员数据更新消息 (@)"""
     
+    __slots__ = ('transponder_code', 'transponder_mode', 'rating', 'position')
+    
     def __init__(self, callsign: str = "", transponder_code: int = 2000,
                  transponder_mode: TransponderMode = TransponderMode.ON,
                  rating: PilotRating = PilotRating.OBS,
@@ -325,31 +661,22 @@ class FSDPilotDataUpdateMessage(FSDMessage):
         self.position = position or FSDPilotPosition()
     
     def serialize(self) -> str:
-        # 格式: @N:SENDER:TRANSPONDER_CODE:RATING:LAT:LON:ALT:GS:PBH:ON_GROUND
-        # 注意: 根据 FSD 协议，PDU 标识符是 "N"，PBH 需要特殊编码
+        # 格式: @MODE:SENDER:TRANSPONDER_CODE:RATING:LAT:LON:ALT:GS:PBH:PDIFF
+        # MODE 为应答机模式（S 待命 / N 正常），PBH 按标准位布局打包（含 on_ground），
+        # PDIFF 为气压高度与真实高度之差
         pos = self.position
-        
-        # PBH 编码: 将 pitch, bank, heading 打包成一个 32 位整数
-        # 这是 FSD 协议的标准编码方式
-        def encode_pbh(pitch, bank, heading):
-            # 将角度转换为弧度，然后编码
-            import math
-            p = int((pitch * math.pi / 180.0) * 10430.0) & 0xFFFF
-            b = int((bank * math.pi / 180.0) * 10430.0) & 0xFFFF
-            h = int((heading * math.pi / 180.0) * 10430.0) & 0xFFFF
-            return (p << 16) | (b << 8) | h
-        
-        pbh = encode_pbh(pos.pitch, pos.bank, pos.heading)
-        
-        # 使用 "N" 作为 PDU 标识符（标准 FSD 协议）
-        return (f"@N:{self.sender}:{self.transponder_code}:{self.rating}:"
+        mode = 'S' if self.transponder_mode == TransponderMode.STANDBY else 'N'
+        pbh = _encode_pbh(pos.pitch, pos.bank, pos.heading, pos.on_ground)
+        return (f"@{mode}:{self.sender}:{self.transponder_code}:{int(self.rating)}:"
                 f"{pos.latitude:.6f}:{pos.longitude:.6f}:{pos.altitude_true}:"
-                f"{pos.groundspeed}:{pbh}:{1 if pos.on_ground else 0}\r\n")
+                f"{pos.groundspeed}:{pbh}:{pos.altitude_pressure - pos.altitude_true}\r\n")
 
 
 class FSDTextMessage(FSDMessage):
     """文本消息 (#TM)"""
     
+    __slots__ = ('message',)
+    
     def __init__(self, sender: str = "", receiver: str = "", message: str = ""):
         super().__init__(MessageType.TEXT_MESSAGE, sender, receiver)
         self.message = message
@@ -362,6 +689,8 @@ class FSDTextMessage(FSDMessage):
 class FSDPingMessage(FSDMessage):
     """Ping 消息 ($PI)"""
     
+    __slots__ = ('timestamp',)
+    
     def __init__(self, sender: str = "", timestamp: str = ""):
         super().__init__(MessageType.PING, sender)
         self.timestamp = timestamp or str(int(time.time()))
@@ -373,6 +702,8 @@ class FSDPingMessage(FSDMessage):
 class FSDPongMessage(FSDMessage):
     """Pong 消息 ($PO)"""
     
+    __slots__ = ('timestamp',)
+    
     def __init__(self, sender: str = "", timestamp: str = ""):
         super().__init__(MessageType.PONG, sender)
         self.timestamp = timestamp
@@ -384,6 +715,8 @@ class FSDPongMessage(FSDMessage):
 class FSDClientQueryMessage(FSDMessage):
     """客户端查询消息 ($CQ)"""
     
+    __slots__ = ('query_type',)
+    
     QUERY_TYPES = {
         "ATIS": "请求 ATIS",
         "CAPS": "请求能力",
@@ -408,6 +741,8 @@ class FSDClientQueryMessage(FSDMessage):
 class FSDClientResponseMessage(FSDMessage):
     """客户端响应消息 ($CR)"""
     
+    __slots__ = ('response_type', 'data')
+    
     def __init__(self, sender: str = "", receiver: str = "", response_type: str = "", data: str = ""):
         super().__init__(MessageType.CLIENT_RESPONSE, sender, receiver)
         self.response_type = response_type
@@ -420,6 +755,8 @@ class FSDClientResponseMessage(FSDMessage):
 class FSDFlightPlanMessage(FSDMessage):
     """飞行计划消息 ($FP)"""
     
+    __slots__ = ('flight_plan',)
+    
     def __init__(self, callsign: str = "", flight_plan: FSDFlightPlan = None):
         super().__init__(MessageType.FLIGHT_PLAN, callsign)
         self.flight_plan = flight_plan or FSDFlightPlan()
@@ -441,17 +778,106 @@ class FSDDeletePilotMessage(FSDMessage):
     例如: #DPB2352:SERVER
     """
     
-    def __init__(self, callsign: str = ""):
+    __slots__ = ('cid',)
+    
+    def __init__(self, callsign: str = "", cid: str = ""):
         super().__init__(MessageType.DELETE_PILOT, callsign)
+        self.cid = cid
     
     def serialize(self) -> str:
         # 格式: #DP发送方:接收方
         return f"#DP{self.sender}:SERVER\r\n"
 
 
+class FSDAddATCMessage(FSDMessage):
+    """管制员上线消息 (#AA)
+    
+    格式: #AA呼号:SERVER:RealName:CID:密码:权限等级:协议版本
+    """
+    
+    __slots__ = ('real_name', 'cid', 'rating')
+    
+    def __init__(self, callsign: str = "", real_name: str = "", cid: str = "", rating: int = 0):
+        super().__init__(MessageType.ADD_ATC, callsign)
+        self.real_name = real_name
+        self.cid = cid
+        self.rating = rating
+
+
+class FSDDeleteATCMessage(FSDMessage):
+    """管制员下线消息 (#DA)"""
+    
+    __slots__ = ('cid',)
+    
+    def __init__(self, callsign: str = "", cid: str = ""):
+        super().__init__(MessageType.DELETE_ATC, callsign)
+        self.cid = cid
+
+
+class FSDAtcDataUpdateMessage(FSDMessage):
+    """管制员位置更新消息 (%)
+    
+    格式: %呼号:频率:设施类型:视程:权限等级:纬度:经度:高度
+    """
+    
+    __slots__ = ('frequency', 'facility', 'visual_range', 'rating', 'latitude', 'longitude')
+    
+    def __init__(self, callsign: str = "", frequency: str = "", facility: int = 0,
+                 visual_range: int = 0, rating: int = 0,
+                 latitude: float = 0.0, longitude: float = 0.0):
+        super().__init__(MessageType.ATC_DATA_UPDATE, callsign)
+        self.frequency = frequency
+        self.facility = facility
+        self.visual_range = visual_range
+        self.rating = rating
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class FSDSquawkBoxMessage(FSDMessage):
+    """SquawkBox 扩展消息 (#SB)，如机型信息请求 (PIR) 与回复 (PI)
+    
+    格式: #SB发送方:接收方:子类型:数据...
+    """
+    
+    __slots__ = ('sub_type', 'fields')
+    
+    def __init__(self, sender: str = "", receiver: str = "", sub_type: str = "", fields: List[str] = None):
+        super().__init__(MessageType.SQUAWKBOX, sender, receiver)
+        self.sub_type = sub_type
+        self.fields = fields or []
+
+
+class FSDMetarRequestMessage(FSDMessage):
+    """METAR 请求消息 ($AX)
+    
+    格式: $AX发送方:SERVER:METAR:机场
+    """
+    
+    __slots__ = ('station',)
+    
+    def __init__(self, sender: str = "", receiver: str = "SERVER", station: str = ""):
+        super().__init__(MessageType.METAR_REQUEST, sender, receiver)
+        self.station = station
+    
+    def serialize(self) -> str:
+        return f"$AX{self.sender}:{self.receiver}:METAR:{self.station}\r\n"
+
+
+class FSDServerHeartbeatMessage(FSDMessage):
+    """服务器心跳包 (#DL)"""
+    
+    __slots__ = ()
+    
+    def __init__(self, sender: str = "", receiver: str = ""):
+        super().__init__(MessageType.SERVER_HEARTBEAT, sender, receiver)
+
+
 class FSDServerErrorMessage(FSDMessage):
     """服务器错误消息 ($ER)"""
     
+    __slots__ = ('error_type', 'message')
+    
     def __init__(self, receiver: str = "", error_type: str = "", message: str = ""):
         super().__init__(MessageType.SERVER_ERROR, "", receiver)
         self.error_type = error_type
@@ -468,200 +894,699 @@ class FSDServerErrorMessage(FSDMessage):
 
 # ==================== 消息解析器 ====================
 
+def _encode_pbh(pitch: float, bank: float, heading: float, on_ground: bool = False) -> int:
+    """按标准 FSD 位布局打包 pitch/bank/heading/on_ground（_decode_pbh 的逆运算）"""
+    p = int(round(pitch * 1024 / 360.0)) & 0x3FF
+    b = int(round(bank * 1024 / 360.0)) & 0x3FF
+    h = int(round((heading % 360.0) * 1024 / 360.0)) & 0x3FF
+    return (p << 22) | (b << 12) | (h << 2) | (0x2 if on_ground else 0)
+
+
+def _decode_pbh(value: int) -> Tuple[float, float, float, bool]:
+    """解码标准 FSD PBH 打包值
+    
+    位布局: pitch[31:22] bank[21:12] heading[11:2] on_ground[1]，角度单位为 360/1024 度，
+    pitch/bank 为 10 位有符号数。
+    """
+    value &= 0xFFFFFFFF
+    pitch = (value >> 22) & 0x3FF
+    bank = (value >> 12) & 0x3FF
+    heading = (value >> 2) & 0x3FF
+    if pitch > 511:
+        pitch -= 1024
+    if bank > 511:
+        bank -= 1024
+    return pitch * 0.3515625, bank * 0.3515625, heading * 0.3515625, bool(value & 0x2)
+
+
+_TRANSPONDER_MODES = {
+    'S': TransponderMode.STANDBY,
+    'N': TransponderMode.ON,
+    'Y': TransponderMode.ON,      # Ident
+}
+
+
+def _parse_pilot_position(body: str) -> Optional[FSDMessage]:
+    # N:CALLSIGN:SQUAWK:RATING:LAT:LON:ALT:GS:PBH:PDIFF
+    f = body.split(':')
+    if len(f) < 9:
+        return None
+    pitch, bank, heading, on_ground = _decode_pbh(int(f[8]))
+    altitude = int(float(f[6]))
+    pressure = altitude + int(f[9]) if len(f) > 9 and f[9] else altitude
+    # 高频路径：位置参数构造，避免关键字参数开销
+    position = FSDPilotPosition(float(f[4]), float(f[5]), altitude, pressure, int(f[7]),
+                                pitch, bank, heading, on_ground)
+    return FSDPilotDataUpdateMessage(
+        f[1], int(f[2] or 0), _TRANSPONDER_MODES.get(f[0], TransponderMode.ON),
+        int(f[3] or 0), position
+    )
+
+
+def _parse_atc_position(body: str) -> Optional[FSDMessage]:
+    # CALLSIGN:FREQ:FACILITY:VISRANGE:RATING:LAT:LON:ALT
+    f = body.split(':')
+    if len(f) < 7:
+        return None
+    return FSDAtcDataUpdateMessage(f[0], f[1], int(f[2] or 0), int(f[3] or 0),
+                                   int(f[4] or 0), float(f[5]), float(f[6]))
+
+
+def _parse_identification(body: str) -> Optional[FSDMessage]:
+    # SERVER[:CLIENT]:VERSION:CHALLENGE
+    f = body.split(':')
+    msg = FSDIdentificationMessage(f[-2] if len(f) >= 2 else "", f[-1])
+    msg.sender = f[0]
+    return msg
+
+
+def _parse_server_error(body: str, colon_form: bool) -> Optional[FSDMessage]:
+    if colon_form:
+        # RECEIVER:ERROR_TYPE:MESSAGE
+        f = body.split(':', 2)
+        if len(f) < 3:
+            return None
+        return FSDServerErrorMessage(f[0], f[1], f[2])
+    # SERVER:RECEIVER:CODE:PARAM:TEXT
+    f = body.split(':', 4)
+    if len(f) < 3:
+        return None
+    msg = FSDServerErrorMessage(f[1], f[2], f[4] if len(f) > 4 and f[4] else (f[3] if len(f) > 3 else ""))
+    msg.sender = f[0]
+    return msg
+
+
+def _parse_text(body: str) -> Optional[FSDMessage]:
+    # SENDER:RECEIVER:MESSAGE
+    f = body.split(':', 2)
+    if len(f) < 3:
+        return None
+    return FSDTextMessage(f[0], f[1], f[2])
+
+
+def _parse_client_query(body: str) -> Optional[FSDMessage]:
+    # SENDER:RECEIVER:QUERY_TYPE[:DATA]
+    f = body.split(':', 3)
+    if len(f) < 2:
+        return None
+    return FSDClientQueryMessage(f[0], f[1], f[2] if len(f) > 2 else "")
+
+
+def _parse_client_response(body: str) -> Optional[FSDMessage]:
+    # SENDER:RECEIVER:RESPONSE_TYPE:DATA...
+    f = body.split(':', 3)
+    if len(f) < 3:
+        return None
+    return FSDClientResponseMessage(f[0], f[1], f[2], f[3] if len(f) > 3 else "")
+
+
+def _parse_ping(body: str) -> Optional[FSDMessage]:
+    # SENDER:RECEIVER:TIMESTAMP
+    f = body.split(':')
+    msg = FSDPingMessage(f[0], f[-1] if len(f) >= 2 else "")
+    if len(f) >= 3:
+        msg.receiver = f[1]
+    return msg
+
+
+def _parse_pong(body: str) -> Optional[FSDMessage]:
+    # SENDER[:RECEIVER]:TIMESTAMP
+    f = body.split(':')
+    if len(f) < 2:
+        return None
+    msg = FSDPongMessage(f[0], f[-1])
+    if len(f) >= 3:
+        msg.receiver = f[1]
+    return msg
+
+
+def _parse_add_pilot(body: str) -> Optional[FSDMessage]:
+    # CALLSIGN:SERVER:CID:PASSWORD:RATING:PROTOCOL:SIMTYPE:REALNAME
+    f = body.split(':', 7)
+    if len(f) < 3:
+        return None
+    return FSDAddPilotMessage(
+        f[0], f[2], "",
+        int(f[4]) if len(f) > 4 and f[4].isdigit() else PilotRating.OBS,
+        int(f[5]) if len(f) > 5 and f[5].isdigit() else ProtocolRevision.CLASSIC,
+        int(f[6]) if len(f) > 6 and f[6].isdigit() else 0,
+        f[7] if len(f) > 7 else ""
+    )
+
+
+def _parse_delete_pilot(body: str) -> Optional[FSDMessage]:
+    # CALLSIGN[:CID]
+    f = body.split(':')
+    return FSDDeletePilotMessage(f[0], f[1] if len(f) > 1 else "")
+
+
+def _parse_add_atc(body: str) -> Optional[FSDMessage]:
+    # CALLSIGN:SERVER:REALNAME:CID:PASSWORD:RATING:PROTOCOL
+    f = body.split(':')
+    if len(f) < 4:
+        return None
+    return FSDAddATCMessage(f[0], f[2], f[3], int(f[5]) if len(f) > 5 and f[5].isdigit() else 0)
+
+
+def _parse_delete_atc(body: str) -> Optional[FSDMessage]:
+    # CALLSIGN[:CID]
+    f = body.split(':')
+    return FSDDeleteATCMessage(f[0], f[1] if len(f) > 1 else "")
+
+
+def _parse_flight_plan(body: str) -> Optional[FSDMessage]:
+    # CALLSIGN:RECEIVER:TYPE:AIRCRAFT:TAS:DEP:DEPTIME:ACTTIME:ALT:DEST:
+    # HRSENROUTE:MINENROUTE:HRSFUEL:MINFUEL:ALTERNATE:REMARKS:ROUTE
+    f = body.split(':', 16)
+    if len(f) < 17:
+        return None
+    plan = FSDFlightPlan(
+        flight_type=f[2], aircraft_type=f[3], true_cruise_speed=f[4],
+        departure_airport=f[5], estimated_departure_time=f[6], actual_departure_time=f[7],
+        cruise_altitude=f[8], destination_airport=f[9],
+        estimated_enroute_time=f"{f[10]}:{f[11]}", fuel_on_board=f"{f[12]}:{f[13]}",
+        alternate_airport=f[14], remarks=f[15], route=f[16],
+    )
+    msg = FSDFlightPlanMessage(f[0], plan)
+    msg.receiver = f[1]
+    return msg
+
+
+def _parse_squawkbox(body: str) -> Optional[FSDMessage]:
+    # SENDER:RECEIVER:SUBTYPE:DATA...
+    f = body.split(':')
+    if len(f) < 3:
+        return None
+    return FSDSquawkBoxMessage(f[0], f[1], f[2], f[3:])
+
+
+def _parse_metar_request(body: str) -> Optional[FSDMessage]:
+    # SENDER:SERVER:METAR:STATION
+    f = body.split(':')
+    if len(f) < 4:
+        return None
+    return FSDMetarRequestMessage(f[0], f[1], f[3])
+
+
+def _parse_heartbeat(body: str) -> Optional[FSDMessage]:
+    f = body.split(':')
+    return FSDServerHeartbeatMessage(f[0], f[1] if len(f) > 1 else "")
+
+
 class FSDMessageParser:
-    """FSD 消息解析器"""
+    """FSD 消息解析器
+    
+    按 PDU 前缀（'@'、'%' 或三字符前缀如 '$DI'、'#TM'）查表分发到对应的解析函数。
+    同时兼容前缀后紧跟 ':' 的写法（如 '$DI:SERVER:...'）。
+    """
+    
+    # 单字符前缀
+    _SHORT_HANDLERS: Dict[str, Callable[[str], Optional[FSDMessage]]] = {
+        '@': _parse_pilot_position,
+        '%': _parse_atc_position,
+    }
+    
+    # 三字符前缀
+    _HANDLERS: Dict[str, Callable[[str], Optional[FSDMessage]]] = {
+        '$DI': _parse_identification,
+        '#TM': _parse_text,
+        '$CQ': _parse_client_query,
+        '$CR': _parse_client_response,
+        '$PI': _parse_ping,
+        '$PO': _parse_pong,
+        '#AP': _parse_add_pilot,
+        '#DP': _parse_delete_pilot,
+        '#AA': _parse_add_atc,
+        '#DA': _parse_delete_atc,
+        '$FP': _parse_flight_plan,
+        '#SB': _parse_squawkbox,
+        '$AX': _parse_metar_request,
+        '#DL': _parse_heartbeat,
+    }
     
-    @staticmethod
-    def parse(data: str) -> Optional[FSDMessage]:
-        """解析 FSD 消息"""
+    @classmethod
+    def parse(cls, data: str) -> Optional[FSDMessage]:
+        """解析 FSD 消息，无法识别或格式错误时返回 None"""
         data = data.strip()
         if not data:
             return None
         
-        # 根据 PDU 标识符判断消息类型
-        if data.startswith("$DI:"):
-            return FSDIdentificationMessage.parse(data)
-        elif data.startswith("$ER:"):
-            return FSDServerErrorMessage.parse(data)
-        elif data.startswith("#TM"):
-            # 格式: #TMSENDER:RECEIVER:MESSAGE
-            # 例如: #TMSERVER:1234:Welcome message
-            # 使用 partition 分割前两个冒号，剩余部分作为消息内容
-            # 去掉 #TM 前缀
-            content = data[3:]  # 去掉 #TM
-            parts = content.split(":", 2)
-            if len(parts) >= 3:
-                return FSDTextMessage(parts[0], parts[1], parts[2])
-        elif data.startswith("$CQ"):
-            # 格式: $CQSENDER:RECEIVER:QUERY_TYPE
-            # 例如: $CQSERVER:1234:CAPS
-            parts = data.split(":")
-            if len(parts) >= 3:
-                return FSDClientQueryMessage(parts[1], parts[2], parts[3] if len(parts) > 3 else "")
-        elif data.startswith("$PO:"):
-            parts = data.split(":")
-            if len(parts) >= 3:
-                return FSDPongMessage(parts[1], parts[2])
+        handler = cls._SHORT_HANDLERS.get(data[0])
+        if handler is not None:
+            body = data[1:]
+        else:
+            prefix = data[:3]
+            body = data[3:]
+            colon_form = body[:1] == ':'
+            if colon_form:
+                body = body[1:]
+            if prefix == '$ER':
+                # $ER 的两种写法字段含义不同，需要单独处理
+                return _parse_server_error(body, colon_form)
+            handler = cls._HANDLERS.get(prefix)
+            if handler is None:
+                return None
         
-        # 未知消息类型
-        logger.debug(f"未知消息类型: {data[:50]}...")
-        return None
+        try:
+            return handler(body)
+        except (ValueError, IndexError):
+            return None
 
 
-# ==================== FSD 客户端 ====================
+# ==================== 在线交通表 ====================
 
-class FSDClient(QObject):
-    """FSD 协议客户端
+class TrafficRecord:
+    """单架在线飞机的最新状态（位置对象直接复用解析结果，不做复制）"""
+    
+    __slots__ = ('callsign', 'cid', 'real_name', 'transponder_code', 'transponder_mode',
+                 'rating', 'position', 'last_seen')
+    
+    def __init__(self, callsign: str, now: float):
+        self.callsign = callsign
+        self.cid = ""
+        self.real_name = ""
+        self.transponder_code = 0
+        self.transponder_mode = TransponderMode.STANDBY
+        self.rating = 0
+        self.position: Optional[FSDPilotPosition] = None
+        self.last_seen = now
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为与 /clients 接口 pilots 条目相同的字段"""
+        pos = self.position or FSDPilotPosition()
+        return {
+            'callsign': self.callsign,
+            'cid': self.cid or None,
+            'latitude': pos.latitude,
+            'longitude': pos.longitude,
+            'altitude': pos.altitude_true,
+            'ground_speed': pos.groundspeed,
+            'heading': round(pos.heading),
+            'transponder': f"{self.transponder_code:04d}",
+        }
+
+
+class TrafficTable:
+    """按呼号索引的在线交通表，由 '@' / '#AP' / '#DP' 消息驱动
     
-    支持 9号协议连接到 FSD 服务器 (如 fsd.flyisfp.com)
+    所有修改只记录变更集合，由调用方定期 take_changes() 批量取出，
+    同一呼号在一个批次内的多次位置更新只通知一次。
+    超过 stale_timeout 秒没有位置更新的飞机由 evict_stale() 移除。
     """
     
-    # 信号
-    connected = Signal()
-    disconnected = Signal()
-    authentication_failed = Signal(str)  # 错误信息
-    error = Signal(str)
-    message_received = Signal(FSDMessage)
-    text_message_received = Signal(str, str, str)  # sender, receiver, message
-    position_updated = Signal(str, FSDPilotPosition)  # callsign, position
-    pilot_added = Signal(str)  # callsign
-    pilot_removed = Signal(str)  # callsign
-    atc_added = Signal(str)  # callsign
-    atc_removed = Signal(str)  # callsign
-    server_error = Signal(str, str)  # error_type, message
+    STALE_TIMEOUT_S = 60.0
     
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        
-        # 网络连接
-        self.socket = QTcpSocket(self)
-        self.socket.connected.connect(self._on_connected)
-        self.socket.disconnected.connect(self._on_disconnected)
-        self.socket.errorOccurred.connect(self._on_error)
-        self.socket.readyRead.connect(self._on_ready_read)
-        
-        # 状态
-        self._is_connected = False
-        self._is_authenticated = False
-        self._server_version = ""
-        self._initial_challenge = ""
-        self._capabilities = Capabilities.FAST_POS | Capabilities.VIS_POS
-        
-        # 用户信息
-        self._callsign = ""
-        self._cid = ""
-        self._password = ""
-        self._real_name = ""
-        self._rating = 1  # 默认 rating=1，根据 FSD9 协议文档示例
-        
-        # 心跳定时器
-        self._ping_timer = QTimer(self)
-        self._ping_timer.timeout.connect(self._send_ping)
-        self._ping_interval = 15000  # 15 秒发送一次 ping
-        
-        # 位置更新定时器
-        self._position_timer = QTimer(self)
-        self._position_timer.timeout.connect(self._send_position_update)
-        self._position_interval = 200  # 0.2 秒发送一次位置更新
-        
-        # 当前位置
-        self._current_position = FSDPilotPosition()
-        self._transponder_code = 2000
-        self._transponder_mode = TransponderMode.ON
-        
-        # 接收缓冲区
-        self._receive_buffer = ""
-        
-        # 初始化连线日志
-        if CONNECTION_LOGGING_AVAILABLE:
-            setup_connection_logging(is_logging_enabled())
-            self._log_protocol_documentation()
-        
-        logger.info("FSDClient 初始化完成")
-        if CONNECTION_LOGGING_AVAILABLE:
-            log_connection_event('FSDClient', '初始化完成')
+    def __init__(self, stale_timeout: float = STALE_TIMEOUT_S, clock: Callable[[], float] = time.monotonic):
+        self.stale_timeout = stale_timeout
+        self._clock = clock
+        self._records: Dict[str, TrafficRecord] = {}
+        self._added: set = set()
+        self._dirty: set = set()
+        self._removed: set = set()
+        self.updates = 0
     
-    def _log_protocol_documentation(self):
-        """记录 FSD 协议版本信息到日志"""
-        if not CONNECTION_LOGGING_AVAILABLE:
-            return
-        
-        # 记录协议版本信息
-        log_connection_event('FSDClient', 'PROTOCOL', 'FSD Protocol 9 (Classic)')
+    def __len__(self) -> int:
+        return len(self._records)
     
-    @property
-    def is_connected(self) -> bool:
-        """是否已连接到服务器"""
-        return self._is_connected
+    def __contains__(self, callsign: str) -> bool:
+        return callsign in self._records
     
-    @property
-    def is_authenticated(self) -> bool:
-        """是否已通过认证"""
-        return self._is_authenticated
+    def get(self, callsign: str) -> Optional[TrafficRecord]:
+        return self._records.get(callsign)
     
-    def connect_to_server(self, host: str, port: int = 6809) -> bool:
-        """连接到 FSD 服务器
-        
-        Args:
-            host: 服务器地址 (如 fsd.flyisfp.com)
-            port: 服务器端口 (默认 6809)
+    def records(self) -> List[TrafficRecord]:
+        return list(self._records.values())
+    
+    def _touch(self, callsign: str, now: float) -> TrafficRecord:
+        record = self._records.get(callsign)
+        if record is None:
+            record = self._records[callsign] = TrafficRecord(callsign, now)
+            if callsign in self._removed:
+                # 同一批次内先下线又上线：对外表现为一次更新
+                self._removed.discard(callsign)
+                self._dirty.add(callsign)
+            else:
+                self._added.add(callsign)
+        else:
+            record.last_seen = now
+            self._dirty.add(callsign)
+        return record
+    
+    def update_position(self, msg: FSDPilotDataUpdateMessage, now: Optional[float] = None) -> TrafficRecord:
+        """应用一条 '@' 位置更新"""
+        record = self._touch(msg.sender, self._clock() if now is None else now)
+        record.position = msg.position
+        record.transponder_code = msg.transponder_code
+        record.transponder_mode = msg.transponder_mode
+        record.rating = msg.rating
+        self.updates += 1
+        return record
+    
+    def add_pilot(self, callsign: str, cid: str = "", real_name: str = "",
+                  now: Optional[float] = None) -> TrafficRecord:
+        """应用一条 '#AP' 上线消息（位置要等第一条 '@' 才有）"""
+        record = self._touch(callsign, self._clock() if now is None else now)
+        if cid:
+            record.cid = cid
+        if real_name:
+            record.real_name = real_name
+        return record
+    
+    def remove(self, callsign: str, notify_unknown: bool = False) -> bool:
+        """应用一条 '#DP' 下线消息
         
-        Returns:
-            是否成功开始连接
+        notify_unknown=True 时，表中没有的呼号也会记为下线（界面可能从 REST 快照得知该飞机）。
         """
-        if self._is_connected:
-            logger.warning("已经连接到 FSD 服务器")
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '连接失败', '已经连接到服务器')
-            return True
-        
-        logger.info(f"正在连接到 FSD 服务器: {host}:{port}")
-        if CONNECTION_LOGGING_AVAILABLE:
-            log_connection_event('FSDClient', '开始连接', f'{host}:{port}')
-            log_connection_event('FSDClient', '协议信息', 'FSD Protocol 9 (Classic)')
-        
-        self.socket.connectToHost(host, port)
-        
-        result = self.socket.waitForConnected(5000)
-        if CONNECTION_LOGGING_AVAILABLE:
-            if result:
-                log_connection_event('FSDClient', 'TCP连接成功', f'{host}:{port}')
-            else:
-                log_connection_error('FSDClient', f'TCP连接失败: {self.socket.errorString()}')
-        
-        return result
+        if self._records.pop(callsign, None) is None:
+            if notify_unknown:
+                self._removed.add(callsign)
+            return False
+        self._dirty.discard(callsign)
+        if callsign in self._added:
+            # 本批次内上线又下线，调用方从未见过它
+            self._added.discard(callsign)
+        else:
+            self._removed.add(callsign)
+        return True
     
-    def disconnect_from_server(self):
-        """断开与 FSD 服务器的连接"""
-        if not self._is_connected:
+    def evict_stale(self, now: Optional[float] = None) -> List[str]:
+        """移除超时未更新的飞机，返回被移除的呼号"""
+        cutoff = (self._clock() if now is None else now) - self.stale_timeout
+        stale = [cs for cs, r in self._records.items() if r.last_seen < cutoff]
+        for callsign in stale:
+            self.remove(callsign)
+        return stale
+    
+    def clear(self) -> List[str]:
+        """清空（断开连接时），所有已通知过的飞机都记为下线"""
+        callsigns = list(self._records)
+        for callsign in callsigns:
+            self.remove(callsign)
+        return callsigns
+    
+    def has_changes(self) -> bool:
+        return bool(self._added or self._dirty or self._removed)
+    
+    def take_changes(self) -> Tuple[List[str], List[TrafficRecord], List[str]]:
+        """取出并清空自上次调用以来的变更: (上线呼号, 更新记录, 下线呼号)"""
+        records = self._records
+        added = [cs for cs in self._added if cs in records]
+        updated = [records[cs] for cs in self._dirty if cs in records and cs not in self._added]
+        removed = list(self._removed)
+        self._added.clear()
+        self._dirty.clear()
+        self._removed.clear()
+        return added, updated, removed
+
+
+# ==================== 协议会话核心 ====================
+
+class AsyncioTimer:
+    """用法与 QTimer 相同（start(ms) / stop() / isActive()）的 asyncio 周期定时器
+
+    必须在运行中的事件循环里 start()。回调落后时跳过错过的周期，不连续补发。
+    """
+
+    def __init__(self, callback: Callable[[], Any]):
+        self._callback = callback
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._interval = 0.0
+        self._next = 0.0
+
+    def start(self, interval_ms: int):
+        self.stop()
+        self._loop = asyncio.get_running_loop()
+        self._interval = interval_ms / 1000.0
+        self._next = self._loop.time() + self._interval
+        self._handle = self._loop.call_at(self._next, self._fire)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def isActive(self) -> bool:
+        return self._handle is not None
+
+    def _fire(self):
+        now = self._loop.time()
+        self._next += self._interval
+        if self._next < now:
+            self._next = now + self._interval
+        # 先排下一次，回调抛异常也不会停掉定时器
+        self._handle = self._loop.call_at(self._next, self._fire)
+        self._callback()
+
+
+class FSDSessionListener:
+    """FSDSession 的事件回调，默认全部为空操作"""
+
+    def on_connected(self):
+        pass
+
+    def on_disconnected(self, exc: Optional[Exception]):
+        pass
+
+    def on_message(self, msg: FSDMessage):
+        pass
+
+    def on_text_message(self, sender: str, receiver: str, message: str):
+        pass
+
+    def on_server_error(self, error_type: str, message: str):
+        pass
+
+    def on_authentication_failed(self, message: str):
+        pass
+
+    def on_traffic_changed(self, added: List[str], updated: List[TrafficRecord], removed: List[str]):
+        pass
+
+
+# 标准 $ER 错误码中表示登录被拒绝的部分：呼号占用、呼号无效、CID/密码错误、协议版本、权限不足、被封禁
+LOGIN_ERROR_CODES = ("1", "2", "6", "10", "11", "13")
+
+
+class FSDSession(asyncio.Protocol):
+    """FSD 9号协议会话：与传输方式无关的协议核心
+
+    实现 asyncio.Protocol（connection_made / data_received / connection_lost），可以直接交给
+    loop.create_connection()，也可以由 FSDClient 用 QTcpSocket 驱动。认证、查询回复、心跳、
+    位置发送和交通表都在这里完成，事件通过 FSDSessionListener 回调通知。
+
+    transport 只需提供 write()、get_write_buffer_size()、is_closing() 和 close()。
+    位置更新是可丢弃的：写缓冲超过 write_buffer_limit（或 asyncio 调用了 pause_writing()）时
+    直接跳过并计入 positions_dropped，下一次发送的就是更新后的位置；其他消息总是写入。
+
+    定时器由 timer_factory(callback) 创建，返回的对象需支持 start(ms) / stop()；
+    默认使用 AsyncioTimer，FSDClient 传入 QTimer。
+    """
+
+    WRITE_BUFFER_LIMIT = 64 * 1024
+    PING_INTERVAL_MS = 15000
+    TRAFFIC_INTERVAL_MS = 500    # 交通表批量通知间隔
+    TRAFFIC_SWEEP_S = 5.0        # 超时飞机清理间隔
+
+    def __init__(self, listener: Optional[FSDSessionListener] = None,
+                 timer_factory: Optional[Callable[[Callable[[], Any]], Any]] = None):
+        self.listener = listener or FSDSessionListener()
+        self.transport = None
+
+        # 状态
+        self.is_connected = False
+        self.is_authenticated = False
+        self.server_version = ""
+        self.initial_challenge = ""
+        self.capabilities = Capabilities.FAST_POS | Capabilities.VIS_POS
+
+        # 用户信息
+        self.callsign = ""
+        self.cid = ""
+        self.password = ""
+        self.real_name = ""
+        self.rating = 1  # 默认 rating=1，根据 FSD9 协议文档示例
+        self.sim_type = 16  # X-Plane 11=15, X-Plane 12=16
+
+        # 当前位置
+        self.current_position = FSDPilotPosition()
+        # 航位推算：发送间隔短于样本间隔时外推位置，避免重复发送同一位置
+        self.extrapolator = PositionExtrapolator()
+        self.dead_reckoning_enabled = True
+        # update_position 可在 X-Plane 接收线程中调用，位置和外推器状态由此锁保护
+        self._position_lock = threading.Lock()
+        # 自适应发送：按飞行阶段选择间隔，变化很小时跳过发送（保留最低频率保活）
+        self.send_scheduler = AdaptiveSendScheduler()
+        self.adaptive_send_enabled = True
+        self.transponder_code = 2000
+        self.transponder_mode = TransponderMode.ON
+
+        # 发送缓冲与统计
+        self.write_buffer_limit = self.WRITE_BUFFER_LIMIT
+        self.positions_sent = 0
+        self.positions_dropped = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._writing_paused = False
+
+        # 接收缓冲区（按字节切分，避免多字节字符被拆在两个数据块之间）
+        self._receive_buffer = b""
+
+        # 在线交通表：'@' 更新先写入表，由定时器批量通知
+        self.traffic = TrafficTable()
+        self._traffic_last_sweep = 0.0
+
+        make_timer = timer_factory or AsyncioTimer
+        self.ping_timer = make_timer(self.send_ping)
+        self.position_timer = make_timer(self.send_position_update)
+        self.traffic_timer = make_timer(self.flush_traffic)
+
+        # 消息分发表（按消息类型查表，避免逐个 isinstance 判断）
+        self._message_handlers: Dict[MessageType, Callable[[FSDMessage], None]] = {
+            MessageType.FSD_IDENTIFICATION: self._handle_identification,
+            MessageType.SERVER_ERROR: self._handle_server_error,
+            MessageType.TEXT_MESSAGE: self._handle_text_message,
+            MessageType.CLIENT_QUERY: self._handle_client_query,
+            MessageType.PING: self._handle_ping,
+            MessageType.PONG: self._handle_pong,
+            MessageType.PILOT_DATA_UPDATE: self._handle_pilot_data_update,
+            MessageType.ADD_PILOT: self._handle_add_pilot,
+            MessageType.DELETE_PILOT: self._handle_delete_pilot,
+        }
+
+    def set_credentials(self, callsign: str, cid: str, password: str,
+                        real_name: str = "", sim_type: int = 16):
+        """设置认证信息，连接建立后自动发送 #AP"""
+        self.callsign = callsign.upper()
+        self.cid = cid
+        self.password = password
+        self.real_name = real_name
+        self.sim_type = sim_type
+
+    @property
+    def has_credentials(self) -> bool:
+        return bool(self.callsign and self.cid and self.password)
+
+    @property
+    def write_buffer_size(self) -> int:
+        """transport 中尚未写出的字节数"""
+        transport = self.transport
+        return transport.get_write_buffer_size() if transport is not None else 0
+
+    @property
+    def is_congested(self) -> bool:
+        """写缓冲积压，可丢弃的消息（位置更新）应跳过"""
+        return self._writing_paused or self.write_buffer_size >= self.write_buffer_limit
+
+    # ---------- asyncio.Protocol ----------
+
+    def connection_made(self, transport):
+        """连接成功回调
+
+        根据 FSD9 协议，建立 TCP 连接后，客户端应立即发送 #AP (Add Pilot) 消息进行认证
+        """
+        self.transport = transport
+        self.is_connected = True
+        self._receive_buffer = b""
+        self._writing_paused = False
+        set_limits = getattr(transport, 'set_write_buffer_limits', None)
+        if set_limits is not None:
+            set_limits(high=self.write_buffer_limit)
+        logger.info("已连接到 FSD 服务器")
+        self.traffic_timer.start(self.TRAFFIC_INTERVAL_MS)
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '已连接', 'TCP连接成功，准备发送#AP认证')
+
+        # 根据 FSD9-Protocol.md，建立连接后应立即发送 #AP 消息
+        # 如果认证信息已设置，立即发送认证
+        if self.has_credentials:
+            logger.info(f"自动发送认证信息: callsign={self.callsign}")
+            if CONNECTION_LOGGING_AVAILABLE:
+                log_connection_event('FSDClient', '认证信息', f'Callsign={self.callsign}, CID={self.cid}')
+            self.authenticate(self.callsign, self.cid, self.password, self.real_name, sim_type=self.sim_type)
+        else:
+            logger.warning(f"认证信息不完整: callsign={self.callsign}, cid={self.cid}, password={'已设置' if self.password else '未设置'}")
+            if CONNECTION_LOGGING_AVAILABLE:
+                log_connection_event('FSDClient', '认证失败', f'信息不完整: callsign={self.callsign}, cid={self.cid}, has_password={bool(self.password)}')
+
+        self.listener.on_connected()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        """断开连接回调"""
+        was_connected = self.is_connected
+        self.is_connected = False
+        self.is_authenticated = False
+        self.transport = None
+        self.ping_timer.stop()
+        self.position_timer.stop()
+        with self._position_lock:
+            self.extrapolator.reset()
+        if self.send_scheduler.sent:
+            logger.info(f"位置发送统计: 发送 {self.send_scheduler.sent}, 跳过 {self.send_scheduler.skipped}, "
+                        f"拥塞丢弃 {self.positions_dropped}")
+        self.send_scheduler.reset()
+        self.traffic_timer.stop()
+        self.traffic.clear()
+        self.flush_traffic()
+        logger.info("与 FSD 服务器断开连接")
+        if CONNECTION_LOGGING_AVAILABLE and was_connected:
+            log_connection_event('FSDClient', '连接断开', f'连接已关闭{f": {exc}" if exc else ""}')
+        self.listener.on_disconnected(exc)
+
+    def pause_writing(self):
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+
+    def data_received(self, data: bytes):
+        """数据可读回调"""
+        if not data:
             return
-        
+        self.bytes_received += len(data)
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '原始数据接收', '字节数=%d, 内容=%s', len(data), clip_repr(data),
+                                 level=logging.DEBUG)
+
+        # 处理完整的消息（以 \r\n 分隔）
+        *lines, self._receive_buffer = (self._receive_buffer + data).split(b'\r\n')
+        for raw in lines:
+            line = raw.decode('utf-8', errors='ignore')
+            if CONNECTION_LOGGING_AVAILABLE:
+                log_connection_event('FSDClient', '消息分隔', '提取消息: %r', line, level=logging.DEBUG)
+            self.process_line(line)
+
+    # ---------- 会话操作 ----------
+
+    def close(self):
+        """发送 #DP 后关闭连接；connection_lost() 由 transport 回调"""
+        if not self.is_connected:
+            return
+
         logger.info("断开与 FSD 服务器的连接")
         if CONNECTION_LOGGING_AVAILABLE:
-            log_connection_event('FSDClient', '断开连接', f'callsign={self._callsign}')
-        
+            log_connection_event('FSDClient', '断开连接', f'callsign={self.callsign}')
+
         # 发送断开连接消息
-        if self._callsign:
-            self._send_message(FSDDeletePilotMessage(self._callsign))
-        
+        if self.callsign:
+            self.send_message(FSDDeletePilotMessage(self.callsign))
+
         # 停止定时器
-        self._ping_timer.stop()
-        self._position_timer.stop()
-        
-        # 断开连接
-        self.socket.disconnectFromHost()
-        if self.socket.state() != QAbstractSocket.SocketState.UnconnectedState:
-            self.socket.waitForDisconnected(1000)
-    
+        self.ping_timer.stop()
+        self.position_timer.stop()
+
+        if self.transport is not None:
+            self.transport.close()
+
     def authenticate(self, callsign: str, cid: str, password: str,
                      real_name: str = "", rating: int = 1,
                      sim_type: int = 16) -> bool:
         """发送认证信息
-        
+
         根据 FSD9-Protocol.md，建立 TCP 连接后应立即发送 #AP 消息进行认证
         格式: #AP发送方:SERVER:CID:密码:权限等级:9:模拟器类型:RealName
         例如: #APB2352:SERVER:2352:123456:1:9:16:2352 ZGHA
-        
+
         参数:
             callsign: 呼号
             cid: CID
@@ -670,322 +1595,581 @@ class FSDClient(QObject):
             rating: 权限等级 (根据文档示例使用 1)
             sim_type: 模拟器类型 (X-Plane 11=15, X-Plane 12=16)
         """
-        if not self._is_connected:
+        if not self.is_connected:
             logger.error("未连接到服务器，无法认证")
             return False
-        
-        self._callsign = callsign.upper()
-        self._cid = cid
-        self._password = password
-        self._real_name = real_name
-        
+
+        self.callsign = callsign.upper()
+        self.cid = cid
+        self.password = password
+        self.real_name = real_name
+
         # 对于标准 FSD 9号协议，直接发送明文密码
         password_to_send = password
-        
+
         # 根据 FSD9-Protocol.md 文档示例，rating 使用 1
         rating_value = 1
-        
+
         # 构建 #AP 消息
         # 格式: #AP发送方:SERVER:CID:密码:权限等级:9:模拟器类型:RealName
-        auth_msg = f"#AP{self._callsign}:SERVER:{cid}:{password_to_send}:{rating_value}:9:{sim_type}:{real_name}\r\n"
-        
+        auth_msg = f"#AP{self.callsign}:SERVER:{cid}:{password_to_send}:{rating_value}:9:{sim_type}:{real_name}\r\n"
+
         logger.info(f"发送认证信息: callsign={callsign}, cid={cid}, protocol=9")
         if CONNECTION_LOGGING_AVAILABLE:
             log_connection_event('FSDClient', '发送认证', f'原始消息: {repr(auth_msg)}')
-        
+
         # 直接发送原始消息
         encoded_data = auth_msg.encode('utf-8')
-        bytes_written = self.socket.write(encoded_data)
-        result = bytes_written == len(encoded_data)
-        
+        result = self._write(encoded_data)
+
         if result:
-            self._is_authenticated = True
+            self.is_authenticated = True
             logger.info("认证信息已发送，等待服务器确认")
             if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '认证已发送', f'已发送 {bytes_written} bytes')
-            
+                log_connection_event('FSDClient', '认证已发送', f'已发送 {len(encoded_data)} bytes')
+
             # 启动心跳检测（每15秒发送一次ping）
-            self.start_heartbeat(15000)
+            self.ping_timer.start(self.PING_INTERVAL_MS)
             if CONNECTION_LOGGING_AVAILABLE:
                 log_connection_event('FSDClient', '心跳启动', '每15秒发送一次ping')
         else:
             logger.error("认证发送失败")
             if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_error('FSDClient', f'认证发送失败: 期望 {len(encoded_data)} bytes, 实际 {bytes_written} bytes')
-        
+                log_connection_error('FSDClient', '认证发送失败: 连接已关闭')
+
         return result
-    
+
     def send_text_message(self, message: str, receiver: str = ""):
-        """发送文本消息
-        
-        Args:
-            message: 消息内容
-            receiver: 接收者（空字符串表示发送给所有 ATC）
-        """
-        if not self._is_authenticated:
+        """发送文本消息（receiver 为空表示发送给所有 ATC）"""
+        if not self.is_authenticated:
             logger.error("未通过认证，无法发送消息")
             return
-        
-        msg = FSDTextMessage(self._callsign, receiver, message)
-        self._send_message(msg)
-    
-    def send_private_message(self, message: str, receiver: str):
-        """发送私聊消息"""
-        self.send_text_message(message, receiver)
-    
-    def update_position(self, position: FSDPilotPosition,
-                       transponder_code: int = None,
-                       transponder_mode: TransponderMode = None):
-        """更新位置信息
-        
-        位置更新会自动定期发送给服务器
-        """
-        self._current_position = position
-        if transponder_code is not None:
-            self._transponder_code = transponder_code
-        if transponder_mode is not None:
-            self._transponder_mode = transponder_mode
-    
+        self.send_message(FSDTextMessage(self.callsign, receiver, message))
+
     def send_flight_plan(self, flight_plan: FSDFlightPlan):
         """提交飞行计划"""
-        if not self._is_authenticated:
+        if not self.is_authenticated:
             logger.error("未通过认证，无法提交飞行计划")
             return
-        
-        msg = FSDFlightPlanMessage(self._callsign, flight_plan)
-        self._send_message(msg)
-    
+        self.send_message(FSDFlightPlanMessage(self.callsign, flight_plan))
+
     def request_atis(self, atc_callsign: str):
         """请求 ATIS 信息"""
-        if not self._is_authenticated:
+        if not self.is_authenticated:
             return
-        
-        msg = FSDClientQueryMessage(self._callsign, atc_callsign, "ATIS")
-        self._send_message(msg)
-    
-    def _on_connected(self):
-        """连接成功回调
-        
-        根据 FSD9 协议，建立 TCP 连接后，客户端应立即发送 #AP (Add Pilot) 消息进行认证
+        self.send_message(FSDClientQueryMessage(self.callsign, atc_callsign, "ATIS"))
+
+    def update_position(self, position: FSDPilotPosition,
+                        transponder_code: int = None,
+                        transponder_mode: TransponderMode = None,
+                        timestamp: Optional[float] = None):
+        """更新位置信息，由 position_timer 定期发送
+
+        可在任意线程调用；timestamp 为样本的接收时刻（time.monotonic()），外推以它为起点，
+        省略时取当前时刻。
         """
-        self._is_connected = True
-        logger.info("已连接到 FSD 服务器")
-        if CONNECTION_LOGGING_AVAILABLE:
-            log_connection_event('FSDClient', '已连接', 'TCP连接成功，准备发送#AP认证')
-        
-        # 根据 FSD9-Protocol.md，建立连接后应立即发送 #AP 消息
-        # 如果认证信息已设置，立即发送认证
-        if self._callsign and self._cid and self._password:
-            logger.info(f"自动发送认证信息: callsign={self._callsign}")
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '认证信息', f'Callsign={self._callsign}, CID={self._cid}')
-            # 使用设置的 sim_type，默认为 16 (X-Plane 12)
-            sim_type = getattr(self, '_sim_type', 16)
-            self.authenticate(self._callsign, self._cid, self._password, self._real_name, sim_type=sim_type)
-        else:
-            logger.warning(f"认证信息不完整: callsign={self._callsign}, cid={self._cid}, password={'已设置' if self._password else '未设置'}")
+        with self._position_lock:
+            self.current_position = position
+            self.extrapolator.observe(position, timestamp)
+            if transponder_code is not None:
+                self.transponder_code = transponder_code
+            if transponder_mode is not None:
+                self.transponder_mode = transponder_mode
+
+    def start_position_updates(self, interval_ms: int = 200):
+        """按 interval_ms 启动位置发送定时器，并告知发送调度器定时器的触发间隔"""
+        self.send_scheduler.config.timer_interval = interval_ms / 1000.0
+        self.position_timer.start(interval_ms)
+
+    def send_ping(self):
+        """发送心跳 ping"""
+        if not self.is_connected:
+            return
+        self.send_message(FSDPingMessage(self.callsign))
+
+    def send_position_update(self):
+        """发送位置更新（写缓冲积压时跳过）"""
+        if not self.is_authenticated:
+            return
+        if self.is_congested:
+            self.positions_dropped += 1
+            return
+
+        now = time.monotonic()
+        with self._position_lock:
+            position = self.current_position
+            if self.dead_reckoning_enabled:
+                position = self.extrapolator.predict(now) or position
+            turn_rate = self.extrapolator.turn_rate
+            vertical_speed = self.extrapolator.vertical_speed
+            transponder_code = self.transponder_code
+            transponder_mode = self.transponder_mode
+
+        if self.adaptive_send_enabled:
+            scheduler = self.send_scheduler
+            if not scheduler.should_send(position, now, turn_rate, vertical_speed * 60.0):
+                return
+            scheduler.mark_sent(position, now)
+
+        msg = FSDPilotDataUpdateMessage(
+            callsign=self.callsign,
+            transponder_code=transponder_code,
+            transponder_mode=transponder_mode,
+            rating=self.rating,
+            position=position
+        )
+        if self.send_message(msg):
+            self.positions_sent += 1
+
+    def flush_traffic(self):
+        """批量通知交通表变更，并定期清理超时的飞机"""
+        now = time.monotonic()
+        if now - self._traffic_last_sweep >= self.TRAFFIC_SWEEP_S:
+            self._traffic_last_sweep = now
+            stale = self.traffic.evict_stale(now)
+            if stale:
+                logger.debug("移除超时飞机: %s", stale)
+        if not self.traffic.has_changes():
+            return
+        self.listener.on_traffic_changed(*self.traffic.take_changes())
+
+    # ---------- 发送 ----------
+
+    def _write(self, data: bytes) -> bool:
+        transport = self.transport
+        if transport is None or transport.is_closing():
+            return False
+        transport.write(data)
+        self.bytes_sent += len(data)
+        return True
+
+    def send_message(self, msg: FSDMessage) -> bool:
+        """发送消息"""
+        if not self.is_connected:
+            logger.error("未连接到服务器，无法发送消息")
             if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '认证失败', f'信息不完整: callsign={self._callsign}, cid={self._cid}, has_password={bool(self._password)}')
-        
-        self.connected.emit()
-    
-    def _on_disconnected(self):
-        """断开连接回调"""
-        was_connected = self._is_connected
-        self._is_connected = False
-        self._is_authenticated = False
-        self._ping_timer.stop()
-        self._position_timer.stop()
-        logger.info("与 FSD 服务器断开连接")
-        if CONNECTION_LOGGING_AVAILABLE and was_connected:
-            log_connection_event('FSDClient', '连接断开', '连接已关闭')
-        self.disconnected.emit()
-    
-    def _on_error(self, error_code):
-        """错误回调"""
-        error_msg = self.socket.errorString()
-        logger.error(f"FSD 连接错误: {error_msg}")
+                log_connection_error('FSDClient', '发送失败: 未连接')
+            return False
+
+        data = msg.serialize()
+        logger.debug("发送消息: %s", data.rstrip())
         if CONNECTION_LOGGING_AVAILABLE:
-            log_connection_error('FSDClient', f'连接错误: {error_msg}')
-        self.error.emit(error_msg)
-    
-    def _on_ready_read(self):
-        """数据可读回调"""
-        while self.socket.bytesAvailable() > 0:
-            data = self.socket.readAll().data().decode('utf-8', errors='ignore')
-            
-            if CONNECTION_LOGGING_AVAILABLE and data:
-                log_connection_event('FSDClient', '原始数据接收', f'字节数={len(data)}, 内容={repr(data[:200])}')
-            
-            self._receive_buffer += data
-            
-            # 处理完整的消息（以 \r\n 分隔）
-            while '\r\n' in self._receive_buffer:
-                line, self._receive_buffer = self._receive_buffer.split('\r\n', 1)
-                if CONNECTION_LOGGING_AVAILABLE:
-                    log_connection_event('FSDClient', '消息分隔', f'提取消息: {repr(line)}')
-                self._process_message(line)
-    
-    def _process_message(self, data: str):
-        """处理接收到的消息"""
+            log_fsd_message('SEND', data)
+            log_connection_event('FSDClient', '发送数据', '原始数据: %r', data, level=logging.DEBUG)
+
+        encoded_data = data.encode('utf-8')
+        result = self._write(encoded_data)
+
+        if CONNECTION_LOGGING_AVAILABLE:
+            if result:
+                log_connection_event('FSDClient', '发送成功', '已发送 %d bytes, 写缓冲 %d bytes',
+                                     len(encoded_data), self.write_buffer_size, level=logging.DEBUG)
+            else:
+                log_connection_error('FSDClient', f'发送失败: 连接已关闭, 丢弃 {len(encoded_data)} bytes')
+
+        return result
+
+    # ---------- 接收 ----------
+
+    def process_line(self, data: str):
+        """处理接收到的一行消息"""
         if not data:
             return
-        
-        logger.debug(f"收到消息: {data[:100]}...")
+
+        logger.debug("收到消息: %.100s", data)
         if CONNECTION_LOGGING_AVAILABLE:
             log_fsd_message('RECV', data)
-            log_connection_event('FSDClient', '消息处理', f'原始数据: {repr(data)}')
-        
+
         # 解析消息
         msg = FSDMessageParser.parse(data)
-        if not msg:
+        if msg is None:
             if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '收到未知消息', f'无法解析: {repr(data[:200])}')
-                # 尝试分析消息类型
-                if data.startswith('$'):
-                    log_connection_event('FSDClient', '消息分析', f'可能是服务器消息: {data[:50]}')
-                elif data.startswith('#'):
-                    log_connection_event('FSDClient', '消息分析', f'可能是ATC消息: {data[:50]}')
-                elif data.startswith('@'):
-                    log_connection_event('FSDClient', '消息分析', f'可能是飞行员位置: {data[:50]}')
-                else:
-                    log_connection_event('FSDClient', '消息分析', f'未知格式: {repr(data[:50])}')
+                log_connection_event('FSDClient', '收到未知消息', '无法解析: %s', clip_repr(data))
             return
-        
+
         # 处理特定消息类型
-        if isinstance(msg, FSDIdentificationMessage):
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '收到$DI', f'version={msg.server_version}, challenge={msg.initial_challenge}')
-            self._handle_identification(msg)
-        elif isinstance(msg, FSDServerErrorMessage):
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '收到$ER', f'type={msg.error_type}, msg={msg.message}')
-            self._handle_server_error(msg)
-        elif isinstance(msg, FSDTextMessage):
-            self.text_message_received.emit(msg.sender, msg.receiver, msg.message)
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '收到文本消息', f'from={msg.sender}: {msg.message[:50]}')
-        elif isinstance(msg, FSDClientQueryMessage):
-            # 处理客户端查询，例如 CAPS (能力查询)
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '收到$CQ', f'from={msg.sender}, type={msg.query_type}')
-            self._handle_client_query(msg)
-        elif isinstance(msg, FSDPongMessage):
-            logger.debug(f"收到 Pong: {msg.timestamp}")
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '收到$PO', f'timestamp={msg.timestamp}')
-        
-        self.message_received.emit(msg)
-    
+        handler = self._message_handlers.get(msg.msg_type)
+        if handler is not None:
+            handler(msg)
+
+        self.listener.on_message(msg)
+
+    def _handle_text_message(self, msg: FSDTextMessage):
+        """处理文本消息"""
+        self.listener.on_text_message(msg.sender, msg.receiver, msg.message)
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '收到文本消息', 'from=%s: %.50s', msg.sender, msg.message)
+
+    def _handle_ping(self, msg: FSDPingMessage):
+        """回复服务器 ping"""
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '收到$PI', 'from=%s, timestamp=%s', msg.sender, msg.timestamp)
+        if self.callsign:
+            self.send_message(FSDPongMessage(self.callsign, msg.timestamp))
+
+    def _handle_pong(self, msg: FSDPongMessage):
+        """处理 pong"""
+        logger.debug("收到 Pong: %s", msg.timestamp)
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '收到$PO', 'timestamp=%s', msg.timestamp)
+
+    def _handle_pilot_data_update(self, msg: FSDPilotDataUpdateMessage):
+        """其他飞行员的位置更新写入交通表（自己的回显忽略）"""
+        if msg.sender != self.callsign:
+            self.traffic.update_position(msg)
+
+    def _handle_add_pilot(self, msg: FSDAddPilotMessage):
+        if msg.callsign != self.callsign:
+            self.traffic.add_pilot(msg.callsign, msg.cid, msg.real_name)
+
+    def _handle_delete_pilot(self, msg: FSDDeletePilotMessage):
+        self.traffic.remove(msg.sender, notify_unknown=True)
+
     def _handle_client_query(self, msg: FSDClientQueryMessage):
         """处理客户端查询"""
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '收到$CQ', 'from=%s, type=%s', msg.sender, msg.query_type)
         if msg.query_type == "CAPS":
             # 服务器查询客户端能力，回复支持的能力
             # 格式: $CR:RECEIVER:SENDER:CAPS:CAPABILITY1:CAPABILITY2:...
-            caps_response = f"$CR:{msg.sender}:{self._callsign}:CAPS:ATCINFO:SECPOS:MODELDESC:INTERIMPOS\r\n"
+            caps_response = f"$CR:{msg.sender}:{self.callsign}:CAPS:ATCINFO:SECPOS:MODELDESC:INTERIMPOS\r\n"
             if CONNECTION_LOGGING_AVAILABLE:
                 log_connection_event('FSDClient', '发送$CR', f'回复CAPS查询: {caps_response.strip()}')
-            encoded_data = caps_response.encode('utf-8')
-            self.socket.write(encoded_data)
-    
+            self._write(caps_response.encode('utf-8'))
+
     def _handle_identification(self, msg: FSDIdentificationMessage):
         """处理服务器识别消息"""
-        self._server_version = msg.server_version
-        self._initial_challenge = msg.initial_challenge
-        logger.info(f"服务器版本: {self._server_version}, 挑战: {self._initial_challenge}")
-        
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '收到$DI', f'version={msg.server_version}, challenge={msg.initial_challenge}')
+        self.server_version = msg.server_version
+        self.initial_challenge = msg.initial_challenge
+        logger.info(f"服务器版本: {self.server_version}, 挑战: {self.initial_challenge}")
+
         if CONNECTION_LOGGING_AVAILABLE:
             log_connection_event('FSDClient', '协议流程', 'Step 1: 收到 $DI (Server Identification)')
-            log_connection_event('FSDClient', '服务器信息', f'Version={self._server_version}, Challenge={self._initial_challenge}')
+            log_connection_event('FSDClient', '服务器信息', f'Version={self.server_version}, Challenge={self.initial_challenge}')
             log_connection_event('FSDClient', '协议流程', 'Step 2: 准备发送 $AP (Add Pilot) 进行认证')
-        
+
         # 自动发送认证信息（如果已设置）
-        if self._callsign and self._cid and self._password:
-            logger.info(f"自动发送认证信息: callsign={self._callsign}")
+        if self.has_credentials:
+            logger.info(f"自动发送认证信息: callsign={self.callsign}")
             if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '认证信息', f'Callsign={self._callsign}, CID={self._cid}, Rating={self._rating}')
-            self.authenticate(self._callsign, self._cid, self._password, self._real_name, self._rating)
+                log_connection_event('FSDClient', '认证信息', f'Callsign={self.callsign}, CID={self.cid}, Rating={self.rating}')
+            self.authenticate(self.callsign, self.cid, self.password, self.real_name, self.rating, self.sim_type)
         else:
-            logger.warning(f"认证信息不完整: callsign={self._callsign}, cid={self._cid}, password={'已设置' if self._password else '未设置'}")
+            logger.warning(f"认证信息不完整: callsign={self.callsign}, cid={self.cid}, password={'已设置' if self.password else '未设置'}")
             if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_event('FSDClient', '认证失败', f'信息不完整: callsign={self._callsign}, cid={self._cid}, has_password={bool(self._password)}')
-    
+                log_connection_event('FSDClient', '认证失败', f'信息不完整: callsign={self.callsign}, cid={self.cid}, has_password={bool(self.password)}')
+
     def _handle_server_error(self, msg: FSDServerErrorMessage):
         """处理服务器错误"""
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '收到$ER', f'type={msg.error_type}, msg={msg.message}')
         logger.error(f"服务器错误 [{msg.error_type}]: {msg.message}")
-        self.server_error.emit(msg.error_type, msg.message)
-        
-        # 检查是否是认证失败
-        if msg.error_type in ("AUTH", "SYNTAX", "INVALID"):
-            self.authentication_failed.emit(msg.message)
-            self._is_authenticated = False
-    
-    def _send_message(self, msg: FSDMessage) -> bool:
-        """发送消息"""
-        if not self._is_connected:
-            logger.error("未连接到服务器，无法发送消息")
-            if CONNECTION_LOGGING_AVAILABLE:
-                log_connection_error('FSDClient', '发送失败: 未连接')
-            return False
-        
-        data = msg.serialize()
-        logger.debug(f"发送消息: {data.strip()}")
+        self.listener.on_server_error(msg.error_type, msg.message)
+
+        # 检查是否是认证失败（标准格式的 $ER 使用数字错误码）
+        if msg.error_type in ("AUTH", "SYNTAX", "INVALID") or msg.error_type.lstrip('0') in LOGIN_ERROR_CODES:
+            self.listener.on_authentication_failed(msg.message)
+            self.is_authenticated = False
+
+
+async def open_fsd_session(host: str, port: int = 6809, session: Optional[FSDSession] = None,
+                           timeout: float = 5.0) -> FSDSession:
+    """在当前事件循环中建立 FSD 连接（不阻塞线程），返回已连接的会话
+
+    认证信息应在调用前通过 session.set_credentials() 设置，连接建立后自动发送 #AP。
+    连接失败或超时抛出 FSDConnectionError。
+    """
+    session = session or FSDSession()
+    loop = asyncio.get_running_loop()
+    if CONNECTION_LOGGING_AVAILABLE:
+        log_connection_event('FSDClient', '开始连接', f'{host}:{port}')
+    try:
+        await asyncio.wait_for(loop.create_connection(lambda: session, host, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
         if CONNECTION_LOGGING_AVAILABLE:
-            log_fsd_message('SEND', data)
-            log_connection_event('FSDClient', '发送数据', f'原始数据: {repr(data)}')
-            log_connection_event('FSDClient', '发送数据', f'字节数: {len(data)}, 编码后: {len(data.encode("utf-8"))} bytes')
-        
-        encoded_data = data.encode('utf-8')
-        bytes_written = self.socket.write(encoded_data)
-        result = bytes_written == len(encoded_data)
-        
+            log_connection_error('FSDClient', f'TCP连接失败: {e!r}')
+        raise FSDConnectionError(f"无法连接到 {host}:{port}: {e!r}") from e
+    return session
+
+
+# ==================== FSD 客户端（Qt 适配） ====================
+
+class _QtSocketTransport:
+    """把 QTcpSocket 包装成 FSDSession 需要的 transport 接口"""
+
+    __slots__ = ('_socket',)
+
+    def __init__(self, socket: QTcpSocket):
+        self._socket = socket
+
+    def write(self, data: bytes):
+        self._socket.write(data)
+
+    def get_write_buffer_size(self) -> int:
+        return self._socket.bytesToWrite()
+
+    def is_closing(self) -> bool:
+        return self._socket.state() != QAbstractSocket.SocketState.ConnectedState
+
+    def close(self):
+        self._socket.disconnectFromHost()
+
+
+class FSDClient(QObject, FSDSessionListener):
+    """FSD 协议客户端
+
+    支持 9号协议连接到 FSD 服务器 (如 fsd.flyisfp.com)。
+    协议逻辑在 FSDSession 中，这里只负责 QTcpSocket 收发、QTimer 定时和 Qt 信号。
+    """
+
+    # 连接超时（connect_to_server 不再阻塞等待）
+    CONNECT_TIMEOUT_MS = 5000
+
+    # 信号
+    connected = Signal()
+    disconnected = Signal()
+    authentication_failed = Signal(str)  # 错误信息
+    error = Signal(str)
+    message_received = Signal(FSDMessage)
+    text_message_received = Signal(str, str, str)  # sender, receiver, message
+    position_updated = Signal(str, FSDPilotPosition)  # callsign, position
+    pilot_added = Signal(str)  # callsign
+    pilot_removed = Signal(str)  # callsign
+    atc_added = Signal(str)  # callsign
+    atc_removed = Signal(str)  # callsign
+    server_error = Signal(str, str)  # error_type, message
+    traffic_changed = Signal(list, list, list)  # 上线呼号, 更新的 TrafficRecord, 下线呼号（批量）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # 网络连接
+        self.socket = QTcpSocket(self)
+        self.socket.connected.connect(self._on_connected)
+        self.socket.disconnected.connect(self._on_disconnected)
+        self.socket.errorOccurred.connect(self._on_error)
+        self.socket.readyRead.connect(self._on_ready_read)
+        self._connect_timer = QTimer(self)
+        self._connect_timer.setSingleShot(True)
+        self._connect_timer.timeout.connect(self._on_connect_timeout)
+
+        # 协议会话（定时器用 QTimer，在 GUI 线程触发）
+        self.session = FSDSession(self, timer_factory=self._make_timer)
+        self.traffic = self.session.traffic
+
+        # 初始化连线日志
         if CONNECTION_LOGGING_AVAILABLE:
-            if result:
-                log_connection_event('FSDClient', '发送成功', f'已发送 {bytes_written} bytes')
-            else:
-                log_connection_error('FSDClient', f'发送失败: 期望 {len(encoded_data)} bytes, 实际 {bytes_written} bytes, 错误: {self.socket.errorString()}')
-        
-        return result
-    
-    def _send_ping(self):
-        """发送心跳 ping"""
-        if not self._is_connected:
+            setup_connection_logging(is_logging_enabled())
+            self._log_protocol_documentation()
+
+        logger.info("FSDClient 初始化完成")
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '初始化完成')
+
+    def _make_timer(self, callback: Callable[[], Any]) -> QTimer:
+        timer = QTimer(self)
+        # 默认的 CoarseTimer 允许 5% 误差，位置发送间隔需要更准
+        timer.setTimerType(Qt.PreciseTimer)
+        timer.timeout.connect(callback)
+        return timer
+
+    def _log_protocol_documentation(self):
+        """记录 FSD 协议版本信息到日志"""
+        if not CONNECTION_LOGGING_AVAILABLE:
             return
-        
-        msg = FSDPingMessage(self._callsign)
-        self._send_message(msg)
-    
-    def _send_position_update(self):
-        """发送位置更新"""
-        if not self._is_authenticated:
+
+        # 记录协议版本信息
+        log_connection_event('FSDClient', 'PROTOCOL', 'FSD Protocol 9 (Classic)')
+
+    @property
+    def is_connected(self) -> bool:
+        """是否已连接到服务器"""
+        return self.session.is_connected
+
+    @property
+    def is_authenticated(self) -> bool:
+        """是否已通过认证"""
+        return self.session.is_authenticated
+
+    @property
+    def callsign(self) -> str:
+        return self.session.callsign
+
+    def set_credentials(self, callsign: str, cid: str, password: str,
+                        real_name: str = "", sim_type: int = 16):
+        """设置认证信息，连接建立后自动发送 #AP"""
+        self.session.set_credentials(callsign, cid, password, real_name, sim_type)
+
+    def connect_to_server(self, host: str, port: int = 6809) -> bool:
+        """开始连接到 FSD 服务器（不阻塞）
+
+        Args:
+            host: 服务器地址 (如 fsd.flyisfp.com)
+            port: 服务器端口 (默认 6809)
+
+        Returns:
+            是否成功开始连接；结果通过 connected / error 信号通知
+        """
+        if self.session.is_connected:
+            logger.warning("已经连接到 FSD 服务器")
+            if CONNECTION_LOGGING_AVAILABLE:
+                log_connection_event('FSDClient', '连接失败', '已经连接到服务器')
+            return True
+        if self.socket.state() != QAbstractSocket.SocketState.UnconnectedState:
+            logger.warning("正在连接 FSD 服务器")
+            return True
+
+        logger.info(f"正在连接到 FSD 服务器: {host}:{port}")
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', '开始连接', f'{host}:{port}')
+            log_connection_event('FSDClient', '协议信息', 'FSD Protocol 9 (Classic)')
+
+        self.socket.connectToHost(host, port)
+        self._connect_timer.start(self.CONNECT_TIMEOUT_MS)
+        return True
+
+    def disconnect_from_server(self):
+        """断开与 FSD 服务器的连接"""
+        if not self.session.is_connected:
+            self._connect_timer.stop()
+            if self.socket.state() != QAbstractSocket.SocketState.UnconnectedState:
+                self.socket.abort()
             return
-        
-        msg = FSDPilotDataUpdateMessage(
-            callsign=self._callsign,
-            transponder_code=self._transponder_code,
-            transponder_mode=self._transponder_mode,
-            rating=self._rating,
-            position=self._current_position
-        )
-        self._send_message(msg)
-    
+
+        self.session.close()
+        # 等待 #DP 写出，退出程序前也能正常下线
+        if self.socket.state() != QAbstractSocket.SocketState.UnconnectedState:
+            self.socket.waitForDisconnected(1000)
+
+    def authenticate(self, callsign: str, cid: str, password: str,
+                     real_name: str = "", rating: int = 1,
+                     sim_type: int = 16) -> bool:
+        """发送认证信息（见 FSDSession.authenticate）"""
+        return self.session.authenticate(callsign, cid, password, real_name, rating, sim_type)
+
+    def send_text_message(self, message: str, receiver: str = ""):
+        """发送文本消息
+
+        Args:
+            message: 消息内容
+            receiver: 接收者（空字符串表示发送给所有 ATC）
+        """
+        self.session.send_text_message(message, receiver)
+
+    def send_private_message(self, message: str, receiver: str):
+        """发送私聊消息"""
+        self.session.send_text_message(message, receiver)
+
+    def update_position(self, position: FSDPilotPosition,
+                        transponder_code: int = None,
+                        transponder_mode: TransponderMode = None,
+                        timestamp: Optional[float] = None):
+        """更新位置信息
+
+        位置更新会自动定期发送给服务器；可在 X-Plane 接收线程中调用（见 FSDSession.update_position）
+        """
+        self.session.update_position(position, transponder_code, transponder_mode, timestamp)
+
+    def send_flight_plan(self, flight_plan: FSDFlightPlan):
+        """提交飞行计划"""
+        self.session.send_flight_plan(flight_plan)
+
+    def request_atis(self, atc_callsign: str):
+        """请求 ATIS 信息"""
+        self.session.request_atis(atc_callsign)
+
     def start_position_updates(self, interval_ms: int = 200):
-        """开始定期发送位置更新"""
-        self._position_interval = interval_ms
-        self._position_timer.start(interval_ms)
-    
+        """开始定期发送位置更新
+
+        interval_ms 是定时器的最快触发间隔；启用自适应发送时，实际发送间隔由
+        AdaptiveSendScheduler 根据飞行阶段在此基础上放宽。
+        """
+        self.session.start_position_updates(interval_ms)
+
     def stop_position_updates(self):
         """停止定期发送位置更新"""
-        self._position_timer.stop()
-    
+        self.session.position_timer.stop()
+
     def start_heartbeat(self, interval_ms: int = 15000):
         """开始心跳检测"""
-        self._ping_interval = interval_ms
-        self._ping_timer.start(interval_ms)
-    
+        self.session.ping_timer.start(interval_ms)
+
     def stop_heartbeat(self):
         """停止心跳检测"""
-        self._ping_timer.stop()
+        self.session.ping_timer.stop()
+
+    # ---------- QTcpSocket 回调 ----------
+
+    def _on_connected(self):
+        self._connect_timer.stop()
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_event('FSDClient', 'TCP连接成功',
+                                 f'{self.socket.peerName()}:{self.socket.peerPort()}')
+        self.session.connection_made(_QtSocketTransport(self.socket))
+
+    def _on_disconnected(self):
+        if self.session.is_connected:
+            self.session.connection_lost(None)
+
+    def _on_error(self, error_code):
+        """错误回调"""
+        self._connect_timer.stop()
+        error_msg = self.socket.errorString()
+        logger.error(f"FSD 连接错误: {error_msg}")
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_error('FSDClient', f'连接错误: {error_msg}')
+        self.error.emit(error_msg)
+
+    def _on_connect_timeout(self):
+        if self.socket.state() == QAbstractSocket.SocketState.ConnectedState:
+            return
+        self.socket.abort()
+        error_msg = f"连接超时（{self.CONNECT_TIMEOUT_MS // 1000} 秒）"
+        logger.error(f"FSD 连接错误: {error_msg}")
+        if CONNECTION_LOGGING_AVAILABLE:
+            log_connection_error('FSDClient', f'TCP连接失败: {error_msg}')
+        self.error.emit(error_msg)
+
+    def _on_ready_read(self):
+        """数据可读回调"""
+        while self.socket.bytesAvailable() > 0:
+            self.session.data_received(self.socket.readAll().data())
+
+    # ---------- FSDSessionListener ----------
+
+    def on_connected(self):
+        self.connected.emit()
+
+    def on_disconnected(self, exc: Optional[Exception]):
+        self.disconnected.emit()
+
+    def on_message(self, msg: FSDMessage):
+        self.message_received.emit(msg)
+
+    def on_text_message(self, sender: str, receiver: str, message: str):
+        self.text_message_received.emit(sender, receiver, message)
+
+    def on_server_error(self, error_type: str, message: str):
+        self.server_error.emit(error_type, message)
+
+    def on_authentication_failed(self, message: str):
+        self.authentication_failed.emit(message)
+
+    def on_traffic_changed(self, added: List[str], updated: List[TrafficRecord], removed: List[str]):
+        """交通表批量变更转发为逐条信号和批量信号"""
+        for callsign in added:
+            self.pilot_added.emit(callsign)
+            record = self.traffic.get(callsign)
+            if record.position is not None:
+                self.position_updated.emit(callsign, record.position)
+        for record in updated:
+            if record.position is not None:
+                self.position_updated.emit(record.callsign, record.position)
+        for callsign in removed:
+            self.pilot_removed.emit(callsign)
+        self.traffic_changed.emit(added, updated, removed)
 
 
 # ==================== 全局客户端实例 ====================
@@ -0,0 +1,226 @@
+"""
+HTTP Cache - REST 响应缓存（TTL + ETag/Last-Modified 条件请求）
+
+- 内存 LRU，可选落盘（每个条目一个 JSON 文件），重启后仍可立即显示上次的数据
+- 有效期内直接使用缓存，不发请求
+- 过期后先返回缓存内容，同时带 If-None-Match / If-Modified-Since 重新验证，
+  服务器返回 304 时只刷新有效期
+- 缓存键包含 URL、查询参数和 Authorization 的摘要，不同账号互不可见
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+logger = logging.getLogger('ISFP-Connect.HTTPCache')
+
+# 内存中保留的条目数
+MAX_MEMORY_ENTRIES = 128
+# 磁盘上保留的条目数（按修改时间淘汰）
+MAX_DISK_ENTRIES = 512
+
+
+class CacheEntry:
+    """一条缓存的响应"""
+
+    __slots__ = ('key', 'url', 'body', 'etag', 'last_modified', 'stored_at', 'ttl')
+
+    def __init__(self, key: str, url: str, body: str, etag: str = "", last_modified: str = "",
+                 stored_at: float = 0.0, ttl: float = 0.0):
+        self.key = key
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.ttl = ttl
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return ((time.time() if now is None else now) - self.stored_at) < self.ttl
+
+    def revalidation_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ResponseCache:
+    """线程安全的响应缓存"""
+
+    def __init__(self, max_entries: int = MAX_MEMORY_ENTRIES, disk_dir: Optional[str] = None,
+                 max_disk_entries: int = MAX_DISK_ENTRIES):
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._disk_dir = None
+        self._max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        if disk_dir:
+            self.set_disk_dir(disk_dir)
+
+    # ---------- 键 ----------
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> str:
+        key = url
+        if params:
+            key += '?' + urlencode(sorted(params.items()))
+        auth = (headers or {}).get('Authorization')
+        if auth:
+            key += '#' + hashlib.sha1(auth.encode('utf-8')).hexdigest()[:16]
+        return key
+
+    # ---------- 磁盘 ----------
+
+    def set_disk_dir(self, disk_dir: str):
+        try:
+            os.makedirs(disk_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"HTTP 缓存目录不可用，仅使用内存缓存: {e}")
+            return
+        self._disk_dir = disk_dir
+        self._prune_disk()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self._disk_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _load_from_disk(self, key: str) -> Optional[CacheEntry]:
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('key') != key:
+            return None
+        return CacheEntry(**{name: data.get(name) for name in CacheEntry.__slots__})
+
+    def _write_to_disk(self, entry: CacheEntry):
+        path = self._disk_path(entry.key)
+        tmp = path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug(f"写入 HTTP 缓存失败: {e}")
+
+    def _prune_disk(self):
+        try:
+            files = [os.path.join(self._disk_dir, name) for name in os.listdir(self._disk_dir)
+                     if name.endswith('.json')]
+        except OSError:
+            return
+        if len(files) <= self._max_disk_entries:
+            return
+        files.sort(key=lambda p: os.path.getmtime(p))
+        for path in files[:len(files) - self._max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ---------- 读写 ----------
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._load_from_disk(key) if self._disk_dir else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(entry)
+        return entry
+
+    def _remember(self, entry: CacheEntry):
+        self._entries[entry.key] = entry
+        self._entries.move_to_end(entry.key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, url: str, body: str, etag: str = "", last_modified: str = "",
+            ttl: float = 0.0) -> CacheEntry:
+        entry = CacheEntry(key, url, body, etag or "", last_modified or "", time.time(), ttl)
+        with self._lock:
+            self._remember(entry)
+        if self._disk_dir:
+            self._write_to_disk(entry)
+        return entry
+
+    def touch(self, entry: CacheEntry, ttl: Optional[float] = None):
+        """304 Not Modified：刷新有效期"""
+        entry.stored_at = time.time()
+        if ttl is not None:
+            entry.ttl = ttl
+        self.revalidated += 1
+        if self._disk_dir:
+            self._write_to_disk(entry)
+
+    def invalidate_prefix(self, url_prefix: str) -> int:
+        """删除 URL 以 url_prefix 开头的所有条目（写操作之后调用）"""
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if e.url.startswith(url_prefix)]
+            for k in keys:
+                del self._entries[k]
+        removed = len(keys)
+        if self._disk_dir:
+            try:
+                names = os.listdir(self._disk_dir)
+            except OSError:
+                names = []
+            for name in names:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self._disk_dir, name)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        url = json.load(f).get('url', '')
+                    if url.startswith(url_prefix):
+                        os.remove(path)
+                        removed += 1
+                except (OSError, ValueError):
+                    continue
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk_dir:
+            for name in os.listdir(self._disk_dir):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self._disk_dir, name))
+                    except OSError:
+                        pass
+
+
+# 全局实例
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """获取全局响应缓存（默认仅内存，调用 set_disk_dir 启用磁盘缓存）"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
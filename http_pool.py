@@ -0,0 +1,134 @@
+"""
+HTTP Pool - 共享的 HTTP 会话与有界请求线程池
+
+- SessionPool: 每个主机一个 keep-alive 的 requests.Session，复用 TCP/TLS 连接
+- RequestExecutor: 基于 QThreadPool 的有界线程池，支持优先级和取消排队中的请求
+
+用户操作触发的请求使用 PRIORITY_USER，后台定时刷新使用 PRIORITY_BACKGROUND，
+线程池繁忙时用户请求先执行。
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from PySide6.QtCore import QThreadPool, QRunnable
+
+logger = logging.getLogger('ISFP-Connect.HTTPPool')
+
+# 同时执行的请求数上限
+MAX_WORKERS = 4
+# 每个主机保持的空闲连接数
+POOL_MAXSIZE = 8
+# 空闲工作线程的回收时间（毫秒）
+WORKER_EXPIRY_MS = 30000
+
+# 请求优先级（数值越大越先执行）
+PRIORITY_USER = 10
+PRIORITY_BACKGROUND = 0
+
+
+class SessionPool:
+    """按 scheme://host:port 复用 requests.Session"""
+
+    def __init__(self, pool_maxsize: int = POOL_MAXSIZE):
+        self._pool_maxsize = pool_maxsize
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize)
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[key] = session
+                logger.debug(f"Created HTTP session for {key}")
+            return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+class _Task(QRunnable):
+    """包装一个可调用对象；autoDelete 关闭，由 Python 端持有引用"""
+
+    def __init__(self, fn: Callable[[], None]):
+        super().__init__()
+        self.setAutoDelete(False)
+        self._fn = fn
+
+    def run(self):
+        try:
+            self._fn()
+        except Exception as e:
+            logger.error(f"Request task failed: {e}")
+
+
+class RequestExecutor:
+    """有界优先级请求线程池"""
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max_workers)
+        self._pool.setExpiryTimeout(WORKER_EXPIRY_MS)
+        self.submitted = 0
+        self.cancelled = 0
+
+    @property
+    def max_workers(self) -> int:
+        return self._pool.maxThreadCount()
+
+    @property
+    def active_workers(self) -> int:
+        return self._pool.activeThreadCount()
+
+    def submit(self, fn: Callable[[], None], priority: int = PRIORITY_USER) -> QRunnable:
+        """提交任务，返回的句柄可用于 cancel()"""
+        task = _Task(fn)
+        self.submitted += 1
+        self._pool.start(task, priority)
+        return task
+
+    def cancel(self, task: QRunnable) -> bool:
+        """取消尚未开始执行的任务，返回是否成功从队列移除"""
+        if self._pool.tryTake(task):
+            self.cancelled += 1
+            return True
+        return False
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self._pool.waitForDone(timeout_ms)
+
+
+# 全局实例
+_session_pool: Optional[SessionPool] = None
+_request_executor: Optional[RequestExecutor] = None
+
+
+def get_session_pool() -> SessionPool:
+    """获取全局 Session 池"""
+    global _session_pool
+    if _session_pool is None:
+        _session_pool = SessionPool()
+    return _session_pool
+
+
+def get_request_executor() -> RequestExecutor:
+    """获取全局请求线程池"""
+    global _request_executor
+    if _request_executor is None:
+        _request_executor = RequestExecutor()
+    return _request_executor
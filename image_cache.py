@@ -0,0 +1,287 @@
+"""
+Image Cache - 航空器照片磁盘缓存
+
+- 原图按内容 SHA-256 存储（同一张照片被多个 URL 引用时只存一份）
+- 缩略图按 (内容, 宽, 高) 存储，机库列表图标直接读取，无需重新解码原图
+- index.json 记录 URL -> 内容哈希 和最近访问时间；写入合并进行，至多每
+  INDEX_SAVE_INTERVAL 秒一次，退出时 flush() 写入剩余修改
+- 总大小超过上限时按最近访问时间淘汰（LRU），淘汰原图时一并删除其缩略图
+
+所有方法线程安全，可在工作线程中调用。
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+
+logger = logging.getLogger('ISFP-Connect.ImageCache')
+
+# 缓存总大小上限
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# 机库列表图标尺寸
+HANGAR_THUMB_SIZE = (220, 150)
+# 缩略图编码
+THUMB_FORMAT = "JPG"
+THUMB_QUALITY = 90
+# index.json 两次写入的最短间隔（秒）
+INDEX_SAVE_INTERVAL = 5.0
+
+
+class ImageDiskCache:
+    """内容寻址的照片磁盘缓存"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._originals_dir = os.path.join(cache_dir, "originals")
+        self._thumbs_dir = os.path.join(cache_dir, "thumbs")
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.RLock()
+        # url -> 内容哈希
+        self._urls: Dict[str, str] = {}
+        # 文件名 -> [大小, 最近访问时间]
+        self._files: Dict[str, list] = {}
+        self._total_bytes = 0
+        self._dirty = False
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        try:
+            os.makedirs(self._originals_dir, exist_ok=True)
+            os.makedirs(self._thumbs_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"图片缓存目录不可用，已禁用: {e}")
+            self.enabled = False
+            return
+        self._load_index()
+
+    # ---------- 索引 ----------
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._urls = dict(data.get('urls', {}))
+            access = data.get('access', {})
+        except (OSError, ValueError):
+            self._urls = {}
+            access = {}
+        # 以磁盘上实际存在的文件为准
+        for folder in (self._originals_dir, self._thumbs_dir):
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+                self._files[name] = [size, access.get(name, os.path.getmtime(path))]
+                self._total_bytes += size
+        originals = {name.split('.', 1)[0] for name in self._files if '_' not in name}
+        # 原图已不存在的缩略图无法再被查到，直接删除
+        for name in [n for n in self._files if '_' in n and n.split('_', 1)[0] not in originals]:
+            self._remove_file(name)
+        self._urls = {url: h for url, h in self._urls.items() if h in originals}
+
+    def save_index(self):
+        with self._lock:
+            if not self.enabled:
+                return
+            self._dirty = False
+            self._last_save = time.monotonic()
+            data = {
+                'urls': self._urls,
+                'access': {name: meta[1] for name, meta in self._files.items()},
+            }
+            tmp = self._index_path + '.tmp'
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp, self._index_path)
+            except OSError as e:
+                logger.debug(f"写入图片缓存索引失败: {e}")
+
+    def _mark_dirty(self):
+        """记录索引有修改，距上次写入超过 INDEX_SAVE_INTERVAL 时才写入"""
+        self._dirty = True
+        if time.monotonic() - self._last_save >= INDEX_SAVE_INTERVAL:
+            self.save_index()
+
+    def flush(self):
+        """写入尚未保存的索引修改"""
+        with self._lock:
+            if self._dirty:
+                self.save_index()
+
+    # ---------- 内部 ----------
+
+    def _path_for(self, name: str) -> str:
+        folder = self._originals_dir if '_' not in name else self._thumbs_dir
+        return os.path.join(folder, name)
+
+    @staticmethod
+    def _thumb_name(content_hash: str, width: int, height: int) -> str:
+        return f"{content_hash}_{width}x{height}.{THUMB_FORMAT.lower()}"
+
+    def _touch(self, name: str):
+        meta = self._files.get(name)
+        if meta is not None:
+            meta[1] = time.time()
+
+    def _add_file(self, name: str, size: int):
+        old = self._files.get(name)
+        if old is not None:
+            self._total_bytes -= old[0]
+        self._files[name] = [size, time.time()]
+        self._total_bytes += size
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _remove_file(self, name: str):
+        try:
+            os.remove(self._path_for(name))
+        except OSError:
+            pass
+        meta = self._files.pop(name, None)
+        if meta is not None:
+            self._total_bytes -= meta[0]
+
+    def _evict(self):
+        """按最近访问时间淘汰到上限的 90%，原图的缩略图随原图一起删除"""
+        target = self.max_bytes * 0.9
+        removed_hashes = set()
+        for name, _ in sorted(self._files.items(), key=lambda kv: kv[1][1]):
+            if self._total_bytes <= target:
+                break
+            if name not in self._files:
+                # 已作为前面某张原图的缩略图删除
+                continue
+            self._remove_file(name)
+            if '_' not in name:
+                removed_hashes.add(name)
+                prefix = name + '_'
+                for thumb in [n for n in self._files if n.startswith(prefix)]:
+                    self._remove_file(thumb)
+        if removed_hashes:
+            self._urls = {url: h for url, h in self._urls.items() if h not in removed_hashes}
+            self._dirty = True
+        logger.info(f"图片缓存淘汰完成，当前 {self._total_bytes / 1048576:.1f} MB")
+
+    # ---------- 公共接口 ----------
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def content_hash(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self._urls.get(url)
+
+    def get_original(self, url: str) -> Optional[bytes]:
+        """返回 URL 对应的原图字节，未缓存返回 None"""
+        with self._lock:
+            content_hash = self._urls.get(url)
+            if content_hash is None or content_hash not in self._files:
+                self.misses += 1
+                return None
+            path = self._path_for(content_hash)
+            self._touch(content_hash)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self._files.pop(content_hash, None)
+                self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put_original(self, url: str, data: bytes) -> str:
+        """保存原图，返回内容哈希"""
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if not self.enabled:
+                return content_hash
+            self._urls[url] = content_hash
+            if content_hash not in self._files:
+                path = self._path_for(content_hash)
+                try:
+                    with open(path, 'wb') as f:
+                        f.write(data)
+                except OSError as e:
+                    logger.debug(f"写入图片缓存失败: {e}")
+                    return content_hash
+                self._add_file(content_hash, len(data))
+            else:
+                self._touch(content_hash)
+            self._mark_dirty()
+        return content_hash
+
+    def get_thumbnail(self, url: str, width: int, height: int) -> Optional[QImage]:
+        """返回已缓存的缩略图"""
+        with self._lock:
+            content_hash = self._urls.get(url)
+            if content_hash is None:
+                self.misses += 1
+                return None
+            name = self._thumb_name(content_hash, width, height)
+            if name not in self._files:
+                self.misses += 1
+                return None
+            self._touch(name)
+            path = self._path_for(name)
+        image = QImage(path)
+        if image.isNull():
+            with self._lock:
+                self._files.pop(name, None)
+                self.misses += 1
+            return None
+        self.hits += 1
+        return image
+
+    def put_thumbnail(self, url: str, width: int, height: int, image: QImage) -> bool:
+        """保存缩略图（须先 put_original 建立 URL 映射）"""
+        with self._lock:
+            content_hash = self._urls.get(url)
+            if content_hash is None or not self.enabled:
+                return False
+            name = self._thumb_name(content_hash, width, height)
+            path = self._path_for(name)
+            if not image.save(path, THUMB_FORMAT, THUMB_QUALITY):
+                return False
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return False
+            self._add_file(name, size)
+            self._mark_dirty()
+        return True
+
+    def make_thumbnail(self, url: str, data: bytes, width: int, height: int) -> Optional[QImage]:
+        """解码原图、按 KeepAspectRatio 缩放并写入缓存"""
+        image = QImage()
+        if not image.loadFromData(data):
+            return None
+        thumb = image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.put_thumbnail(url, width, height, thumb)
+        return thumb
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._files):
+                try:
+                    os.remove(self._path_for(name))
+                except OSError:
+                    pass
+            self._files.clear()
+            self._urls.clear()
+            self._total_bytes = 0
+            self.save_index()
@@ -0,0 +1,194 @@
+"""
+Image Pipeline - 后台线程图片解码与圆角渲染
+
+QImage 可在任意线程使用，解码、裁剪、缩放和圆角遮罩都在工作线程完成，
+GUI 线程只做 QPixmap.fromImage()：
+- 使用 QImageReader 的 setClipRect / setScaledSize 按目标尺寸解码（JPEG 可直接按比例解码，
+  不必先解出整张原图）
+- 结果按 (url, 宽, 高, 形状, 边框) 缓存在内存 LRU 中，同一张图的头像和封面各只渲染一次
+- 同一变体已在渲染中时，后来的请求只追加回调
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from PySide6.QtCore import QObject, Signal, Qt, QRect, QSize, QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage, QImageReader, QPainter, QPainterPath, QPen, QColor
+
+from http_pool import RequestExecutor, PRIORITY_USER
+
+logger = logging.getLogger('ISFP-Connect.ImagePipeline')
+
+# 渲染线程数
+IMAGE_WORKERS = 2
+# 内存缓存上限（按 QImage 字节数）
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# 形状
+SHAPE_CIRCLE = "circle"      # 居中裁成正方形后填满，圆形遮罩（头像）
+SHAPE_ROUNDED = "rounded"    # 完整显示（KeepAspectRatio），圆角矩形遮罩（封面）
+COVER_RADIUS = 15.0
+BORDER_COLOR = QColor(255, 255, 255, 100)
+
+RenderKey = Tuple[str, int, int, str, int]
+
+
+def _decode(data: bytes, width: int, height: int, shape: str) -> Optional[QImage]:
+    """按目标尺寸解码，返回已裁剪、缩放的图像"""
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.ReadOnly)
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    source = reader.size()
+    if source.isValid() and source.width() > 0 and source.height() > 0:
+        if shape == SHAPE_CIRCLE:
+            side = min(source.width(), source.height())
+            reader.setClipRect(QRect((source.width() - side) // 2, (source.height() - side) // 2, side, side))
+            target = QSize(side, side).scaled(width, height, Qt.KeepAspectRatioByExpanding)
+        else:
+            target = source.scaled(width, height, Qt.KeepAspectRatio)
+        if target.width() < source.width():
+            reader.setScaledSize(target)
+            reader.setQuality(100)
+        image = reader.read()
+        if not image.isNull() and image.size() != target:
+            image = image.scaled(target, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        return None if image.isNull() else image
+    # 读不到头信息的格式：完整解码后再处理
+    image = QImage()
+    if not image.loadFromData(data):
+        return None
+    if shape == SHAPE_CIRCLE:
+        side = min(image.width(), image.height())
+        image = image.copy(QRect((image.width() - side) // 2, (image.height() - side) // 2, side, side))
+        return image.scaled(width, height, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    return image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+def render_image(data: bytes, width: int, height: int, shape: str = SHAPE_ROUNDED,
+                 border: int = 0) -> Optional[QImage]:
+    """解码并渲染成 width x height 的透明底圆角图，可在任意线程调用"""
+    if not data or width <= 0 or height <= 0:
+        return None
+    scaled = _decode(data, width, height, shape)
+    if scaled is None:
+        return None
+    radius = width / 2 if shape == SHAPE_CIRCLE else COVER_RADIUS
+
+    result = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    result.fill(Qt.transparent)
+    painter = QPainter(result)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+    path = QPainterPath()
+    path.addRoundedRect(0, 0, width, height, radius, radius)
+    painter.setClipPath(path)
+    # 居中绘制
+    painter.drawImage((width - scaled.width()) // 2, (height - scaled.height()) // 2, scaled)
+    if border > 0:
+        pen = QPen(BORDER_COLOR)
+        pen.setWidth(border)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        half = border / 2
+        painter.drawRoundedRect(half, half, width - border, height - border, radius - half, radius - half)
+    painter.end()
+    return result
+
+
+class ImagePipeline(QObject):
+    """工作线程渲染 + 内存 LRU 缓存；须在 GUI 线程创建，回调在 GUI 线程执行"""
+
+    # (key, QImage 或 None)，从工作线程发出，排队到 GUI 线程处理
+    _rendered = Signal(object, object)
+
+    def __init__(self, max_workers: int = IMAGE_WORKERS, max_bytes: int = MAX_CACHE_BYTES):
+        super().__init__()
+        self._executor = RequestExecutor(max_workers)
+        self._max_bytes = max_bytes
+        self._cache: "OrderedDict[RenderKey, QImage]" = OrderedDict()
+        self._cache_bytes = 0
+        self._pending: Dict[RenderKey, List[Callable[[Optional[QImage]], None]]] = {}
+        self.hits = 0
+        self.renders = 0
+        self._rendered.connect(self._on_rendered)
+
+    @staticmethod
+    def make_key(url: str, width: int, height: int, shape: str, border: int = 0) -> RenderKey:
+        return (url, int(width), int(height), shape, int(border))
+
+    def cached(self, url: str, width: int, height: int, shape: str = SHAPE_ROUNDED,
+               border: int = 0) -> Optional[QImage]:
+        key = self.make_key(url, width, height, shape, border)
+        image = self._cache.get(key)
+        if image is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return image
+
+    def render(self, url: str, data: Union[bytes, Callable[[], Optional[bytes]]], width: int, height: int,
+               shape: str, callback: Callable[[Optional[QImage]], None], border: int = 0,
+               priority: int = PRIORITY_USER):
+        """渲染 url 对应的图片变体，完成后在 GUI 线程调用 callback(QImage 或 None)
+
+        data 可以是字节，也可以是在工作线程中调用的读取函数（例如读磁盘缓存）。
+        """
+        key = self.make_key(url, width, height, shape, border)
+        image = self.cached(url, width, height, shape, border)
+        if image is not None:
+            callback(image)
+            return
+        waiters = self._pending.get(key)
+        if waiters is not None:
+            waiters.append(callback)
+            return
+        self._pending[key] = [callback]
+
+        def work():
+            image = None
+            try:
+                raw = data() if callable(data) else data
+                image = render_image(raw, width, height, shape, border) if raw else None
+            finally:
+                self._rendered.emit(key, image)
+
+        self._executor.submit(work, priority)
+
+    def _on_rendered(self, key: RenderKey, image: Optional[QImage]):
+        self.renders += 1
+        if image is not None:
+            self._remember(key, image)
+        for callback in self._pending.pop(key, []):
+            try:
+                callback(image)
+            except RuntimeError:
+                # 目标控件已被删除
+                pass
+
+    def _remember(self, key: RenderKey, image: QImage):
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cache_bytes -= old.sizeInBytes()
+        self._cache[key] = image
+        self._cache_bytes += image.sizeInBytes()
+        while self._cache_bytes > self._max_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.sizeInBytes()
+
+    def clear(self):
+        self._cache.clear()
+        self._cache_bytes = 0
+
+
+# 全局实例
+_image_pipeline: Optional[ImagePipeline] = None
+
+
+def get_image_pipeline() -> ImagePipeline:
+    """获取全局图片渲染管线（首次调用须在 GUI 线程）"""
+    global _image_pipeline
+    if _image_pipeline is None:
+        _image_pipeline = ImagePipeline()
+    return _image_pipeline
@@ -6,6 +6,7 @@ import json
 import os
 import shutil
 import logging
+import threading
 from datetime import datetime
 
 # 获取应用程序基础路径（支持开发和打包后的环境）
@@ -38,13 +39,25 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QScrollArea, QFrame, QGraphicsBlurEffect, QSplitter,
                              QDialog, QCheckBox, QFileDialog, QComboBox, QDateEdit, 
                              QTimeEdit, QSpinBox, QFormLayout, QGroupBox, QAbstractSpinBox,
-                             QGridLayout, QStackedWidget)
+                             QGridLayout, QStackedWidget, QListView)
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import Qt, QSize, QTimer, QThread, Signal, QUrl, QObject, Slot, QSettings, QPropertyAnimation, QEasingCurve, QPoint, QRect
+from PySide6.QtCore import Qt, QSize, QTimer, QThread, Signal, QUrl, QObject, Slot, QSettings, QPropertyAnimation, QEasingCurve, QPoint, QRect, QPersistentModelIndex
 from PySide6.QtGui import QPixmap, QIcon, QFont, QPalette, QColor, QBrush, QImage, QPainter, QPainterPath, QPen
 from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
 from PySide6.QtWebChannel import QWebChannel
 
+from http_pool import get_session_pool, get_request_executor, PRIORITY_USER, PRIORITY_BACKGROUND
+from http_cache import get_response_cache
+from image_cache import ImageDiskCache, HANGAR_THUMB_SIZE
+from image_pipeline import get_image_pipeline, SHAPE_CIRCLE, SHAPE_ROUNDED
+from xzphotos_cache import get_photo_metadata_cache, normalize_registration
+from dispatch_store import DispatchStore, DB_FILENAME
+from map_delta import PilotDeltaEncoder, dumps_patch
+from flight_path_cache import FlightPathCache, MAX_ZOOM
+from flight_recorder import RECORDING_SUFFIX
+from tile_cache import TileStore, MapSchemeHandler, register_map_scheme, SCHEME, MAP_BASE_URL
+from dispatch_models import HangarModel, FlightHistoryModel, HangarItemDelegate, FlightHistoryDelegate
+
 # 导入 X-Plane TCP 客户端模块
 try:
     from xplane_tcp_client import (
@@ -169,6 +182,22 @@ _CHANGELOG = "v1.0.0|初始版本发布;支持众多功能;欢迎体验~"
 # 尝试加载外部 .env 文件（如果存在则覆盖编译配置）
 load_env_file()
 
+# ================= 界面配置 =================
+# 本机飞行数据面板刷新间隔（毫秒）
+XPLANE_UI_REFRESH_MS = 200
+# 连飞地图 /clients 轮询间隔（毫秒）；FSD 已连接时位置由交通表实时推送，轮询只用于补充飞行计划
+MAP_POLL_INTERVAL_MS = 15000
+MAP_POLL_INTERVAL_LIVE_MS = 60000
+# /clients 快照有效期（毫秒），有效期内的请求直接复用上一次结果
+CLIENTS_SNAPSHOT_TTL_MS = 10000
+# REST 响应缓存有效期（秒），按接口路径结尾匹配；未列出的接口不缓存
+HTTP_CACHE_TTLS = {
+    "/server/rating": 300,
+    "/users/histories/self": 60,
+    "/activities": 120,
+    "/tickets/self": 30,
+}
+
 # ================= API 配置 =================
 ISFP_API_BASE = "https://isfpapi.flyisfp.com/api"
 TAF_API_URL = "https://aviationweather.gov/api/data/taf"
@@ -234,12 +263,61 @@ def generate_xzphotos_signature(params, secret_key):
         'param_string': param_string
     }
 
-class APIThread(QThread):
+def resolve_image_url(url, base_url):
+    """ 补全相对路径并对 path 部分做 URL 编码（保留 query 参数） """
+    from urllib.parse import urljoin, quote, urlparse, urlunparse
+    full_url = url if url.startswith("http") else urljoin(base_url, url)
+    try:
+        parsed = urlparse(full_url)
+        full_url = urlunparse((
+            parsed.scheme,
+            parsed.netloc,
+            quote(parsed.path, safe='/'),
+            parsed.params,
+            parsed.query,
+            parsed.fragment
+        ))
+    except ValueError:
+        pass
+    return full_url
+
+
+def _http_cache_ttl(url):
+    """ 按 HTTP_CACHE_TTLS 查找接口的缓存有效期，不缓存返回 0 """
+    from urllib.parse import urlsplit
+    path = urlsplit(url).path.rstrip("/")
+    for suffix, ttl in HTTP_CACHE_TTLS.items():
+        if path.endswith(suffix):
+            return ttl
+    return 0
+
+
+def _http_cache_scope(url):
+    """ 写操作影响的缓存范围：API 根路径下的第一段，如 .../api/tickets """
+    if not url.startswith(ISFP_API_BASE):
+        return None
+    first = url[len(ISFP_API_BASE):].lstrip("/").split("/", 1)[0].split("?", 1)[0]
+    return f"{ISFP_API_BASE}/{first}" if first else None
+
+
+class APIThread(QObject):
+    """ REST 请求
+
+    不再为每个请求创建 QThread：请求提交到共享的有界线程池执行，并复用按主机的
+    keep-alive Session。保持原有的 finished / error / jwt_expired 信号和 start() 用法，
+    信号在发出对象所在的主线程中处理。
+
+    HTTP_CACHE_TTLS 中的 GET 接口带响应缓存：有效期内直接返回缓存；过期时先返回缓存，
+    再用条件请求重新验证，只有 200 且内容有变化时才会再发出一次 finished（304 刷新有效期，
+    其他状态保留已显示的缓存内容）。
+    """
     finished = Signal(dict)
     error = Signal(str)
     jwt_expired = Signal()
+    done = Signal()  # 无论成功、失败还是取消都会发出，用于释放引用
 
-    def __init__(self, url, params=None, is_json=True, headers=None, method="GET", json_data=None):
+    def __init__(self, url, params=None, is_json=True, headers=None, method="GET", json_data=None,
+                 priority=PRIORITY_USER):
         super().__init__()
         self.url = url
         self.params = params
@@ -247,19 +325,83 @@ class APIThread(QThread):
         self.headers = headers or {}
         self.method = method
         self.json_data = json_data
+        self.priority = priority
+        self._task = None
+        self._cancelled = False
+        self._running = False
+        self._cache_ttl = _http_cache_ttl(url) if method == "GET" and is_json else 0
+        self._cache_key = None
+        self._cached = None
+
+    def start(self):
+        self._running = True
+        if self._cache_ttl:
+            cache = get_response_cache()
+            self._cache_key = cache.make_key(self.url, self.params, self.headers)
+            self._cached = cache.get(self._cache_key)
+            if self._cached is not None:
+                fresh = self._cached.is_fresh()
+                # 异步发出，保持与网络请求一致的时序（调用方在 start() 之后才处理结果）
+                QTimer.singleShot(0, lambda: self._emit_cached(finish=fresh))
+                if fresh:
+                    return
+        self._task = get_request_executor().submit(self.run, self.priority)
+
+    def _emit_cached(self, finish):
+        if not self._cancelled:
+            try:
+                result = json.loads(self._cached.body)
+            except ValueError:
+                result = None
+            if isinstance(result, dict):
+                result["_latency"] = 0
+                result["_cached"] = True
+                self.finished.emit(result)
+        # 取消后不再发出结果，但缓存新鲜时没有网络请求，done 只能在这里发出
+        if finish:
+            self._running = False
+            self.done.emit()
+
+    def isRunning(self):
+        return self._running
+
+    def cancel(self):
+        """ 取消请求：排队中的直接移出队列，已发出的请求结果将被丢弃 """
+        self._cancelled = True
+        if self._task is not None and get_request_executor().cancel(self._task):
+            self._running = False
+            self.done.emit()
 
     def run(self):
         try:
+            if self._cancelled:
+                return
+            session = get_session_pool().session_for(self.url)
+            headers = self.headers
+            if self._cached is not None:
+                headers = dict(headers, **self._cached.revalidation_headers())
             start_time = time.time()
             if self.method == "POST":
-                response = requests.post(self.url, params=self.params, json=self.json_data, headers=self.headers, timeout=10)
+                response = session.post(self.url, params=self.params, json=self.json_data, headers=headers, timeout=10)
             elif self.method == "DELETE":
-                response = requests.delete(self.url, params=self.params, json=self.json_data, headers=self.headers, timeout=10)
+                response = session.delete(self.url, params=self.params, json=self.json_data, headers=headers, timeout=10)
             else:
-                response = requests.get(self.url, params=self.params, headers=self.headers, timeout=10)
+                response = session.get(self.url, params=self.params, headers=headers, timeout=10)
             
             end_time = time.time()
             latency = int((end_time - start_time) * 1000)
+            if self._cancelled:
+                return
+            
+            if self._cached is not None:
+                if response.status_code == 304:
+                    # 内容未变，缓存结果已经发出过
+                    get_response_cache().touch(self._cached, self._cache_ttl)
+                    return
+                if response.status_code != 200:
+                    # 已经显示了缓存内容，错误响应不覆盖界面也不写入缓存
+                    logger.warning(f"重新验证缓存失败 {self.url}: HTTP {response.status_code}")
+                    return
             
             result = {}
             if self.is_json:
@@ -277,22 +419,94 @@ class APIThread(QThread):
             else:
                 result = {"raw_text": response.text}
             
+            if response.ok:
+                self._update_cache(response)
+                if self._cached is not None and self._cached.body == response.text:
+                    # 服务器不支持条件请求但内容相同，不重复通知
+                    return
+            
             # 注入延迟数据
             result["_latency"] = latency
             self.finished.emit(result)
         except Exception as e:
-            self.error.emit(str(e))
-
-class XZPhotosAPIThread(QThread):
-    """专门用于 XZPhotos API 的线程，自动处理签名"""
+            if self._cached is not None:
+                # 已经显示了缓存内容，重新验证失败时保留旧数据
+                logger.warning(f"重新验证缓存失败 {self.url}: {e}")
+            elif not self._cancelled:
+                self.error.emit(str(e))
+        finally:
+            self._running = False
+            self.done.emit()
+
+    def _update_cache(self, response):
+        cache = get_response_cache()
+        if self._cache_ttl:
+            if response.status_code != 200:
+                # 只缓存完整的成功响应
+                return
+            cache.put(self._cache_key, self.url, response.text,
+                      response.headers.get("ETag", ""), response.headers.get("Last-Modified", ""),
+                      self._cache_ttl)
+        elif self.method != "GET":
+            # 写操作之后，同一资源下的缓存全部失效
+            scope = _http_cache_scope(self.url)
+            if scope:
+                cache.invalidate_prefix(scope)
+
+class XZPhotosAPIThread(QObject):
+    """专门用于 XZPhotos API 的请求，自动处理签名
+
+    结果缓存在 PhotoMetadataCache 中（包括"未找到照片"），命中时不再请求接口；
+    同一注册号已有请求在途时，后来的请求等待并共享同一结果；若后来者优先级更高
+    且原请求仍在排队，则按新优先级重新排队，用户查询不必等在后台预取之后。
+    与 APIThread 一样在共享线程池中执行，保留 finished / error 信号和 start() 用法。
+    """
     finished = Signal(dict)
     error = Signal(str)
+    done = Signal()
     
-    def __init__(self, registration, api_key=None, api_secret=None):
+    # 注册号 -> 等待同一结果的请求对象（第一个为实际发起请求者）
+    _inflight = {}
+    _inflight_lock = threading.Lock()
+    
+    def __init__(self, registration, api_key=None, api_secret=None, priority=PRIORITY_USER):
         super().__init__()
-        self.registration = registration
+        self.registration = normalize_registration(registration)
         self.api_key = api_key or XZPHOTOS_API_KEY
         self.api_secret = api_secret or XZPHOTOS_API_SECRET
+        self.priority = priority
+        # 发起请求者在线程池中的任务句柄
+        self._task = None
+    
+    def start(self):
+        cached = get_photo_metadata_cache().get(self.registration)
+        if cached is not None:
+            result = {'success': True, 'data': cached}
+            logging.getLogger('ISFP-Connect.XZPhotos').debug(f"XZPhotos 缓存命中 - 注册号: {self.registration}")
+            QTimer.singleShot(0, lambda: (self.finished.emit(result), self.done.emit()))
+            return
+        with self._inflight_lock:
+            waiters = self._inflight.get(self.registration)
+            if waiters is not None:
+                waiters.append(self)
+                owner = waiters[0]
+                if self.priority > owner.priority and get_request_executor().cancel(owner._task):
+                    owner.priority = self.priority
+                    owner._task = get_request_executor().submit(owner.run, owner.priority)
+                return
+            self._inflight[self.registration] = [self]
+            self._task = get_request_executor().submit(self.run, self.priority)
+    
+    def _settle(self, result=None, error=None):
+        """把结果分发给所有等待同一注册号的请求"""
+        with self._inflight_lock:
+            waiters = self._inflight.pop(self.registration, [self])
+        for waiter in waiters:
+            if error is None:
+                waiter.finished.emit(result)
+            else:
+                waiter.error.emit(error)
+            waiter.done.emit()
     
     def run(self):
         xz_logger = logging.getLogger('ISFP-Connect.XZPhotos')
@@ -335,7 +549,7 @@ class XZPhotosAPIThread(QThread):
             
             # 发送请求
             xz_logger.info(f"发送 GET 请求...")
-            response = requests.get(url, headers=headers, timeout=10)
+            response = get_session_pool().session_for(url).get(url, headers=headers, timeout=10)
             xz_logger.info(f"响应状态码: {response.status_code}")
             xz_logger.debug(f"响应内容: {response.text[:500]}")
             
@@ -343,8 +557,8 @@ class XZPhotosAPIThread(QThread):
             xz_logger.info(f"解析后的响应: {json.dumps(result, ensure_ascii=False, indent=2)[:500]}")
             
             # 转换为与旧 API 兼容的格式
-            if result.get('success') and result.get('data', {}).get('images'):
-                images = result['data']['images']
+            if result.get('success'):
+                images = (result.get('data') or {}).get('images') or []
                 if images:
                     # 获取第一张图片
                     img = images[0]
@@ -374,11 +588,14 @@ class XZPhotosAPIThread(QThread):
             
             xz_logger.info(f"转换后的结果: {json.dumps(compatible_result, ensure_ascii=False)}")
             xz_logger.info(f"XZPhotos API 请求完成")
-            self.finished.emit(compatible_result)
+            if compatible_result['success']:
+                # 接口失败不缓存，找到/未找到照片都缓存
+                get_photo_metadata_cache().put(self.registration, compatible_result['data'])
+            self._settle(result=compatible_result)
         except Exception as e:
             xz_logger.error(f"XZPhotos API 请求异常: {str(e)}")
             xz_logger.exception("详细异常信息:")
-            self.error.emit(str(e))
+            self._settle(error=str(e))
 
 # ================= 工具类：防抖装饰器 =================
 def debounce(wait_ms=500):
@@ -403,73 +620,61 @@ def debounce(wait_ms=500):
     return decorator
 
 class DispatchManager:
-    """ 签派数据管理器：处理机库和航班历史 """
+    """ 签派数据管理器：处理机库和航班历史（SQLite 存储，见 dispatch_store） """
     def __init__(self, data_dir="data"):
         self.data_dir = data_dir
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
         self.hangar_file = os.path.join(data_dir, "hangar.json")
         self.history_file = os.path.join(data_dir, "flight_history.json")
-        self.hangar = self.load_json(self.hangar_file)
-        self.history = self.load_json(self.history_file)
+        self.store = DispatchStore(os.path.join(data_dir, DB_FILENAME))
+        # 旧版本的 JSON 数据只导入一次
+        self.store.migrate_json(self.hangar_file, self.history_file)
 
-    def load_json(self, path):
-        if os.path.exists(path):
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+    @property
+    def hangar(self):
+        return self.store.aircraft()
+
+    @property
+    def history(self):
+        return self.store.flights()
 
-    def save_json(self, path, data):
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+    def history_count(self):
+        return self.store.flight_count()
+
+    def history_page(self, offset, limit):
+        return self.store.flights(offset, limit)
 
     def add_aircraft(self, aircraft):
-        self.hangar.append(aircraft)
-        self.save_json(self.hangar_file, self.hangar)
+        self.store.add_aircraft(aircraft)
 
     def add_flight(self, flight):
         flight['status'] = '计划'  # 默认状态
-        self.history.insert(0, flight) # 最新航班排前面
-        self.save_json(self.history_file, self.history)
+        self.store.add_flight(flight)
 
     def delete_flight(self, flight):
-        if flight in self.history:
-            self.history.remove(flight)
-            self.save_json(self.history_file, self.history)
+        return self.store.delete_flight(flight)
 
     def clear_history(self):
-        self.history = []
-        self.save_json(self.history_file, self.history)
+        self.store.clear_flights()
 
     def update_flight_status(self, flight, new_status):
         """更新航班状态 - 使用航班号和日期作为唯一标识"""
-        callsign = flight.get('callsign')
-        date = flight.get('date')
-        
-        for index, f in enumerate(self.history):
-            if f.get('callsign') == callsign and f.get('date') == date:
-                self.history[index]['status'] = new_status
-                self.save_json(self.history_file, self.history)
-                # 同时更新传入的flight对象的状态
-                flight['status'] = new_status
-                return True
+        if self.store.update_flight_status(flight.get('callsign'), flight.get('date'), new_status):
+            # 同时更新传入的flight对象的状态
+            flight['status'] = new_status
+            return True
         return False
 
     def delete_aircraft(self, aircraft):
-        # 使用注册号作为唯一标识尝试删除，或者直接比较字典
-        #由于字典比较是完全匹配，可以直接用 remove
-        if aircraft in self.hangar:
-            self.hangar.remove(aircraft)
-            self.save_json(self.hangar_file, self.hangar)
+        return self.store.delete_aircraft(aircraft)
 
     def update_aircraft(self, old_data, new_data):
-        if old_data in self.hangar:
-            index = self.hangar.index(old_data)
-            self.hangar[index] = new_data
-            self.save_json(self.hangar_file, self.hangar)
+        return self.store.update_aircraft(old_data, new_data)
+
+    def set_aircraft_image(self, reg, image):
+        """把自动获取到的图片 URL 写回对应注册号的航空器"""
+        return self.store.set_aircraft_image(reg, image)
 
 class MapBridge(QObject):
     """ 连飞地图 JS 交互桥接 """
@@ -481,17 +686,97 @@ class MapBridge(QObject):
         super().__init__()
         self.app = app
 
-    @Slot(str)
-    def get_flight_path(self, callsign):
-        self.app.fetch_flight_path(callsign)
+    @Slot(str, int)
+    def get_flight_path(self, callsign, zoom):
+        self.app.fetch_flight_path(callsign, zoom)
+
+    @Slot(str, int)
+    def refine_flight_path(self, callsign, zoom):
+        self.app.refine_flight_path(callsign, zoom)
 
     @Slot()
     def map_ready(self):
         """ JS 通知地图已加载完毕 """
         self.app._map_js_ready = True
+        # 页面是新加载的，下一次推送全量
+        self.app._map_delta.reset()
         # 立即触发一次数据加载
         QTimer.singleShot(100, self.app.load_map_data)
 
+class ClientsSnapshot:
+    """ 一次 /clients 请求解析后的只读快照，由 ClientsSnapshotService 发布给所有订阅者 """
+    __slots__ = ('pilots', 'controllers', 'fetched_at', 'latency')
+
+    def __init__(self, pilots=(), controllers=(), fetched_at=0.0, latency=0):
+        self.pilots = tuple(pilots)
+        self.controllers = tuple(controllers)
+        self.fetched_at = fetched_at
+        self.latency = latency
+
+    @classmethod
+    def from_response(cls, data, fetched_at):
+        pilots = data.get("pilots") or []
+        controllers = data.get("controllers") or []
+        # 兼容处理：如果数据在 data.data 中
+        if not pilots and isinstance(data.get("data"), dict):
+            pilots = data["data"].get("pilots") or []
+            controllers = controllers or data["data"].get("controllers") or []
+        return cls(pilots, controllers, fetched_at, data.get("_latency", 0))
+
+    def age_ms(self):
+        return (time.monotonic() - self.fetched_at) * 1000
+
+
+class ClientsSnapshotService(QObject):
+    """ 共享的 /clients 轮询服务
+
+    首页统计、连飞地图和在线机组共用同一次请求与解析结果：
+    - 快照在 CLIENTS_SNAPSHOT_TTL_MS 内有效，期间的 request() 直接复用
+    - 已有请求在途时不会重复发起
+    - request(force=True) 忽略有效期立即刷新（手动刷新按钮）
+    """
+    snapshot_ready = Signal(object)  # ClientsSnapshot
+
+    def __init__(self, app, ttl_ms=CLIENTS_SNAPSHOT_TTL_MS):
+        super().__init__(app)
+        self.app = app
+        self.ttl_ms = ttl_ms
+        self.snapshot = None
+        self._thread = None
+        self.fetches = 0
+        self.served_from_cache = 0
+
+    def is_fresh(self):
+        return self.snapshot is not None and self.snapshot.age_ms() < self.ttl_ms
+
+    def request(self, force=False):
+        """ 请求最新快照，结果通过 snapshot_ready 异步发布 """
+        if self._thread is not None:
+            return
+        if not force and self.is_fresh():
+            self.served_from_cache += 1
+            QTimer.singleShot(0, lambda: self.snapshot_ready.emit(self.snapshot))
+            return
+        self.fetches += 1
+        self._thread = APIThread(f"{ISFP_API_BASE}/clients", priority=PRIORITY_BACKGROUND)
+        # 使用 QueuedConnection 确保槽函数在主线程中执行
+        self._thread.finished.connect(self._on_finished, Qt.QueuedConnection)
+        self._thread.error.connect(self._on_error, Qt.QueuedConnection)
+        # 认证过期、取消、304 等路径不会发出 finished/error，统一在 done 时清除在途请求
+        self._thread.done.connect(self._on_done, Qt.QueuedConnection)
+        self.app.manage_thread(self._thread)
+
+    def _on_finished(self, data):
+        self.snapshot = ClientsSnapshot.from_response(data, time.monotonic())
+        self.snapshot_ready.emit(self.snapshot)
+
+    def _on_error(self, message):
+        logger.warning(f"获取在线客户端失败: {message}")
+
+    def _on_done(self):
+        self._thread = None
+
+
 class AddAircraftDialog(QDialog):
     def __init__(self, parent=None, aircraft_data=None):
         super().__init__(parent)
@@ -1344,12 +1629,30 @@ class ISFPApp(QMainWindow):
         config_path = os.path.join(data_dir, "config.ini")
         self.settings = QSettings(config_path, QSettings.IniFormat)
         
+        # REST 响应缓存落盘，重启后可立即显示上次的数据
+        get_response_cache().set_disk_dir(os.path.join(data_dir, "http_cache"))
+        
         # 签派数据管理器
         self.dispatch_manager = DispatchManager(data_dir)
         
+        # 航空器照片磁盘缓存（原图 + 机库缩略图）
+        self.image_cache = ImageDiskCache(os.path.join(data_dir, "image_cache"))
+        # 索引写入是合并进行的，退出前写入剩余修改
+        QApplication.instance().aboutToQuit.connect(self.image_cache.flush)
+        self.image_pipeline = get_image_pipeline()
+        # XZPhotos 注册号查询结果缓存（同样合并写入，退出前写入剩余修改）
+        photo_metadata_cache = get_photo_metadata_cache()
+        photo_metadata_cache.set_storage_path(os.path.join(data_dir, "xzphotos_cache.json"))
+        QApplication.instance().aboutToQuit.connect(photo_metadata_cache.flush)
+        
         # 线程管理器，防止 QThread 被 GC 回收
         self._active_threads = set()
         
+        # 共享的 /clients 快照，首页、地图、在线机组都订阅它
+        self.clients_service = ClientsSnapshotService(self)
+        self.clients_service.snapshot_ready.connect(self.on_home_stats_ready)
+        self.clients_service.snapshot_ready.connect(self.on_map_data_ready)
+        
         # 初始化 X-Plane 插件管理器
         self._init_plugin_manager()
         
@@ -1364,11 +1667,25 @@ class ISFPApp(QMainWindow):
         # 初始化灵动岛
         self._init_dynamic_island()
         
+        # 后台预热机库航空器的照片元数据
+        QTimer.singleShot(3000, self.prefetch_hangar_photos)
+        
         # 启动时检查登录状态
         if not self.auth_token:
             # 默认显示账户页面（登录页面）
             self.switch_page(9)  # 账户页面现在是第9个
     
+    def prefetch_hangar_photos(self, registrations=None):
+        """ 在后台批量查询尚未缓存的注册号（低优先级，不影响用户操作） """
+        if registrations is None:
+            registrations = [ac.get('reg', '') for ac in self.dispatch_manager.hangar]
+        missing = get_photo_metadata_cache().missing(registrations)
+        if not missing:
+            return
+        logging.getLogger('ISFP-Connect.XZPhotos').info(f"后台预取 {len(missing)} 个注册号的照片信息")
+        for reg in missing:
+            self.manage_thread(XZPhotosAPIThread(reg, priority=PRIORITY_BACKGROUND))
+
     def _init_plugin_manager(self):
         """初始化 X-Plane 插件管理器"""
         if XPLANE_PLUGIN_MANAGER_AVAILABLE:
@@ -1484,7 +1801,11 @@ class ISFPApp(QMainWindow):
             # 显示登录页面
             self.switch_page(9)  # 账户页面现在是第9个
         
-        thread.finished.connect(cleanup)
+        # APIThread 在成功/失败/取消时都会发出 done；其他 QThread 仍以 finished 为准
+        if hasattr(thread, 'done'):
+            thread.done.connect(cleanup)
+        else:
+            thread.finished.connect(cleanup)
         if hasattr(thread, 'jwt_expired'):
             thread.jwt_expired.connect(handle_jwt_expired)
         thread.start()
@@ -2303,31 +2624,36 @@ class ISFPApp(QMainWindow):
         hangar_layout = QVBoxLayout(hangar_group)
         hangar_layout.setContentsMargins(15, 25, 15, 15)
         
-        # 使用 IconMode 展示机库
-        self.hangar_list = QListWidget()
-        self.hangar_list.setViewMode(QListWidget.IconMode)
+        # 使用 IconMode 展示机库（模型见 dispatch_models）
+        self.hangar_model = HangarModel(self)
+        self.hangar_list = QListView()
+        self.hangar_list.setModel(self.hangar_model)
+        self.hangar_list.setItemDelegate(HangarItemDelegate(self.hangar_list))
+        self.hangar_list.setUniformItemSizes(True)
+        self.hangar_list.setViewMode(QListView.IconMode)
+        self.hangar_list.setMovement(QListView.Static)
         self.hangar_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.hangar_list.customContextMenuRequested.connect(self.show_hangar_menu)
-        self.hangar_list.setIconSize(QSize(220, 150))
+        self.hangar_list.setIconSize(QSize(*HANGAR_THUMB_SIZE))
         self.hangar_list.setSpacing(10)
-        self.hangar_list.setResizeMode(QListWidget.Adjust)
+        self.hangar_list.setResizeMode(QListView.Adjust)
         self.hangar_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background: transparent; 
                 border: none;
             }
-            QListWidget::item {
+            QListView::item {
                 background: rgba(255, 255, 255, 0.05);
                 border-radius: 8px;
                 padding: 5px;
                 color: white;
                 margin: 5px;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background: rgba(255, 255, 255, 0.1);
                 border: 1px solid #f39c12;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background: rgba(243, 156, 18, 0.2);
                 border: 1px solid #f39c12;
             }
@@ -2418,28 +2744,33 @@ class ISFPApp(QMainWindow):
         
         flight_layout.addLayout(hist_header)
         
-        self.flight_history_list = QListWidget()
+        # 历史记录按页懒加载，滚动到底部时才读取下一页
+        self.history_model = FlightHistoryModel(self.dispatch_manager, self)
+        self.flight_history_list = QListView()
+        self.flight_history_list.setModel(self.history_model)
+        self.flight_history_list.setItemDelegate(FlightHistoryDelegate(self.flight_history_list))
+        self.flight_history_list.setUniformItemSizes(True)
         self.flight_history_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.flight_history_list.customContextMenuRequested.connect(self.show_history_menu)
         self.flight_history_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background: rgba(0,0,0,0.2); 
                 border: 1px solid rgba(255,255,255,0.1); 
                 border-radius: 6px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 10px;
                 border-bottom: 1px solid rgba(255,255,255,0.05);
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background: rgba(255, 255, 255, 0.05);
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background: rgba(46, 204, 113, 0.2);
                 border-left: 3px solid #2ecc71;
             }
         """)
-        self.flight_history_list.itemClicked.connect(self.show_flight_details)
+        self.flight_history_list.clicked.connect(self.show_flight_details)
         flight_layout.addWidget(self.flight_history_list)
         
         layout.addWidget(flight_group, 4) # 占比 40%
@@ -2452,99 +2783,46 @@ class ISFPApp(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.dispatch_manager.clear_history()
-            self.load_dispatch_data()
+            self.history_model.reload()
             self.show_notification("历史记录已清空")
 
     def load_dispatch_data(self):
-        # 加载机库
-        self.hangar_list.clear()
-        hangar = self.dispatch_manager.hangar
-        for ac in hangar:
-            # 动态生成占位图作为默认图标
-            pix = QPixmap(220, 150)
-            pix.fill(QColor(44, 62, 80))
-            painter = QPainter(pix)
-            painter.setPen(QPen(Qt.white))
-            painter.setFont(QFont("Arial", 14, QFont.Bold))
-            painter.drawText(pix.rect(), Qt.AlignCenter, "NO IMAGE")
-            painter.end()
-            icon = QIcon(pix)
-            
-            text = f"{ac['airline']} {ac['reg']}\n{ac['type']}"
-            item = QListWidgetItem(icon, text)
-            item.setForeground(Qt.white)
-            item.setFont(QFont("Consolas", 10, QFont.Bold))
-            item.setTextAlignment(Qt.AlignCenter)
-            item.setData(Qt.UserRole, ac)
-            self.hangar_list.addItem(item)
-            
-            # 如果有图片URL，异步加载图片
-            if ac.get('image'):
-                img_path_or_url = ac['image']
-                if img_path_or_url.startswith('http'):
-                    # 是URL，异步加载
-                    self.async_load_hangar_image(img_path_or_url, item)
-                elif os.path.exists(img_path_or_url):
-                    # 是本地路径且存在
-                    icon = QIcon(img_path_or_url)
-                    item.setIcon(icon)
-            
-        # 加载历史
-        self.flight_history_list.clear()
-        history = self.dispatch_manager.history
-        
-        # 状态颜色映射
-        status_colors = {
-            '计划': '#95a5a6',
-            '推出': '#e67e22',
-            '起飞': '#f39c12',
-            '巡航': '#3498db',
-            '下降': '#9b59b6',
-            '落地': '#2ecc71'
-        }
-        
-        for f in history:
-            status = f.get('status', '计划')
-            status_color = status_colors.get(status, '#95a5a6')
-            
-            # 格式化显示：日期 | 航班号 | 起降 | 机型 | 状态
-            text = f"📅 {f['date']}   ✈ {f['callsign']}\n🛫 {f['dep']} ➔ 🛬 {f['arr']}   🛩️ {f['aircraft']['type']}   [{status}]"
-            item = QListWidgetItem(text)
-            item.setForeground(QColor(status_color))
-            item.setFont(QFont("Consolas", 10))
-            item.setData(Qt.UserRole, f) # 存储完整数据以便点击查看
-            self.flight_history_list.addItem(item)
-
-    def async_load_hangar_image(self, url, list_item):
-        """异步加载机库图片并设置到列表项"""
+        """重新加载机库和历史；之后的增删改都是对模型的单行更新"""
+        self.hangar_model.set_aircraft(self.dispatch_manager.hangar)
+        for ac in self.hangar_model.aircraft():
+            self.load_hangar_icon(ac)
+        # 历史只读取总数，行数据由视图按需分页读取
+        self.history_model.reload()
+
+    def load_hangar_icon(self, aircraft):
+        """为航空器加载图片图标；同一图片只加载一次，没有图片时委托显示共享占位图"""
+        img_path_or_url = aircraft.get('image')
+        if not img_path_or_url or self.hangar_model.has_icon(img_path_or_url):
+            return
+        if img_path_or_url.startswith('http'):
+            # 是URL，异步加载
+            self.async_load_hangar_image(img_path_or_url, aircraft.get('reg', 'unknown'))
+        elif os.path.exists(img_path_or_url):
+            # 是本地路径且存在
+            self.hangar_model.set_icon(img_path_or_url, QIcon(img_path_or_url))
+
+    def async_load_hangar_image(self, url, reg):
+        """异步加载机库图片并设置到模型中使用该图片的航空器，优先使用磁盘缓存"""
         xz_logger = logging.getLogger('ISFP-Connect.XZPhotos')
         
-        # 获取航空器注册号作为唯一标识
-        aircraft_data = list_item.data(Qt.UserRole)
-        reg = aircraft_data.get('reg', 'unknown') if aircraft_data else 'unknown'
-        
-        # URL 解析
-        from urllib.parse import urljoin, quote, urlparse, urlunparse
-        base_api_url = "https://xzphotos.cn"
-        
-        if url.startswith("http"):
-            full_url = url
-        else:
-            full_url = urljoin(base_api_url, url)
-            
-        try:
-            parsed = urlparse(full_url)
-            new_path = quote(parsed.path, safe='/')
-            full_url = urlunparse((
-                parsed.scheme,
-                parsed.netloc,
-                new_path,
-                parsed.params,
-                parsed.query,
-                parsed.fragment
-            ))
-        except:
-            pass
+        full_url = resolve_image_url(url, "https://xzphotos.cn")
+        thumb_w, thumb_h = HANGAR_THUMB_SIZE
+        
+        # 缩略图已缓存：直接显示，不访问网络
+        thumb = self.image_cache.get_thumbnail(full_url, thumb_w, thumb_h)
+        if thumb is None:
+            # 原图已缓存：只需重新生成缩略图
+            cached = self.image_cache.get_original(full_url)
+            if cached is not None:
+                thumb = self.image_cache.make_thumbnail(full_url, cached, thumb_w, thumb_h)
+        if thumb is not None:
+            self.hangar_model.set_icon(url, QIcon(QPixmap.fromImage(thumb)))
+            return
         
         req = QNetworkRequest(QUrl(full_url))
         req.setRawHeader(b"User-Agent", b"Mozilla/5.0 ISFP-Connect/1.0")
@@ -2552,36 +2830,16 @@ class ISFPApp(QMainWindow):
         reply = self.nam.get(req)
         
         def on_finished():
-            # 检查列表项是否仍然有效（通过注册号查找）
-            found_item = None
-            for i in range(self.hangar_list.count()):
-                item = self.hangar_list.item(i)
-                if item:
-                    item_data = item.data(Qt.UserRole)
-                    if item_data and item_data.get('reg') == reg:
-                        found_item = item
-                        break
-            
-            if not found_item:
-                xz_logger.debug(f"[机库图片] 列表项已不存在，跳过 - 注册号: {reg}")
-                reply.deleteLater()
-                return
-            
             if reply.error() == QNetworkReply.NoError:
-                img_data = reply.readAll()
-                image = QImage()
-                if image.loadFromData(img_data):
-                    # 缩放到合适大小
-                    pixmap = QPixmap.fromImage(image).scaled(
-                        220, 150,
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                    icon = QIcon(pixmap)
-                    found_item.setIcon(icon)
-                    xz_logger.info(f"[机库图片] 加载成功 - 注册号: {reg}")
-                else:
+                img_data = reply.readAll().data()
+                self.image_cache.put_original(full_url, img_data)
+                # 即使航空器已被删除也生成缩略图，下次刷新直接命中缓存
+                thumb = self.image_cache.make_thumbnail(full_url, img_data, thumb_w, thumb_h)
+                if thumb is None:
                     xz_logger.warning(f"[机库图片] 图片格式错误 - 注册号: {reg}")
+                else:
+                    self.hangar_model.set_icon(url, QIcon(QPixmap.fromImage(thumb)))
+                    xz_logger.info(f"[机库图片] 加载成功 - 注册号: {reg}")
             else:
                 xz_logger.warning(f"[机库图片] 加载失败 - 注册号: {reg}, 错误: {reply.errorString()}")
             
@@ -2590,8 +2848,8 @@ class ISFPApp(QMainWindow):
         reply.finished.connect(on_finished)
 
     def show_history_menu(self, pos):
-        item = self.flight_history_list.itemAt(pos)
-        if not item: return
+        index = self.flight_history_list.indexAt(pos)
+        if not index.isValid(): return
         
         from PySide6.QtWidgets import QMenu
         menu = QMenu()
@@ -2605,14 +2863,14 @@ class ISFPApp(QMainWindow):
         action = menu.exec(self.flight_history_list.mapToGlobal(pos))
         
         if action == del_action:
-            flight_data = item.data(Qt.UserRole)
-            self.dispatch_manager.delete_flight(flight_data)
-            self.load_dispatch_data()
+            flight_data = index.data(Qt.UserRole)
+            if self.dispatch_manager.delete_flight(flight_data):
+                self.history_model.remove_row(index.row())
             self.show_notification("航班记录已删除")
 
     def show_hangar_menu(self, pos):
-        item = self.hangar_list.itemAt(pos)
-        if not item: return
+        index = self.hangar_list.indexAt(pos)
+        if not index.isValid(): return
         
         from PySide6.QtWidgets import QMenu
         menu = QMenu()
@@ -2628,19 +2886,20 @@ class ISFPApp(QMainWindow):
         action = menu.exec(self.hangar_list.mapToGlobal(pos))
         
         if action == edit_action:
-            self.show_edit_aircraft_dialog(item)
+            self.show_edit_aircraft_dialog(index)
         elif action == del_action:
             from PySide6.QtWidgets import QMessageBox
             reply = QMessageBox.question(self, "确认删除", "确定要删除该航空器吗？",
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                aircraft_data = item.data(Qt.UserRole)
-                self.dispatch_manager.delete_aircraft(aircraft_data)
-                self.load_dispatch_data()
+                aircraft_data = index.data(Qt.UserRole)
+                if self.dispatch_manager.delete_aircraft(aircraft_data):
+                    self.hangar_model.remove_row(index.row())
                 self.show_notification("航空器已删除")
 
-    def show_edit_aircraft_dialog(self, item):
-        original_data = item.data(Qt.UserRole)
+    def show_edit_aircraft_dialog(self, index):
+        row = index.row()
+        original_data = index.data(Qt.UserRole)
         dialog = AddAircraftDialog(self, aircraft_data=original_data)
         if dialog.exec():
             new_data = dialog.get_data()
@@ -2662,12 +2921,8 @@ class ISFPApp(QMainWindow):
                                 xz_logger.info(f"[图片URL] 获取成功 - 注册号: {reg}, URL: {img_url}")
                                 
                                 # 直接保存URL，不下载图片到本地
-                                for ac in self.dispatch_manager.hangar:
-                                    if ac['reg'] == reg:
-                                        ac['image'] = img_url  # 保存URL而不是本地路径
-                                        break
-                                self.dispatch_manager.save_json(self.dispatch_manager.hangar_file, self.dispatch_manager.hangar)
-                                self.load_dispatch_data()
+                                self.dispatch_manager.set_aircraft_image(reg, img_url)  # 保存URL而不是本地路径
+                                self.update_hangar_image(reg, img_url)
                                 xz_logger.info(f"[图片URL] 航空器数据已更新 - 注册号: {reg}")
                             except Exception as e:
                                 xz_logger.error(f"[图片URL] 异常 - 注册号: {reg}, 错误: {str(e)}")
@@ -2678,10 +2933,17 @@ class ISFPApp(QMainWindow):
                  self.auto_photo_thread.finished.connect(on_photo_ready)
                  self.manage_thread(self.auto_photo_thread)
             
-            self.dispatch_manager.update_aircraft(original_data, new_data)
-            self.load_dispatch_data()
+            if self.dispatch_manager.update_aircraft(original_data, new_data):
+                self.hangar_model.update_row(row, new_data)
+                self.load_hangar_icon(new_data)
             self.show_notification("航空器信息已更新")
 
+    def update_hangar_image(self, reg, img_url):
+        """自动获取到图片后只刷新对应航空器"""
+        aircraft = self.hangar_model.set_aircraft_image(reg, img_url)
+        if aircraft is not None:
+            self.load_hangar_icon(aircraft)
+
     def show_add_aircraft_dialog(self):
         dialog = AddAircraftDialog(self)
         if dialog.exec():
@@ -2696,7 +2958,7 @@ class ISFPApp(QMainWindow):
                 
                 # 方案：先添加，然后启动线程获取图片，获取成功后更新 JSON
                 self.dispatch_manager.add_aircraft(data)
-                self.load_dispatch_data()
+                self.hangar_model.append(data)
                 
                 # 自动获取图片
                 reg = data['reg']
@@ -2709,12 +2971,8 @@ class ISFPApp(QMainWindow):
                                 xz_logger.info(f"[图片URL] 获取成功 - 注册号: {reg}, URL: {img_url}")
                                 
                                 # 直接保存URL，不下载图片到本地
-                                for ac in self.dispatch_manager.hangar:
-                                    if ac['reg'] == reg:
-                                        ac['image'] = img_url  # 保存URL而不是本地路径
-                                        break
-                                self.dispatch_manager.save_json(self.dispatch_manager.hangar_file, self.dispatch_manager.hangar)
-                                self.load_dispatch_data() # 刷新显示
+                                self.dispatch_manager.set_aircraft_image(reg, img_url)  # 保存URL而不是本地路径
+                                self.update_hangar_image(reg, img_url) # 刷新显示
                                 xz_logger.info(f"[图片URL] 航空器数据已更新 - 注册号: {reg}")
                             except Exception as e:
                                 xz_logger.error(f"[图片URL] 异常 - 注册号: {reg}, 错误: {str(e)}")
@@ -2728,7 +2986,8 @@ class ISFPApp(QMainWindow):
                 self.manage_thread(self.auto_photo_thread)
             else:
                 self.dispatch_manager.add_aircraft(data)
-                self.load_dispatch_data()
+                self.hangar_model.append(data)
+                self.load_hangar_icon(data)
 
     def show_new_flight_dialog(self):
         if not self.dispatch_manager.hangar:
@@ -2739,7 +2998,7 @@ class ISFPApp(QMainWindow):
         if dialog.exec():
             data = dialog.get_data()
             self.dispatch_manager.add_flight(data)
-            self.load_dispatch_data()
+            self.history_model.prepend(data)
             self.show_notification("航班签派成功，已添加至历史记录")
             
             # 在灵动岛显示新航班信息
@@ -2747,16 +3006,20 @@ class ISFPApp(QMainWindow):
                 callsign = data.get('callsign', '')
                 update_flight_on_island(callsign, '准备')
 
-    def show_flight_details(self, item):
-        flight_data = item.data(Qt.UserRole)
+    def show_flight_details(self, index):
+        flight_data = index.data(Qt.UserRole)
+        # 对话框打开期间行号可能变化，用持久索引定位要刷新的行
+        row_index = QPersistentModelIndex(index)
         dialog = FlightDetailsDialog(flight_data, self, editable=True)
-        dialog.status_changed.connect(lambda status: self.on_flight_status_changed(flight_data, status))
+        dialog.status_changed.connect(lambda status: self.on_flight_status_changed(flight_data, status, row_index))
         dialog.exec()
 
-    def on_flight_status_changed(self, flight_data, new_status):
+    def on_flight_status_changed(self, flight_data, new_status, row_index=None):
         """处理航班状态变更"""
         if self.dispatch_manager.update_flight_status(flight_data, new_status):
-            self.load_dispatch_data()
+            # flight_data 就是模型中的字典，已被原地更新，只需重绘该行
+            if row_index is not None and row_index.isValid():
+                self.history_model.refresh_row(row_index.row())
             logger.info(f"航班 {flight_data.get('callsign')} 状态更新为: {new_status}")
             
             # 更新灵动岛航班信息
@@ -2789,7 +3052,7 @@ class ISFPApp(QMainWindow):
         # 刷新按钮
         refresh_btn = QPushButton("刷新机组动态")
         refresh_btn.setStyleSheet("padding: 8px; background: #27ae60; color: white; border-radius: 6px; font-size: 12px;")
-        refresh_btn.clicked.connect(self.load_map_data)
+        refresh_btn.clicked.connect(lambda: self.load_map_data(force=True))
         online_layout.addWidget(refresh_btn)
         
         # 在线机组列表
@@ -2821,7 +3084,12 @@ class ISFPApp(QMainWindow):
                 border: 1px solid #3498db;
             }
         """)
+        self.online_list.itemClicked.connect(self.on_pilot_item_clicked)
         online_layout.addWidget(self.online_list)
+        # 呼号 -> 列表项，列表原地增量更新，不再每次 clear 重建
+        self._online_items = {}
+        # 最近一次 /clients 的机组快照（呼号 -> 条目），提供 CID 和飞行计划
+        self._rest_pilots = {}
         
         # 右侧：地图容器（包含地图和切换按钮）
         map_container = QWidget()
@@ -2830,6 +3098,7 @@ class ISFPApp(QMainWindow):
         
         self.map_view = QWebEngineView()
         self.map_view.setStyleSheet("background: #1a1a1a;")
+        self._install_map_scheme_handler(self.map_view.page().profile())
         
         # 配置 WebChannel
         self.map_channel = QWebChannel()
@@ -2839,6 +3108,10 @@ class ISFPApp(QMainWindow):
         
         # 标记 JS 是否已就绪
         self._map_js_ready = False
+        # 记录页面上已有的机组，推送增量补丁
+        self._map_delta = PilotDeltaEncoder()
+        # 按呼号缓存的航迹，按缩放级别抽稀后发送
+        self.path_cache = FlightPathCache()
         
         # 移除不可靠的 loadFinished 监听，改用 JS 主动通知
         # self.map_view.loadFinished.connect(lambda: setattr(self, '_map_js_ready', True))
@@ -2879,8 +3152,8 @@ class ISFPApp(QMainWindow):
                     background: #2ecc71;
                 }
             </style>
-            <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
-            <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+            <link rel="stylesheet" href="isfp://assets/leaflet/leaflet.css" />
+            <script src="isfp://assets/leaflet/leaflet.js"></script>
             <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
         </head>
         <body>
@@ -2893,20 +3166,18 @@ class ISFPApp(QMainWindow):
             <script>
                 var map = L.map('map').setView([35.0, 105.0], 4);
                 
-                // 定义不同图源
+                // 定义不同图源（经本地瓦片缓存，上游地址见 tile_cache.TILE_SOURCES）
                 var layers = {
-                    dark: L.tileLayer('https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png', {
+                    dark: L.tileLayer('isfp://tiles/dark/{z}/{x}/{y}{r}.png', {
                         attribution: '&copy; OpenStreetMap &copy; CARTO',
-                        subdomains: 'abcd',
                         maxZoom: 19
                     }),
-                    satellite: L.tileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}', {
+                    satellite: L.tileLayer('isfp://tiles/satellite/{z}/{x}/{y}.png', {
                         attribution: '&copy; Esri',
                         maxZoom: 19
                     }),
-                    light: L.tileLayer('https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png', {
+                    light: L.tileLayer('isfp://tiles/light/{z}/{x}/{y}{r}.png', {
                         attribution: '&copy; OpenStreetMap &copy; CARTO',
-                        subdomains: 'abcd',
                         maxZoom: 19
                     })
                 };
@@ -2934,70 +3205,273 @@ class ISFPApp(QMainWindow):
                 };
 
                 // 将变量挂载到 window 对象，确保全局可访问
-                window.markers = {};
                 window.flightPaths = {}; // 改为存储多个航迹: {callsign: polyline}
                 window.bridge = null;
 
-                // 核心修复：直接定义在 window 上，不要用 var/let
-                updatePilots = function(pilots) {
-                    var currentIds = [];
-                    pilots.forEach(function(p) {
-                        var id = p.cid; 
-                        currentIds.push(id);
-                        
-                        var lat = p.latitude;
-                        var lng = p.longitude;
-                        
-                        // 动态按钮文本
-                        var hasPath = window.flightPaths[p.callsign] ? "隐藏航迹" : "显示航迹";
-                        var btnColor = window.flightPaths[p.callsign] ? "#c0392b" : "#34495e";
-                        
-                        var info = `
-                            <div style='font-family: Consolas, sans-serif; font-size: 13px;'>
-                                <b style='color: #3498db; font-size: 15px;'>${p.callsign}</b><br>
-                                <hr style='border: 0; border-top: 1px solid #555; margin: 5px 0;'>
-                                👤 CID: <span style='color: #9b59b6;'>${p.cid || 'N/A'}</span><br>
-                                ✈ 机型: <span style='color: #2ecc71;'>${p.aircraft || 'Unknown'}</span><br>
-                                📏 高度: <span style='color: #f1c40f;'>${p.altitude} ft</span><br>
-                                🚀 速度: ${p.ground_speed} kts<br>
-                                📡 应答机: ${p.transponder}<br>
-                                <button id="btn-${p.callsign}" onclick="window.togglePath('${p.callsign}')" style="margin-top:8px; width: 100%; padding: 5px; background: ${btnColor}; color: white; border: none; border-radius: 4px; cursor: pointer;">${hasPath}</button>
-                            </div>
-                        `;
-
-                        if (window.markers[id]) {
-                            window.markers[id].setLatLng([lat, lng]);
-                            if (window.markers[id].getPopup().isOpen()) {
-                                // 保持 popup 内容最新
-                            } else {
-                                window.markers[id].setPopupContent(info);
+                // 机组增量补丁（格式见 map_delta.py）：短键记录 i/c/y/x/h/a/g/t/p
+                window.pilots = {};
+                window.callsignIndex = {}; // 呼号 -> 机组 ID
+                var pendingPatches = [];
+                var patchFrame = 0;
+
+                // ---------- Canvas 机组图层 ----------
+                // 所有飞机画在同一张 canvas 上：只绘制视口内的机组，低缩放级别按屏幕网格聚合
+                var PLANE_SIZE = 24;
+                var CLUSTER_MAX_ZOOM = 6;   // 此缩放级别及以下聚合
+                var CLUSTER_CELL = 48;      // 聚合网格边长（像素）
+                var HIT_CELL = 32;          // 点击检测网格边长（像素）
+
+                // 飞机图标只绘制一次，之后按航向旋转贴图
+                var planeSprite = (function() {
+                    var ratio = window.devicePixelRatio || 1;
+                    var c = document.createElement('canvas');
+                    c.width = c.height = PLANE_SIZE * ratio;
+                    var ctx = c.getContext('2d');
+                    ctx.scale(ratio, ratio);
+                    ctx.fillStyle = '#3498db';
+                    ctx.font = '20px sans-serif';
+                    ctx.textAlign = 'center';
+                    ctx.textBaseline = 'middle';
+                    ctx.fillText('✈', PLANE_SIZE / 2, PLANE_SIZE / 2);
+                    return c;
+                })();
+
+                var PlaneLayer = L.Layer.extend({
+                    onAdd: function(map) {
+                        // leaflet-zoom-hide：缩放动画期间隐藏，动画结束后重绘
+                        this._canvas = L.DomUtil.create('canvas', 'leaflet-zoom-hide');
+                        this._canvas.style.position = 'absolute';
+                        this._canvas.style.pointerEvents = 'none';
+                        map.getPanes().overlayPane.appendChild(this._canvas);
+                        this._hitGrid = {};
+                        this._frame = 0;
+                        map.on('move zoomend resize viewreset', this.redraw, this);
+                        map.on('click', this._onClick, this);
+                        map.on('mousemove', this._onMouseMove, this);
+                        this.redraw();
+                    },
+
+                    onRemove: function(map) {
+                        L.DomUtil.remove(this._canvas);
+                        map.off('move zoomend resize viewreset', this.redraw, this);
+                        map.off('click', this._onClick, this);
+                        map.off('mousemove', this._onMouseMove, this);
+                        if (this._frame) L.Util.cancelAnimFrame(this._frame);
+                        this._frame = 0;
+                    },
+
+                    // 同一帧内的多次请求只重绘一次
+                    redraw: function() {
+                        if (this._map && !this._frame) this._frame = L.Util.requestAnimFrame(this._draw, this);
+                        return this;
+                    },
+
+                    _draw: function() {
+                        this._frame = 0;
+                        var map = this._map;
+                        var size = map.getSize();
+                        var ratio = window.devicePixelRatio || 1;
+                        var canvas = this._canvas;
+                        L.DomUtil.setPosition(canvas, map.containerPointToLayerPoint([0, 0]));
+                        if (canvas.width !== size.x * ratio || canvas.height !== size.y * ratio) {
+                            canvas.width = size.x * ratio;
+                            canvas.height = size.y * ratio;
+                            canvas.style.width = size.x + 'px';
+                            canvas.style.height = size.y + 'px';
+                        }
+                        var ctx = canvas.getContext('2d');
+                        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+                        ctx.clearRect(0, 0, size.x, size.y);
+
+                        var bounds = map.getBounds().pad(0.05);
+                        var cluster = map.getZoom() <= CLUSTER_MAX_ZOOM;
+                        var cells = {};
+                        var hits = [];
+                        for (var id in window.pilots) {
+                            var p = window.pilots[id];
+                            if (!bounds.contains([p.y, p.x])) continue;
+                            var pt = map.latLngToContainerPoint([p.y, p.x]);
+                            if (cluster) {
+                                var key = Math.floor(pt.x / CLUSTER_CELL) + ':' + Math.floor(pt.y / CLUSTER_CELL);
+                                var cell = cells[key] || (cells[key] = {x: 0, y: 0, ids: []});
+                                cell.x += pt.x;
+                                cell.y += pt.y;
+                                cell.ids.push(id);
+                                continue;
                             }
-                        } else {
-                            // 自定义飞机图标
-                            var icon = L.divIcon({
-                                className: 'plane-icon',
-                                html: `<div style='transform: rotate(${p.heading}deg); color: #3498db; font-size: 20px;'>✈</div>`,
-                                iconSize: [24, 24],
-                                iconAnchor: [12, 12]
-                            });
-                            
-                            var marker = L.marker([lat, lng], {icon: icon}).addTo(map);
-                            marker.bindPopup(info);
-                            window.markers[id] = marker;
+                            this._drawPlane(ctx, ratio, pt.x, pt.y, p.h);
+                            hits.push({x: pt.x, y: pt.y, r: PLANE_SIZE / 2, id: id});
+                        }
+                        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+                        for (var key in cells) {
+                            var cell = cells[key];
+                            var n = cell.ids.length;
+                            var x = cell.x / n, y = cell.y / n;
+                            if (n === 1) {
+                                this._drawPlane(ctx, ratio, x, y, window.pilots[cell.ids[0]].h);
+                                ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+                                hits.push({x: x, y: y, r: PLANE_SIZE / 2, id: cell.ids[0]});
+                                continue;
+                            }
+                            var r = Math.min(12 + 4 * Math.log(n), 26);
+                            ctx.beginPath();
+                            ctx.arc(x, y, r, 0, 2 * Math.PI);
+                            ctx.fillStyle = 'rgba(52, 152, 219, 0.85)';
+                            ctx.fill();
+                            ctx.lineWidth = 2;
+                            ctx.strokeStyle = 'rgba(255, 255, 255, 0.8)';
+                            ctx.stroke();
+                            ctx.fillStyle = 'white';
+                            ctx.font = 'bold 12px sans-serif';
+                            ctx.textAlign = 'center';
+                            ctx.textBaseline = 'middle';
+                            ctx.fillText(n, x, y);
+                            hits.push({x: x, y: y, r: r, ids: cell.ids});
                         }
-                        
-                        // 更新图标旋转
-                        var iconDiv = window.markers[id].getElement().querySelector('div');
-                        if(iconDiv) iconDiv.style.transform = `rotate(${p.heading - 45}deg)`;
-                    });
 
-                    // 移除下线机组
-                    for (var id in window.markers) {
-                        if (!currentIds.includes(parseInt(id)) && !currentIds.includes(id)) {
-                            map.removeLayer(window.markers[id]);
-                            delete window.markers[id];
+                        // 点击检测按网格索引，不再遍历全部机组
+                        var grid = {};
+                        hits.forEach(function(h) {
+                            var key = Math.floor(h.x / HIT_CELL) + ':' + Math.floor(h.y / HIT_CELL);
+                            (grid[key] || (grid[key] = [])).push(h);
+                        });
+                        this._hitGrid = grid;
+                    },
+
+                    _drawPlane: function(ctx, ratio, x, y, heading) {
+                        var a = (heading - 45) * Math.PI / 180;
+                        var cos = Math.cos(a) * ratio, sin = Math.sin(a) * ratio;
+                        ctx.setTransform(cos, sin, -sin, cos, x * ratio, y * ratio);
+                        ctx.drawImage(planeSprite, -PLANE_SIZE / 2, -PLANE_SIZE / 2, PLANE_SIZE, PLANE_SIZE);
+                    },
+
+                    _hitTest: function(pt) {
+                        var cx = Math.floor(pt.x / HIT_CELL), cy = Math.floor(pt.y / HIT_CELL);
+                        var best = null, bestDist = Infinity;
+                        for (var dx = -1; dx <= 1; dx++) {
+                            for (var dy = -1; dy <= 1; dy++) {
+                                var list = this._hitGrid[(cx + dx) + ':' + (cy + dy)];
+                                if (!list) continue;
+                                for (var i = 0; i < list.length; i++) {
+                                    var h = list[i];
+                                    var d = (h.x - pt.x) * (h.x - pt.x) + (h.y - pt.y) * (h.y - pt.y);
+                                    if (d <= h.r * h.r && d < bestDist) {
+                                        best = h;
+                                        bestDist = d;
+                                    }
+                                }
+                            }
+                        }
+                        return best;
+                    },
+
+                    _onClick: function(e) {
+                        var hit = this._hitTest(e.containerPoint);
+                        if (!hit) return;
+                        if (hit.ids) {
+                            // 点击聚合：缩放到其中全部机组
+                            var latlngs = hit.ids.map(function(id) {
+                                var p = window.pilots[id];
+                                return [p.y, p.x];
+                            });
+                            map.fitBounds(L.latLngBounds(latlngs).pad(0.2), {maxZoom: CLUSTER_MAX_ZOOM + 2});
+                        } else {
+                            openPilotPopup(hit.id);
                         }
+                    },
+
+                    _onMouseMove: function(e) {
+                        map.getContainer().style.cursor = this._hitTest(e.containerPoint) ? 'pointer' : '';
                     }
+                });
+
+                var planeLayer = new PlaneLayer().addTo(map);
+
+                // 所有机组共用一个 popup
+                var pilotPopupLayer = L.popup({offset: [0, -6]});
+                var openPilotId = null;
+                map.on('popupclose', function(e) {
+                    if (e.popup === pilotPopupLayer) openPilotId = null;
+                });
+
+                function pilotPopup(p) {
+                    // 动态按钮文本
+                    var hasPath = window.flightPaths[p.c] ? "隐藏航迹" : "显示航迹";
+                    var btnColor = window.flightPaths[p.c] ? "#c0392b" : "#34495e";
+                    return `
+                        <div style='font-family: Consolas, sans-serif; font-size: 13px;'>
+                            <b style='color: #3498db; font-size: 15px;'>${p.c}</b><br>
+                            <hr style='border: 0; border-top: 1px solid #555; margin: 5px 0;'>
+                            👤 CID: <span style='color: #9b59b6;'>${p.i || 'N/A'}</span><br>
+                            ✈ 机型: <span style='color: #2ecc71;'>${p.p || 'Unknown'}</span><br>
+                            📏 高度: <span style='color: #f1c40f;'>${p.a} ft</span><br>
+                            🚀 速度: ${p.g} kts<br>
+                            📡 应答机: ${p.t}<br>
+                            <button id="btn-${p.c}" onclick="window.togglePath('${p.c}')" style="margin-top:8px; width: 100%; padding: 5px; background: ${btnColor}; color: white; border: none; border-radius: 4px; cursor: pointer;">${hasPath}</button>
+                        </div>
+                    `;
+                }
+
+                function openPilotPopup(id) {
+                    var p = window.pilots[id];
+                    if (!p) return;
+                    openPilotId = id;
+                    pilotPopupLayer.setLatLng([p.y, p.x]).setContent(pilotPopup(p)).openOn(map);
+                }
+
+                // 在线列表点击：按呼号索引定位机组
+                focusPilot = function(callsign) {
+                    var id = window.callsignIndex[callsign];
+                    var p = id !== undefined ? window.pilots[id] : null;
+                    if (!p) return;
+                    map.setView([p.y, p.x], Math.max(map.getZoom(), 10));
+                    openPilotPopup(id);
+                };
+
+                function removePilot(id) {
+                    var p = window.pilots[id];
+                    if (!p) return;
+                    if (window.callsignIndex[p.c] === id) delete window.callsignIndex[p.c];
+                    delete window.pilots[id];
+                    if (openPilotId === id) map.closePopup(pilotPopupLayer);
+                }
+
+                function addPilot(p) {
+                    removePilot(p.i);
+                    window.pilots[p.i] = p;
+                    window.callsignIndex[p.c] = p.i;
+                }
+
+                function updatePilot(u) {
+                    var p = window.pilots[u.i];
+                    if (!p) return;
+                    if ('c' in u && window.callsignIndex[p.c] === u.i) delete window.callsignIndex[p.c];
+                    Object.assign(p, u);
+                    window.callsignIndex[p.c] = p.i;
+                    // popup 跟随飞机移动，内容保持不变，避免按钮闪烁
+                    if (openPilotId === u.i && ('y' in u || 'x' in u)) pilotPopupLayer.setLatLng([p.y, p.x]);
+                }
+
+                function applyPatches() {
+                    patchFrame = 0;
+                    var patches = pendingPatches;
+                    pendingPatches = [];
+                    patches.forEach(function(patch) {
+                        if (patch.z) {
+                            for (var id in window.pilots) removePilot(id);
+                        }
+                        (patch.d || []).forEach(removePilot);
+                        (patch.n || []).forEach(addPilot);
+                        (patch.u || []).forEach(updatePilot);
+                    });
+                    planeLayer.redraw();
+                }
+
+                // 同一帧内到达的补丁合并到一次 requestAnimationFrame 中应用
+                updatePilots = function(patch) {
+                    if (patch.z) pendingPatches = [];
+                    pendingPatches.push(patch);
+                    if (!patchFrame) patchFrame = requestAnimationFrame(applyPatches);
                 };
                 
                 // 切换航迹显示/隐藏
@@ -3026,7 +3500,7 @@ class ISFPApp(QMainWindow):
                             }
                         }
                         
-                        if (window.bridge) window.bridge.get_flight_path(callsign);
+                        if (window.bridge) window.bridge.get_flight_path(callsign, map.getZoom());
                         // 不再显示"加载中..."，保持原样直到数据返回
                     }
                 };
@@ -3037,9 +3511,18 @@ class ISFPApp(QMainWindow):
                     return 'hsl(' + h + ', 100%, 50%)';
                 }
 
+                // data: {callsign, p: [[lat, lng], ...], z: 抽稀时的缩放级别, f: 是否缩放到航迹}
                 drawPath = function(data) {
                     var callsign = data.callsign;
-                    var pathData = data.path;
+                    var latlngs = data.p;
+                    
+                    // 放大后的细化结果：只替换点，不改变视野和颜色
+                    var existing = window.flightPaths[callsign];
+                    if (existing && !data.f) {
+                        existing.setLatLngs(latlngs);
+                        existing.options.isfpZoom = data.z;
+                        return;
+                    }
                     
                     // 再次确保互斥：清除所有现有航迹
                     for (var key in window.flightPaths) {
@@ -3052,12 +3535,11 @@ class ISFPApp(QMainWindow):
                         }
                     }
                     
-                    var latlngs = pathData.map(p => [p.latitude, p.longitude]);
                     // 生成一个均匀的随机颜色
                     var color = getRandomColor();
                     
                     // 绘制整条均匀颜色的航迹
-                    var polyline = L.polyline(latlngs, {color: color, weight: 4, opacity: 0.8}).addTo(map);
+                    var polyline = L.polyline(latlngs, {color: color, weight: 4, opacity: 0.8, isfpZoom: data.z}).addTo(map);
                     window.flightPaths[callsign] = polyline;
                     map.fitBounds(polyline.getBounds());
                     
@@ -3069,14 +3551,23 @@ class ISFPApp(QMainWindow):
                     }
                 };
 
+                // 放大到比抽稀时更高的缩放级别后，向 Python 请求更精细的航迹（来自缓存，不访问接口）
+                map.on('zoomend', function() {
+                    var zoom = map.getZoom();
+                    for (var key in window.flightPaths) {
+                        if (zoom > window.flightPaths[key].options.isfpZoom && window.bridge) {
+                            window.bridge.refine_flight_path(key, zoom);
+                        }
+                    }
+                });
+
                 // 最后再初始化通信
                 new QWebChannel(qt.webChannelTransport, function(channel) {
                     window.bridge = channel.objects.bridge;
                     
                     // 监听 Python 信号
                     window.bridge.updatePilotsSignal.connect(function(jsonData) {
-                        var pilots = JSON.parse(jsonData);
-                        updatePilots(pilots);
+                        updatePilots(JSON.parse(jsonData));
                     });
                     
                     window.bridge.drawPathSignal.connect(function(jsonData) {
@@ -3091,7 +3582,8 @@ class ISFPApp(QMainWindow):
         </body>
         </html>
         """
-        self.map_view.setHtml(html_content)
+        # 以 isfp://app/ 为 baseUrl，使页面可以加载本地 Leaflet 和缓存瓦片
+        self.map_view.setHtml(html_content, QUrl(MAP_BASE_URL))
         map_layout.addWidget(self.map_view)
         
         # 创建浮动按钮容器（使用绝对定位）- 放在右上角，但在地图控制按钮下方
@@ -3145,7 +3637,7 @@ class ISFPApp(QMainWindow):
         
         # 定时刷新地图
         self.map_timer = QTimer(self)
-        self.map_timer.setInterval(15000) # 15秒刷新一次
+        self.map_timer.setInterval(MAP_POLL_INTERVAL_MS)
         self.map_timer.timeout.connect(self.load_map_data)
         self.map_timer.start()
         
@@ -3190,140 +3682,160 @@ class ISFPApp(QMainWindow):
         data = item.data(Qt.UserRole)
         if data:
             callsign = data.get('callsign')
-            lat = data.get('latitude')
-            lng = data.get('longitude')
-            
-            # 在地图上定位并显示 popup
-            js_code = f"""
-                if (window.markers) {{
-                    for (var id in window.markers) {{
-                        var marker = window.markers[id];
-                        var popup = marker.getPopup();
-                        if (popup && popup.getContent().includes('{callsign}')) {{
-                            map.setView(marker.getLatLng(), 10);
-                            marker.openPopup();
-                            break;
-                        }}
-                    }}
-                }}
-            """
+            
+            # 在地图上定位并显示 popup（页面端按呼号索引查找）
+            js_code = f"if (window.focusPilot) focusPilot({json.dumps(callsign)});"
             self.map_view.page().runJavaScript(js_code)
 
-    def load_map_data(self):
-        # 使用 /clients 接口获取所有在线客户端
-        self.map_data_thread = APIThread(f"{ISFP_API_BASE}/clients")
-        # 使用 QueuedConnection 确保槽函数在主线程中执行
-        self.map_data_thread.finished.connect(self.on_map_data_ready, Qt.QueuedConnection)
-        self.manage_thread(self.map_data_thread)
-
-    def on_map_data_ready(self, data):
-        # 获取 pilots 数据
-        pilots = data.get("pilots", [])
-        
-        # 兼容处理：如果数据在 data.data.pilots
-        if not pilots and "data" in data and isinstance(data["data"], dict):
-            pilots = data["data"].get("pilots", [])
+    def _install_map_scheme_handler(self, profile):
+        """为地图页面安装 isfp:// 处理器（本地 Leaflet + 磁盘瓦片缓存），每个 profile 只装一次"""
+        if profile.urlSchemeHandler(SCHEME) is not None:
+            return
+        data_dir = os.path.join(get_app_data_dir(), "data")
+        self.tile_store = TileStore(os.path.join(data_dir, "tile_cache.db"))
+        self.map_scheme_handler = MapSchemeHandler(self.tile_store, get_asset_path(""), self)
+        profile.installUrlSchemeHandler(SCHEME, self.map_scheme_handler)
+
+    def load_map_data(self, force=False):
+        # 使用共享的 /clients 快照，结果通过 on_map_data_ready 返回
+        self.clients_service.request(force=force)
+
+    def on_map_data_ready(self, snapshot):
+        if not hasattr(self, '_rest_pilots'):
+            # 地图页尚未创建
+            return
+        self._rest_pilots = {p.get("callsign"): p for p in snapshot.pilots if p.get("callsign")}
+        self._render_pilot_views()
+
+    def on_fsd_traffic_changed(self, added, updated, removed):
+        """FSD 交通表批量变更，推送到在线列表和地图"""
+        if removed and self.fsd_client and self.fsd_client.is_connected:
+            # 真实下线（#DP 或超时），REST 快照中的旧条目也不再显示；断开连接时的清空不算
+            for callsign in removed:
+                self._rest_pilots.pop(callsign, None)
+        self._render_pilot_views()
+
+    def _merged_pilots(self):
+        """合并 REST 快照与 FSD 实时交通：实时位置优先，REST 提供 CID 与飞行计划"""
+        traffic = self.fsd_client.traffic if (FSD_AVAILABLE and self.fsd_client) else None
+        pilots = []
+        for callsign, p in self._rest_pilots.items():
+            record = traffic.get(callsign) if traffic is not None else None
+            if record is not None and record.position is not None:
+                merged = dict(p)
+                merged.update(record.to_dict())
+                merged["cid"] = p.get("cid") or merged["cid"]
+                p = merged
+            pilots.append(p)
+        if traffic is not None:
+            for record in traffic.records():
+                if record.position is not None and record.callsign not in self._rest_pilots:
+                    pilots.append(record.to_dict())
+        return pilots
+
+    def _render_pilot_views(self):
+        pilots = self._merged_pilots()
         
         # 检查 online_list 是否存在
-        if not hasattr(self, 'online_list') or self.online_list is None:
-            return
+        if getattr(self, 'online_list', None) is not None:
+            self._update_online_list(pilots)
         
-        # 检查 online_list 是否已经被销毁
+        # 如果 JS 还没加载完，直接跳过
+        if not getattr(self, '_map_js_ready', False):
+            return
+
+        # 只推送与上次相比新增、移动和下线的机组
+        patch = self._map_delta.encode(pilots)
+        if patch is not None:
+            self.map_bridge.updatePilotsSignal.emit(dumps_patch(patch))
+
+    def _update_online_list(self, pilots):
+        """按呼号原地更新左侧在线机组列表（保留选中和滚动位置）"""
+        items = self._online_items
         try:
-            # 更新左侧在线机组列表
-            self.online_list.clear()
             if not pilots:
+                self.online_list.clear()
+                items.clear()
                 item = QListWidgetItem("✈️ 暂无机组在线")
                 item.setTextAlignment(Qt.AlignCenter)
                 item.setForeground(QColor("#bdc3c7"))
                 item.setSizeHint(QSize(0, 40))
                 self.online_list.addItem(item)
-            else:
-                for p in pilots:
-                    fp = p.get("flight_plan") or {}
-                    callsign = p.get("callsign", "Unknown")
-                    aircraft = fp.get("aircraft", "Unknown")
-                    altitude = p.get("altitude", 0)
-                    ground_speed = p.get("ground_speed", 0)
-                    latitude = p.get("latitude", 0)
-                    longitude = p.get("longitude", 0)
-                    
-                    # 格式化显示文本 - 显示更多信息
-                    dep = fp.get('departure', '???')
-                    arr = fp.get('arrival', '???')
-                    item_text = f"✈ {callsign}\n   {dep} → {arr}\n   📏 {altitude} ft | 🚀 {ground_speed} kts"
+                return
+            if not items:
+                # 移除占位项
+                self.online_list.clear()
+            
+            current = set()
+            for p in pilots:
+                fp = p.get("flight_plan") or {}
+                callsign = p.get("callsign", "Unknown")
+                aircraft = fp.get("aircraft", "Unknown")
+                altitude = p.get("altitude", 0)
+                ground_speed = p.get("ground_speed", 0)
+                current.add(callsign)
+                
+                # 格式化显示文本 - 显示更多信息
+                dep = fp.get('departure', '???')
+                arr = fp.get('arrival', '???')
+                item_text = f"✈ {callsign}\n   {dep} → {arr}\n   📏 {altitude} ft | 🚀 {ground_speed} kts"
+                item = items.get(callsign)
+                if item is None:
                     item = QListWidgetItem(item_text)
-                    item.setData(Qt.UserRole, {
-                        'callsign': callsign,
-                        'latitude': latitude,
-                        'longitude': longitude,
-                        'departure': dep,
-                        'arrival': arr,
-                        'altitude': altitude,
-                        'ground_speed': ground_speed,
-                        'aircraft': aircraft
-                    })
                     item.setSizeHint(QSize(0, 75))
-                    item.setToolTip(f"机型: {aircraft}\n起飞机场: {dep}\n降落机场: {arr}\n高度: {altitude} ft\n速度: {ground_speed} kts")
                     self.online_list.addItem(item)
-                
-                # 连接点击事件
-                self.online_list.itemClicked.connect(self.on_pilot_item_clicked)
+                    items[callsign] = item
+                elif item.text() != item_text:
+                    item.setText(item_text)
+                item.setData(Qt.UserRole, {
+                    'callsign': callsign,
+                    'latitude': p.get("latitude", 0),
+                    'longitude': p.get("longitude", 0),
+                    'departure': dep,
+                    'arrival': arr,
+                    'altitude': altitude,
+                    'ground_speed': ground_speed,
+                    'aircraft': aircraft
+                })
+                item.setToolTip(f"机型: {aircraft}\n起飞机场: {dep}\n降落机场: {arr}\n高度: {altitude} ft\n速度: {ground_speed} kts")
+            
+            for callsign in [cs for cs in items if cs not in current]:
+                self.online_list.takeItem(self.online_list.row(items.pop(callsign)))
         except RuntimeError:
             # 忽略 GUI 对象已销毁的错误
             pass
-        
-        # 如果 JS 还没加载完，直接跳过
-        if not getattr(self, '_map_js_ready', False):
-            return
-
-        # 转换数据为 JS 友好的格式
-        js_data = []
-        for p in pilots:
-            fp = p.get("flight_plan") or {}
-            js_data.append({
-                "cid": p.get("cid"),
-                "callsign": p.get("callsign"),
-                "latitude": p.get("latitude"),
-                "longitude": p.get("longitude"),
-                "heading": p.get("heading", 0),
-                "altitude": p.get("altitude", 0),
-                "ground_speed": p.get("ground_speed", 0),
-                "transponder": p.get("transponder", "----"),
-                "aircraft": fp.get("aircraft", "Unknown")
-            })
-        
-        # 改用信号机制推送数据，不再直接调用 runJavaScript
-        import json
-        json_str = json.dumps(js_data)
-        self.map_bridge.updatePilotsSignal.emit(json_str)
 
-    def fetch_flight_path(self, callsign):
+    def fetch_flight_path(self, callsign, zoom=MAX_ZOOM):
+        # 缓存仍然有效：直接重绘，不请求接口
+        if self.path_cache.is_fresh(callsign):
+            self._emit_flight_path(callsign, zoom, fit=True)
+            return
         self.path_thread = APIThread(
             f"{ISFP_API_BASE}/clients/paths/{callsign}",
             headers={"Authorization": f"Bearer {self.auth_token}"} if self.auth_token else {}
         )
-        self.path_thread.finished.connect(self.on_path_ready)
+        self.path_thread.finished.connect(lambda data: self.on_path_ready(data, callsign, zoom))
         self.manage_thread(self.path_thread)
 
-    def on_path_ready(self, data):
+    def on_path_ready(self, data, callsign, zoom):
         if data.get("code") == "200" or isinstance(data.get("data"), list):
-            path_data = data.get("data", [])
-            import json
-            # 改用信号推送航迹数据，同时带上呼号以便 JS 区分
-            # 这里我们需要从请求参数中找回 callsign，或者让 APIThread 返回它
-            # 由于 APIThread 不返回原始参数，我们从 url 中解析 callsign
-            # URL 格式: .../clients/paths/{callsign}
-            callsign = self.sender().url.split('/')[-1]
-            
-            payload = {
-                "callsign": callsign,
-                "path": path_data
-            }
-            self.map_bridge.drawPathSignal.emit(json.dumps(payload))
+            # 同一次飞行只追加新增的点，已有历史和抽稀结果保持不变
+            self.path_cache.update(callsign, data.get("data", []))
+            self._emit_flight_path(callsign, zoom, fit=True)
         else:
             self.show_notification("获取航迹失败或未登录")
 
+    def refine_flight_path(self, callsign, zoom):
+        """地图放大后按新的缩放级别重新抽稀已缓存的航迹"""
+        if callsign in self.path_cache:
+            self._emit_flight_path(callsign, zoom, fit=False)
+
+    def _emit_flight_path(self, callsign, zoom, fit):
+        payload = self.path_cache.payload(callsign, zoom)
+        payload["z"] = zoom
+        payload["f"] = 1 if fit else 0
+        self.map_bridge.drawPathSignal.emit(json.dumps(payload, separators=(",", ":")))
+
     def create_activities_tab(self):
         widget = QWidget()
         layout = QVBoxLayout(widget)
@@ -3370,17 +3882,9 @@ class ISFPApp(QMainWindow):
     def load_activities(self):
         # 如果有正在进行的请求，先终止它
         if hasattr(self, 'activities_thread') and self.activities_thread and self.activities_thread.isRunning():
-            self.activities_thread.terminate()
-            self.activities_thread.wait(1000)
+            self.activities_thread.cancel()
         
-        # 清理旧的活动卡片和错误信息
-        # 保留最后的 stretch 项，移除其他所有 widget
-        while self.activities_layout.count() > 1:
-            item = self.activities_layout.takeAt(0)
-            if item and item.widget():
-                widget = item.widget()
-                widget.setParent(None)
-                widget.deleteLater()
+        self._clear_activities()
         
         # 强制处理事件，确保删除操作立即生效
         from PySide6.QtCore import QCoreApplication
@@ -3399,6 +3903,16 @@ class ISFPApp(QMainWindow):
         self.activities_thread.error.connect(self.on_activities_error)
         self.manage_thread(self.activities_thread)
 
+    def _clear_activities(self):
+        # 清理旧的活动卡片和错误信息
+        # 保留最后的 stretch 项，移除其他所有 widget
+        while self.activities_layout.count() > 1:
+            item = self.activities_layout.takeAt(0)
+            if item and item.widget():
+                widget = item.widget()
+                widget.setParent(None)
+                widget.deleteLater()
+
     def on_activities_error(self, error_msg):
         error_lbl = QLabel(f"❌ 网络请求异常:\n{error_msg}")
         error_lbl.setStyleSheet("color: #e74c3c; font-size: 15px; font-weight: bold; margin-top: 20px;")
@@ -3406,6 +3920,8 @@ class ISFPApp(QMainWindow):
         self.activities_layout.insertWidget(0, error_lbl)
 
     def display_activities(self, data):
+        # 缓存结果之后可能还会收到重新验证后的新数据，每次都从空列表开始
+        self._clear_activities()
         activities = data.get("data")
         code = data.get("code")
         message = data.get("message", "未知错误")
@@ -3543,6 +4059,15 @@ class ISFPApp(QMainWindow):
             ))
         except: pass
         
+        # 同尺寸的变体已渲染过（例如刷新活动列表）：直接显示，不再下载
+        is_avatar = label.width() == label.height()
+        rendered = self.image_pipeline.cached(full_url, label.width(), label.height(),
+                                              SHAPE_CIRCLE if is_avatar else SHAPE_ROUNDED,
+                                              2 if is_avatar else 0)
+        if rendered is not None:
+            self._set_rendered_image(label, rendered, "解码失败")
+            return
+        
         req = QNetworkRequest(QUrl(full_url))
         req.setRawHeader(b"User-Agent", b"Mozilla/5.0 ISFP-Connect/1.0")
         
@@ -3560,62 +4085,14 @@ class ISFPApp(QMainWindow):
                 return
             
             if reply.error() == QNetworkReply.NoError:
-                img_data = reply.readAll()
-                image = QImage()
-                if image.loadFromData(img_data):
-                    # 判断是头像(方形)还是活动封面(矩形)
-                    is_avatar = label_width == label_height
-                    
-                    if is_avatar:
-                        # 头像：先裁剪为正方形，然后按 Expanding 模式缩放填满 label
-                        from PySide6.QtCore import QRect
-                        size = min(image.width(), image.height())
-                        rect = QRect((image.width() - size) // 2, (image.height() - size) // 2, size, size)
-                        image = image.copy(rect)
-                        
-                        # 关键修改：使用 KeepAspectRatioByExpanding 确保填满容器
-                        pixmap = QPixmap.fromImage(image).scaled(
-                            label.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-                        )
-                        radius = label.width() / 2
-                    else:
-                        # 封面：修复溢出问题，改用 KeepAspectRatio 保证图片完整显示在框内
-                        pixmap = QPixmap.fromImage(image).scaled(
-                            label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-                        )
-                        radius = 15.0
-
-                    rounded_pixmap = QPixmap(label.size())
-                    rounded_pixmap.fill(Qt.transparent)
-                    
-                    painter = QPainter(rounded_pixmap)
-                    painter.setRenderHint(QPainter.Antialiasing)
-                    
-                    path = QPainterPath()
-                    # 确保圆形路径不留缝隙
-                    # 如果是海报，这里可能因为 KeepAspectRatio 导致 label 有空白，所以只给 pixmap 区域加圆角，或者干脆对整个 label 加
-                    # 为了简单且不出错，这里对整个 label 区域做圆角裁剪
-                    path.addRoundedRect(0, 0, label.width(), label.height(), radius, radius)
-                    painter.setClipPath(path)
-                    
-                    # 居中绘制
-                    x = int((label.width() - pixmap.width()) / 2)
-                    y = int((label.height() - pixmap.height()) / 2)
-                    painter.drawPixmap(x, y, pixmap)
-                    
-                    # 如果是头像，再画一个极细的白色边框提升质感，但不占用空间
-                    if is_avatar:
-                         pen = QPen(QColor(255, 255, 255, 100))
-                         pen.setWidth(2)
-                         painter.setPen(pen)
-                         painter.drawRoundedRect(1, 1, label.width()-2, label.height()-2, radius-1, radius-1)
-                    
-                    painter.end()
-                    
-                    label.setPixmap(rounded_pixmap)
-                    label.setText("")
-                else:
-                    label.setText("解码失败")
+                img_data = reply.readAll().data()
+                # 判断是头像(方形)还是活动封面(矩形)；头像加一圈极细的白色边框
+                is_avatar = label_width == label_height
+                self.image_pipeline.render(
+                    full_url, img_data, label_width, label_height,
+                    SHAPE_CIRCLE if is_avatar else SHAPE_ROUNDED,
+                    lambda image: self._set_rendered_image(label, image, "解码失败"),
+                    border=2 if is_avatar else 0)
             else:
                 # 自动尝试 /storage/ 路径重试
                 if reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) == 404 and "storage" not in full_url:
@@ -4121,6 +4598,11 @@ class ISFPApp(QMainWindow):
         
         # 初始化 X-Plane TCP Client
         self.xplane_connector = None
+        # 本机数据面板按固定 UI 频率从邮箱拉取最新样本，避免逐样本刷新堆积
+        self._xplane_ui_timer = QTimer(self)
+        self._xplane_ui_timer.timeout.connect(self.refresh_own_data_display)
+        # FSD 位置路径在接收线程中逐样本更新（见 on_xplane_sample）
+        self._latest_xplane_sample = None
         self._connection_update_timer = QTimer(self)
         self._connection_update_timer.timeout.connect(self.update_connection_ui)
         self._connection_update_timer.start(1000)  # 每秒更新一次 UI
@@ -4144,7 +4626,7 @@ class ISFPApp(QMainWindow):
             # 连接信号
             self.xplane_connector.connected.connect(self.on_xplane_connected)
             self.xplane_connector.disconnected.connect(self.on_xplane_disconnected)
-            self.xplane_connector.flight_data_received.connect(self.on_xplane_data_received)
+            self.xplane_connector.add_sample_listener(self.on_xplane_sample)
             self.xplane_connector.error_occurred.connect(self.on_xplane_connection_error)
         
         # 尝试连接
@@ -4195,6 +4677,15 @@ class ISFPApp(QMainWindow):
         self.connect_btn.setEnabled(False)
         self.disconnect_btn.setEnabled(True)
         self.show_notification("已成功连接到 X-Plane")
+        self._xplane_ui_timer.start(XPLANE_UI_REFRESH_MS)
+        if self.xplane_connector and self.settings.value("flight_recorder_enabled", False, type=bool):
+            # 录制本次连接的全部样本，可用 ReplaySource 或 tools/xplane_standin.py --replay 回放
+            name = datetime.now().strftime("flight-%Y%m%d-%H%M%S") + RECORDING_SUFFIX
+            path = os.path.join(get_app_data_dir(), "data", "recordings", name)
+            try:
+                self.xplane_connector.start_recording(path)
+            except OSError as e:
+                logger.error(f"无法开始录制飞行数据: {e}")
     
     def on_xplane_disconnected(self):
         """X-Plane 断开连接回调"""
@@ -4203,9 +4694,29 @@ class ISFPApp(QMainWindow):
         self.connection_info_label.setText('点击"连接"按钮连接到 X-Plane')
         self.connect_btn.setEnabled(True)
         self.disconnect_btn.setEnabled(False)
+        self._xplane_ui_timer.stop()
+        if self.xplane_connector:
+            self.xplane_connector.stop_recording()
+            mailbox = self.xplane_connector.mailbox
+            logger.info(f"X-Plane 样本统计: 收到 {mailbox.posted}, 显示 {mailbox.taken}, 合并丢弃 {mailbox.dropped}")
     
-    def on_xplane_data_received(self, data):
-        """接收到 X-Plane 飞行数据"""
+    def on_xplane_sample(self, data, received_at):
+        """每个 X-Plane 样本都会调用（在接收线程中，received_at 为接收时刻），只做轻量的 FSD 位置更新"""
+        # 保存最新样本用于 FSD 连接成功时的首次位置发送
+        self._latest_xplane_sample = (data, received_at)
+        
+        # 如果 FSD 已连接，更新位置数据
+        if FSD_AVAILABLE and self.fsd_client and self.fsd_client.is_authenticated:
+            self._update_fsd_position(data, received_at)
+    
+    def refresh_own_data_display(self):
+        """按 UI 刷新频率从邮箱拉取最新样本并更新本机数据显示"""
+        if not self.xplane_connector:
+            return
+        data = self.xplane_connector.mailbox.take()
+        if data is None:
+            return
+        
         # 更新本机数据显示
         data_text = f"""
 <b>位置:</b> {data.get('latitude', 0):.4f}°, {data.get('longitude', 0):.4f}°<br>
@@ -4215,13 +4726,6 @@ class ISFPApp(QMainWindow):
 <b>应答机:</b> {data.get('transponder', 0):04d}
         """.strip()
         self.own_data_label.setText(data_text)
-        
-        # 保存最新数据用于 FSD 位置更新
-        self._latest_xplane_data = data
-        
-        # 如果 FSD 已连接，更新位置数据
-        if FSD_AVAILABLE and self.fsd_client and hasattr(self.fsd_client, '_is_authenticated') and self.fsd_client._is_authenticated:
-            self._update_fsd_position(data)
     
     def on_disconnect_xplane(self):
         """断开与 X-Plane 的连接"""
@@ -4229,25 +4733,13 @@ class ISFPApp(QMainWindow):
             self.xplane_connector.disconnect()
             self.show_notification("已断开与 X-Plane 的连接")
     
-    def _update_fsd_position(self, data):
-        """更新 FSD 位置数据"""
+    def _update_fsd_position(self, data, received_at=None):
+        """更新 FSD 位置数据（received_at 为样本接收时刻，作为外推起点）"""
         try:
-            from fsd_client import FSDPilotPosition, TransponderMode
+            from fsd_client import position_from_xplane, TransponderMode
             
             # 从 X-Plane 数据创建 FSD 位置对象
-            # 注意：FSDPilotPosition 使用 bank 而不是 roll
-            altitude_msl = data.get('altitude_msl', 0)
-            position = FSDPilotPosition(
-                latitude=data.get('latitude', 0),
-                longitude=data.get('longitude', 0),
-                altitude_true=int(altitude_msl),
-                altitude_pressure=int(altitude_msl),  # 使用 MSL 高度作为气压高度
-                groundspeed=int(data.get('groundspeed', 0)),
-                pitch=data.get('pitch', 0),
-                bank=data.get('roll', 0),  # roll 对应 bank
-                heading=data.get('heading', 0),
-                on_ground=data.get('on_ground', False)
-            )
+            position = position_from_xplane(data)
             
             # 获取应答机代码和模式
             transponder = data.get('transponder', 1200)
@@ -4257,7 +4749,8 @@ class ISFPApp(QMainWindow):
             self.fsd_client.update_position(
                 position=position,
                 transponder_code=transponder,
-                transponder_mode=transponder_mode
+                transponder_mode=transponder_mode,
+                timestamp=received_at
             )
             
             logger.debug(f"FSD 位置已更新: lat={position.latitude:.4f}, lon={position.longitude:.4f}, alt={position.altitude_true}")
@@ -4336,13 +4829,10 @@ class ISFPApp(QMainWindow):
             self.fsd_client.error.connect(self.on_fsd_error)
             self.fsd_client.text_message_received.connect(self.on_fsd_text_message)
             self.fsd_client.server_error.connect(self.on_fsd_server_error)
+            self.fsd_client.traffic_changed.connect(self.on_fsd_traffic_changed)
         
         # 设置认证信息
-        self.fsd_client._callsign = callsign
-        self.fsd_client._cid = cid
-        self.fsd_client._password = password
-        self.fsd_client._real_name = real_name
-        self.fsd_client._sim_type = sim_type
+        self.fsd_client.set_credentials(callsign, cid, password, real_name, sim_type)
         
         # 更新 UI
         self.fsd_status_label.setText("🟡 连接中...")
@@ -4350,12 +4840,11 @@ class ISFPApp(QMainWindow):
         self.fsd_info_label.setText(f"正在连接到 {server}:{port}...")
         self.fsd_connect_btn.setEnabled(False)
         
-        # 尝试连接
+        # 开始连接（不阻塞，结果由 on_fsd_connected / on_fsd_error 处理）
         try:
             success = self.fsd_client.connect_to_server(server, port)
             if success:
-                self._append_fsd_message(f"已连接到服务器 {server}:{port}")
-                self._append_fsd_message("等待服务器识别...")
+                self._append_fsd_message(f"正在连接服务器 {server}:{port}...")
             else:
                 self.fsd_status_label.setText("🔴 连接失败")
                 self.fsd_status_label.setStyleSheet("color: #e74c3c; padding: 10px 0;")
@@ -4378,7 +4867,9 @@ class ISFPApp(QMainWindow):
         """FSD 连接成功"""
         self.fsd_status_label.setText("🟢 已连接")
         self.fsd_status_label.setStyleSheet("color: #2ecc71; padding: 10px 0;")
-        self.fsd_info_label.setText(f"已连接到 FSD 服务器，呼号: {self.fsd_client._callsign}")
+        self.fsd_info_label.setText(f"已连接到 FSD 服务器，呼号: {self.fsd_client.callsign}")
+        self._append_fsd_message(f"已连接到服务器 {self.fsd_server}:{self.fsd_port}")
+        self._append_fsd_message("等待服务器识别...")
         self.fsd_connect_btn.setEnabled(False)
         self.fsd_disconnect_btn.setEnabled(True)
         self.show_notification("已连接到 FSD 服务器")
@@ -4387,9 +4878,13 @@ class ISFPApp(QMainWindow):
         self.fsd_client.start_position_updates(200)
         logger.info("FSD 位置更新已启动（每 0.2 秒）")
         
+        # 其他机组位置改由 FSD 实时推送，/clients 轮询降频
+        if hasattr(self, 'map_timer'):
+            self.map_timer.setInterval(MAP_POLL_INTERVAL_LIVE_MS)
+        
         # 立即发送一次当前位置数据（如果有）
-        if hasattr(self, '_latest_xplane_data') and self._latest_xplane_data:
-            self._update_fsd_position(self._latest_xplane_data)
+        if self._latest_xplane_sample is not None:
+            self._update_fsd_position(*self._latest_xplane_sample)
             logger.info("FSD 连接成功，已发送初始位置数据")
     
     def on_fsd_disconnected(self):
@@ -4404,11 +4899,21 @@ class ISFPApp(QMainWindow):
         if self.fsd_client:
             self.fsd_client.stop_position_updates()
             logger.info("FSD 位置更新已停止")
+        
+        if hasattr(self, 'map_timer'):
+            self.map_timer.setInterval(MAP_POLL_INTERVAL_MS)
+            self.load_map_data()
     
     def on_fsd_error(self, error_msg):
         """FSD 错误处理"""
         self._append_fsd_message(f"[错误] {error_msg}")
         self.show_notification(f"FSD 错误: {error_msg}")
+        if self.fsd_client and not self.fsd_client.is_connected:
+            # 连接阶段失败（拒绝连接、超时等）
+            self.fsd_status_label.setText("🔴 连接失败")
+            self.fsd_status_label.setStyleSheet("color: #e74c3c; padding: 10px 0;")
+            self.fsd_info_label.setText("连接失败，请检查网络后重试")
+            self.fsd_connect_btn.setEnabled(True)
     
     def on_fsd_text_message(self, sender, receiver, message):
         """收到 FSD 文本消息 - 显示在信息栏目、播放提示音、展示在灵动岛"""
@@ -4946,6 +5451,8 @@ class ISFPApp(QMainWindow):
     def handle_logout(self):
         self.auth_token = None
         self.user_data = None
+        # 清除该账号的缓存响应（包含个人数据）
+        get_response_cache().clear()
         self.update_account_ui()
         self.load_activities() # 刷新活动列表（会显示报错）
 
@@ -6205,13 +6712,13 @@ class ISFPApp(QMainWindow):
         return card
 
     def update_home_stats(self):
-        self.stats_thread = APIThread(f"{ISFP_API_BASE}/clients")
-        self.stats_thread.finished.connect(self.on_home_stats_ready)
-        self.manage_thread(self.stats_thread)
+        self.clients_service.request()
 
-    def on_home_stats_ready(self, data):
-        pilots = data.get("pilots", [])
-        controllers = data.get("controllers", [])
+    def on_home_stats_ready(self, snapshot):
+        if not hasattr(self, 'pilot_stat_card'):
+            return
+        pilots = snapshot.pilots
+        controllers = snapshot.controllers
         total = len(pilots) + len(controllers)
         
         # 更新首页卡片中的数值
@@ -6295,6 +6802,7 @@ class ISFPApp(QMainWindow):
 
         self.online_list = QListWidget()
         self.online_list.setStyleSheet("background: rgba(0,0,0,100); border-radius: 10px; color: white; padding: 5px;")
+        self.clients_service.snapshot_ready.connect(self.display_pilots)
         
         layout.addWidget(self.online_list)
         
@@ -6920,8 +7428,7 @@ class ISFPApp(QMainWindow):
         
         # 修复：防止线程被垃圾回收导致崩溃
         if hasattr(self, 'ticket_thread') and self.ticket_thread.isRunning():
-            self.ticket_thread.terminate()
-            self.ticket_thread.wait()
+            self.ticket_thread.cancel()
             
         # 调用 /tickets/self 接口
         self.ticket_thread = APIThread(
@@ -6933,6 +7440,7 @@ class ISFPApp(QMainWindow):
         self.manage_thread(self.ticket_thread)
 
     def display_tickets(self, data):
+        self.ticket_list.clear()
         items = data.get("data", {}).get("items", [])
         if not items:
             item = QListWidgetItem("暂无工单记录")
@@ -7128,18 +7636,11 @@ class ISFPApp(QMainWindow):
         self.weather_display.setHtml(html)
 
     def load_online_pilots(self):
-        self.online_list.clear()
-        self.online_thread = APIThread(f"{ISFP_API_BASE}/clients")
-        self.online_thread.finished.connect(self.display_pilots)
-        self.manage_thread(self.online_thread)
+        self.clients_service.request(force=True)
 
-    def display_pilots(self, data):
-        pilots = data.get("pilots", [])
-        
-        # 兼容处理：如果数据在 data.data.pilots
-        if not pilots and "data" in data and isinstance(data["data"], dict):
-            pilots = data["data"].get("pilots", [])
-            
+    def display_pilots(self, snapshot):
+        pilots = snapshot.pilots
+        self.online_list.clear()
         self.online_list.setStyleSheet("""
             QListWidget {
                 background: rgba(0,0,0,120); 
@@ -7210,109 +7711,77 @@ class ISFPApp(QMainWindow):
         else:
             xz_logger.info(f"[图片URL-预览] API未返回图片 - 注册号: {reg}")
     
+    def _set_rendered_image(self, label, image, failure_text):
+        """在 GUI 线程把渲染管线的结果显示到 label 上（唯一的 QPixmap 转换），显示成功返回 True"""
+        try:
+            if image is None:
+                label.setText(failure_text)
+                return
+            label.setPixmap(QPixmap.fromImage(image))
+            label.setText("")
+        except RuntimeError:
+            # QLabel 已被删除
+            return
+        return True
+
     def async_load_image_from_url(self, url, label):
-        """从URL异步加载图片并显示"""
+        """从URL异步加载图片并显示；解码和圆角渲染在工作线程完成，原图优先从磁盘缓存读取"""
         xz_logger = logging.getLogger('ISFP-Connect.XZPhotos')
         
-        # 终极 URL 解析方案
-        from urllib.parse import urljoin, quote, urlparse, urlunparse
-        base_api_url = "https://xzphotos.cn"
+        full_url = resolve_image_url(url, "https://xzphotos.cn")
         
-        if url.startswith("http"):
-            full_url = url
-        else:
-            full_url = urljoin(base_api_url, url)
-            
         try:
-            # 修复：使用 urlparse 正确处理 query 参数
-            parsed = urlparse(full_url)
-            new_path = quote(parsed.path, safe='/')
-            
-            full_url = urlunparse((
-                parsed.scheme,
-                parsed.netloc,
-                new_path,
-                parsed.params,
-                parsed.query,
-                parsed.fragment
-            ))
-        except: 
-            pass
-        
-        req = QNetworkRequest(QUrl(full_url))
-        req.setRawHeader(b"User-Agent", b"Mozilla/5.0 ISFP-Connect/1.0")
-        
-        reply = self.nam.get(req)
-        
-        def on_finished():
-            # 检查 label 是否仍然有效
-            try:
-                label_width = label.width()
-                label_height = label.height()
-            except RuntimeError:
-                reply.deleteLater()
-                return
-            
-            if reply.error() == QNetworkReply.NoError:
-                img_data = reply.readAll()
-                image = QImage()
-                if image.loadFromData(img_data):
-                    # 判断是头像(方形)还是封面(矩形)
-                    is_avatar = label_width == label_height
-                    
-                    if is_avatar:
-                        # 头像处理
-                        from PySide6.QtCore import QRect
-                        size = min(image.width(), image.height())
-                        rect = QRect((image.width() - size) // 2, (image.height() - size) // 2, size, size)
-                        image = image.copy(rect)
-                        
-                        pixmap = QPixmap.fromImage(image).scaled(
-                            label.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-                        )
-                        radius = label_width / 2
-                    else:
-                        # 封面处理
-                        pixmap = QPixmap.fromImage(image).scaled(
-                            label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-                        )
-                        radius = 15.0
-
-                    rounded_pixmap = QPixmap(label.size())
-                    rounded_pixmap.fill(Qt.transparent)
-                    
-                    painter = QPainter(rounded_pixmap)
-                    painter.setRenderHint(QPainter.Antialiasing)
-                    
-                    path = QPainterPath()
-                    path.addRoundedRect(0, 0, label.width(), label.height(), radius, radius)
-                    painter.setClipPath(path)
-                    
-                    # 居中绘制
-                    x = int((label.width() - pixmap.width()) / 2)
-                    y = int((label.height() - pixmap.height()) / 2)
-                    painter.drawPixmap(x, y, pixmap)
-                    
-                    if is_avatar:
-                        pen = QPen(QColor(255, 255, 255, 100))
-                        pen.setWidth(1)
-                        painter.setPen(pen)
-                        painter.setBrush(Qt.NoBrush)
-                        painter.drawEllipse(0, 0, label.width(), label.height())
+            label_width = label.width()
+            label_height = label.height()
+        except RuntimeError:
+            return
+        # 判断是头像(方形)还是封面(矩形)
+        shape = SHAPE_CIRCLE if label_width == label_height else SHAPE_ROUNDED
+        border = 1 if shape == SHAPE_CIRCLE else 0
+        
+        def show(image):
+            if self._set_rendered_image(label, image, "图片格式错误"):
+                label.setStyleSheet("border: none;")
+                xz_logger.info(f"[图片URL-预览] 图片已显示 - URL: {url[:60]}...")
+        
+        def fetch():
+            req = QNetworkRequest(QUrl(full_url))
+            req.setRawHeader(b"User-Agent", b"Mozilla/5.0 ISFP-Connect/1.0")
+            reply = self.nam.get(req)
+            
+            def on_finished():
+                if reply.error() == QNetworkReply.NoError:
+                    img_data = reply.readAll().data()
                     
-                    painter.end()
+                    def store():
+                        # 写磁盘缓存也放到工作线程
+                        self.image_cache.put_original(full_url, img_data)
+                        return img_data
                     
-                    label.setPixmap(rounded_pixmap)
-                    label.setStyleSheet("border: none;")
-                    xz_logger.info(f"[图片URL-预览] 图片已显示 - URL: {url[:60]}...")
+                    self.image_pipeline.render(full_url, store, label_width, label_height, shape, show,
+                                               border=border)
                 else:
-                    label.setText("图片格式错误")
-            else:
-                label.setText("加载失败")
+                    try:
+                        label.setText("加载失败")
+                    except RuntimeError:
+                        pass
+                reply.deleteLater()
             
-            reply.deleteLater()
+            reply.finished.connect(on_finished)
         
-        reply.finished.connect(on_finished)
+        if self.image_pipeline.cached(full_url, label_width, label_height, shape, border) is not None \
+                or self.image_cache.content_hash(full_url) is not None:
+            # 已渲染过或原图在磁盘缓存中：在工作线程读取并渲染，读取失败时再走网络
+            def on_cached(image):
+                if image is None:
+                    fetch()
+                else:
+                    show(image)
+            self.image_pipeline.render(full_url, lambda: self.image_cache.get_original(full_url),
+                                       label_width, label_height, shape, on_cached, border=border)
+            return
+        
+        fetch()
 
 if __name__ == "__main__":
     # 修复 Windows 任务栏图标不显示的问题
@@ -7329,6 +7798,8 @@ if __name__ == "__main__":
     except ImportError:
         pass
 
+    # 地图本地资源 / 瓦片缓存使用的 isfp:// 协议必须在 QApplication 之前注册
+    register_map_scheme()
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon(get_asset_path("logo.png")))
     window = ISFPApp()
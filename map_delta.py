@@ -0,0 +1,114 @@
+"""
+Map Delta - 连飞地图机组增量更新协议
+
+每次刷新不再把整个机组列表发给 Leaflet 页面，只发送与上次相比的差异：
+- 坐标按 COORD_DECIMALS 位小数量化（约 11 米），航向 / 高度 / 地速取整，
+  量化后没有变化的机组不会出现在补丁中
+- 记录使用短键，更新只带变化的字段：
+  i=标记 ID（CID，没有时用呼号） c=呼号 y/x=纬度/经度 h=航向 a=高度 g=地速 t=应答机 p=机型
+- 页面重新加载后调用 reset()，下一帧补丁带 "z": 1 并包含全部机组
+
+补丁格式::
+
+    {"z": 1,                      # 可选，先清空页面上的全部标记
+     "n": [{"i": id, "c": ..., "y": ..., "x": ..., ...}],   # 新增（完整记录）
+     "u": [{"i": id, "y": ..., "x": ...}],                   # 变化（只含变化的字段）
+     "d": [id, ...]}                                         # 下线
+"""
+
+import json
+from typing import Dict, Iterable, Optional
+
+COORD_DECIMALS = 4
+
+
+def _int(value) -> int:
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _coord(value) -> Optional[float]:
+    try:
+        return round(float(value), COORD_DECIMALS)
+    except (TypeError, ValueError):
+        return None
+
+
+def compact_pilot(p: dict) -> Optional[dict]:
+    """把合并后的机组字典转成量化的短键记录，没有有效坐标时返回 None"""
+    lat = _coord(p.get("latitude"))
+    lng = _coord(p.get("longitude"))
+    if lat is None or lng is None:
+        return None
+    fp = p.get("flight_plan") or {}
+    return {
+        "i": str(p.get("cid") or p.get("callsign")),
+        "c": p.get("callsign"),
+        "y": lat,
+        "x": lng,
+        "h": _int(p.get("heading", 0)) % 360,
+        "a": _int(p.get("altitude", 0)),
+        "g": _int(p.get("ground_speed", 0)),
+        "t": p.get("transponder", "----"),
+        "p": fp.get("aircraft", p.get("aircraft", "Unknown")) or "Unknown",
+    }
+
+
+class PilotDeltaEncoder:
+    """记录页面上已有的机组，生成下一帧补丁"""
+
+    def __init__(self):
+        self._sent: Dict[str, dict] = {}
+        self._full = True
+
+    def reset(self):
+        """页面已重新加载：下一帧发送全量"""
+        self._sent.clear()
+        self._full = True
+
+    def __len__(self):
+        return len(self._sent)
+
+    def encode(self, pilots: Iterable[dict]) -> Optional[dict]:
+        """返回补丁字典；与上次相比没有任何变化时返回 None"""
+        current: Dict[str, dict] = {}
+        for p in pilots:
+            record = compact_pilot(p)
+            if record is not None:
+                current[record["i"]] = record
+
+        added, changed = [], []
+        for marker_id, record in current.items():
+            previous = self._sent.get(marker_id)
+            if previous is None:
+                added.append(record)
+                continue
+            diff = {k: v for k, v in record.items() if previous.get(k) != v}
+            if diff:
+                diff["i"] = marker_id
+                changed.append(diff)
+        removed = [marker_id for marker_id in self._sent if marker_id not in current]
+
+        full = self._full
+        self._full = False
+        self._sent = current
+        if not (full or added or changed or removed):
+            return None
+
+        patch = {}
+        if full:
+            patch["z"] = 1
+        if added:
+            patch["n"] = added
+        if changed:
+            patch["u"] = changed
+        if removed:
+            patch["d"] = removed
+        return patch
+
+
+def dumps_patch(patch: dict) -> str:
+    """紧凑序列化（无空格），通过 QWebChannel 发送"""
+    return json.dumps(patch, ensure_ascii=False, separators=(",", ":"))
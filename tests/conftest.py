@@ -0,0 +1,8 @@
+"""pytest 公共配置：让测试可以直接导入仓库根目录和 tools/ 下的模块"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
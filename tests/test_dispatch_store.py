@@ -0,0 +1,88 @@
+"""dispatch_store 迁移与读写测试"""
+
+import json
+
+import pytest
+
+from dispatch_store import DispatchStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "dispatch.db", tmp_path / "hangar.json", tmp_path / "flight_history.json"
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def test_migrate_json_imports_and_renames(paths):
+    db, hangar, history = paths
+    _write(hangar, [{"reg": "B-32DN", "type": "A320"}, {"reg": "B-1234", "type": "B738"}])
+    _write(history, [{"callsign": "CCA2", "date": "2026-03-02", "status": "planned"},
+                     {"callsign": "CCA1", "date": "2026-03-01", "status": "done"}])
+    store = DispatchStore(str(db))
+
+    assert store.migrate_json(str(hangar), str(history))
+
+    assert [ac["reg"] for ac in store.aircraft()] == ["B-32DN", "B-1234"]
+    # 保持 JSON 中最新在前的顺序
+    assert [f["callsign"] for f in store.flights()] == ["CCA2", "CCA1"]
+    assert not hangar.exists() and (hangar.parent / "hangar.json.migrated").exists()
+    assert not history.exists() and (history.parent / "flight_history.json.migrated").exists()
+    # 只导入一次
+    _write(hangar, [{"reg": "B-9999"}])
+    assert not store.migrate_json(str(hangar), str(history))
+    assert store.aircraft_count() == 2
+
+
+def test_migrate_json_keeps_unreadable_file_for_retry(paths):
+    db, hangar, history = paths
+    hangar.write_text("[{\"reg\": \"B-32DN\",", encoding="utf-8")
+    _write(history, [{"callsign": "CCA1", "date": "2026-03-01", "status": "done"}])
+    store = DispatchStore(str(db))
+
+    assert store.migrate_json(str(hangar), str(history))
+    assert store.aircraft_count() == 0
+    assert store.flight_count() == 1
+    # 损坏的文件不改名，修复后下次启动时导入
+    assert hangar.exists()
+    _write(hangar, [{"reg": "B-32DN"}])
+    assert store.migrate_json(str(hangar), str(history))
+    assert [ac["reg"] for ac in store.aircraft()] == ["B-32DN"]
+    assert store.flight_count() == 1
+
+
+def test_migrate_json_skips_non_list(paths):
+    db, hangar, history = paths
+    _write(hangar, {"reg": "B-32DN"})
+    store = DispatchStore(str(db))
+
+    assert not store.migrate_json(str(hangar), str(history))
+    assert hangar.exists()
+
+
+def test_missing_files_are_not_imported_later(paths):
+    db, hangar, history = paths
+    store = DispatchStore(str(db))
+    assert not store.migrate_json(str(hangar), str(history))
+    store.add_aircraft({"reg": "B-32DN"})
+
+    _write(hangar, [{"reg": "B-32DN"}])
+    assert not store.migrate_json(str(hangar), str(history))
+    assert store.aircraft_count() == 1
+
+
+def test_flight_status_and_delete(paths):
+    db, _, _ = paths
+    store = DispatchStore(str(db))
+    first = {"callsign": "CCA1", "date": "2026-03-01", "status": "planned"}
+    store.add_flight(first)
+    store.add_flight({"callsign": "CCA2", "date": "2026-03-01", "status": "planned"})
+
+    assert store.update_flight_status("CCA1", "2026-03-01", "done")
+    assert store.flights(limit=1)[0]["callsign"] == "CCA2"
+    assert store.flights(offset=1)[0]["status"] == "done"
+    assert not store.delete_flight(first)
+    assert store.delete_flight(dict(first, status="done"))
+    assert store.flight_count() == 1
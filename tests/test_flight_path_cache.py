@@ -0,0 +1,51 @@
+"""flight_path_cache 抽稀与增量合并测试"""
+
+from flight_path_cache import FlightPathCache, simplify, zoom_tolerance
+
+
+def _raw(points):
+    return [{"latitude": lat, "longitude": lon} for lat, lon in points]
+
+
+def test_simplify_drops_collinear_points_and_keeps_corners():
+    line = [(0.0, i * 0.01) for i in range(11)] + [(i * 0.01, 0.1) for i in range(1, 11)]
+    result = simplify(line, 0.001)
+    assert result == [(0.0, 0.0), (0.0, 0.1), (0.1, 0.1)]
+    assert simplify(line[:2], 0.001) == line[:2]
+
+
+def test_update_appends_tail_and_replaces_new_flight():
+    cache = FlightPathCache()
+    assert cache.update("CES1", _raw([(0, 0), (0, 1)])) == 2
+    assert cache.update("CES1", _raw([(0, 0), (0, 1), (0, 2)])) == 1
+    assert cache.points("CES1") == [(0, 0), (0, 1), (0, 2)]
+    # 起点不同：新的飞行，整条替换
+    assert cache.update("CES1", _raw([(5, 5), (5, 6)]) + [{"latitude": "bad"}]) == 2
+    assert cache.points("CES1") == [(5, 5), (5, 6)]
+
+
+def test_simplified_incremental_matches_history():
+    cache = FlightPathCache()
+    zoom = 8
+    step = zoom_tolerance(zoom) / 10
+    straight = [(0.0, i * step) for i in range(50)]
+    cache.update("CES1", _raw(straight))
+    first = cache.simplified("CES1", zoom)
+    assert first == [straight[0], straight[-1]]
+
+    turn = straight + [(i * step * 20, straight[-1][1]) for i in range(1, 20)]
+    cache.update("CES1", _raw(turn))
+    second = cache.simplified("CES1", zoom)
+    # 历史部分不重算，只追加尾部
+    assert second[:2] == first
+    assert second[-1] == turn[-1]
+    payload = cache.payload("CES1", zoom)
+    assert payload["callsign"] == "CES1" and len(payload["p"]) == len(second)
+
+
+def test_lru_limit():
+    cache = FlightPathCache(max_paths=2)
+    for callsign in ("A", "B", "C"):
+        cache.update(callsign, _raw([(0, 0)]))
+    assert "A" not in cache and "C" in cache
+    assert cache.simplified("A", 5) == []
@@ -0,0 +1,103 @@
+"""flight_recorder 环形缓冲与录制文件测试"""
+
+import pytest
+
+import flight_recorder
+from flight_recorder import FlightRecorder, ReplaySource, read_recording
+from xplane_tcp_client import XPlaneTCPClient
+
+
+def _sample(i):
+    return {"latitude": 31.0 + i * 1e-4, "longitude": 121.5, "altitude_msl": 1000.0 + i, "transponder": 2000 + i}
+
+
+def test_ring_buffer_snapshot_keeps_latest():
+    recorder = FlightRecorder(capacity=4)
+    for i in range(6):
+        recorder.record(_sample(i), timestamp=float(i))
+    assert len(recorder) == 4
+    snapshot = recorder.snapshot()
+    assert [t for t, _ in snapshot] == [2.0, 3.0, 4.0, 5.0]
+    assert snapshot[-1][1]["transponder"] == 2005
+    assert [t for t, _ in recorder.snapshot(last=2)] == [4.0, 5.0]
+    # 缺失字段记为 0
+    assert snapshot[0][1]["groundspeed"] == 0.0
+    recorder.stop()
+
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "rec" / "flight.isfprec")
+    recorder = FlightRecorder(capacity=8, flush_interval=3600)
+    recorder.record(_sample(-1), timestamp=0.5)   # 开始录制之前的样本不写入
+    recorder.start(path)
+    for i in range(5):
+        recorder.record(_sample(i), timestamp=float(i))
+    assert recorder.flush() == 5
+    for i in range(5, 7):
+        recorder.record(_sample(i), timestamp=float(i))
+    recorder.stop()
+
+    samples = list(read_recording(path))
+    assert [t for t, _ in samples] == [float(i) for i in range(7)]
+    t, sample = samples[3]
+    assert sample["type"] == "flight_data"
+    assert sample["latitude"] == pytest.approx(31.0003)
+    assert sample["transponder"] == 2003
+    assert recorder.chunks == 2 and recorder.dropped == 0
+
+
+def test_flush_counts_overwritten_samples(tmp_path):
+    path = str(tmp_path / "flight.isfprec")
+    recorder = FlightRecorder(capacity=4, flush_interval=3600)
+    recorder.start(path)
+    for i in range(10):
+        recorder.record(_sample(i), timestamp=float(i))
+    recorder.stop()
+    assert recorder.dropped == 6
+    assert [t for t, _ in read_recording(path)] == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_read_recording_ignores_truncated_chunk_and_rejects_other_files(tmp_path):
+    path = tmp_path / "flight.isfprec"
+    recorder = FlightRecorder(capacity=8, flush_interval=3600)
+    recorder.start(str(path))
+    for i in range(3):
+        recorder.record(_sample(i), timestamp=float(i))
+    recorder.flush()
+    recorder.record(_sample(3), timestamp=3.0)
+    recorder.stop()
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+    assert [t for t, _ in read_recording(str(path))] == [0.0, 1.0, 2.0]
+
+    other = tmp_path / "other.isfprec"
+    other.write_bytes(b"not a recording")
+    with pytest.raises(ValueError):
+        list(read_recording(str(other)))
+
+
+def test_replay_delivers_every_sample_to_listeners(tmp_path, monkeypatch):
+    path = str(tmp_path / "flight.isfprec")
+    recorder = FlightRecorder(capacity=16, flush_interval=3600)
+    recorder.start(path)
+    for i in range(10):
+        recorder.record(_sample(i), timestamp=i * 0.1)
+    recorder.stop()
+
+    client = XPlaneTCPClient()
+    received = []
+    client.add_sample_listener(lambda data, received_at: received.append((data["transponder"], received_at)))
+    clock = [100.0]
+    monkeypatch.setattr(flight_recorder.time, "monotonic", lambda: clock[0])
+    replay = ReplaySource(path, client, speed=100)
+    replay.start()
+    replay._timer.stop()
+    # 100 倍速下 1 秒的录制在 10 ms 内全部到期，一次触发送出
+    clock[0] = 100.01
+    replay._tick()
+
+    assert [code for code, _ in received] == [2000 + i for i in range(10)]
+    # 接收时刻按录制间隔除以速度，而不是全部相同
+    assert [t for _, t in received] == pytest.approx([100.0 + i * 0.001 for i in range(10)])
+    assert client.mailbox.posted == 10
+    assert replay.samples_sent == 10
@@ -0,0 +1,277 @@
+"""fsd_client 协议编解码、交通表、位置外推与发送频率测试"""
+
+import math
+
+import pytest
+
+from fsd_client import (
+    EARTH_RADIUS_M, KNOTS_TO_MPS, AdaptiveSendScheduler, FSDMessageParser, FSDPilotDataUpdateMessage,
+    FSDPilotPosition, MessageType, PilotRating, PositionExtrapolator, SendRateConfig, TrafficTable,
+    TransponderMode, _decode_pbh, _encode_pbh, is_on_ground, position_from_xplane,
+)
+from fsd_capture import encode_pbh as capture_encode_pbh
+
+
+@pytest.mark.parametrize("pitch, bank, heading, on_ground", [
+    (0.0, 0.0, 0.0, False),
+    (2.5, -10.0, 270.0, False),
+    (-5.0, 25.0, 359.0, False),
+    (0.0, 0.0, 90.0, True),
+])
+def test_pbh_round_trip(pitch, bank, heading, on_ground):
+    p, b, h, g = _decode_pbh(_encode_pbh(pitch, bank, heading, on_ground))
+    # 10 位量化，误差不超过半个单位（360/1024/2 度）
+    assert p == pytest.approx(pitch, abs=0.18)
+    assert b == pytest.approx(bank, abs=0.18)
+    assert h == pytest.approx(heading, abs=0.18)
+    assert g is on_ground
+
+
+def test_pbh_matches_capture_tool():
+    assert _encode_pbh(3.0, -12.0, 181.0, True) == capture_encode_pbh(3.0, -12.0, 181.0, True)
+
+
+@pytest.mark.parametrize("on_ground", [False, True])
+def test_pilot_position_serialize_parse_round_trip(on_ground):
+    position = FSDPilotPosition(31.123456, 121.654321, 100, 120, 150, 2.5, -10.0, 270.0, on_ground)
+    line = FSDPilotDataUpdateMessage("CCA1234", 4521, TransponderMode.ON, PilotRating.S2, position).serialize()
+
+    msg = FSDMessageParser.parse(line)
+
+    assert msg.msg_type == MessageType.PILOT_DATA_UPDATE
+    assert msg.sender == "CCA1234"
+    assert msg.transponder_code == 4521
+    assert msg.transponder_mode == TransponderMode.ON
+    assert msg.rating == PilotRating.S2
+    got = msg.position
+    assert got.latitude == pytest.approx(31.123456)
+    assert got.longitude == pytest.approx(121.654321)
+    assert got.altitude_true == 100
+    assert got.altitude_pressure == 120
+    assert got.groundspeed == 150
+    assert got.heading == pytest.approx(270.0, abs=0.18)
+    assert got.bank == pytest.approx(-10.0, abs=0.18)
+    assert got.pitch == pytest.approx(2.5, abs=0.18)
+    assert got.on_ground is on_ground
+
+
+def test_pilot_position_standby_mode_round_trip():
+    line = FSDPilotDataUpdateMessage("CCA1234", 2000, TransponderMode.STANDBY).serialize()
+    assert line.startswith("@S:")
+    assert FSDMessageParser.parse(line).transponder_mode == TransponderMode.STANDBY
+
+
+def _xplane_sample(agl, vs=0.0, gs=0.0):
+    return {'latitude': 31.14, 'longitude': 121.8, 'altitude_msl': 13.0 + agl, 'altitude_agl': agl,
+            'vertical_speed': vs, 'groundspeed': gs, 'heading': 90.0, 'pitch': 0.0, 'roll': 0.0}
+
+
+def test_on_ground_derived_from_agl():
+    assert is_on_ground(_xplane_sample(8.0))
+    assert not is_on_ground(_xplane_sample(1500.0))
+    # 拉平时离地很近但仍在下沉
+    assert not is_on_ground(_xplane_sample(10.0, vs=-3.5))
+    # 样本自带标志时优先使用
+    assert is_on_ground(dict(_xplane_sample(1500.0), on_ground=True))
+    assert not is_on_ground({})
+
+
+def test_takeoff_roll_classified_as_ground_roll():
+    scheduler = AdaptiveSendScheduler()
+    position = position_from_xplane(_xplane_sample(8.0, gs=150.0))
+    assert position.on_ground
+    assert scheduler.classify(position, 0.0) == AdaptiveSendScheduler.PHASE_GROUND_ROLL
+    parked = position_from_xplane(_xplane_sample(8.0, gs=0.0))
+    assert scheduler.classify(parked, 0.0) == AdaptiveSendScheduler.PHASE_PARKED
+
+
+# ---------- 解析器 ----------
+
+def test_parse_identification():
+    msg = FSDMessageParser.parse("$DISERVER:CLIENT:VATSIM FSD V3.13:abcdef0123")
+    assert msg.msg_type == MessageType.FSD_IDENTIFICATION
+    assert msg.sender == "SERVER"
+    assert msg.server_version == "VATSIM FSD V3.13"
+    assert msg.initial_challenge == "abcdef0123"
+
+
+def test_parse_text_keeps_colons_in_message():
+    msg = FSDMessageParser.parse("#TMZSSS_TWR:CES123:cleared to land rwy 35R, wind 340:08")
+    assert (msg.sender, msg.receiver, msg.message) == ("ZSSS_TWR", "CES123", "cleared to land rwy 35R, wind 340:08")
+
+
+@pytest.mark.parametrize("line, error_type, message", [
+    ("$ERSERVER:CES123:006:1000001:Invalid CID/password", "006", "Invalid CID/password"),
+    ("$ERSERVER:CES123:007:NOPE:", "007", "NOPE"),
+    ("$ER:CES123:AUTH:Authentication failed", "AUTH", "Authentication failed"),
+])
+def test_parse_server_error_forms(line, error_type, message):
+    msg = FSDMessageParser.parse(line)
+    assert msg.msg_type == MessageType.SERVER_ERROR
+    assert (msg.error_type, msg.message) == (error_type, message)
+
+
+def test_parse_client_query_and_response():
+    query = FSDMessageParser.parse("$CQSERVER:CES123:CAPS")
+    assert (query.msg_type, query.sender, query.receiver, query.query_type) == \
+        (MessageType.CLIENT_QUERY, "SERVER", "CES123", "CAPS")
+    response = FSDMessageParser.parse("$CRCES123:SERVER:CAPS:ATCINFO=1:SECPOS=1")
+    assert (response.response_type, response.data) == ("CAPS", "ATCINFO=1:SECPOS=1")
+
+
+def test_parse_ping_pong():
+    ping = FSDMessageParser.parse("$PISERVER:CES123:42")
+    assert (ping.msg_type, ping.sender, ping.receiver, ping.timestamp) == (MessageType.PING, "SERVER", "CES123", "42")
+    pong = FSDMessageParser.parse("$POSERVER:CES123:42")
+    assert (pong.msg_type, pong.timestamp) == (MessageType.PONG, "42")
+
+
+def test_parse_add_and_delete_pilot():
+    add = FSDMessageParser.parse("#APCES123:SERVER:1000001::2:9:16:Zhang San")
+    assert add.msg_type == MessageType.ADD_PILOT
+    assert (add.sender, add.cid, add.rating, add.sim_type, add.real_name) == ("CES123", "1000001", 2, 16, "Zhang San")
+    delete = FSDMessageParser.parse("#DPCES123:1000001")
+    assert (delete.msg_type, delete.sender, delete.cid) == (MessageType.DELETE_PILOT, "CES123", "1000001")
+
+
+def test_parse_accepts_colon_after_prefix():
+    msg = FSDMessageParser.parse("#TM:CES123:*:hello")
+    assert (msg.sender, msg.receiver, msg.message) == ("CES123", "*", "hello")
+
+
+@pytest.mark.parametrize("line", [
+    "", "   ", "$XXFOO:BAR", "@N:CES123:2000", "#TMCES123", "@N:CES123:2000:1:abc:121:3000:250:0:0",
+])
+def test_parse_malformed_returns_none(line):
+    assert FSDMessageParser.parse(line) is None
+
+
+# ---------- 交通表 ----------
+
+def _position_msg(callsign, lat=31.0):
+    return FSDPilotDataUpdateMessage(callsign, 2000, TransponderMode.ON, PilotRating.S1,
+                                     FSDPilotPosition(lat, 121.5, 3000, 3000, 250, 0.0, 0.0, 90.0, False))
+
+
+def test_traffic_table_batches_changes():
+    table = TrafficTable(stale_timeout=10.0, clock=lambda: 0.0)
+    table.add_pilot("CES1", cid="1000001", now=0.0)
+    table.update_position(_position_msg("CES1"), now=1.0)
+    table.update_position(_position_msg("CES1", 31.1), now=2.0)
+    added, updated, removed = table.take_changes()
+    # 同一批次内新上线的飞机只出现在 added 中
+    assert (added, updated, removed) == (["CES1"], [], [])
+    assert table.get("CES1").position.latitude == 31.1
+    assert table.get("CES1").cid == "1000001"
+
+    table.update_position(_position_msg("CES1", 31.2), now=3.0)
+    added, updated, removed = table.take_changes()
+    assert added == [] and [r.callsign for r in updated] == ["CES1"] and removed == []
+    assert not table.has_changes()
+
+
+def test_traffic_table_add_then_remove_in_same_batch_is_silent():
+    table = TrafficTable(clock=lambda: 0.0)
+    table.add_pilot("CES1")
+    table.remove("CES1")
+    assert table.take_changes() == ([], [], [])
+    assert table.remove("CES2", notify_unknown=True) is False
+    assert table.take_changes() == ([], [], ["CES2"])
+
+
+def test_traffic_table_evicts_stale():
+    table = TrafficTable(stale_timeout=10.0, clock=lambda: 0.0)
+    table.update_position(_position_msg("CES1"), now=0.0)
+    table.update_position(_position_msg("CES2"), now=8.0)
+    table.take_changes()
+    assert table.evict_stale(now=15.0) == ["CES1"]
+    assert "CES1" not in table and "CES2" in table
+    assert table.take_changes() == ([], [], ["CES1"])
+
+
+# ---------- 位置外推 ----------
+
+def test_extrapolator_straight_line():
+    extrapolator = PositionExtrapolator(clock=lambda: 0.0)
+    # 向东 300 节
+    extrapolator.observe(FSDPilotPosition(0.0, 0.0, 10000, 10000, 300, 0.0, 0.0, 90.0, False), 0.0)
+    extrapolator.observe(FSDPilotPosition(0.0, 0.0015431, 10000, 10000, 300, 0.0, 0.0, 90.0, False), 1.0)
+    predicted = extrapolator.predict(2.0)
+    expected_lon = 0.0015431 + math.degrees(300 * KNOTS_TO_MPS / EARTH_RADIUS_M)
+    assert predicted.longitude == pytest.approx(expected_lon, rel=1e-3)
+    assert predicted.latitude == pytest.approx(0.0, abs=1e-6)
+    # 外推时长有上限
+    far = extrapolator.predict(100.0)
+    assert far.longitude == pytest.approx(
+        0.0015431 + math.degrees(300 * KNOTS_TO_MPS * PositionExtrapolator.MAX_EXTRAPOLATION_S / EARTH_RADIUS_M),
+        rel=1e-3)
+
+
+def test_extrapolator_holds_parked_aircraft():
+    extrapolator = PositionExtrapolator(clock=lambda: 0.0)
+    parked = FSDPilotPosition(31.0, 121.5, 13, 13, 0, 0.0, 0.0, 180.0, True)
+    extrapolator.observe(parked, 0.0)
+    assert extrapolator.predict(1.5) is parked
+    assert PositionExtrapolator().predict() is None
+
+
+def test_extrapolator_reseeds_turn_rate_when_track_source_changes():
+    extrapolator = PositionExtrapolator(clock=lambda: 0.0)
+    # 航向 90°，实际航迹 100°（侧风修正）：首个样本以航向起算，第二个样本不能据此算出转弯
+    step = 0.0001
+    north, east = step * math.cos(math.radians(100.0)), step * math.sin(math.radians(100.0))
+    for i in range(3):
+        extrapolator.observe(
+            FSDPilotPosition(north * i, east * i, 3000, 3000, 150, 0.0, 0.0, 90.0, False), 0.5 * i)
+        assert extrapolator.turn_rate == pytest.approx(0.0, abs=1e-3)
+    assert extrapolator.track == pytest.approx(100.0, abs=0.1)
+    # 接地后航迹改用航向，再次离地时重新起算
+    extrapolator.observe(FSDPilotPosition(north * 3, east * 3, 13, 13, 150, 0.0, 0.0, 90.0, True), 1.5)
+    assert extrapolator.turn_rate == 0.0
+    extrapolator.observe(FSDPilotPosition(north * 4, east * 4, 60, 60, 150, 0.0, 0.0, 90.0, False), 2.0)
+    assert extrapolator.turn_rate == 0.0
+
+
+def test_extrapolator_attitude_rates_are_clamped():
+    extrapolator = PositionExtrapolator(clock=lambda: 0.0)
+    extrapolator.observe(FSDPilotPosition(0.0, 0.0, 10000, 10000, 250, 2.0, 0.0, 90.0, False), 0.0)
+    extrapolator.observe(FSDPilotPosition(0.0, 0.001, 10000, 10000, 250, 4.0, 5.0, 90.0, False), 1.0)
+    predicted = extrapolator.predict(1.5)
+    assert predicted.pitch == pytest.approx(5.0)
+    assert predicted.bank == pytest.approx(7.5)
+    # 姿态突变（例如样本错误）时变化率限幅
+    extrapolator.observe(FSDPilotPosition(0.0, 0.002, 10000, 10000, 250, 4.0, 85.0, 90.0, False), 1.5)
+    assert extrapolator.bank_rate == PositionExtrapolator.MAX_ATTITUDE_RATE_DPS
+    assert extrapolator.predict(3.5).bank == pytest.approx(85.0 + 2 * PositionExtrapolator.MAX_ATTITUDE_RATE_DPS)
+    extrapolator.reset()
+    assert extrapolator.pitch_rate == extrapolator.bank_rate == 0.0
+
+
+# ---------- 自适应发送 ----------
+
+def test_scheduler_rate_limits_by_phase():
+    scheduler = AdaptiveSendScheduler(SendRateConfig())
+    cruise = FSDPilotPosition(31.0, 121.5, 35000, 35000, 450, 0.0, 0.0, 90.0, False)
+    assert scheduler.should_send(cruise, 0.0)
+    scheduler.mark_sent(cruise, 0.0)
+    moved = FSDPilotPosition(31.0, 121.52, 35000, 35000, 450, 0.0, 0.0, 90.0, False)
+    assert scheduler.phase == AdaptiveSendScheduler.PHASE_CRUISE
+    assert not scheduler.should_send(moved, 0.5)
+    assert scheduler.should_send(moved, 1.0)
+    scheduler.mark_sent(moved, 1.0)
+    # 没有变化时只按保活间隔发送
+    assert not scheduler.should_send(moved, 2.5)
+    assert scheduler.should_send(moved, 1.0 + SendRateConfig().keepalive_interval)
+
+
+def test_scheduler_tolerates_early_timer_ticks():
+    # 200 ms 定时器每次提前 5 ms 触发，滑跑阶段仍应每次都发送
+    scheduler = AdaptiveSendScheduler(SendRateConfig(timer_interval=0.2))
+    for i in range(50):
+        roll = FSDPilotPosition(31.0, 121.5 + 0.0001 * i, 13, 13, 100, 0.0, 0.0, 90.0, True)
+        now = 0.195 * i
+        if scheduler.should_send(roll, now):
+            scheduler.mark_sent(roll, now)
+    assert scheduler.phase == AdaptiveSendScheduler.PHASE_GROUND_ROLL
+    assert scheduler.sent == 50
+    assert scheduler.skipped == 0
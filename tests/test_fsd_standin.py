@@ -0,0 +1,153 @@
+"""FSDSession 与本地替身服务器的端到端测试（tools/fsd_standin.py）"""
+
+import socket
+import asyncio
+
+import pytest
+
+from fsd_client import FSDPilotPosition, FSDPingMessage, FSDSession, FSDSessionListener, MessageType, open_fsd_session
+from fsd_standin import ERR_INVALID_LOGIN, FSDStandinServer
+
+TIMEOUT = 5.0
+
+
+class RecordingListener(FSDSessionListener):
+    """记录收到的消息，并允许等待某类消息出现"""
+
+    def __init__(self):
+        self.messages = []
+        self.errors = []
+        self.auth_failures = []
+        self.disconnected = asyncio.Event()
+        self._changed = asyncio.Event()
+
+    def on_message(self, msg):
+        self.messages.append(msg)
+        self._changed.set()
+
+    def on_server_error(self, error_type, message):
+        self.errors.append((error_type, message))
+
+    def on_authentication_failed(self, message):
+        self.auth_failures.append(message)
+
+    def on_disconnected(self, exc):
+        self.disconnected.set()
+
+    def of_type(self, msg_type):
+        return [m for m in self.messages if m.msg_type == msg_type]
+
+    async def wait_for(self, msg_type, count=1):
+        while len(self.of_type(msg_type)) < count:
+            self._changed.clear()
+            await asyncio.wait_for(self._changed.wait(), TIMEOUT)
+        return self.of_type(msg_type)
+
+
+async def _login(port, callsign, password="secret"):
+    listener = RecordingListener()
+    session = FSDSession(listener)
+    session.set_credentials(callsign, "1000001", password, "Test Pilot")
+    # 每次调用都发送，不受自适应发送频率影响
+    session.adaptive_send_enabled = False
+    await open_fsd_session("127.0.0.1", port, session, timeout=TIMEOUT)
+    return session, listener
+
+
+def _position(lat, lon):
+    return FSDPilotPosition(lat, lon, 3000, 3000, 250, 0.0, 0.0, 90.0, False)
+
+
+@pytest.fixture(params=[0, 5], ids=["whole", "split"])
+def split_bytes(request):
+    """split 时下行数据被切成最多 5 字节的片段，检验客户端的分包重组"""
+    return request.param
+
+
+def test_login_ping_and_position_fan_out(split_bytes):
+    async def scenario():
+        server = FSDStandinServer("127.0.0.1", 0, visibility_nm=50, split_bytes=split_bytes,
+                                  latency_ms=2, password="secret")
+        port = await server.start()
+        try:
+            a, la = await _login(port, "CES101")
+            b, lb = await _login(port, "CES102")
+
+            # $DI 之后服务器以 $CQ CAPS 确认登录，客户端回复 $CR
+            for listener in (la, lb):
+                await listener.wait_for(MessageType.FSD_IDENTIFICATION)
+                await listener.wait_for(MessageType.CLIENT_QUERY)
+            # 已在线的客户端收到新登录者的 #AP
+            await la.wait_for(MessageType.ADD_PILOT)
+            assert la.of_type(MessageType.ADD_PILOT)[0].sender == "CES102"
+
+            # $PI -> $PO 带回同一令牌
+            a.send_message(FSDPingMessage("CES101", "token-1"))
+            pong = (await la.wait_for(MessageType.PONG))[0]
+            assert pong.timestamp == "token-1"
+
+            # '@' 只转发给已报告位置且在可视范围内的客户端
+            a.update_position(_position(31.0, 121.5))
+            b.update_position(_position(31.2, 121.6))
+            a.send_position_update()
+            b.send_position_update()
+            await la.wait_for(MessageType.PILOT_DATA_UPDATE)
+            a.send_position_update()
+            await lb.wait_for(MessageType.PILOT_DATA_UPDATE)
+            assert a.traffic.get("CES102").position.latitude == pytest.approx(31.2)
+            assert b.traffic.get("CES101").position.latitude == pytest.approx(31.0)
+
+            far, lf = await _login(port, "CES103")
+            await lf.wait_for(MessageType.CLIENT_QUERY)
+            far.update_position(_position(40.0, 116.0))
+            far.send_position_update()
+            a.send_position_update()
+            await lb.wait_for(MessageType.PILOT_DATA_UPDATE, count=2)
+            await asyncio.sleep(0.1)
+            assert not lf.of_type(MessageType.PILOT_DATA_UPDATE)
+            # 只收到了 CES103 的 #AP，没有位置
+            assert a.traffic.get("CES103").position is None
+
+            assert not (la.errors or lb.errors or lf.errors)
+            assert server.positions_forwarded == 3
+            assert set(server.pilots) == {"CES101", "CES102", "CES103"}
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_login_error_reports_authentication_failure():
+    async def scenario():
+        server = FSDStandinServer("127.0.0.1", 0, password="secret")
+        port = await server.start()
+        try:
+            session, listener = await _login(port, "CES201", password="wrong")
+            await asyncio.wait_for(listener.disconnected.wait(), TIMEOUT)
+            assert listener.errors == [(f"{ERR_INVALID_LOGIN:03d}", "Invalid CID/password")]
+            assert listener.auth_failures
+            assert not session.is_authenticated
+            assert "CES201" not in server.pilots
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_start_in_thread_raises_when_port_in_use():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        port = sock.getsockname()[1]
+        with pytest.raises(OSError):
+            FSDStandinServer("127.0.0.1", port).start_in_thread()
+
+
+def test_start_in_thread_serves_identification():
+    server = FSDStandinServer("127.0.0.1", 0)
+    port = server.start_in_thread()
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=TIMEOUT) as sock:
+            assert sock.recv(256).startswith(b"$DISERVER:CLIENT:")
+    finally:
+        server.stop_thread()
@@ -0,0 +1,56 @@
+"""http_cache.ResponseCache 测试"""
+
+import os
+
+from http_cache import ResponseCache
+
+URL = "https://isfpapi.flyisfp.com/api/clients"
+
+
+def test_make_key_orders_params_and_separates_users():
+    key = ResponseCache.make_key(URL, {"b": 2, "a": 1})
+    assert key == ResponseCache.make_key(URL, {"a": 1, "b": 2})
+    alice = ResponseCache.make_key(URL, headers={"Authorization": "Bearer alice"})
+    bob = ResponseCache.make_key(URL, headers={"Authorization": "Bearer bob"})
+    assert alice != bob and "alice" not in alice
+
+
+def test_put_get_fresh_and_touch():
+    cache = ResponseCache()
+    key = cache.make_key(URL)
+    assert cache.get(key) is None
+    entry = cache.put(key, URL, '{"ok":1}', etag='"v1"', ttl=30.0)
+    assert cache.get(key) is entry
+    assert entry.is_fresh(entry.stored_at + 29.0)
+    assert not entry.is_fresh(entry.stored_at + 31.0)
+    assert entry.revalidation_headers() == {"If-None-Match": '"v1"'}
+
+    stored_at = entry.stored_at
+    cache.touch(entry, ttl=60.0)
+    assert entry.stored_at >= stored_at and entry.ttl == 60.0
+    assert (cache.hits, cache.misses, cache.revalidated) == (1, 1, 1)
+
+
+def test_memory_lru_and_disk_persistence(tmp_path):
+    cache = ResponseCache(max_entries=2, disk_dir=str(tmp_path))
+    for i in range(3):
+        cache.put(f"k{i}", f"{URL}/{i}", f"body{i}", ttl=30.0)
+    # 内存中最旧的条目被淘汰后仍可从磁盘恢复
+    reopened = ResponseCache(disk_dir=str(tmp_path))
+    assert reopened.get("k0").body == "body0"
+    assert cache.get("k0").body == "body0"
+
+
+def test_invalidate_prefix_and_prune(tmp_path):
+    cache = ResponseCache(disk_dir=str(tmp_path), max_disk_entries=10)
+    cache.put("a", f"{URL}/1", "1")
+    cache.put("b", f"{URL}/2", "2")
+    cache.put("c", "https://isfpapi.flyisfp.com/api/users", "3")
+    # 内存和磁盘各删除 2 条
+    assert cache.invalidate_prefix(URL) == 4
+    assert cache.get("a") is None and cache.get("c").body == "3"
+
+    for i in range(15):
+        cache.put(f"p{i}", f"{URL}/p{i}", "x")
+    ResponseCache(disk_dir=str(tmp_path), max_disk_entries=10)
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".json")]) == 10
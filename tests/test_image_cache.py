@@ -0,0 +1,81 @@
+"""image_cache.ImageDiskCache 索引写入与淘汰测试"""
+
+import json
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtGui import QColor, QImage
+
+import image_cache
+from image_cache import ImageDiskCache
+
+
+def _thumb(color="red"):
+    image = QImage(8, 6, QImage.Format_RGB32)
+    image.fill(QColor(color))
+    return image
+
+
+def _index(cache):
+    with open(cache._index_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_index_writes_are_batched(tmp_path, monkeypatch):
+    cache = ImageDiskCache(str(tmp_path))
+    saves = []
+    original_save = cache.save_index
+    monkeypatch.setattr(cache, "save_index", lambda: saves.append(1) or original_save())
+
+    for i in range(20):
+        cache.put_original(f"https://example.com/{i}.jpg", f"photo-{i}".encode())
+    # 间隔内只写入第一次，其余修改留待 flush
+    assert len(saves) == 1
+    assert len(_index(cache)["urls"]) == 1
+
+    cache.flush()
+    assert len(_index(cache)["urls"]) == 20
+    cache.flush()
+    assert len(saves) == 2
+
+
+def test_index_written_again_after_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "INDEX_SAVE_INTERVAL", 0.0)
+    cache = ImageDiskCache(str(tmp_path))
+    cache.put_original("https://example.com/a.jpg", b"a")
+    cache.put_original("https://example.com/b.jpg", b"b")
+    assert len(_index(cache)["urls"]) == 2
+
+    reopened = ImageDiskCache(str(tmp_path))
+    assert reopened.get_original("https://example.com/b.jpg") == b"b"
+
+
+def test_evicting_original_removes_its_thumbnails(tmp_path):
+    cache = ImageDiskCache(str(tmp_path), max_bytes=10_000)
+    old_url = "https://example.com/old.jpg"
+    cache.put_original(old_url, b"o" * 3000)
+    assert cache.put_thumbnail(old_url, 8, 6, _thumb())
+    old_hash = cache.content_hash(old_url)
+
+    cache.put_original("https://example.com/new.jpg", b"n" * 8000)
+
+    assert cache.content_hash(old_url) is None
+    assert not any(name.startswith(old_hash) for name in cache._files)
+    assert not list((tmp_path / "thumbs").iterdir())
+    assert cache.total_bytes == 8000
+
+
+def test_orphan_thumbnails_dropped_on_load(tmp_path):
+    cache = ImageDiskCache(str(tmp_path))
+    url = "https://example.com/a.jpg"
+    cache.put_original(url, b"a" * 100)
+    cache.put_thumbnail(url, 8, 6, _thumb())
+    cache.flush()
+    (tmp_path / "originals" / cache.content_hash(url)).unlink()
+
+    reopened = ImageDiskCache(str(tmp_path))
+    assert reopened.total_bytes == 0
+    assert not list((tmp_path / "thumbs").iterdir())
+    assert reopened.get_thumbnail(url, 8, 6) is None
@@ -0,0 +1,48 @@
+"""map_delta.PilotDeltaEncoder 测试"""
+
+import json
+
+from map_delta import PilotDeltaEncoder, compact_pilot, dumps_patch
+
+
+def _pilot(cid, callsign, lat=31.0, lon=121.5, **extra):
+    return dict({"cid": cid, "callsign": callsign, "latitude": lat, "longitude": lon,
+                 "heading": 90, "altitude": 3000, "ground_speed": 250, "transponder": "2000"}, **extra)
+
+
+def test_first_patch_is_full_and_unchanged_returns_none():
+    encoder = PilotDeltaEncoder()
+    pilots = [_pilot(1, "CES1"), _pilot(2, "CES2")]
+    patch = encoder.encode(pilots)
+    assert patch["z"] == 1
+    assert [r["c"] for r in patch["n"]] == ["CES1", "CES2"]
+    assert encoder.encode(pilots) is None
+    assert len(encoder) == 2
+
+
+def test_update_contains_only_changed_fields():
+    encoder = PilotDeltaEncoder()
+    encoder.encode([_pilot(1, "CES1"), _pilot(2, "CES2")])
+    # 低于量化精度的移动不产生更新
+    patch = encoder.encode([_pilot(1, "CES1", lat=31.00001, altitude=3100), _pilot(3, "CES3")])
+    assert patch == {
+        "n": [compact_pilot(_pilot(3, "CES3"))],
+        "u": [{"a": 3100, "i": "1"}],
+        "d": ["2"],
+    }
+    assert json.loads(dumps_patch(patch)) == patch
+
+
+def test_reset_sends_full_snapshot_again():
+    encoder = PilotDeltaEncoder()
+    pilots = [_pilot(1, "CES1")]
+    encoder.encode(pilots)
+    encoder.reset()
+    patch = encoder.encode(pilots)
+    assert patch["z"] == 1 and len(patch["n"]) == 1
+
+
+def test_compact_pilot_falls_back_to_callsign_and_skips_invalid():
+    record = compact_pilot(_pilot(None, "CES9", heading=370.4, flight_plan={"aircraft": "A320"}))
+    assert (record["i"], record["h"], record["p"]) == ("CES9", 10, "A320")
+    assert compact_pilot({"callsign": "CES9", "latitude": None, "longitude": 1}) is None
@@ -0,0 +1,63 @@
+"""xplane_framing.LineFramer 分帧测试"""
+
+import pytest
+
+from xplane_framing import FrameTooLargeError, LineFramer
+from xplane_protocol import decode_flight_frame, encode_flight_frame
+
+
+def _frames(framer):
+    return [bytes(frame) for frame in framer.frames()]
+
+
+def test_lines_split_across_feeds():
+    framer = LineFramer(buffer_size=64)
+    framer.feed(b'{"a":1}\n{"b"')
+    assert _frames(framer) == [b'{"a":1}']
+    framer.feed(b':2}\r\n\n{"c":3}\n')
+    assert _frames(framer) == [b'{"b":2}', b'{"c":3}']
+    assert framer.pending == 0
+    assert framer.frames_emitted == 3
+
+
+def test_compaction_and_growth_keep_frames_intact():
+    framer = LineFramer(buffer_size=16)
+    line = b"x" * 40
+    framer.feed(b"abc\n" + line[:10])
+    assert _frames(framer) == [b"abc"]
+    framer.feed(line[10:] + b"\n")
+    assert _frames(framer) == [line]
+    assert framer.capacity >= 41
+    assert framer.bytes_copied > 0
+
+
+def test_frame_too_large_drops_buffer():
+    framer = LineFramer(buffer_size=8, max_frame_size=16)
+    with pytest.raises(FrameTooLargeError):
+        framer.feed(b"y" * 32)
+    assert framer.pending == 0
+    framer.feed(b"ok\n")
+    assert _frames(framer) == [b"ok"]
+
+
+def test_binary_and_json_frames_mixed():
+    sample = {"latitude": 31.1433, "longitude": 121.8052, "altitude_msl": 1234.5, "transponder": 2000}
+    binary = encode_flight_frame(sample, 7)
+    framer = LineFramer(buffer_size=64)
+    # 二进制帧跨两次写入
+    framer.feed(b'{"type":"heartbeat"}\n' + binary[:10])
+    assert _frames(framer) == [b'{"type":"heartbeat"}']
+    framer.feed(binary[10:] + b'{"type":"x"}\n')
+    frames = _frames(framer)
+    assert frames[1] == b'{"type":"x"}'
+    sequence, data = decode_flight_frame(frames[0])
+    assert sequence == 7
+    assert data["latitude"] == pytest.approx(31.1433)
+    assert data["transponder"] == 2000
+
+
+def test_corrupt_binary_header_resyncs():
+    framer = LineFramer()
+    # 跳过损坏的帧头字节后按换行符重新同步，其后的帧不受影响
+    framer.feed(bytes([0xB5, 0x01, 0x01, 0x00]) + b'junk\n{"ok":1}\n')
+    assert _frames(framer)[-1] == b'{"ok":1}'
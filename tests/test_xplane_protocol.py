@@ -0,0 +1,68 @@
+"""xplane_protocol 帧编解码测试"""
+
+import json
+
+import pytest
+
+from xplane_protocol import (
+    FLIGHT_FIELDS, FLIGHT_FRAME, ProtocolError, decode_flight_frame, encode_flight_frame,
+    encode_json_frame, set_format_command,
+)
+
+SAMPLE = {
+    'latitude': 31.143378, 'longitude': 121.805214, 'altitude': 1000.0, 'elevation': 305.0,
+    'pitch': 2.5, 'roll': -10.0, 'heading': 270.0, 'indicated_airspeed': 250.0,
+    'true_airspeed': 280.0, 'groundspeed': 290.0, 'vertical_speed': 5.0,
+    'altitude_msl': 3280.0, 'altitude_agl': 3200.0, 'mag_heading': 275.5, 'true_heading': 270.0,
+    'com1_freq': 118350, 'com2_freq': 121500, 'transponder': 4521, 'gear_deploy': 1,
+    'flaps_ratio': 0.25, 'throttle_ratio': 0.95,
+}
+
+
+def test_binary_round_trip():
+    frame = encode_flight_frame(SAMPLE, 0x1_0000_0005)
+    assert len(frame) == FLIGHT_FRAME.size
+    sequence, data = decode_flight_frame(frame)
+    # 序号按 u32 回绕
+    assert sequence == 5
+    assert data['type'] == 'flight_data'
+    for name in FLIGHT_FIELDS:
+        assert data[name] == pytest.approx(SAMPLE[name], rel=1e-6), name
+    # 经纬度使用 double
+    assert data['latitude'] == SAMPLE['latitude']
+
+
+def test_decode_at_offset_in_buffer():
+    buffer = bytearray(b'\x00' * 3) + encode_flight_frame(SAMPLE, 1)
+    assert decode_flight_frame(memoryview(buffer), 3)[1]['transponder'] == 4521
+
+
+@pytest.mark.parametrize("index, value, message", [
+    (0, 0x00, "magic"),
+    (1, 0x09, "version"),
+    (2, 0x10, "length"),
+])
+def test_decode_rejects_bad_header(index, value, message):
+    frame = bytearray(encode_flight_frame(SAMPLE, 1))
+    frame[index] = value
+    with pytest.raises(ProtocolError, match=message):
+        decode_flight_frame(frame)
+
+
+def test_decode_rejects_short_frame():
+    with pytest.raises(ProtocolError):
+        decode_flight_frame(encode_flight_frame(SAMPLE, 1)[:-1])
+
+
+def test_json_frame_matches_binary_fields():
+    frame = encode_json_frame(SAMPLE)
+    assert frame.endswith(b'\n')
+    data = json.loads(frame)
+    assert data['type'] == 'flight_data'
+    assert data['transponder'] == 4521
+    assert data['latitude'] == pytest.approx(SAMPLE['latitude'])
+
+
+def test_set_format_command():
+    assert json.loads(set_format_command(True, 50)) == {'type': 'set_format', 'format': 'binary', 'interval_ms': 50}
+    assert json.loads(set_format_command(False))['format'] == 'json'
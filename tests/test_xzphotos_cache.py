@@ -0,0 +1,35 @@
+"""xzphotos_cache.PhotoMetadataCache 持久化测试"""
+
+import json
+
+import xzphotos_cache
+from xzphotos_cache import PhotoMetadataCache
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_writes_are_batched_and_flushed(tmp_path):
+    path = str(tmp_path / "xzphotos_cache.json")
+    cache = PhotoMetadataCache(path)
+    for i in range(10):
+        cache.put(f"b-{i}", {"photo_found": True, "photo_url": f"https://example.com/{i}.jpg"})
+    # 间隔内只写入第一次，其余修改留待 flush
+    assert list(_load(path)) == ["B-0"]
+
+    cache.flush()
+    assert len(_load(path)) == 10
+    assert PhotoMetadataCache(path).get("b-9")["photo_url"] == "https://example.com/9.jpg"
+
+
+def test_save_drops_expired_entries(tmp_path, monkeypatch):
+    path = str(tmp_path / "xzphotos_cache.json")
+    cache = PhotoMetadataCache(path, negative_ttl=10)
+    cache.put("B-1", {"photo_found": False})
+    cache.put("B-2", {"photo_found": True})
+    now = xzphotos_cache.time.time()
+    monkeypatch.setattr(xzphotos_cache.time, "time", lambda: now + 60)
+    cache.flush()
+    assert list(_load(path)) == ["B-2"]
@@ -0,0 +1,262 @@
+"""
+Tile Cache - 连飞地图的本地资源与底图瓦片缓存
+
+地图页面通过自定义 isfp:// 协议加载 Leaflet 和底图瓦片，不再每次启动都依赖 unpkg / CartoDB / ArcGIS：
+- isfp://assets/<路径>      优先读取 assets/ 下打包的文件（Leaflet 见 tools/fetch_leaflet.py）；
+                             leaflet/ 下缺失的文件从 CDN 取一次后存入缓存，离线时同样可用
+- isfp://tiles/<图层>/z/x/y  先查磁盘缓存，命中直接返回，未命中才从上游下载并写入缓存
+- 缓存存放在一个 SQLite 文件中，总大小超过上限时按最近访问时间淘汰
+
+register_map_scheme() 必须在创建 QApplication 之前调用。
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import mimetypes
+from typing import Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QBuffer, QByteArray, QUrl
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PySide6.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+
+logger = logging.getLogger('ISFP-Connect.TileCache')
+
+SCHEME = b"isfp"
+# 地图页面的 baseUrl，使页面与瓦片、资源同源
+MAP_BASE_URL = "isfp://app/"
+
+DEFAULT_MAX_BYTES = 300 * 1024 * 1024
+# 访问时间的更新间隔，避免每次命中都写库
+TOUCH_INTERVAL = 3600
+
+LEAFLET_CDN = "https://unpkg.com/leaflet@1.9.4/dist/"
+
+# 图层 -> 上游模板（与页面中的图层名一致）
+TILE_SOURCES = {
+    "light": "https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png",
+    "dark": "https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png",
+    "satellite": "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
+}
+TILE_SUBDOMAINS = "abcd"
+
+_TILE_PATH = re.compile(r"^/(\w+)/(\d+)/(\d+)/(\d+)(@2x)?\.png$")
+
+
+def register_map_scheme():
+    """注册 isfp:// 协议（须在 QApplication 创建前调用）"""
+    scheme = QWebEngineUrlScheme(SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme
+                    | QWebEngineUrlScheme.LocalAccessAllowed
+                    | QWebEngineUrlScheme.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def tile_upstream_url(layer: str, z: int, x: int, y: int, retina: bool = False) -> Optional[str]:
+    template = TILE_SOURCES.get(layer)
+    if template is None:
+        return None
+    s = TILE_SUBDOMAINS[(x + y) % len(TILE_SUBDOMAINS)]
+    return template.format(s=s, z=z, x=x, y=y, r="@2x" if retina else "")
+
+
+def _sniff_mime(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class TileStore:
+    """大小受限的瓦片 / 资源存储（SQLite），只在 GUI 线程使用"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tiles (
+                    key TEXT PRIMARY KEY,
+                    mime TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tiles_accessed ON tiles(accessed)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        row = self._conn.execute("SELECT data, mime, accessed FROM tiles WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        data, mime, accessed = row
+        now = time.time()
+        if now - accessed > TOUCH_INTERVAL:
+            with self._conn:
+                self._conn.execute("UPDATE tiles SET accessed = ? WHERE key = ?", (now, key))
+        return bytes(data), mime
+
+    def put(self, key: str, data: bytes, mime: str):
+        with self._conn:
+            old = self._conn.execute("SELECT size FROM tiles WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO tiles(key, mime, data, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                               (key, mime, sqlite3.Binary(data), len(data), time.time()))
+        self._total_bytes += len(data) - (old[0] if old else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """按最近访问时间淘汰到上限的 90%"""
+        target = self.max_bytes * 0.9
+        with self._conn:
+            rows = self._conn.execute("SELECT key, size FROM tiles ORDER BY accessed").fetchall()
+            removed = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                removed.append((key,))
+                self._total_bytes -= size
+            self._conn.executemany("DELETE FROM tiles WHERE key = ?", removed)
+        logger.info(f"瓦片缓存淘汰 {len(removed)} 项，当前 {self._total_bytes / 1048576:.1f} MB")
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM tiles")
+        self._total_bytes = 0
+
+    def close(self):
+        self._conn.close()
+
+
+class MapSchemeHandler(QWebEngineUrlSchemeHandler):
+    """处理 isfp://assets/ 和 isfp://tiles/ 请求"""
+
+    def __init__(self, store: TileStore, assets_dir: str, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.assets_dir = os.path.abspath(assets_dir)
+        self._nam = QNetworkAccessManager(self)
+        # 缓存键 -> 等待同一次下载的请求
+        self._pending: Dict[str, List[QWebEngineUrlRequestJob]] = {}
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        url = job.requestUrl()
+        host = url.host()
+        path = url.path()
+        if host == "assets":
+            self._serve_asset(job, path)
+        elif host == "tiles":
+            self._serve_tile(job, path)
+        else:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+
+    # ---------- 请求处理 ----------
+
+    def _serve_asset(self, job, path: str):
+        rel = os.path.normpath(path.lstrip("/"))
+        if rel.startswith("..") or os.path.isabs(rel):
+            job.fail(QWebEngineUrlRequestJob.RequestDenied)
+            return
+        rel = rel.replace(os.sep, "/")
+        local = os.path.join(self.assets_dir, rel)
+        mime = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        if os.path.isfile(local):
+            try:
+                with open(local, "rb") as f:
+                    self._reply(job, f.read(), mime)
+            except OSError:
+                job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            return
+        # 未打包 Leaflet 时从 CDN 获取一次并缓存
+        if rel.startswith("leaflet/"):
+            key = "asset:" + rel
+            cached = self.store.get(key)
+            if cached is not None:
+                self._reply(job, cached[0], cached[1])
+                return
+            self._fetch(job, key, LEAFLET_CDN + rel[len("leaflet/"):], mime)
+            return
+        job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+
+    def _serve_tile(self, job, path: str):
+        m = _TILE_PATH.match(path)
+        if m is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        layer, z, x, y, retina = m.group(1), int(m.group(2)), int(m.group(3)), int(m.group(4)), bool(m.group(5))
+        upstream = tile_upstream_url(layer, z, x, y, retina)
+        if upstream is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        key = f"tile:{layer}/{z}/{x}/{y}{'@2x' if retina else ''}"
+        cached = self.store.get(key)
+        if cached is not None:
+            self._reply(job, cached[0], cached[1])
+            return
+        self._fetch(job, key, upstream, None)
+
+    # ---------- 下载 ----------
+
+    def _fetch(self, job, key: str, upstream: str, mime: Optional[str]):
+        waiters = self._pending.get(key)
+        if waiters is not None:
+            waiters.append(job)
+            return
+        self._pending[key] = [job]
+        req = QNetworkRequest(QUrl(upstream))
+        req.setRawHeader(b"User-Agent", b"Mozilla/5.0 ISFP-Connect/1.0")
+        req.setAttribute(QNetworkRequest.RedirectPolicyAttribute, QNetworkRequest.NoLessSafeRedirectPolicy)
+        reply = self._nam.get(req)
+
+        def on_finished():
+            jobs = self._pending.pop(key, [])
+            if reply.error() == QNetworkReply.NoError:
+                data = reply.readAll().data()
+                content_mime = mime or _sniff_mime(data)
+                if data:
+                    self.store.put(key, data, content_mime)
+                for waiting in jobs:
+                    self._reply(waiting, data, content_mime)
+            else:
+                logger.debug(f"下载失败 {upstream}: {reply.errorString()}")
+                for waiting in jobs:
+                    self._fail(waiting)
+            reply.deleteLater()
+
+        reply.finished.connect(on_finished)
+
+    # ---------- 响应 ----------
+
+    @staticmethod
+    def _reply(job, data: bytes, mime: str):
+        try:
+            buffer = QBuffer(job)
+            buffer.setData(QByteArray(data))
+            job.reply(mime.encode("ascii"), buffer)
+        except RuntimeError:
+            # 页面已取消该请求
+            pass
+
+    @staticmethod
+    def _fail(job):
+        try:
+            job.fail(QWebEngineUrlRequestJob.RequestFailed)
+        except RuntimeError:
+            pass
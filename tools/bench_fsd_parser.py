@@ -0,0 +1,109 @@
+"""
+FSD 解析器基准测试
+
+比较旧版基于 startswith 链的 FSDMessageParser 与当前按前缀查表分发的解析器，
+统计每秒解析行数以及可识别的消息比例。
+
+用法:
+    python tools/bench_fsd_parser.py [--capture capture.txt] [--lines 100000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from collections import Counter
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fsd_client import (
+    FSDMessage, FSDMessageParser, FSDIdentificationMessage, FSDServerErrorMessage,
+    FSDTextMessage, FSDClientQueryMessage, FSDPongMessage, logger as fsd_logger,
+)
+from fsd_capture import synth_capture
+
+
+class LegacyFSDMessageParser:
+    """改造前的解析器（逐个 startswith 判断，仅覆盖少数 PDU），保留用于对比"""
+
+    @staticmethod
+    def parse(data: str) -> Optional[FSDMessage]:
+        data = data.strip()
+        if not data:
+            return None
+        if data.startswith("$DI:"):
+            return FSDIdentificationMessage.parse(data)
+        elif data.startswith("$ER:"):
+            return FSDServerErrorMessage.parse(data)
+        elif data.startswith("#TM"):
+            parts = data[3:].split(":", 2)
+            if len(parts) >= 3:
+                return FSDTextMessage(parts[0], parts[1], parts[2])
+        elif data.startswith("$CQ"):
+            parts = data.split(":")
+            if len(parts) >= 3:
+                return FSDClientQueryMessage(parts[1], parts[2], parts[3] if len(parts) > 3 else "")
+        elif data.startswith("$PO:"):
+            parts = data.split(":")
+            if len(parts) >= 3:
+                return FSDPongMessage(parts[1], parts[2])
+        fsd_logger.debug(f"未知消息类型: {data[:50]}...")
+        return None
+
+
+def run(parser, lines: List[str], repeat: int):
+    parse = parser.parse
+    best = float('inf')
+    parsed = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = 0
+        for line in lines:
+            if parse(line) is not None:
+                parsed += 1
+        best = min(best, time.perf_counter() - start)
+    return best, parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FSD 解析器基准测试')
+    parser.add_argument('--capture', help='抓包文件（每行一条 FSD 消息），默认生成模拟流量')
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # 与客户端运行时一致：INFO 级别，debug 日志不输出
+    logging.basicConfig(level=logging.INFO)
+
+    if args.capture:
+        with open(args.capture, encoding='utf-8', errors='replace') as f:
+            lines = [line for line in f.read().splitlines() if line]
+    else:
+        lines = synth_capture(args.lines)
+
+    mix = Counter(line[0] if line[0] in '@%' else line[:3] for line in lines)
+    print(f"{len(lines)} lines: " + ', '.join(f"{k} {v * 100 / len(lines):.0f}%" for k, v in mix.most_common(6)))
+
+    results = {}
+    for name, impl in (('legacy', LegacyFSDMessageParser), ('dispatch', FSDMessageParser)):
+        elapsed, parsed = run(impl, lines, args.repeat)
+        results[name] = elapsed
+        print(f"{name:<9} {len(lines) / elapsed:>12,.0f} lines/s  "
+              f"{elapsed / len(lines) * 1e6:>6.2f} us/line  parsed {parsed * 100 / len(lines):5.1f}%")
+    print(f"dispatch vs legacy: {results['legacy'] / results['dispatch']:.2f}x time per line "
+          f"(dispatch also decodes every '@'/'%' position update)")
+
+    # 只比较旧解析器本来就能识别的 PDU，同工作量对比
+    common = [line for line in lines if line[:3] in ('#TM', '$CQ', '$PO', '$DI', '$ER')]
+    if common:
+        legacy, _ = run(LegacyFSDMessageParser, common, args.repeat)
+        dispatch, _ = run(FSDMessageParser, common, args.repeat)
+        print(f"common PDUs ({len(common)} lines): legacy {legacy / len(common) * 1e6:.2f} us/line, "
+              f"dispatch {dispatch / len(common) * 1e6:.2f} us/line ({legacy / dispatch:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
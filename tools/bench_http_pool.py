@@ -0,0 +1,132 @@
+"""
+HTTP 请求池基准测试
+
+比较旧方式（每个请求一个线程 + 模块级 requests.get，每次新建连接）与
+http_pool（有界线程池 + 按主机复用的 keep-alive Session）在相同请求量下的
+耗时、新建 TCP 连接数和峰值线程数。
+
+默认对本地 HTTP/1.1 服务器测试；--url 可指定真实接口（例如 ISFP /clients）。
+
+用法:
+    python tools/bench_http_pool.py [--requests 200] [--concurrency 8] [--url URL]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from PySide6.QtCore import QCoreApplication
+
+from http_pool import SessionPool, RequestExecutor
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和正文一次写出，避免 keep-alive 连接上触发 Nagle + 延迟 ACK
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    body = json.dumps({'pilots': [{'callsign': f'CES{i}'} for i in range(50)], 'controllers': []}).encode()
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/clients"
+
+
+class _PeakThreads:
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = False
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def _watch(self):
+        while not self._stop:
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(0.001)
+
+    def stop(self):
+        self._stop = True
+        self._thread.join()
+        return self.peak
+
+
+def bench_legacy(url: str, count: int, concurrency: int):
+    """旧 APIThread 行为：每个请求一个新线程、一次新连接"""
+    watcher = _PeakThreads()
+    start = time.perf_counter()
+    for batch in range(0, count, concurrency):
+        threads = [threading.Thread(target=lambda: requests.get(url, timeout=10))
+                   for _ in range(min(concurrency, count - batch))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    return time.perf_counter() - start, watcher.stop()
+
+
+def bench_pooled(url: str, count: int, concurrency: int):
+    sessions = SessionPool()
+    executor = RequestExecutor()
+    watcher = _PeakThreads()
+    start = time.perf_counter()
+    for batch in range(0, count, concurrency):
+        for _ in range(min(concurrency, count - batch)):
+            executor.submit(lambda: sessions.session_for(url).get(url, timeout=10))
+        executor.wait_for_done()
+    elapsed = time.perf_counter() - start
+    sessions.close()
+    return elapsed, watcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP 请求池基准测试')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--url', help='测试真实接口（不统计连接数）')
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    server = None
+    url = args.url
+    if not url:
+        server, url = start_local_server()
+
+    for name, bench in (('legacy', bench_legacy), ('pooled', bench_pooled)):
+        before = server.connections if server else 0
+        elapsed, peak = bench(url, args.requests, args.concurrency)
+        conns = f"{server.connections - before:>4} connections" if server else ""
+        print(f"{name:<7} {args.requests} requests  {elapsed * 1000 / args.requests:7.2f} ms/request  "
+              f"peak threads {peak:>3}  {conns}")
+
+    if server:
+        server.shutdown()
+    del app
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+X-Plane 帧编解码基准测试
+
+比较 JSON 帧（json.loads）与二进制帧（struct.unpack_from）的每样本 CPU 开销与
+字节数，可选通过本地替身插件服务器走一遍真实 TCP 回环。
+
+用法:
+    python tools/bench_xplane_codec.py [--samples 50000] [--loopback]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from xplane_framing import LineFramer, BINARY_MAGIC
+from xplane_protocol import decode_flight_frame, set_format_command
+from xplane_replay import replay_stream, split_segments
+from xplane_standin import XPlaneStandinServer
+
+
+def decode_stream(stream: bytes) -> int:
+    """用客户端同样的分帧 + 解码路径处理整条流，返回样本数"""
+    framer = LineFramer()
+    count = 0
+    for segment in split_segments(stream, [1460, 1460, 2920, 536, 4096]):
+        framer.feed(segment)
+        for frame in framer.frames():
+            if frame[0] == BINARY_MAGIC:
+                decode_flight_frame(frame)
+            else:
+                json.loads(frame.tobytes())
+            count += 1
+    return count
+
+
+def bench_codec(samples: int):
+    results = {}
+    for name, binary in (('json', False), ('binary', True)):
+        stream = replay_stream(samples / 50.0, 50.0, binary=binary)
+        start = time.perf_counter()
+        count = decode_stream(stream)
+        elapsed = time.perf_counter() - start
+        results[name] = (elapsed / count, len(stream) / count)
+        print(f"{name:<7} {count:>8} samples  {elapsed / count * 1e6:>7.2f} us/sample  "
+              f"{len(stream) / count:>6.0f} bytes/sample")
+    cpu = results['json'][0] / results['binary'][0]
+    size = results['json'][1] / results['binary'][1]
+    print(f"binary vs json: {cpu:.1f}x less CPU, {size:.1f}x less bandwidth")
+
+
+def bench_loopback(seconds: float, interval_ms: int):
+    """连接替身插件，协商二进制帧，统计实际收到的样本率"""
+    server = XPlaneStandinServer(port=0)
+    port = server.start()
+    sock = socket.create_connection(('127.0.0.1', port))
+    framer = LineFramer()
+    counts = {'json': 0, 'binary': 0}
+    deadline = time.monotonic() + seconds
+    sock.settimeout(0.5)
+    try:
+        while time.monotonic() < deadline:
+            try:
+                if framer.recv_into(sock) == 0:
+                    break
+            except socket.timeout:
+                continue
+            for frame in framer.frames():
+                if frame[0] == BINARY_MAGIC:
+                    decode_flight_frame(frame)
+                    counts['binary'] += 1
+                    continue
+                message = json.loads(frame.tobytes())
+                if message.get('type') == 'connected' and 'binary' in message.get('formats', []):
+                    sock.sendall(set_format_command(True, interval_ms))
+                elif message.get('type') == 'flight_data':
+                    counts['json'] += 1
+    finally:
+        sock.close()
+        server.stop()
+    print(f"loopback {seconds:g}s @ {interval_ms} ms: {counts['binary']} binary frames "
+          f"({counts['binary'] / seconds:.1f} Hz), {counts['json']} JSON frames before switch, "
+          f"{framer.bytes_received:,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, default=50000)
+    parser.add_argument('--loopback', action='store_true', help='同时通过替身插件做 TCP 回环测试')
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--interval-ms', type=int, default=20)
+    args = parser.parse_args()
+
+    bench_codec(args.samples)
+    if args.loopback:
+        bench_loopback(args.seconds, args.interval_ms)
+
+
+if __name__ == '__main__':
+    main()
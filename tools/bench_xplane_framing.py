@@ -0,0 +1,114 @@
+"""
+X-Plane 接收分帧基准测试
+
+比较旧的 str 拼接 + split 分帧与 LineFramer 零拷贝分帧在 50 Hz 回放流上的
+吞吐量（frames/sec）与每帧复制字节数。
+
+用法:
+    python tools/bench_xplane_framing.py [--seconds 600] [--rate 50]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from xplane_framing import LineFramer
+from xplane_replay import replay_stream, split_segments
+
+
+class _ReplaySocket:
+    """按预先切好的分段返回数据的伪 socket"""
+
+    def __init__(self, segments):
+        self._segments = iter(segments)
+        self._pending = b''
+
+    def _next(self, limit):
+        if not self._pending:
+            self._pending = next(self._segments, b'')
+        chunk, self._pending = self._pending[:limit], self._pending[limit:]
+        return chunk
+
+    def recv(self, bufsize):
+        return self._next(bufsize)
+
+    def recv_into(self, buffer):
+        chunk = self._next(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def run_legacy(sock, parse):
+    """旧实现：decode -> str 拼接 -> 逐行 split"""
+    buffer = ""
+    frames = 0
+    copied = 0
+    while True:
+        data = sock.recv(4096)
+        if not data:
+            break
+        decoded = data.decode('utf-8')
+        copied += len(decoded)
+        buffer += decoded
+        copied += len(buffer)
+        while '\n' in buffer:
+            line, buffer = buffer.split('\n', 1)
+            # split 会复制行本身以及剩余全部缓冲区
+            copied += len(line) + len(buffer)
+            line = line.strip()
+            if line:
+                parse(line)
+                frames += 1
+    return frames, copied
+
+
+def run_framer(sock, parse):
+    """新实现：recv_into 预分配缓冲区 + find + memoryview"""
+    framer = LineFramer()
+    frames = 0
+    copied = 0
+    while framer.recv_into(sock):
+        for frame in framer.frames():
+            data = frame.tobytes()
+            copied += len(data)
+            parse(data)
+            frames += 1
+    return frames, copied + framer.bytes_copied
+
+
+def bench(name, runner, segments, parse):
+    sock = _ReplaySocket(segments)
+    start = time.perf_counter()
+    frames, copied = runner(sock, parse)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} frames={frames:>8}  {frames / elapsed:>12,.0f} frames/s  "
+          f"{copied / max(frames, 1):>9,.1f} bytes copied/frame")
+    return frames / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=600.0, help='回放时长（秒）')
+    parser.add_argument('--rate', type=float, default=50.0, help='采样率（Hz）')
+    parser.add_argument('--parse', action='store_true', help='同时计入 json.loads 的开销')
+    args = parser.parse_args()
+
+    stream = replay_stream(args.seconds, args.rate)
+    # 典型的 TCP 到达模式：MSS 分段，偶尔合并成大块
+    segments = list(split_segments(stream, [1460, 1460, 2920, 536, 4096]))
+    parse = json.loads if args.parse else (lambda _: None)
+
+    print(f"stream: {len(stream):,} bytes, {int(args.seconds * args.rate):,} frames "
+          f"({args.rate:g} Hz x {args.seconds:g} s), avg frame {len(stream) / (args.seconds * args.rate):.0f} bytes")
+    legacy = bench('legacy', run_legacy, segments, parse)
+    framer = bench('framer', run_framer, segments, parse)
+    print(f"speedup: {framer / legacy:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Fetch Leaflet - 下载 Leaflet 发行文件到 assets/leaflet/
+
+地图页面从 isfp://assets/leaflet/ 加载 Leaflet（见 tile_cache.py）。打包前运行一次，
+Leaflet 就会随 assets/ 一起发布，首次启动也不需要访问 CDN。
+
+用法:
+    python tools/fetch_leaflet.py [--version 1.9.4] [--force]
+"""
+
+import os
+import sys
+import argparse
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FILES = (
+    "leaflet.js",
+    "leaflet.css",
+    "images/layers.png",
+    "images/layers-2x.png",
+    "images/marker-icon.png",
+    "images/marker-icon-2x.png",
+    "images/marker-shadow.png",
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下载 Leaflet 到 assets/leaflet/")
+    parser.add_argument("--version", default="1.9.4")
+    parser.add_argument("--force", action="store_true", help="覆盖已存在的文件")
+    args = parser.parse_args()
+
+    base = f"https://unpkg.com/leaflet@{args.version}/dist/"
+    target_dir = os.path.join(ROOT, "assets", "leaflet")
+    session = requests.Session()
+    for name in FILES:
+        path = os.path.join(target_dir, *name.split("/"))
+        if os.path.exists(path) and not args.force:
+            print(f"已存在  {name}")
+            continue
+        resp = session.get(base + name, timeout=30)
+        if resp.status_code != 200:
+            print(f"下载失败 {name}: HTTP {resp.status_code}")
+            return 1
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(resp.content)
+        print(f"已下载  {name} ({len(resp.content)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
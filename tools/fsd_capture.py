@@ -0,0 +1,107 @@
+"""
+FSD Capture - 生成模拟的 FSD 服务器下行流量
+
+按真实服务器的消息比例（约 70% 为 '@' 位置更新，其余为 '%'、#TM、$CQ、$PI、
+#AP/#DP、$FP 等）生成可重复的抓包文本，用于解析器基准测试和回放。
+
+用法:
+    python tools/fsd_capture.py [--lines 100000] [--pilots 300] [-o capture.txt]
+"""
+
+import os
+import sys
+import random
+import argparse
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def encode_pbh(pitch: float, bank: float, heading: float, on_ground: bool = False) -> int:
+    """按标准 FSD 位布局打包 pitch/bank/heading（与 fsd_client._decode_pbh 对应）"""
+    p = int(round(pitch * 1024 / 360.0)) & 0x3FF
+    b = int(round(bank * 1024 / 360.0)) & 0x3FF
+    h = int(round((heading % 360.0) * 1024 / 360.0)) & 0x3FF
+    return (p << 22) | (b << 12) | (h << 2) | (0x2 if on_ground else 0)
+
+
+def pilot_position_line(callsign: str, lat: float, lon: float, alt: int, gs: int,
+                        heading: float, squawk: int = 2000, rating: int = 1,
+                        pitch: float = 0.0, bank: float = 0.0, on_ground: bool = False,
+                        mode: str = 'N') -> str:
+    """生成一行 '@' 飞行员位置更新"""
+    pbh = encode_pbh(pitch, bank, heading, on_ground)
+    return f"@{mode}:{callsign}:{squawk:04d}:{rating}:{lat:.5f}:{lon:.5f}:{alt}:{gs}:{pbh}:{random.randint(-200, 200)}"
+
+
+def _callsign(i: int) -> str:
+    airline = ('CES', 'CCA', 'CSN', 'CHH', 'CXA', 'CSZ', 'CQH', 'CDG')[i % 8]
+    return f"{airline}{1000 + i}"
+
+
+def synth_capture(lines: int = 100000, pilots: int = 300, seed: int = 0) -> List[str]:
+    """生成 lines 行模拟服务器流量（不含行尾换行符）"""
+    rng = random.Random(seed)
+    random.seed(seed)
+    state = [
+        [_callsign(i), rng.uniform(20.0, 45.0), rng.uniform(100.0, 125.0),
+         rng.randint(0, 39000), rng.randint(0, 480), rng.uniform(0.0, 360.0)]
+        for i in range(pilots)
+    ]
+    atcs = [f"Z{code}_{pos}" for code in ('SSS', 'BAA', 'GGG', 'UUU', 'SPD') for pos in ('TWR', 'APP', 'GND')]
+    out = []
+    for n in range(lines):
+        roll = rng.random()
+        if roll < 0.70:
+            p = state[n % pilots]
+            p[1] += rng.uniform(-0.01, 0.01)
+            p[2] += rng.uniform(-0.01, 0.01)
+            p[5] = (p[5] + rng.uniform(-3.0, 3.0)) % 360.0
+            out.append(pilot_position_line(p[0], p[1], p[2], p[3], p[4], p[5],
+                                           squawk=rng.randint(1000, 7777), pitch=rng.uniform(-5, 10),
+                                           bank=rng.uniform(-25, 25), on_ground=p[4] < 40,
+                                           mode='S' if p[4] == 0 else 'N'))
+        elif roll < 0.80:
+            atc = atcs[n % len(atcs)]
+            out.append(f"%{atc}:{rng.randint(18000, 28000)}:4:50:5:{rng.uniform(20, 45):.5f}:{rng.uniform(100, 125):.5f}:0")
+        elif roll < 0.86:
+            p = state[rng.randrange(pilots)]
+            out.append(f"#TM{rng.choice(atcs)}:{p[0]}:Contact next sector, frequency 124.350, good day")
+        elif roll < 0.90:
+            p = state[rng.randrange(pilots)]
+            out.append(f"$CQ{rng.choice(atcs)}:{p[0]}:{rng.choice(('CAPS', 'RN', 'ATIS', 'FP'))}")
+        elif roll < 0.93:
+            out.append(f"$PISERVER:{state[rng.randrange(pilots)][0]}:{n}")
+        elif roll < 0.95:
+            p = state[rng.randrange(pilots)]
+            out.append(f"#AP{p[0]}:SERVER:{rng.randint(1000, 9999)}::1:9:16:Pilot {p[0]}")
+        elif roll < 0.97:
+            out.append(f"#DP{state[rng.randrange(pilots)][0]}:{rng.randint(1000, 9999)}")
+        elif roll < 0.99:
+            p = state[rng.randrange(pilots)]
+            out.append(f"$FP{p[0]}:*A:I:B738/M-SDE2E3FGHIJ1RWXY/LB1:450:ZSSS:1200:0:FL350:ZBAA:2:10:4:0:ZBTJ:"
+                       f"PBN/A1B1C1D1L1O1S1 /v/:PIKAS G330 ELNEX B458 OMDEK")
+        else:
+            out.append(f"#SB{state[rng.randrange(pilots)][0]}:{rng.choice(atcs)}:PIR")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成模拟 FSD 服务器流量')
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--pilots', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='-', help="输出文件，'-' 为标准输出")
+    args = parser.parse_args()
+
+    lines = synth_capture(args.lines, args.pilots, args.seed)
+    text = '\r\n'.join(lines) + '\r\n'
+    if args.output == '-':
+        sys.stdout.write(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+FSD Load Test - 模拟大量飞行员会话的 FSD 负载测试
+
+在一个 asyncio 事件循环里运行 N 个 FSDSession（与桌面客户端相同的协议核心），
+每个会话沿各自的合成航迹飞行：
+- 约 10% 在地面低速滑行，其余在空中盘旋（不同半径、速度、高度，高度缓慢起伏），
+  位置按 --sample-hz 更新，经航位推算和自适应发送后由会话自己的定时器发出 '@'
+- 每个会话每 --ping-interval 秒发送一次 $PI，按 $PO 带回的令牌计算 RTT
+- 统计位置发送速率、接收行数、RTT 分位数、写缓冲拥塞丢弃和错误（连接失败、$ER、意外断开、ping 超时）
+
+不指定 --server 时在同一进程内启动 tools/fsd_standin.py 的替身服务器，完全离线运行。
+
+用法:
+    python tools/fsd_loadtest.py [--pilots 200] [--duration 60] [--ramp 10]
+    python tools/fsd_loadtest.py --server 127.0.0.1:6809 --pilots 500 --json result.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import itertools
+from collections import Counter
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fsd_client import (
+    FSDSession, FSDSessionListener, FSDPingMessage, FSDConnectionError,
+    MessageType, open_fsd_session,
+)
+from fsd_standin import FSDStandinServer, SyntheticTrack
+
+logger = logging.getLogger('ISFP-Connect.FSDLoadTest')
+
+PING_TIMEOUT_S = 30.0
+
+
+class LoadStats:
+    """全部会话共享的计数器"""
+
+    def __init__(self):
+        self.connected = 0
+        self.lines_received = 0
+        self.positions_received = 0
+        self.rtts: List[float] = []
+        self.errors: Counter = Counter()
+
+
+class LoadPilot(FSDSessionListener):
+    """一个模拟飞行员：FSDSession + 合成航迹 + RTT 测量"""
+
+    _tokens = itertools.count()
+
+    def __init__(self, index: int, track: SyntheticTrack, stats: LoadStats):
+        self.index = index
+        self.track = track
+        self.stats = stats
+        self.callsign = f"LT{index:04d}"
+        self.session = FSDSession(self)
+        self.session.set_credentials(self.callsign, str(9000000 + index), "loadtest", f"Load Test {index}")
+        self.pings: Dict[str, float] = {}
+        self.next_ping = 0.0
+        self.stopping = False
+
+    def send_ping(self, now: float):
+        # 过期未回复的 ping 计为超时
+        for token, sent in list(self.pings.items()):
+            if now - sent > PING_TIMEOUT_S:
+                del self.pings[token]
+                self.stats.errors['ping_timeout'] += 1
+        token = f"{next(self._tokens)}"
+        self.pings[token] = now
+        self.session.send_message(FSDPingMessage(self.callsign, token))
+
+    # ---------- FSDSessionListener ----------
+
+    def on_connected(self):
+        self.stats.connected += 1
+
+    def on_disconnected(self, exc: Optional[Exception]):
+        self.stats.connected -= 1
+        if not self.stopping:
+            self.stats.errors['disconnect'] += 1
+
+    def on_message(self, msg):
+        stats = self.stats
+        stats.lines_received += 1
+        kind = msg.msg_type
+        if kind == MessageType.PILOT_DATA_UPDATE:
+            stats.positions_received += 1
+        elif kind == MessageType.PONG:
+            sent = self.pings.pop(msg.timestamp, None)
+            if sent is not None:
+                stats.rtts.append(time.perf_counter() - sent)
+
+    def on_server_error(self, error_type: str, message: str):
+        self.stats.errors[f"$ER {error_type}"] += 1
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.stats = LoadStats()
+        rng = random.Random(args.seed)
+        self.pilots = [LoadPilot(i, SyntheticTrack(rng, args.spread), self.stats) for i in range(args.pilots)]
+        self.t0 = 0.0
+        self.report_rows: List[dict] = []
+
+    async def _connect(self, pilot: LoadPilot, host: str, port: int):
+        session = pilot.session
+        session.adaptive_send_enabled = not self.args.no_adaptive
+        try:
+            await open_fsd_session(host, port, session, timeout=self.args.connect_timeout)
+        except FSDConnectionError as e:
+            logger.debug(f"{pilot.callsign}: {e}")
+            self.stats.errors['connect'] += 1
+            return
+        session.start_position_updates(self.args.position_interval_ms)
+        pilot.next_ping = time.perf_counter() + random.uniform(0.0, self.args.ping_interval)
+
+    async def _ramp(self, host: str, port: int):
+        delay = self.args.ramp / max(1, len(self.pilots))
+        tasks = []
+        for pilot in self.pilots:
+            tasks.append(asyncio.create_task(self._connect(pilot, host, port)))
+            await asyncio.sleep(delay)
+        await asyncio.gather(*tasks)
+
+    async def _drive(self, until: float):
+        """按采样频率更新全部会话的位置并按期发送 ping"""
+        interval = 1.0 / self.args.sample_hz
+        while True:
+            now = time.perf_counter()
+            if now >= until:
+                return
+            t = now - self.t0
+            for pilot in self.pilots:
+                session = pilot.session
+                if not session.is_connected:
+                    continue
+                session.update_position(pilot.track.position(t), transponder_code=pilot.track.squawk)
+                if now >= pilot.next_ping:
+                    pilot.next_ping = now + self.args.ping_interval
+                    pilot.send_ping(now)
+            await asyncio.sleep(interval - (time.perf_counter() - now) % interval)
+
+    def _totals(self) -> dict:
+        sessions = [p.session for p in self.pilots]
+        return {
+            'positions_sent': sum(s.positions_sent for s in sessions),
+            'positions_dropped': sum(s.positions_dropped for s in sessions),
+            'bytes_sent': sum(s.bytes_sent for s in sessions),
+            'bytes_received': sum(s.bytes_received for s in sessions),
+            'lines_received': self.stats.lines_received,
+        }
+
+    async def _report(self, until: float):
+        last = self._totals()
+        last_time = time.perf_counter()
+        last_rtt = 0
+        while time.perf_counter() < until:
+            await asyncio.sleep(min(self.args.report, max(0.0, until - time.perf_counter())))
+            now = time.perf_counter()
+            totals = self._totals()
+            dt = now - last_time
+            rtts = self.stats.rtts[last_rtt:]
+            row = {
+                'elapsed_s': round(now - self.t0, 1),
+                'connected': self.stats.connected,
+                'positions_per_s': round((totals['positions_sent'] - last['positions_sent']) / dt, 1),
+                'lines_in_per_s': round((totals['lines_received'] - last['lines_received']) / dt, 1),
+                'kb_out_per_s': round((totals['bytes_sent'] - last['bytes_sent']) / dt / 1024, 1),
+                'rtt_p50_ms': _ms(percentile(rtts, 0.50)),
+                'rtt_p95_ms': _ms(percentile(rtts, 0.95)),
+                'dropped': totals['positions_dropped'],
+                'errors': sum(self.stats.errors.values()),
+            }
+            self.report_rows.append(row)
+            print(f"[{row['elapsed_s']:6.1f}s] {row['connected']:4d}/{len(self.pilots)} connected | "
+                  f"pos {row['positions_per_s']:7.1f}/s | in {row['lines_in_per_s']:8.1f} lines/s | "
+                  f"out {row['kb_out_per_s']:6.1f} KB/s | RTT p50 {row['rtt_p50_ms']} p95 {row['rtt_p95_ms']} ms | "
+                  f"dropped {row['dropped']} | errors {row['errors']}")
+            last, last_time, last_rtt = totals, now, len(self.stats.rtts)
+
+    async def run(self) -> dict:
+        args = self.args
+        standin = None
+        if args.server:
+            host, _, port = args.server.rpartition(':')
+            host, port = host or '127.0.0.1', int(port)
+        else:
+            standin = FSDStandinServer('127.0.0.1', 0, args.visibility,
+                                       latency_ms=args.latency_ms, split_bytes=args.split_bytes, seed=args.seed)
+            host, port = '127.0.0.1', await standin.start()
+
+        print(f"{len(self.pilots)} pilots -> {host}:{port}, ramp {args.ramp:g}s, duration {args.duration:g}s")
+        self.t0 = time.perf_counter()
+        until = self.t0 + args.ramp + args.duration
+        drive = asyncio.create_task(self._drive(until))
+        report = asyncio.create_task(self._report(until))
+        await self._ramp(host, port)
+        await asyncio.gather(drive, report)
+
+        summary = self.summary()
+        for pilot in self.pilots:
+            pilot.stopping = True
+            pilot.session.close()
+        await asyncio.sleep(0.2)
+        if standin is not None:
+            summary['standin'] = {
+                'lines_received': standin.lines_received,
+                'positions_forwarded': standin.positions_forwarded,
+                'positions_dropped': standin.positions_dropped,
+            }
+            await standin.stop()
+        return summary
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.t0
+        totals = self._totals()
+        rtts = self.stats.rtts
+        return {
+            'pilots': len(self.pilots),
+            'connected': self.stats.connected,
+            'elapsed_s': round(elapsed, 1),
+            'positions_sent': totals['positions_sent'],
+            'positions_per_s': round(totals['positions_sent'] / elapsed, 1),
+            'positions_dropped': totals['positions_dropped'],
+            'lines_received': totals['lines_received'],
+            'positions_received': self.stats.positions_received,
+            'bytes_sent': totals['bytes_sent'],
+            'bytes_received': totals['bytes_received'],
+            'pings_answered': len(rtts),
+            'rtt_ms': {q: _ms(percentile(rtts, v)) for q, v in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))},
+            'errors': dict(self.stats.errors),
+            'intervals': self.report_rows,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FSD 负载测试：模拟 N 个飞行员会话')
+    parser.add_argument('--server', help='目标服务器 HOST:PORT，默认在进程内启动替身服务器')
+    parser.add_argument('--pilots', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=60.0, help='全部上线后的持续时间（秒）')
+    parser.add_argument('--ramp', type=float, default=10.0, help='逐个上线的总时长（秒）')
+    parser.add_argument('--sample-hz', type=float, default=5.0, help='航迹采样频率（模拟插件样本）')
+    parser.add_argument('--position-interval-ms', type=int, default=200, help='位置定时器间隔（与客户端一致）')
+    parser.add_argument('--no-adaptive', action='store_true', help='关闭自适应发送，每次定时器触发都发送')
+    parser.add_argument('--ping-interval', type=float, default=5.0)
+    parser.add_argument('--connect-timeout', type=float, default=5.0)
+    parser.add_argument('--spread', type=float, default=300.0, help='航迹分布半径（海里）')
+    parser.add_argument('--visibility', type=float, default=100.0, help='替身服务器位置转发范围（海里）')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='替身服务器下行延迟')
+    parser.add_argument('--split-bytes', type=int, default=0, help='替身服务器把下行数据切成最多 N 字节的片段')
+    parser.add_argument('--report', type=float, default=5.0, help='报告间隔（秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='FILE', help='把结果写入 JSON 文件')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='[%(asctime)s] [%(levelname)-8s] [%(name)s] %(message)s')
+
+    summary = asyncio.run(LoadTest(args).run())
+    print(f"\n{summary['connected']}/{summary['pilots']} connected, "
+          f"{summary['positions_sent']} positions ({summary['positions_per_s']}/s), "
+          f"{summary['lines_received']} lines received, {summary['pings_answered']} pongs, "
+          f"RTT p50/p95/p99 {summary['rtt_ms']['p50']}/{summary['rtt_ms']['p95']}/{summary['rtt_ms']['p99']} ms, "
+          f"dropped {summary['positions_dropped']}, errors {summary['errors'] or 0}")
+    if 'standin' in summary:
+        s = summary['standin']
+        print(f"stand-in: {s['lines_received']} lines in, {s['positions_forwarded']} forwarded, "
+              f"{s['positions_dropped']} dropped")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
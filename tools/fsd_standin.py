@@ -0,0 +1,582 @@
+"""
+FSD Stand-in - 本地 FSD 协议替身服务器
+
+在本机模拟 fsd.flyisfp.com 使用的 9 号协议子集，让 FSDClient / FSDSession 的端到端测试、
+负载测试和基准测试不依赖外网，并且结果可重复：
+- 连接后发送 $DI 识别消息（挑战串由 seed 决定）
+- #AP 登录：校验字段数、呼号格式、协议版本、密码（可选）和呼号占用，失败时回复 $ER 并断开；
+  成功后向其他客户端广播 #AP，并向新客户端发送 $CQ CAPS 查询
+- $CR CAPS 记录客户端能力；$PI 回复 $PO；可选定期向客户端发送 $PI 并统计 $PO 的 RTT
+- #TM 按接收方转发：'*' 或 '@频率' 广播，呼号私聊，呼号不存在时回复 $ER
+- '@' 位置原样转发给可视范围（visibility_nm）内的其他客户端；
+  某个客户端积压超过 WRITE_BUFFER_LIMIT 时跳过转发给它的位置并计数
+- #DP 或断开连接时向其他客户端广播 #DP
+
+用于测试的网络条件与流量注入：
+- latency_ms / jitter_ms：所有下行消息延迟发送（同一连接内保持顺序）
+- split_bytes / split_delay_ms：把下行数据切成随机大小的片段分开写出，检验客户端的分包重组
+- inject_text() / inject_error() / inject_line() 注入任意下行消息；
+  start_traffic() 注入沿合成航迹移动的虚拟机组（#AP + '@'）
+
+基于 asyncio，可在负载测试的事件循环内启动，也可用 start_in_thread() 在后台线程运行，
+供使用 Qt 事件循环的 FSDClient 集成测试使用。
+
+用法:
+    python tools/fsd_standin.py [--port 6809] [--visibility 300] [--latency-ms 50] [--split-bytes 16]
+                                [--inject-pilots 100] [--password secret] [--motd "Welcome"]
+"""
+
+import os
+import re
+import sys
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fsd_client import FSDMessageParser, FSDPilotPosition, MessageType
+from fsd_capture import pilot_position_line
+
+logger = logging.getLogger('ISFP-Connect.FSDStandin')
+
+SERVER_NAME = "SERVER"
+SERVER_VERSION = "ISFP-Standin"
+PROTOCOL_REVISION = "9"
+VISIBILITY_NM = 300.0
+WRITE_BUFFER_LIMIT = 256 * 1024
+
+# 标准 FSD 错误码
+ERR_CALLSIGN_IN_USE = 1
+ERR_INVALID_CALLSIGN = 2
+ERR_SYNTAX = 4
+ERR_INVALID_SOURCE = 5
+ERR_INVALID_LOGIN = 6
+ERR_NO_SUCH_CALLSIGN = 7
+ERR_INVALID_PROTOCOL = 10
+
+_CALLSIGN = re.compile(r"^[A-Z0-9_-]{2,12}$")
+_NM_PER_DEG = 60.0
+
+CENTER_LAT = 31.0
+CENTER_LON = 121.5
+GRAVITY = 9.81
+KNOTS_TO_MPS = 0.514444
+
+
+class SyntheticTrack:
+    """可重复的合成航迹：以固定角速度绕圆心运动，高度正弦起伏（约 10% 为地面滑行）"""
+
+    def __init__(self, rng: random.Random, spread_nm: float):
+        r = spread_nm * math.sqrt(rng.random())
+        a = rng.uniform(0.0, 2 * math.pi)
+        self.center_lat = CENTER_LAT + r * math.cos(a) / 60.0
+        self.center_lon = CENTER_LON + r * math.sin(a) / (60.0 * math.cos(math.radians(CENTER_LAT)))
+        self.on_ground = rng.random() < 0.1
+        if self.on_ground:
+            self.radius_nm = rng.uniform(0.2, 1.0)
+            self.speed_kt = rng.randint(8, 25)
+            self.altitude = rng.randint(0, 500)
+            self.altitude_amp = 0.0
+        else:
+            self.radius_nm = rng.uniform(5.0, 40.0)
+            self.speed_kt = rng.randint(180, 480)
+            self.altitude = rng.randint(3000, 39000)
+            self.altitude_amp = rng.choice((0.0, 0.0, 1000.0, 3000.0))
+        self.altitude_period = rng.uniform(300.0, 900.0)
+        self.direction = rng.choice((1, -1))
+        self.phase = rng.uniform(0.0, 2 * math.pi)
+        self.omega = self.speed_kt / self.radius_nm / 3600.0   # 弧度/秒
+        self.squawk = rng.randint(0, 7777)
+
+    def position(self, t: float) -> FSDPilotPosition:
+        angle = self.phase + self.direction * self.omega * t
+        lat = self.center_lat + self.radius_nm * math.cos(angle) / 60.0
+        lon = self.center_lon + self.radius_nm * math.sin(angle) / (60.0 * math.cos(math.radians(self.center_lat)))
+        heading = math.degrees(angle) + 90.0 * self.direction
+        wave = 2 * math.pi / self.altitude_period
+        altitude = int(self.altitude + self.altitude_amp * math.sin(wave * t))
+        vs_fps = self.altitude_amp * wave * math.cos(wave * t)
+        speed_mps = self.speed_kt * KNOTS_TO_MPS
+        bank = 0.0 if self.on_ground else math.degrees(math.atan(speed_mps * self.omega / GRAVITY)) * self.direction
+        pitch = 0.0 if self.on_ground else math.degrees(math.atan2(vs_fps * 0.3048, speed_mps))
+        return FSDPilotPosition(lat, lon, altitude, altitude, self.speed_kt,
+                                pitch, bank, heading % 360.0, self.on_ground)
+
+
+class _StandinConnection(asyncio.Protocol):
+    """一个客户端连接；下行数据经过延迟 / 分包队列"""
+
+    def __init__(self, server: 'FSDStandinServer'):
+        self.server = server
+        self.transport: Optional[asyncio.Transport] = None
+        self.loop = asyncio.get_running_loop()
+        self.callsign = ""
+        self.cid = ""
+        self.real_name = ""
+        self.capabilities: List[str] = []
+        self.lat = 0.0
+        self.lon = 0.0
+        self.has_position = False
+        self.pings: Dict[str, float] = {}
+        self._buffer = b""
+        # 延迟发送队列：(到期时间, 数据)，按顺序写出
+        self._queue: Deque[Tuple[float, bytes]] = deque()
+        self._queued_bytes = 0
+        self._last_due = 0.0
+        self._drain_handle: Optional[asyncio.TimerHandle] = None
+        self._close_when_drained = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections.add(self)
+        self.send(f"$DI{SERVER_NAME}:CLIENT:{SERVER_VERSION}:{self.server.rng.getrandbits(32):08x}")
+
+    def connection_lost(self, exc):
+        if self._drain_handle is not None:
+            self._drain_handle.cancel()
+        self.server.connections.discard(self)
+        self.server.logout(self)
+
+    def data_received(self, data: bytes):
+        *lines, self._buffer = (self._buffer + data).split(b'\r\n')
+        for raw in lines:
+            if raw:
+                self.server.handle_line(self, raw.decode('utf-8', errors='ignore'))
+
+    # ---------- 下行 ----------
+
+    def send(self, line: str) -> bool:
+        transport = self.transport
+        if transport is None or transport.is_closing():
+            return False
+        data = (line + "\r\n").encode('utf-8')
+        server = self.server
+        server.lines_sent += 1
+        server.bytes_sent += len(data)
+        if not (server.latency or server.split_bytes):
+            transport.write(data)
+            return True
+
+        due = max(self.loop.time() + server.latency + server.rng.uniform(0.0, server.jitter), self._last_due)
+        if server.split_bytes:
+            offset = 0
+            while offset < len(data):
+                size = server.rng.randint(1, server.split_bytes)
+                self._push(due, data[offset:offset + size])
+                offset += size
+                due += server.split_delay
+        else:
+            self._push(due, data)
+        return True
+
+    def _push(self, due: float, data: bytes):
+        self._queue.append((due, data))
+        self._queued_bytes += len(data)
+        self._last_due = due
+        if self._drain_handle is None:
+            self._drain_handle = self.loop.call_at(self._queue[0][0], self._drain)
+
+    def _drain(self):
+        self._drain_handle = None
+        transport = self.transport
+        now = self.loop.time()
+        queue = self._queue
+        while queue and queue[0][0] <= now:
+            _, data = queue.popleft()
+            self._queued_bytes -= len(data)
+            if transport is not None and not transport.is_closing():
+                transport.write(data)
+        if queue:
+            self._drain_handle = self.loop.call_at(queue[0][0], self._drain)
+        elif self._close_when_drained:
+            self._close()
+
+    def close_after_send(self):
+        """等队列中的数据（如 $ER）写出后再断开"""
+        if self._queue:
+            self._close_when_drained = True
+        else:
+            self._close()
+
+    def _close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    @property
+    def closing(self) -> bool:
+        return self._close_when_drained or self.transport is None or self.transport.is_closing()
+
+    @property
+    def congested(self) -> bool:
+        transport = self.transport
+        if transport is None:
+            return True
+        return self._queued_bytes + transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT
+
+
+class _InjectedPilot:
+    """start_traffic() 注入的虚拟机组"""
+
+    __slots__ = ('callsign', 'track', 'lat', 'lon', 'has_position')
+
+    def __init__(self, callsign: str, track: SyntheticTrack):
+        self.callsign = callsign
+        self.track = track
+        self.lat = track.center_lat
+        self.lon = track.center_lon
+        self.has_position = False
+
+
+class FSDStandinServer:
+    """FSD 替身服务器（asyncio）"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 6809, visibility_nm: float = VISIBILITY_NM,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 split_bytes: int = 0, split_delay_ms: float = 1.0,
+                 password: Optional[str] = None, accounts: Optional[Dict[str, str]] = None,
+                 server_ping_interval: float = 0.0, motd: Optional[str] = None, seed: int = 0):
+        """password 为所有 CID 共用的密码，accounts 为 CID -> 密码；两者都为空时不校验密码"""
+        self.host = host
+        self.port = port
+        self.visibility_nm = visibility_nm
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.split_bytes = split_bytes
+        self.split_delay = split_delay_ms / 1000.0
+        self.password = password
+        self.accounts = accounts
+        self.server_ping_interval = server_ping_interval
+        self.motd = motd
+        self.rng = random.Random(seed)
+        self.connections = set()
+        self.pilots: Dict[str, _StandinConnection] = {}
+        self.injected: Dict[str, _InjectedPilot] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._tasks: List[asyncio.Task] = []
+        self._traffic_task: Optional[asyncio.Task] = None
+        self._ping_tokens = 0
+        # 统计
+        self.lines_received = 0
+        self.lines_rejected = 0
+        self.lines_sent = 0
+        self.bytes_sent = 0
+        self.positions_forwarded = 0
+        self.positions_dropped = 0
+        self.errors_sent = 0
+        self.rtts: List[float] = []
+
+    # ---------- 生命周期 ----------
+
+    async def start(self) -> int:
+        """开始监听，返回实际端口（port=0 时由系统分配）"""
+        self._loop = asyncio.get_running_loop()
+        self._server = await self._loop.create_server(lambda: _StandinConnection(self), self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.server_ping_interval > 0:
+            self._tasks.append(asyncio.create_task(self._ping_loop()))
+        logger.info(f"FSD stand-in listening on {self.host}:{self.port}")
+        return self.port
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self.stop_traffic()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self._server.close()
+        for conn in list(self.connections):
+            conn.transport.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def start_in_thread(self) -> int:
+        """在后台线程的事件循环中运行，返回端口（供 Qt 事件循环中的 FSDClient 测试使用）
+
+        启动失败（如端口被占用）时在调用方线程重新抛出异常。
+        """
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+        failure: List[BaseException] = []
+
+        def run():
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e:
+                failure.append(e)
+                loop.close()
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        thread = threading.Thread(target=run, name='FSDStandin', daemon=True)
+        thread.start()
+        started.wait()
+        if failure:
+            thread.join()
+            raise failure[0]
+        self._thread = thread
+        return self.port
+
+    def stop_thread(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def call_threadsafe(self, fn: Callable, *args):
+        """start_in_thread() 模式下从其他线程调用 inject_* / start_traffic 等方法"""
+        self._loop.call_soon_threadsafe(fn, *args)
+
+    # ---------- 消息处理 ----------
+
+    def handle_line(self, conn: _StandinConnection, line: str):
+        self.lines_received += 1
+        if conn.closing:
+            # 已被拒绝登录或已注销，等待断开
+            self.lines_rejected += 1
+            return
+        if line.startswith('#AP'):
+            # 解析器不保留密码，登录单独处理
+            self._handle_login(conn, line)
+            return
+        msg = FSDMessageParser.parse(line)
+        if msg is None or not conn.callsign:
+            # 无法解析，或未登录就发送其他消息
+            self.lines_rejected += 1
+            return
+        kind = msg.msg_type
+        if kind == MessageType.PILOT_DATA_UPDATE:
+            if msg.sender == conn.callsign:
+                conn.lat, conn.lon = msg.position.latitude, msg.position.longitude
+                conn.has_position = True
+                self._fan_out(conn.lat, conn.lon, line, exclude=conn)
+            else:
+                self.send_error(conn, ERR_INVALID_SOURCE, msg.sender, "Invalid source callsign")
+        elif kind == MessageType.PING:
+            conn.send(f"$PO{SERVER_NAME}:{msg.sender}:{msg.timestamp}")
+        elif kind == MessageType.PONG:
+            sent = conn.pings.pop(msg.timestamp, None)
+            if sent is not None:
+                self.rtts.append(self._loop.time() - sent)
+        elif kind == MessageType.TEXT_MESSAGE:
+            self._route_text(conn, msg.receiver, line)
+        elif kind == MessageType.CLIENT_RESPONSE:
+            if msg.response_type == "CAPS":
+                conn.capabilities = [c for c in msg.data.split(':') if c]
+        elif kind == MessageType.DELETE_PILOT:
+            self.logout(conn)
+            conn.close_after_send()
+
+    def _handle_login(self, conn: _StandinConnection, line: str):
+        # #APCALLSIGN:SERVER:CID:PASSWORD:RATING:PROTOCOL:SIMTYPE[:REALNAME]
+        f = line[3:].lstrip(':').split(':', 7)
+        if len(f) < 7:
+            self.send_error(conn, ERR_SYNTAX, "", "Syntax error")
+            conn.close_after_send()
+            return
+        callsign, _, cid, password, rating, protocol, sim_type = f[:7]
+        real_name = f[7] if len(f) > 7 else ""
+        if conn.callsign:
+            if conn.callsign != callsign:
+                self.send_error(conn, ERR_INVALID_SOURCE, callsign, "Already logged in as " + conn.callsign)
+            # 客户端在连接建立和收到 $DI 时各发一次 #AP，重复的登录忽略
+            return
+        if not _CALLSIGN.match(callsign):
+            self._reject(conn, ERR_INVALID_CALLSIGN, callsign, "Invalid callsign")
+            return
+        if protocol != PROTOCOL_REVISION:
+            self._reject(conn, ERR_INVALID_PROTOCOL, protocol, "Invalid protocol revision")
+            return
+        expected = self.accounts.get(cid) if self.accounts is not None else self.password
+        if (self.accounts is not None or self.password is not None) and password != expected:
+            self._reject(conn, ERR_INVALID_LOGIN, cid, "Invalid CID/password")
+            return
+        if callsign in self.pilots or callsign in self.injected:
+            self._reject(conn, ERR_CALLSIGN_IN_USE, callsign, "Callsign in use")
+            return
+
+        conn.callsign, conn.cid, conn.real_name = callsign, cid, real_name
+        self.pilots[callsign] = conn
+        self.broadcast(f"#AP{callsign}:{SERVER_NAME}:{cid}::{rating}:{protocol}:{sim_type}:{real_name}", exclude=conn)
+        conn.send(f"$CQ{SERVER_NAME}:{callsign}:CAPS")
+        if self.motd:
+            conn.send(f"#TM{SERVER_NAME}:{callsign}:{self.motd}")
+
+    def _reject(self, conn: _StandinConnection, code: int, param: str, text: str):
+        self.send_error(conn, code, param, text)
+        conn.close_after_send()
+
+    def _route_text(self, conn: _StandinConnection, receiver: str, line: str):
+        if receiver.startswith('*') or receiver.startswith('@'):
+            self.broadcast(line, exclude=conn)
+            return
+        target = self.pilots.get(receiver)
+        if target is None:
+            self.send_error(conn, ERR_NO_SUCH_CALLSIGN, receiver, "No such callsign")
+            return
+        target.send(line)
+
+    def logout(self, conn: _StandinConnection):
+        callsign = conn.callsign
+        if not callsign or self.pilots.get(callsign) is not conn:
+            return
+        del self.pilots[callsign]
+        conn.callsign = ""
+        self.broadcast(f"#DP{callsign}:{SERVER_NAME}", exclude=conn)
+
+    # ---------- 下行 ----------
+
+    def send_error(self, conn: _StandinConnection, code: int, param: str, text: str):
+        conn.send(f"$ER{SERVER_NAME}:{conn.callsign or 'unknown'}:{code:03d}:{param}:{text}")
+        self.errors_sent += 1
+
+    def broadcast(self, line: str, exclude: Optional[_StandinConnection] = None):
+        for other in self.pilots.values():
+            if other is not exclude:
+                other.send(line)
+
+    def _fan_out(self, lat: float, lon: float, line: str, exclude: Optional[_StandinConnection] = None):
+        """把位置行发给可视范围内的客户端，积压的客户端跳过"""
+        limit = self.visibility_nm / _NM_PER_DEG
+        limit2 = limit * limit
+        k = math.cos(math.radians(lat))
+        for other in self.pilots.values():
+            if other is exclude or not other.has_position:
+                continue
+            dy = other.lat - lat
+            dx = (other.lon - lon) * k
+            if dx * dx + dy * dy > limit2:
+                continue
+            if other.congested:
+                self.positions_dropped += 1
+                continue
+            other.send(line)
+            self.positions_forwarded += 1
+
+    async def _ping_loop(self):
+        while True:
+            await asyncio.sleep(self.server_ping_interval)
+            now = self._loop.time()
+            for conn in list(self.pilots.values()):
+                self._ping_tokens += 1
+                token = str(self._ping_tokens)
+                conn.pings[token] = now
+                conn.send(f"$PI{SERVER_NAME}:{conn.callsign}:{token}")
+
+    # ---------- 流量注入 ----------
+
+    def inject_line(self, line: str, callsign: Optional[str] = None):
+        """向指定客户端（默认全部已登录客户端）发送任意一行"""
+        if callsign is None:
+            self.broadcast(line)
+        elif callsign in self.pilots:
+            self.pilots[callsign].send(line)
+
+    def inject_text(self, message: str, sender: str = SERVER_NAME, receiver: str = "*"):
+        """注入 #TM；receiver 为 '*' 时广播"""
+        line = f"#TM{sender}:{receiver}:{message}"
+        self.inject_line(line, None if receiver.startswith('*') or receiver.startswith('@') else receiver)
+
+    def inject_error(self, callsign: str, code: int, text: str, param: str = ""):
+        conn = self.pilots.get(callsign)
+        if conn is not None:
+            self.send_error(conn, code, param, text)
+
+    def start_traffic(self, count: int, rate_hz: float = 1.0, spread_nm: float = 300.0):
+        """注入 count 架沿合成航迹移动的虚拟机组，每架每秒发送 rate_hz 次位置"""
+        self.stop_traffic()
+        for i in range(count):
+            callsign = f"INJ{i:04d}"
+            self.injected[callsign] = _InjectedPilot(callsign, SyntheticTrack(self.rng, spread_nm))
+            self.broadcast(f"#AP{callsign}:{SERVER_NAME}:{8000000 + i}::1:{PROTOCOL_REVISION}:16:Injected {i}")
+        self._traffic_task = asyncio.create_task(self._traffic_loop(1.0 / rate_hz))
+
+    def stop_traffic(self):
+        if self._traffic_task is not None:
+            self._traffic_task.cancel()
+            self._traffic_task = None
+        for callsign in self.injected:
+            self.broadcast(f"#DP{callsign}:{SERVER_NAME}")
+        self.injected.clear()
+
+    async def _traffic_loop(self, interval: float):
+        t0 = self._loop.time()
+        # 各机组的发送时刻在一个周期内均匀错开
+        pilots = list(self.injected.values())
+        step = interval / max(1, len(pilots))
+        while True:
+            for pilot in pilots:
+                pos = pilot.track.position(self._loop.time() - t0)
+                line = pilot_position_line(pilot.callsign, pos.latitude, pos.longitude, pos.altitude_true,
+                                           pos.groundspeed, pos.heading, pilot.track.squawk,
+                                           pitch=pos.pitch, bank=pos.bank, on_ground=pos.on_ground)
+                self._fan_out(pos.latitude, pos.longitude, line)
+                await asyncio.sleep(step)
+
+
+async def _serve(args):
+    server = FSDStandinServer(args.host, args.port, args.visibility,
+                              latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                              split_bytes=args.split_bytes, split_delay_ms=args.split_delay_ms,
+                              password=args.password, server_ping_interval=args.server_ping,
+                              motd=args.motd, seed=args.seed)
+    await server.start()
+    if args.inject_pilots:
+        server.start_traffic(args.inject_pilots, args.inject_rate)
+    last = time.monotonic()
+    last_lines = 0
+    try:
+        while True:
+            await asyncio.sleep(5)
+            now = time.monotonic()
+            rate = (server.lines_received - last_lines) / (now - last)
+            last, last_lines = now, server.lines_received
+            logger.info(f"{len(server.pilots)} pilots, {rate:.0f} lines/s in, "
+                        f"{server.positions_forwarded} forwarded, {server.positions_dropped} dropped, "
+                        f"{server.errors_sent} errors sent")
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ISFP Connect 本地 FSD 替身服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6809)
+    parser.add_argument('--visibility', type=float, default=VISIBILITY_NM, help='位置转发范围（海里）')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='下行延迟')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='下行延迟的随机抖动上限')
+    parser.add_argument('--split-bytes', type=int, default=0, help='把下行数据切成最多 N 字节的片段（0 表示不切）')
+    parser.add_argument('--split-delay-ms', type=float, default=1.0, help='相邻片段的写出间隔')
+    parser.add_argument('--password', help='要求所有 CID 使用该密码（默认不校验）')
+    parser.add_argument('--server-ping', type=float, default=0.0, help='每 N 秒向客户端发送 $PI（0 表示不发送）')
+    parser.add_argument('--motd', help='登录后发送给客户端的 #TM')
+    parser.add_argument('--inject-pilots', type=int, default=0, help='注入的虚拟机组数量')
+    parser.add_argument('--inject-rate', type=float, default=1.0, help='虚拟机组每秒位置更新次数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)-8s] [%(name)s] %(message)s')
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
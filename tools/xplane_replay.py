@@ -0,0 +1,63 @@
+"""
+X-Plane Replay - 生成与插件 NetworkManager::SendData 格式一致的模拟飞行数据流
+
+用于在没有 X-Plane 的环境下对客户端接收链路做基准测试。
+"""
+
+import os
+import sys
+import math
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xplane_protocol import encode_json_frame, encode_flight_frame
+
+
+def synth_flight_sample(t: float) -> Dict[str, float]:
+    """按时间 t（秒）生成一条模拟飞行样本：起飞爬升后做标准转弯"""
+    climb = min(t, 600.0)
+    heading = (90.0 + 3.0 * max(0.0, t - 120.0)) % 360.0
+    gs = min(250.0, 20.0 + t * 1.5)
+    return {
+        'latitude': 31.143378 + 0.0004 * t * math.cos(math.radians(heading)),
+        'longitude': 121.805214 + 0.0004 * t * math.sin(math.radians(heading)),
+        'altitude': 4.0 + climb * 5.0,
+        'elevation': 4.0 + climb * 5.0,
+        'pitch': 7.5 if t < 600 else 0.5,
+        'roll': 25.0 if t > 120 else 0.0,
+        'heading': heading,
+        'indicated_airspeed': gs * 0.9,
+        'true_airspeed': gs,
+        'groundspeed': gs * 0.514444,
+        'vertical_speed': 1500.0 if t < 600 else 0.0,
+        'altitude_msl': 13.0 + climb * 16.4,
+        'altitude_agl': climb * 16.4,
+        'mag_heading': (heading + 5.5) % 360.0,
+        'true_heading': heading,
+        'com1_freq': 118350,
+        'com2_freq': 121500,
+        'transponder': 2000,
+        'gear_deploy': 1 if t < 30 else 0,
+        'flaps_ratio': 0.25 if t < 60 else 0.0,
+        'throttle_ratio': 0.95,
+    }
+
+
+def replay_stream(seconds: float = 60.0, rate_hz: float = 50.0, binary: bool = False) -> bytes:
+    """生成 seconds 秒、rate_hz 采样率的完整字节流（默认 JSON，binary=True 时为二进制帧）"""
+    count = int(seconds * rate_hz)
+    if binary:
+        return b''.join(encode_flight_frame(synth_flight_sample(i / rate_hz), i) for i in range(count))
+    return b''.join(encode_json_frame(synth_flight_sample(i / rate_hz)) for i in range(count))
+
+
+def split_segments(stream: bytes, segment_sizes: List[int]) -> Iterator[bytes]:
+    """按循环使用的分段大小切分字节流，模拟 TCP 的任意分段到达"""
+    pos = 0
+    i = 0
+    while pos < len(stream):
+        size = segment_sizes[i % len(segment_sizes)]
+        yield stream[pos:pos + size]
+        pos += size
+        i += 1
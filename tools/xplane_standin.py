@@ -0,0 +1,198 @@
+"""
+X-Plane Stand-in - 模拟 ISFP Connect 插件的 TCP 服务器
+
+行为与 xplane-plugin/src/network.cpp 一致：
+- 客户端连接后发送 {"type":"connected","version":...,"formats":[...]}
+- 默认以 JSON 行推送 flight_data
+- 收到 {"type":"set_format","format":"binary","interval_ms":N} 后切换为二进制帧
+
+用于在 Linux 上无 X-Plane 运行客户端、测试编解码与做基准测试。
+指定 --replay 时不再合成样本，而是按录制时的间隔（乘以 --speed）发送飞行录制文件中的样本。
+
+用法:
+    python tools/xplane_standin.py [--port 51001] [--json-only] [--rate 10]
+    python tools/xplane_standin.py --replay data/recordings/flight-....isfprec [--speed 10]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from xplane_protocol import encode_json_frame, encode_flight_frame, BINARY_PROTOCOL_VERSION
+from xplane_replay import synth_flight_sample
+from flight_recorder import read_recording, MIN_REPLAY_SPEED, MAX_REPLAY_SPEED
+
+logger = logging.getLogger('ISFP-Connect.XPlaneStandin')
+
+MIN_SEND_INTERVAL_MS = 10
+MAX_SEND_INTERVAL_MS = 1000
+
+
+class XPlaneStandinServer:
+    """单客户端的插件替身服务器（与真实插件一样，新客户端会顶掉旧客户端）"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 51001,
+                 json_interval_ms: int = 100, binary_supported: bool = True,
+                 plugin_version: int = 101, recording: str = None, speed: float = 1.0):
+        self.host = host
+        self.port = port
+        self.json_interval_ms = json_interval_ms
+        self.binary_supported = binary_supported
+        self.plugin_version = plugin_version if binary_supported else 100
+        self.recording = recording
+        self.speed = max(MIN_REPLAY_SPEED, min(MAX_REPLAY_SPEED, speed))
+        self._listen: socket.socket = None
+        self._running = False
+        self._thread: threading.Thread = None
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    def start(self):
+        """在后台线程启动服务器，返回实际监听端口"""
+        self._listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listen.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listen.bind((self.host, self.port))
+        self._listen.listen(1)
+        self.port = self._listen.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        logger.info(f"Stand-in plugin listening on {self.host}:{self.port}")
+        return self.port
+
+    def stop(self):
+        self._running = False
+        try:
+            self._listen.close()
+        except OSError:
+            pass
+
+    def _serve(self):
+        while self._running:
+            try:
+                client, addr = self._listen.accept()
+            except OSError:
+                break
+            logger.info(f"Client connected from {addr}")
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                self._handle_client(client)
+            except OSError as e:
+                logger.info(f"Client disconnected: {e}")
+            finally:
+                client.close()
+
+    def _handle_client(self, client: socket.socket):
+        hello = {'type': 'connected', 'version': self.plugin_version}
+        if self.binary_supported:
+            hello['formats'] = ['json', 'binary']
+            hello['binary_version'] = BINARY_PROTOCOL_VERSION
+        client.sendall((json.dumps(hello, separators=(',', ':')) + '\n').encode('utf-8'))
+
+        state = {'binary': False, 'interval_ms': self.json_interval_ms}
+        reader = threading.Thread(target=self._read_commands, args=(client, state), daemon=True)
+        reader.start()
+
+        if self.recording:
+            self._replay_recording(client, state, reader)
+            return
+
+        sequence = 0
+        t0 = time.monotonic()
+        next_send = t0
+        while self._running and reader.is_alive():
+            now = time.monotonic()
+            sample = synth_flight_sample(now - t0)
+            sequence = self._send_sample(client, state, sample, sequence)
+            next_send += state['interval_ms'] / 1000.0
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_send = time.monotonic()
+
+    def _replay_recording(self, client: socket.socket, state: dict, reader: threading.Thread):
+        """按录制时的时间间隔发送录制文件中的样本，发完后断开"""
+        sequence = 0
+        wall0 = time.monotonic()
+        t0 = None
+        for t, sample in read_recording(self.recording):
+            if not (self._running and reader.is_alive()):
+                return
+            if t0 is None:
+                t0 = t
+            delay = wall0 + (t - t0) / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            sequence = self._send_sample(client, state, sample, sequence)
+        logger.info(f"Replay finished after {self.frames_sent} frames")
+
+    def _send_sample(self, client: socket.socket, state: dict, sample: dict, sequence: int) -> int:
+        if state['binary']:
+            frame = encode_flight_frame(sample, sequence)
+            sequence += 1
+        else:
+            frame = encode_json_frame(sample)
+        client.sendall(frame)
+        self.frames_sent += 1
+        self.bytes_sent += len(frame)
+        return sequence
+
+    def _read_commands(self, client: socket.socket, state: dict):
+        buffer = b''
+        while self._running:
+            try:
+                data = client.recv(512)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                try:
+                    command = json.loads(line)
+                except ValueError:
+                    continue
+                if command.get('type') != 'set_format':
+                    continue
+                if self.binary_supported:
+                    state['binary'] = command.get('format') == 'binary'
+                interval = int(command.get('interval_ms', state['interval_ms']))
+                state['interval_ms'] = max(MIN_SEND_INTERVAL_MS, min(MAX_SEND_INTERVAL_MS, interval))
+                logger.info(f"Client selected {'binary' if state['binary'] else 'JSON'} frames, "
+                            f"interval {state['interval_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ISFP Connect X-Plane 插件替身服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=51001)
+    parser.add_argument('--rate', type=float, default=10.0, help='JSON 模式发送频率（Hz），插件默认 10 Hz')
+    parser.add_argument('--json-only', action='store_true', help='模拟旧版插件（不支持二进制帧）')
+    parser.add_argument('--replay', metavar='FILE', help='回放飞行录制文件（.isfprec）而不是合成样本')
+    parser.add_argument('--speed', type=float, default=1.0, help='回放速度倍数（1-100）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)-8s] [%(name)s] %(message)s')
+    server = XPlaneStandinServer(args.host, args.port, int(1000 / args.rate), not args.json_only,
+                                 recording=args.replay, speed=args.speed)
+    server.start()
+    try:
+        while True:
+            time.sleep(5)
+            logger.info(f"Sent {server.frames_sent} frames, {server.bytes_sent:,} bytes")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
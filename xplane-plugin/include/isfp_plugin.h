@@ -18,6 +18,7 @@
 #include <atomic>
 #include <mutex>
 #include <queue>
+#include <cstdint>
 
 // X-Plane SDK Headers
 #include "XPLMPlugin.h"
@@ -33,12 +34,19 @@ namespace ISFP {
 constexpr const char* PLUGIN_NAME = "ISFP Connect";
 constexpr const char* PLUGIN_SIGNATURE = "com.isfp.connect";
 constexpr const char* PLUGIN_DESCRIPTION = "ISFP Connect Plugin for X-Plane - Native TCP Server";
-constexpr int PLUGIN_VERSION = 100;
+constexpr int PLUGIN_VERSION = 101;
 
 // Default server config - plugin acts as server
 constexpr const char* DEFAULT_HOST = "0.0.0.0";  // Listen on all interfaces
 constexpr int DEFAULT_PORT = 51001;
 constexpr int DATA_SEND_INTERVAL_MS = 500; // 2Hz data send frequency
+constexpr int BINARY_SEND_INTERVAL_MS = 20; // 50Hz default in binary mode
+constexpr int MIN_SEND_INTERVAL_MS = 10;
+constexpr int MAX_SEND_INTERVAL_MS = 1000;
+
+// Binary frame protocol (negotiated with {"type":"set_format","format":"binary"})
+constexpr uint8_t BINARY_FRAME_MAGIC = 0xB5;   // Never a valid first byte of a JSON line
+constexpr uint8_t BINARY_PROTOCOL_VERSION = 1;
 
 // Flight data structure
 struct FlightData {
@@ -68,6 +76,45 @@ struct FlightData {
     FlightData() : valid(false) {}
 };
 
+// Binary wire layout, little-endian and packed. Mirrors FlightData;
+// keep in sync with FLIGHT_FRAME in xplane_protocol.py
+#pragma pack(push, 1)
+struct BinaryFrameHeader {
+    uint8_t magic;      // BINARY_FRAME_MAGIC
+    uint8_t version;    // BINARY_PROTOCOL_VERSION
+    uint16_t length;    // Total frame length including header
+    uint32_t sequence;  // Incremented per frame, lets the client count drops
+};
+
+struct BinaryFlightFrame {
+    BinaryFrameHeader header;
+    double latitude;
+    double longitude;
+    float altitude;
+    float elevation;
+    float pitch;
+    float roll;
+    float heading;
+    float indicated_airspeed;
+    float true_airspeed;
+    float groundspeed;
+    float vertical_speed;
+    float altitude_msl;
+    float altitude_agl;
+    float mag_heading;
+    float true_heading;
+    int32_t com1_freq;
+    int32_t com2_freq;
+    int32_t transponder;
+    int32_t gear_deploy;
+    float flaps_ratio;
+    float throttle_ratio;
+};
+#pragma pack(pop)
+
+static_assert(sizeof(BinaryFrameHeader) == 8, "BinaryFrameHeader must be 8 bytes");
+static_assert(sizeof(BinaryFlightFrame) == 100, "BinaryFlightFrame must be 100 bytes");
+
 // Network manager class - acts as TCP server
 class NetworkManager {
 public:
@@ -80,17 +127,27 @@ public:
     bool StartServer(int port);  // Start listening
     void StopServer();
     bool IsClientConnected() const { return client_connected_; }
+    bool IsBinaryMode() const { return binary_mode_; }
+    float GetSendIntervalSec() const { return send_interval_ms_ / 1000.0f; }
     
     bool SendData(const FlightData& data);
     
 private:
     void ServerLoop();  // Accept connections
     void ClientLoop();  // Handle client communication
+    void HandleClientCommand(const std::string& line);
+    bool SendJson(const FlightData& data);
+    bool SendBinary(const FlightData& data);
+    bool SendRaw(const char* buffer, int length);
     
     SOCKET listen_socket_;
     SOCKET client_socket_;
     std::atomic<bool> server_running_;
     std::atomic<bool> client_connected_;
+    std::atomic<bool> binary_mode_;
+    std::atomic<int> send_interval_ms_;
+    uint32_t sequence_;
+    std::string command_buffer_;
     
     int port_;
     
@@ -6,6 +6,7 @@
 #include "isfp_plugin.h"
 #include <sstream>
 #include <iomanip>
+#include <cstdlib>
 
 namespace ISFP {
 
@@ -14,6 +15,9 @@ NetworkManager::NetworkManager()
     , client_socket_(INVALID_SOCKET)
     , server_running_(false)
     , client_connected_(false)
+    , binary_mode_(false)
+    , send_interval_ms_(BINARY_SEND_INTERVAL_MS)
+    , sequence_(0)
     , port_(DEFAULT_PORT)
     , wsa_initialized_(false) {
 }
@@ -125,10 +129,14 @@ void NetworkManager::ServerLoop() {
     XPLMDebugString("ISFP Connect: Server loop started\n");
 
     while (server_running_) {
-        // Check for incoming connection (non-blocking)
+        // Check for incoming connection and client commands (non-blocking)
         fd_set readfds;
         FD_ZERO(&readfds);
         FD_SET(listen_socket_, &readfds);
+        SOCKET client = client_socket_;
+        if (client_connected_ && client != INVALID_SOCKET) {
+            FD_SET(client, &readfds);
+        }
 
         timeval timeout;
         timeout.tv_sec = 1;
@@ -136,6 +144,10 @@ void NetworkManager::ServerLoop() {
 
         int result = select(0, &readfds, nullptr, nullptr, &timeout);
 
+        if (result > 0 && client != INVALID_SOCKET && FD_ISSET(client, &readfds)) {
+            ClientLoop();
+        }
+
         if (result > 0 && FD_ISSET(listen_socket_, &readfds)) {
             // Accept new connection
             sockaddr_in client_addr;
@@ -153,14 +165,22 @@ void NetworkManager::ServerLoop() {
                 client_socket_ = new_client;
                 client_connected_ = true;
 
+                // Every new client starts in JSON mode until it asks for binary
+                binary_mode_ = false;
+                send_interval_ms_ = BINARY_SEND_INTERVAL_MS;
+                sequence_ = 0;
+                command_buffer_.clear();
+
                 // Set TCP_NODELAY
                 int nodelay = 1;
                 setsockopt(client_socket_, IPPROTO_TCP, TCP_NODELAY, (char*)&nodelay, sizeof(nodelay));
 
                 XPLMDebugString("ISFP Connect: Client connected\n");
 
-                // Send welcome message
-                std::string welcome = "{\"type\":\"connected\",\"version\":" + std::to_string(PLUGIN_VERSION) + "}\n";
+                // Send welcome message (advertises the supported frame formats)
+                std::string welcome = "{\"type\":\"connected\",\"version\":" + std::to_string(PLUGIN_VERSION) +
+                                      ",\"formats\":[\"json\",\"binary\"],\"binary_version\":" +
+                                      std::to_string(BINARY_PROTOCOL_VERSION) + "}\n";
                 send(client_socket_, welcome.c_str(), (int)welcome.length(), 0);
             }
         }
@@ -169,11 +189,111 @@ void NetworkManager::ServerLoop() {
     XPLMDebugString("ISFP Connect: Server loop ended\n");
 }
 
+void NetworkManager::ClientLoop() {
+    // Read whatever the client sent; commands are newline-terminated JSON
+    char buffer[512];
+    int received;
+    {
+        std::lock_guard<std::mutex> lock(socket_mutex_);
+        if (client_socket_ == INVALID_SOCKET) {
+            return;
+        }
+        received = recv(client_socket_, buffer, sizeof(buffer), 0);
+        if (received <= 0) {
+            client_connected_ = false;
+            closesocket(client_socket_);
+            client_socket_ = INVALID_SOCKET;
+            XPLMDebugString("ISFP Connect: Client disconnected\n");
+            return;
+        }
+    }
+
+    command_buffer_.append(buffer, received);
+    if (command_buffer_.size() > 4096) {
+        // Garbage from the client, don't let it grow forever
+        command_buffer_.clear();
+        return;
+    }
+
+    size_t pos;
+    while ((pos = command_buffer_.find('\n')) != std::string::npos) {
+        std::string line = command_buffer_.substr(0, pos);
+        command_buffer_.erase(0, pos + 1);
+        if (!line.empty()) {
+            HandleClientCommand(line);
+        }
+    }
+}
+
+void NetworkManager::HandleClientCommand(const std::string& line) {
+    // Only {"type":"set_format","format":"binary|json","interval_ms":N} is understood,
+    // a full JSON parser is not worth pulling in for it
+    if (line.find("\"set_format\"") == std::string::npos) {
+        return;
+    }
+
+    if (line.find("\"binary\"") != std::string::npos) {
+        binary_mode_ = true;
+    } else if (line.find("\"json\"") != std::string::npos) {
+        binary_mode_ = false;
+    }
+
+    size_t key = line.find("\"interval_ms\"");
+    if (key != std::string::npos) {
+        size_t colon = line.find(':', key);
+        if (colon != std::string::npos) {
+            int interval = atoi(line.c_str() + colon + 1);
+            if (interval < MIN_SEND_INTERVAL_MS) interval = MIN_SEND_INTERVAL_MS;
+            if (interval > MAX_SEND_INTERVAL_MS) interval = MAX_SEND_INTERVAL_MS;
+            send_interval_ms_ = interval;
+        }
+    }
+
+    std::string msg = std::string("ISFP Connect: Client selected ") + (binary_mode_ ? "binary" : "JSON") +
+                      " frames, interval " + std::to_string(send_interval_ms_) + " ms\n";
+    XPLMDebugString(msg.c_str());
+}
+
 bool NetworkManager::SendData(const FlightData& data) {
     if (!client_connected_ || client_socket_ == INVALID_SOCKET) {
         return false;
     }
 
+    return binary_mode_ ? SendBinary(data) : SendJson(data);
+}
+
+bool NetworkManager::SendBinary(const FlightData& data) {
+    BinaryFlightFrame frame;
+    frame.header.magic = BINARY_FRAME_MAGIC;
+    frame.header.version = BINARY_PROTOCOL_VERSION;
+    frame.header.length = (uint16_t)sizeof(BinaryFlightFrame);
+    frame.header.sequence = sequence_++;
+    frame.latitude = data.latitude;
+    frame.longitude = data.longitude;
+    frame.altitude = (float)data.altitude;
+    frame.elevation = (float)data.elevation;
+    frame.pitch = (float)data.pitch;
+    frame.roll = (float)data.roll;
+    frame.heading = (float)data.heading;
+    frame.indicated_airspeed = (float)data.indicated_airspeed;
+    frame.true_airspeed = (float)data.true_airspeed;
+    frame.groundspeed = (float)data.groundspeed;
+    frame.vertical_speed = (float)data.vertical_speed;
+    frame.altitude_msl = (float)data.altitude_msl;
+    frame.altitude_agl = (float)data.altitude_agl;
+    frame.mag_heading = (float)data.mag_heading;
+    frame.true_heading = (float)data.true_heading;
+    frame.com1_freq = data.com1_freq;
+    frame.com2_freq = data.com2_freq;
+    frame.transponder = data.transponder;
+    frame.gear_deploy = data.gear_deploy;
+    frame.flaps_ratio = data.flaps_ratio;
+    frame.throttle_ratio = data.throttle_ratio;
+
+    return SendRaw(reinterpret_cast<const char*>(&frame), (int)sizeof(frame));
+}
+
+bool NetworkManager::SendJson(const FlightData& data) {
     // Build JSON
     std::ostringstream json;
     json << std::fixed << std::setprecision(6);
@@ -203,10 +323,17 @@ bool NetworkManager::SendData(const FlightData& data) {
     json << "}\n";
 
     std::string data_str = json.str();
+    return SendRaw(data_str.c_str(), (int)data_str.length());
+}
 
+bool NetworkManager::SendRaw(const char* buffer, int length) {
     std::lock_guard<std::mutex> lock(socket_mutex_);
 
-    int sent = send(client_socket_, data_str.c_str(), (int)data_str.length(), 0);
+    if (client_socket_ == INVALID_SOCKET) {
+        return false;
+    }
+
+    int sent = send(client_socket_, buffer, length, 0);
 
     if (sent == SOCKET_ERROR) {
         int error = WSAGetLastError();
@@ -172,6 +172,10 @@ static float FlightLoopCallback(float inElapsedSinceLastCall,
         g_network->SendData(data);
     }
     
-    // Return next callback interval (seconds) - 10Hz = 0.1s
+    // Return next callback interval (seconds) - 10Hz = 0.1s for JSON,
+    // binary mode runs at the interval negotiated by the client
+    if (g_network->IsClientConnected() && g_network->IsBinaryMode()) {
+        return g_network->GetSendIntervalSec();
+    }
     return 0.1f;
 }
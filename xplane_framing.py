@@ -0,0 +1,188 @@
+"""
+X-Plane Framing - 基于 bytearray/memoryview 的零拷贝行分帧器
+
+插件以 '\\n' 结尾的帧推送数据。LineFramer 使用预分配的接收缓冲区，
+通过 recv_into 直接写入，用 find 查找换行符，并以 memoryview 切片的形式
+交出完整帧，不会像 str.split 那样在每一行都复制剩余的缓冲区。
+
+协商为二进制模式后，插件发送以 BINARY_MAGIC 开头、头部带小端 u16 总长度的
+定长帧（见 xplane_protocol），分帧器按长度切分，两种帧可以在同一连接上混合出现。
+"""
+
+import logging
+from typing import Iterator, Optional
+
+logger = logging.getLogger('ISFP-Connect.XPlaneFraming')
+
+# 默认缓冲区大小：足以容纳数十个 JSON 帧
+DEFAULT_BUFFER_SIZE = 64 * 1024
+# 单帧最大长度，超过则视为流损坏并丢弃
+MAX_FRAME_SIZE = 1024 * 1024
+# 二进制帧首字节（不可能是 UTF-8 JSON 行的首字节）
+BINARY_MAGIC = 0xB5
+# 二进制帧头: magic(1) + version(1) + length(2, little-endian)
+BINARY_LENGTH_PREFIX = 4
+
+
+class FrameTooLargeError(Exception):
+    """单帧超过 MAX_FRAME_SIZE"""
+    pass
+
+
+class LineFramer:
+    """Zero-copy newline framer over a preallocated bytearray
+
+    Usage::
+
+        framer = LineFramer()
+        while True:
+            if framer.recv_into(sock) == 0:
+                break
+            for frame in framer.frames():
+                handle(frame)   # frame is a memoryview, valid until next recv_into
+
+    Unconsumed bytes stay in place between reads; they are only moved to the
+    front of the buffer when the free tail runs out (compaction), and the
+    buffer only grows when a single frame is larger than the buffer itself.
+    ``bytes_copied`` counts every byte moved by compaction/growth so the cost
+    can be compared against the old str-based loop.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 max_frame_size: int = MAX_FRAME_SIZE,
+                 delimiter: bytes = b'\n'):
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._start = 0     # 未消费数据起点
+        self._end = 0       # 有效数据终点
+        self._scan = 0      # 下一次查找换行符的起点（避免重复扫描）
+        self._max_frame_size = max_frame_size
+        self._delimiter = delimiter
+
+        # 统计
+        self.bytes_received = 0
+        self.bytes_copied = 0
+        self.frames_emitted = 0
+
+    @property
+    def pending(self) -> int:
+        """缓冲区中尚未组成完整帧的字节数"""
+        return self._end - self._start
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def reset(self):
+        """丢弃缓冲区内容（重连时使用）"""
+        self._start = self._end = self._scan = 0
+
+    def _make_room(self):
+        """保证缓冲区尾部有空闲空间"""
+        if self._end < len(self._buf):
+            return
+
+        pending = self._end - self._start
+        if pending >= self._max_frame_size:
+            self.reset()
+            raise FrameTooLargeError(f"Frame exceeds {self._max_frame_size} bytes, buffer dropped")
+
+        if self._start > 0:
+            # 压缩：把未消费部分移到缓冲区开头（同长度切片赋值，不改变 bytearray 大小）
+            self._buf[0:pending] = self._view[self._start:self._end]
+            self.bytes_copied += pending
+            self._scan -= self._start
+            self._start = 0
+            self._end = pending
+        else:
+            # 单帧比缓冲区还大，扩容一倍
+            new_buf = bytearray(min(len(self._buf) * 2, self._max_frame_size + 1))
+            new_buf[0:pending] = self._view[0:pending]
+            self.bytes_copied += pending
+            self._view.release()
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+            logger.debug(f"Framer buffer grown to {len(new_buf)} bytes")
+
+    def writable(self) -> memoryview:
+        """返回缓冲区尾部的可写区域，写入后需调用 commit()"""
+        self._make_room()
+        return self._view[self._end:]
+
+    def commit(self, nbytes: int):
+        """确认已向 writable() 区域写入 nbytes 字节"""
+        self._end += nbytes
+        self.bytes_received += nbytes
+
+    def recv_into(self, sock) -> int:
+        """从 socket 直接读入缓冲区，返回读取的字节数（0 表示连接关闭）"""
+        target = self.writable()
+        try:
+            nbytes = sock.recv_into(target)
+        finally:
+            target.release()
+        self.commit(nbytes)
+        return nbytes
+
+    def feed(self, data: bytes):
+        """写入一段已有数据（用于测试、回放和基准测试）"""
+        data = memoryview(data)
+        while data:
+            target = self.writable()
+            n = min(len(target), len(data))
+            target[:n] = data[:n]
+            target.release()
+            self.commit(n)
+            data = data[n:]
+
+    def frames(self) -> Iterator[memoryview]:
+        """依次交出缓冲区中的完整帧（不含分隔符，空帧跳过）
+
+        交出的 memoryview 仅在下一次 recv_into/feed 之前有效。
+        """
+        buf = self._buf
+        view = self._view
+        find = buf.find
+        delimiter = self._delimiter
+        scan = self._scan
+        end = self._end
+        while True:
+            start = self._start
+            if start < end and buf[start] == BINARY_MAGIC:
+                # 长度前缀的二进制帧
+                if end - start < BINARY_LENGTH_PREFIX:
+                    break
+                length = buf[start + 2] | (buf[start + 3] << 8)
+                if length < BINARY_LENGTH_PREFIX:
+                    # 帧头损坏：跳过该字节，按行重新同步
+                    logger.warning(f"Corrupt binary frame header (length={length}), resyncing")
+                    self._start = self._scan = scan = start + 1
+                    continue
+                if end - start < length:
+                    break
+                self._start = self._scan = scan = start + length
+                self.frames_emitted += 1
+                yield view[start:start + length]
+                continue
+
+            idx = find(delimiter, scan, end)
+            if idx < 0:
+                break
+            self._start = self._scan = scan = idx + 1
+            # 跳过 \r 和空行
+            if idx > start and buf[idx - 1] == 0x0D:
+                idx -= 1
+            if idx > start:
+                self.frames_emitted += 1
+                yield view[start:idx]
+
+        if self._start == end:
+            # 缓冲区已全部消费，回到开头，不需要任何复制
+            self._start = self._end = self._scan = 0
+        elif buf[self._start] != BINARY_MAGIC:
+            # 剩余的是半行 JSON，下次从新数据处继续查找换行符
+            self._scan = end
+
+    def next_frame(self) -> Optional[memoryview]:
+        """取出下一帧，没有完整帧时返回 None"""
+        return next(self.frames(), None)
@@ -0,0 +1,96 @@
+"""
+X-Plane Protocol - 插件与客户端之间的帧编解码
+
+支持两种帧格式:
+- JSON: 以 '\\n' 结尾的一行 JSON（所有插件版本都支持，作为回退）
+- Binary: 定长小端结构体，布局与插件 BinaryFlightFrame 一致（插件版本 >= 101）
+
+二进制模式由客户端在收到 {"type":"connected","formats":[...,"binary"]} 后发送
+{"type":"set_format","format":"binary","interval_ms":N} 协商开启。
+"""
+
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+from xplane_framing import BINARY_MAGIC
+
+BINARY_PROTOCOL_VERSION = 1
+
+# magic, version, length, sequence
+FRAME_HEADER = struct.Struct('<BBHI')
+
+# 与 xplane-plugin/include/isfp_plugin.h 中的 BinaryFlightFrame 保持一致
+FLIGHT_FRAME = struct.Struct('<BBHI2d13f4i2f')
+
+FLIGHT_FIELDS = (
+    'latitude', 'longitude',
+    'altitude', 'elevation', 'pitch', 'roll', 'heading',
+    'indicated_airspeed', 'true_airspeed', 'groundspeed', 'vertical_speed',
+    'altitude_msl', 'altitude_agl', 'mag_heading', 'true_heading',
+    'com1_freq', 'com2_freq', 'transponder', 'gear_deploy',
+    'flaps_ratio', 'throttle_ratio',
+)
+
+_INT_FIELDS = frozenset(('com1_freq', 'com2_freq', 'transponder', 'gear_deploy'))
+
+
+class ProtocolError(Exception):
+    """帧格式错误或版本不支持"""
+    pass
+
+
+def decode_flight_frame(buffer, offset: int = 0) -> Tuple[int, Dict[str, Any]]:
+    """直接在接收缓冲区（bytes/bytearray/memoryview）上解码一个二进制飞行数据帧
+
+    Returns:
+        (sequence, data) - data 的键与 JSON 帧相同，并带有 type='flight_data'
+    """
+    if len(buffer) - offset < FLIGHT_FRAME.size:
+        raise ProtocolError(f"Binary frame too short: {len(buffer) - offset} < {FLIGHT_FRAME.size}")
+    values = FLIGHT_FRAME.unpack_from(buffer, offset)
+    magic, version, length, sequence = values[:4]
+    if magic != BINARY_MAGIC:
+        raise ProtocolError(f"Bad frame magic 0x{magic:02X}")
+    if version != BINARY_PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported binary protocol version {version}")
+    if length != FLIGHT_FRAME.size:
+        raise ProtocolError(f"Unexpected binary frame length {length}")
+    data = dict(zip(FLIGHT_FIELDS, values[4:]))
+    data['type'] = 'flight_data'
+    return sequence, data
+
+
+def encode_flight_frame(sample: Dict[str, Any], sequence: int) -> bytes:
+    """按插件的二进制布局编码一帧（用于替身插件服务器和测试）"""
+    return FLIGHT_FRAME.pack(
+        BINARY_MAGIC, BINARY_PROTOCOL_VERSION, FLIGHT_FRAME.size, sequence & 0xFFFFFFFF,
+        *(int(sample.get(name, 0)) if name in _INT_FIELDS else float(sample.get(name, 0.0))
+          for name in FLIGHT_FIELDS)
+    )
+
+
+def encode_json_frame(sample: Dict[str, Any]) -> bytes:
+    """按插件 SendJson 的格式（%.6f 定点）编码一帧"""
+    parts = ['"type":"flight_data"']
+    for name in FLIGHT_FIELDS:
+        value = sample.get(name, 0)
+        if name in _INT_FIELDS:
+            parts.append(f'"{name}":{int(value)}')
+        else:
+            parts.append(f'"{name}":{float(value):.6f}')
+    return ('{' + ','.join(parts) + '}\n').encode('utf-8')
+
+
+def encode_command(command: Dict[str, Any]) -> bytes:
+    """编码客户端 -> 插件的控制命令"""
+    return (json.dumps(command, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def set_format_command(binary: bool, interval_ms: int = 20) -> bytes:
+    """生成切换帧格式的命令"""
+    return encode_command({
+        'type': 'set_format',
+        'format': 'binary' if binary else 'json',
+        'interval_ms': int(interval_ms),
+    })
@@ -6,11 +6,66 @@ import json
 import socket
 import logging
 import threading
-from typing import Callable, Optional, Dict, Any
+import time
+from typing import Callable, Optional, Dict, Any, List, Union
 from PySide6.QtCore import QObject, Signal, QThread
 
+from xplane_framing import LineFramer, FrameTooLargeError, BINARY_MAGIC
+from xplane_protocol import (
+    decode_flight_frame, set_format_command, ProtocolError, BINARY_PROTOCOL_VERSION
+)
+
 logger = logging.getLogger('ISFP-Connect.XPlaneTCP')
 
+# Per-sample callback: (sample, time.monotonic() when the frame was received)
+SampleListener = Callable[[Dict[str, Any], float], None]
+
+
+class LatestValueMailbox:
+    """Single-slot mailbox between the receive thread and the GUI thread
+
+    The writer overwrites the slot; the reader takes only the newest value.
+    Samples overwritten before being read are counted in ``dropped``.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value: Optional[Dict[str, Any]] = None
+        self._fresh = False
+        self.posted = 0
+        self.taken = 0
+        self.dropped = 0
+    
+    def post(self, value: Dict[str, Any]):
+        """Store a new value (called from the receive thread)"""
+        with self._lock:
+            if self._fresh:
+                self.dropped += 1
+            self._value = value
+            self._fresh = True
+            self.posted += 1
+    
+    def take(self) -> Optional[Dict[str, Any]]:
+        """Return the newest value if it has not been taken yet, else None"""
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            self.taken += 1
+            return self._value
+    
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """Return the newest value without marking it as taken"""
+        with self._lock:
+            return self._value
+    
+    def clear(self):
+        """Drop the stored value and reset statistics"""
+        with self._lock:
+            self._value = None
+            self._fresh = False
+            self.posted = self.taken = self.dropped = 0
+
 
 class XPlaneTCPClient(QObject):
     """TCP client to receive data from X-Plane native plugin"""
@@ -18,18 +73,44 @@ class XPlaneTCPClient(QObject):
     # Signals
     connected = Signal()
     disconnected = Signal()
-    flight_data_received = Signal(dict)  # Flight data from X-Plane
     error_occurred = Signal(str)
     
-    def __init__(self, host='127.0.0.1', port=51001, parent=None):
+    def __init__(self, host='127.0.0.1', port=51001, parent=None,
+                 prefer_binary: bool = True, binary_interval_ms: int = 20):
         super().__init__(parent)
         self.host = host
         self.port = port
+        # Ask plugins that advertise it (version >= 101) for compact binary frames
+        self.prefer_binary = prefer_binary
+        self.binary_interval_ms = binary_interval_ms
+        self.frame_format = 'json'
+        self._last_sequence: Optional[int] = None
+        self.frames_lost = 0
         self.socket: Optional[socket.socket] = None
         self.running = False
         self.connected_flag = False
         self.thread: Optional[threading.Thread] = None
         self.lock = threading.Lock()
+        # Newest sample for the UI; the GUI thread pulls it at its own refresh rate
+        self.mailbox = LatestValueMailbox()
+        # Optional flight recorder (see flight_recorder.py); fed from the receive thread
+        self.recorder = None
+        # Called for every sample on the receive thread (see add_sample_listener)
+        self._sample_listeners: List[SampleListener] = []
+    
+    def add_sample_listener(self, listener: SampleListener):
+        """Call listener(data, received_at) for every flight_data sample
+        
+        Listeners run on the receive thread, so they must be short and thread-safe.
+        received_at is time.monotonic() when the frame arrived. Unlike the mailbox,
+        no sample is skipped; the FSD position path uses this to see every sample
+        with its real arrival time without queueing a Qt call per sample.
+        """
+        self._sample_listeners.append(listener)
+    
+    def remove_sample_listener(self, listener: SampleListener):
+        if listener in self._sample_listeners:
+            self._sample_listeners.remove(listener)
         
     def connect_to_xplane(self) -> bool:
         """Connect to X-Plane plugin"""
@@ -47,6 +128,10 @@ class XPlaneTCPClient(QObject):
                 
                 self.running = True
                 self.connected_flag = True
+                self.mailbox.clear()
+                self.frame_format = 'json'
+                self._last_sequence = None
+                self.frames_lost = 0
                 
                 # Start receive thread
                 self.thread = threading.Thread(target=self._receive_loop, daemon=True)
@@ -125,30 +210,27 @@ class XPlaneTCPClient(QObject):
     
     def _receive_loop(self):
         """Main receive loop running in separate thread"""
-        buffer = ""
+        framer = LineFramer()
         
         while self.running:
             try:
                 if not self.socket:
                     break
                     
-                data = self.socket.recv(4096)
-                if not data:
+                if framer.recv_into(self.socket) == 0:
                     # Connection closed
                     logger.warning("X-Plane connection closed")
                     break
                 
-                buffer += data.decode('utf-8')
-                
-                # Process complete JSON messages
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    line = line.strip()
-                    if line:
-                        self._process_message(line)
+                # Process complete JSON messages (frames are views into the receive buffer)
+                for frame in framer.frames():
+                    self._process_message(frame)
                         
             except socket.timeout:
                 continue
+            except FrameTooLargeError as e:
+                logger.warning(f"Dropped oversized frame: {e}")
+                continue
             except Exception as e:
                 if self.running:
                     logger.error(f"Receive error: {e}")
@@ -159,30 +241,104 @@ class XPlaneTCPClient(QObject):
         self.connected_flag = False
         self.disconnected.emit()
     
-    def _process_message(self, message: str):
+    def _process_message(self, message: Union[str, bytes, memoryview]):
         """Process received message"""
+        received_at = time.monotonic()
         try:
+            if isinstance(message, memoryview):
+                if message and message[0] == BINARY_MAGIC:
+                    # Binary frame: decode straight out of the receive buffer
+                    sequence, data = decode_flight_frame(message)
+                    self._track_sequence(sequence)
+                    self._handle_flight_data(data, received_at)
+                    return
+                # json.loads needs bytes; this copies only the frame itself
+                message = message.tobytes()
             data = json.loads(message)
             msg_type = data.get('type', '')
             
             if msg_type == 'flight_data':
-                # Convert COM frequencies from X-Plane format (e.g., 118350) to standard format (e.g., 118.350)
-                if 'com1_freq' in data and data['com1_freq']:
-                    # X-Plane stores frequency as integer in Hz/100, e.g., 118350 for 118.350 MHz
-                    data['com1_freq_mhz'] = data['com1_freq'] / 1000.0
-                if 'com2_freq' in data and data['com2_freq']:
-                    data['com2_freq_mhz'] = data['com2_freq'] / 1000.0
-                self.flight_data_received.emit(data)
+                self._handle_flight_data(data, received_at)
             elif msg_type == 'connected':
                 version = data.get('version', 0)
                 logger.info(f"X-Plane plugin version: {version}")
+                self._negotiate_format(data)
             else:
                 logger.debug(f"Unknown message type: {msg_type}")
                 
         except json.JSONDecodeError as e:
-            logger.warning(f"Invalid JSON: {message}")
+            logger.warning(f"Invalid JSON: {message[:200]!r}")
+        except ProtocolError as e:
+            logger.warning(f"Invalid binary frame: {e}")
         except Exception as e:
             logger.error(f"Error processing message: {e}")
+    
+    def start_recording(self, path: str):
+        """Record every received sample to a flight recording file"""
+        from flight_recorder import FlightRecorder
+        if self.recorder is None:
+            self.recorder = FlightRecorder()
+        self.recorder.start(path)
+
+    def stop_recording(self):
+        """Stop recording and flush the remaining samples"""
+        if self.recorder is not None:
+            self.recorder.stop()
+
+    def inject_sample(self, data: Dict[str, Any], received_at: Optional[float] = None):
+        """Publish a sample that did not come from the socket (flight recording replay)
+
+        Goes through the same path as live data (mailbox and every sample listener)
+        but is never re-recorded. received_at defaults to now.
+        """
+        if received_at is None:
+            received_at = time.monotonic()
+        self._handle_flight_data(dict(data), received_at, record=False)
+
+    def _handle_flight_data(self, data: Dict[str, Any], received_at: float, record: bool = True):
+        """Post-process a decoded flight_data sample (JSON or binary) and publish it"""
+        recorder = self.recorder
+        if record and recorder is not None:
+            recorder.record(data)
+        # Convert COM frequencies from X-Plane format (e.g., 118350) to standard format (e.g., 118.350)
+        if 'com1_freq' in data and data['com1_freq']:
+            # X-Plane stores frequency as integer in Hz/100, e.g., 118350 for 118.350 MHz
+            data['com1_freq_mhz'] = data['com1_freq'] / 1000.0
+        if 'com2_freq' in data and data['com2_freq']:
+            data['com2_freq_mhz'] = data['com2_freq'] / 1000.0
+        self.mailbox.post(data)
+        self._notify_sample(data, received_at)
+    
+    def _negotiate_format(self, hello: Dict[str, Any]):
+        """Switch to binary frames if the plugin supports them"""
+        formats = hello.get('formats') or []
+        if not self.prefer_binary or 'binary' not in formats:
+            return
+        if hello.get('binary_version', BINARY_PROTOCOL_VERSION) != BINARY_PROTOCOL_VERSION:
+            logger.info(f"Plugin binary protocol v{hello.get('binary_version')} not supported, staying on JSON")
+            return
+        try:
+            self.socket.sendall(set_format_command(True, self.binary_interval_ms))
+            self.frame_format = 'binary'
+            logger.info(f"Requested binary frames at {self.binary_interval_ms} ms interval")
+        except Exception as e:
+            logger.warning(f"Failed to negotiate binary frames, staying on JSON: {e}")
+    
+    def _track_sequence(self, sequence: int):
+        """Count frames lost between consecutive binary sequence numbers"""
+        last = self._last_sequence
+        if last is not None:
+            gap = (sequence - last - 1) & 0xFFFFFFFF
+            if 0 < gap < 0x80000000:
+                self.frames_lost += gap
+        self._last_sequence = sequence
+    
+    def _notify_sample(self, data: Dict[str, Any], received_at: float):
+        for listener in list(self._sample_listeners):
+            try:
+                listener(data, received_at)
+            except Exception as e:
+                logger.error(f"Sample listener failed: {e}")
 
 
 # Global instance
@@ -0,0 +1,136 @@
+"""
+XZPhotos Cache - 注册号 -> 照片元数据的持久化缓存
+
+缓存 XZPhotos 查询结果（照片 URL、机型、航空公司），避免对同一注册号重复签名请求：
+- 找到照片的结果保存 POSITIVE_TTL
+- "未找到照片" 也会缓存（NEGATIVE_TTL 较短，便于之后有新照片上传时重新查询）
+- 接口失败不缓存
+- 文件写入合并进行：最多每 SAVE_INTERVAL 秒一次，退出时 flush() 写入剩余修改，写入时丢弃过期条目
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger('ISFP-Connect.XZPhotos')
+
+POSITIVE_TTL = 7 * 24 * 3600
+NEGATIVE_TTL = 24 * 3600
+# 缓存文件最短写入间隔（秒）
+SAVE_INTERVAL = 5.0
+
+
+def normalize_registration(registration: str) -> str:
+    return (registration or "").strip().upper()
+
+
+class PhotoMetadataCache:
+    """线程安全的注册号元数据缓存，可选持久化到 JSON 文件"""
+
+    def __init__(self, path: Optional[str] = None,
+                 positive_ttl: float = POSITIVE_TTL, negative_ttl: float = NEGATIVE_TTL):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._path = None
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.set_storage_path(path)
+
+    def set_storage_path(self, path: str):
+        self._path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        now = time.time()
+        with self._lock:
+            self._entries = {reg: e for reg, e in entries.items()
+                             if isinstance(e, dict) and e.get('expires', 0) > now}
+
+    def _save(self):
+        """写入缓存文件（调用方持有锁），同时丢弃已过期的条目"""
+        self._dirty = False
+        self._last_save = time.monotonic()
+        now = time.time()
+        self._entries = {reg: e for reg, e in self._entries.items() if e.get('expires', 0) > now}
+        if not self._path:
+            return
+        tmp = self._path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp, self._path)
+        except OSError as e:
+            logger.debug(f"写入照片元数据缓存失败: {e}")
+
+    def _mark_dirty(self):
+        """记录有修改（调用方持有锁），距上次写入超过 SAVE_INTERVAL 时才写入"""
+        self._dirty = True
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self._save()
+
+    def flush(self):
+        """写入尚未保存的修改"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def get(self, registration: str) -> Optional[dict]:
+        """返回与 XZPhotosAPIThread 结果中 data 字段相同格式的字典，未命中或已过期返回 None"""
+        reg = normalize_registration(registration)
+        with self._lock:
+            entry = self._entries.get(reg)
+            if entry is None or entry.get('expires', 0) <= time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(entry['data'])
+
+    def put(self, registration: str, data: dict):
+        reg = normalize_registration(registration)
+        ttl = self.positive_ttl if data.get('photo_found') else self.negative_ttl
+        with self._lock:
+            self._entries[reg] = {'data': dict(data), 'expires': time.time() + ttl}
+            self._mark_dirty()
+
+    def missing(self, registrations: Iterable[str]) -> List[str]:
+        """返回尚未缓存（或已过期）的注册号，去重并保持顺序"""
+        now = time.time()
+        result = []
+        seen = set()
+        with self._lock:
+            for registration in registrations:
+                reg = normalize_registration(registration)
+                if not reg or reg in seen:
+                    continue
+                seen.add(reg)
+                entry = self._entries.get(reg)
+                if entry is None or entry.get('expires', 0) <= now:
+                    result.append(reg)
+        return result
+
+    def invalidate(self, registration: str):
+        with self._lock:
+            if self._entries.pop(normalize_registration(registration), None) is not None:
+                self._mark_dirty()
+
+
+# 全局实例
+_photo_cache: Optional[PhotoMetadataCache] = None
+
+
+def get_photo_metadata_cache() -> PhotoMetadataCache:
+    """获取全局照片元数据缓存（默认仅内存，调用 set_storage_path 启用持久化）"""
+    global _photo_cache
+    if _photo_cache is None:
+        _photo_cache = PhotoMetadataCache()
+    return _photo_cache